@@ -16,8 +16,42 @@ else:
     CACHE_CACHES["redis"] = RedisCache
     del redis
 
+    try:
+        import redis.cluster
+    except ImportError:
+        logger.info("redis-py without cluster support (< 4.1), RedisClusterCache unavailable")
+    else:
+        from pycached.backends.cluster import RedisClusterCache
+
+        CACHE_CACHES["rediscluster"] = RedisClusterCache
+        del redis
+
+try:
+    import pymemcache
+except ImportError:
+    logger.info("pymemcache not installed, MemcachedCache unavailable")
+else:
+    from pycached.backends.memcached import MemcachedCache
+
+    CACHE_CACHES["memcached"] = MemcachedCache
+    del pymemcache
+
+try:
+    import fcntl
+except ImportError:
+    logger.info("fcntl not available, SharedMemoryCache unavailable")
+else:
+    from pycached.backends.shm import SharedMemoryCache
+
+    CACHE_CACHES["shm"] = SharedMemoryCache
+    del fcntl
+
+from .aio import ASYNC_CACHES  # noqa: E402
 from .factory import caches, Cache  # noqa: E402
 from .decorators import cached, cached_stampede, multi_cached  # noqa: E402
+from .tiered import TieredCache  # noqa: E402
+from .sharded import ShardedCache  # noqa: E402
+from .router import RouterCache  # noqa: E402
 
 __all__ = (
     "caches",
@@ -25,6 +59,10 @@ __all__ = (
     "cached",
     "cached_stampede",
     "multi_cached",
+    "TieredCache",
+    "ShardedCache",
+    "RouterCache",
     *list(CACHE_CACHES.values()),
+    *list(ASYNC_CACHES.values()),
     "__version__",
 )
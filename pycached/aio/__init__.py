@@ -0,0 +1,26 @@
+"""
+asyncio flavour of the caches. They have the same commands as the sync ones as coroutines and
+are built from the same config with ``caches.get(alias, asynchronous=True)`` or
+``Cache(cache_type, asynchronous=True)``.
+"""
+
+import logging
+
+from pycached.aio.base import AsyncAPI, AsyncBaseCache
+from pycached.aio.memory import AsyncSimpleMemoryCache
+
+logger = logging.getLogger(__name__)
+
+ASYNC_CACHES = {"memory": AsyncSimpleMemoryCache}
+
+try:
+    import redis.asyncio
+except ImportError:
+    logger.info("redis not installed, AsyncRedisCache unavailable")
+else:
+    from pycached.aio.redis import AsyncRedisCache
+
+    ASYNC_CACHES["redis"] = AsyncRedisCache
+    del redis
+
+__all__ = ("AsyncAPI", "AsyncBaseCache", *[cache.__name__ for cache in ASYNC_CACHES.values()])
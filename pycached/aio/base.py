@@ -0,0 +1,439 @@
+import asyncio
+import functools
+import inspect
+import logging
+import os
+import time
+
+from pycached import serializers
+from pycached.base import BaseCache, SENTINEL, _cost_kwargs
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncAPI:
+    """
+    Coroutine versions of the :class:`pycached.base.API` decorators.
+    """
+
+    CMDS = set()
+
+    @classmethod
+    def register(cls, func):
+        AsyncAPI.CMDS.add(func)
+        return func
+
+    @classmethod
+    def timeout(cls, func):
+        """
+        Cancel the command if it lasts more than ``self.timeout`` seconds, or than the
+        ``timeout`` kwarg of the call. Use 0 or None to disable it.
+        """
+        NOT_SET = "NOT_SET"
+
+        @functools.wraps(func)
+        async def _timeout(self, *args, timeout=NOT_SET, **kwargs):
+            timeout = self.timeout if timeout == NOT_SET else timeout
+            if timeout == 0 or timeout is None:
+                return await func(self, *args, **kwargs)
+            return await asyncio.wait_for(func(self, *args, **kwargs), timeout)
+
+        return _timeout
+
+    @classmethod
+    def pycached_enabled(cls, fake_return=None):
+        """
+        Use this decorator to be able to fake the return of the function by setting the
+        ``CACHE_DISABLE`` environment variable
+        """
+
+        def enabled(func):
+            @functools.wraps(func)
+            async def _enabled(*args, **kwargs):
+                if os.getenv("CACHE_DISABLE") == "1":
+                    return fake_return
+                return await func(*args, **kwargs)
+
+            return _enabled
+
+        return enabled
+
+    @classmethod
+    def plugins(cls, func):
+        """
+        Call the ``pre_<command>`` and ``post_<command>`` hooks of the plugins. The same
+        plugins as the sync caches are used, hooks can also be coroutines.
+        """
+
+        @functools.wraps(func)
+        async def _plugins(self, *args, **kwargs):
+            start = time.monotonic()
+            for plugin in self.plugins:
+                await _maybe_await(
+                    getattr(plugin, "pre_{}".format(func.__name__))(self, *args, **kwargs)
+                )
+
+            ret = await func(self, *args, **kwargs)
+
+            end = time.monotonic()
+            for plugin in self.plugins:
+                await _maybe_await(
+                    getattr(plugin, "post_{}".format(func.__name__))(
+                        self, *args, took=end - start, ret=ret, **kwargs
+                    )
+                )
+            return ret
+
+        return _plugins
+
+
+async def _maybe_await(result):
+    if inspect.isawaitable(result):
+        return await result
+    return result
+
+
+class AsyncBaseCache:
+    """
+    Base class of the asyncio caches, with the same commands as :class:`pycached.base.BaseCache`
+    as coroutines, i.e. ``await cache.get("key")``. Options are the same too:
+
+    :param serializer: obj derived from :class:`pycached.serializers.BaseSerializer`. Default is
+        :class:`pycached.serializers.StringSerializer`.
+    :param plugins: list of :class:`pycached.plugins.BasePlugin` derived classes. Default is empty
+        list. Their hooks can be plain functions or coroutines.
+    :param namespace: string to use as default prefix for the key used in all operations of
+        the backend. Default is None
+    :param key_builder: alternative callable to build the key. Receives the key and the namespace as
+        params and should return something that can be used as key by the underlying backend.
+    :param timeout: int or float in seconds specifying maximum timeout for the operations to last.
+        By default its 5. Use 0 or None if you want to disable it.
+    :param ttl: int the expiration time in seconds to use as a default in all operations of
+        the backend. It can be overriden in the specific calls.
+    """
+
+    def __init__(
+            self,
+            serializer=None,
+            plugins=None,
+            namespace=None,
+            key_builder=None,
+            timeout=5,
+            ttl=None,
+    ):
+        self.timeout = float(timeout) if timeout is not None else None
+        self.namespace = namespace
+        self.ttl = ttl
+        self.build_key = key_builder or self._build_key
+
+        self._serializer = None
+        self.serializer = serializer or serializers.StringSerializer()
+
+        self._plugins = None
+        self.plugins = plugins or []
+
+    @property
+    def serializer(self):
+        return self._serializer
+
+    @serializer.setter
+    def serializer(self, value):
+        self._serializer = value
+
+    @property
+    def plugins(self):
+        return self._plugins
+
+    @plugins.setter
+    def plugins(self, value):
+        self._plugins = value
+
+    @AsyncAPI.register
+    @AsyncAPI.pycached_enabled(fake_return=True)
+    @AsyncAPI.timeout
+    @AsyncAPI.plugins
+    async def add(self, key, value, ttl=SENTINEL, dumps_fn=None, namespace=None, _conn=None):
+        start = time.monotonic()
+        dumps = dumps_fn or self._serializer.dumps
+        ns_key = self.build_key(key, namespace=namespace)
+
+        await self._add(ns_key, dumps(value), ttl=self._get_ttl(ttl), _conn=_conn)
+
+        logger.debug("ADD %s %s (%.4f)s", ns_key, True, time.monotonic() - start)
+        return True
+
+    add.__doc__ = BaseCache.add.__doc__
+
+    async def _add(self, key, value, ttl, _conn=None):
+        raise NotImplementedError()
+
+    @AsyncAPI.register
+    @AsyncAPI.pycached_enabled()
+    @AsyncAPI.timeout
+    @AsyncAPI.plugins
+    async def get(self, key, default=None, loads_fn=None, namespace=None, _conn=None):
+        start = time.monotonic()
+        loads = loads_fn or self._serializer.loads
+        ns_key = self.build_key(key, namespace=namespace)
+
+        value = loads(await self._get(ns_key, _conn=_conn))
+
+        logger.debug("GET %s %s (%.4f)s", ns_key, value is not None, time.monotonic() - start)
+        return value if value is not None else default
+
+    get.__doc__ = BaseCache.get.__doc__
+
+    async def _get(self, key, _conn=None):
+        raise NotImplementedError()
+
+    async def _gets(self, key, _conn=None):
+        raise NotImplementedError()
+
+    @AsyncAPI.register
+    @AsyncAPI.pycached_enabled(fake_return=[])
+    @AsyncAPI.timeout
+    @AsyncAPI.plugins
+    async def multi_get(self, keys, loads_fn=None, namespace=None, _conn=None):
+        start = time.monotonic()
+        loads = loads_fn or self._serializer.loads
+
+        ns_keys = [self.build_key(key, namespace=namespace) for key in keys]
+        values = [loads(value) for value in await self._multi_get(ns_keys, _conn=_conn)]
+
+        logger.debug(
+            "MULTI_GET %s %d (%.4f)s",
+            ns_keys,
+            len([value for value in values if value is not None]),
+            time.monotonic() - start,
+        )
+        return values
+
+    multi_get.__doc__ = BaseCache.multi_get.__doc__
+
+    async def _multi_get(self, keys, _conn=None):
+        raise NotImplementedError()
+
+    @AsyncAPI.register
+    @AsyncAPI.pycached_enabled(fake_return=True)
+    @AsyncAPI.timeout
+    @AsyncAPI.plugins
+    async def set(
+            self,
+            key,
+            value,
+            ttl=SENTINEL,
+            dumps_fn=None,
+            namespace=None,
+            _cas_token=None,
+            _cost=None,
+            _conn=None,
+    ):
+        start = time.monotonic()
+        dumps = dumps_fn or self._serializer.dumps
+        ns_key = self.build_key(key, namespace=namespace)
+
+        res = await self._set(
+            ns_key,
+            dumps(value),
+            ttl=self._get_ttl(ttl),
+            _cas_token=_cas_token,
+            _conn=_conn,
+            **_cost_kwargs(self._set, _cost),
+        )
+
+        logger.debug("SET %s %d (%.4f)s", ns_key, True, time.monotonic() - start)
+        return res
+
+    set.__doc__ = BaseCache.set.__doc__
+
+    async def _set(self, key, value, ttl, _cas_token=None, _cost=None, _conn=None):
+        raise NotImplementedError()
+
+    @AsyncAPI.register
+    @AsyncAPI.pycached_enabled(fake_return=True)
+    @AsyncAPI.timeout
+    @AsyncAPI.plugins
+    async def multi_set(
+            self, pairs, ttl=SENTINEL, dumps_fn=None, namespace=None, _cost=None, _conn=None
+    ):
+        start = time.monotonic()
+        dumps = dumps_fn or self._serializer.dumps
+
+        tmp_pairs = []
+        for key, value in pairs:
+            tmp_pairs.append((self.build_key(key, namespace=namespace), dumps(value)))
+
+        await self._multi_set(
+            tmp_pairs, ttl=self._get_ttl(ttl), _conn=_conn, **_cost_kwargs(self._multi_set, _cost)
+        )
+
+        logger.debug(
+            "MULTI_SET %s %d (%.4f)s",
+            [key for key, value in tmp_pairs],
+            len(pairs),
+            time.monotonic() - start,
+        )
+        return True
+
+    multi_set.__doc__ = BaseCache.multi_set.__doc__
+
+    async def _multi_set(self, pairs, ttl, _cost=None, _conn=None):
+        raise NotImplementedError()
+
+    @AsyncAPI.register
+    @AsyncAPI.pycached_enabled(fake_return=0)
+    @AsyncAPI.timeout
+    @AsyncAPI.plugins
+    async def delete(self, key, namespace=None, _conn=None):
+        start = time.monotonic()
+        ns_key = self.build_key(key, namespace=namespace)
+        ret = await self._delete(ns_key, _conn=_conn)
+        logger.debug("DELETE %s %d (%.4f)s", ns_key, ret, time.monotonic() - start)
+        return ret
+
+    delete.__doc__ = BaseCache.delete.__doc__
+
+    async def _delete(self, key, _conn=None):
+        raise NotImplementedError()
+
+    @AsyncAPI.register
+    @AsyncAPI.pycached_enabled(fake_return=False)
+    @AsyncAPI.timeout
+    @AsyncAPI.plugins
+    async def exists(self, key, namespace=None, _conn=None):
+        start = time.monotonic()
+        ns_key = self.build_key(key, namespace=namespace)
+        ret = await self._exists(ns_key, _conn=_conn)
+        logger.debug("EXISTS %s %d (%.4f)s", ns_key, ret, time.monotonic() - start)
+        return ret
+
+    exists.__doc__ = BaseCache.exists.__doc__
+
+    async def _exists(self, key, _conn=None):
+        raise NotImplementedError()
+
+    @AsyncAPI.register
+    @AsyncAPI.pycached_enabled(fake_return=1)
+    @AsyncAPI.timeout
+    @AsyncAPI.plugins
+    async def increment(self, key, delta=1, namespace=None, _conn=None):
+        start = time.monotonic()
+        ns_key = self.build_key(key, namespace=namespace)
+        ret = await self._increment(ns_key, delta, _conn=_conn)
+        logger.debug("INCREMENT %s %d (%.4f)s", ns_key, ret, time.monotonic() - start)
+        return ret
+
+    increment.__doc__ = BaseCache.increment.__doc__
+
+    async def _increment(self, key, delta, _conn=None):
+        raise NotImplementedError()
+
+    @AsyncAPI.register
+    @AsyncAPI.pycached_enabled(fake_return=False)
+    @AsyncAPI.timeout
+    @AsyncAPI.plugins
+    async def expire(self, key, ttl, namespace=None, _conn=None):
+        start = time.monotonic()
+        ns_key = self.build_key(key, namespace=namespace)
+        ret = await self._expire(ns_key, ttl, _conn=_conn)
+        logger.debug("EXPIRE %s %d (%.4f)s", ns_key, ret, time.monotonic() - start)
+        return ret
+
+    expire.__doc__ = BaseCache.expire.__doc__
+
+    async def _expire(self, key, ttl, _conn=None):
+        raise NotImplementedError()
+
+    @AsyncAPI.register
+    @AsyncAPI.pycached_enabled(fake_return=True)
+    @AsyncAPI.timeout
+    @AsyncAPI.plugins
+    async def clear(self, namespace=None, _conn=None):
+        start = time.monotonic()
+        ret = await self._clear(namespace, _conn=_conn)
+        logger.debug("CLEAR %s %d (%.4f)s", namespace, ret, time.monotonic() - start)
+        return ret
+
+    clear.__doc__ = BaseCache.clear.__doc__
+
+    async def _clear(self, namespace, _conn=None):
+        raise NotImplementedError()
+
+    @AsyncAPI.register
+    @AsyncAPI.pycached_enabled()
+    @AsyncAPI.timeout
+    @AsyncAPI.plugins
+    async def raw(self, command, *args, _conn=None, **kwargs):
+        start = time.monotonic()
+        ret = await self._raw(command, *args, _conn=_conn, **kwargs)
+        logger.debug("%s (%.4f)s", command, time.monotonic() - start)
+        return ret
+
+    raw.__doc__ = BaseCache.raw.__doc__
+
+    async def _raw(self, command, *args, **kwargs):
+        raise NotImplementedError()
+
+    @AsyncAPI.timeout
+    async def close(self, *args, _conn=None, **kwargs):
+        start = time.monotonic()
+        ret = await self._close(*args, _conn=_conn, **kwargs)
+        logger.debug("CLOSE (%.4f)s", time.monotonic() - start)
+        return ret
+
+    close.__doc__ = BaseCache.close.__doc__
+
+    async def _close(self, *args, **kwargs):
+        pass
+
+    def _build_key(self, key, namespace=None):
+        if namespace is not None:
+            return "{}{}".format(namespace, key)
+        if self.namespace is not None:
+            return "{}{}".format(self.namespace, key)
+        return key
+
+    def _get_ttl(self, ttl):
+        return ttl if ttl is not SENTINEL else self.ttl
+
+    def get_connection(self):
+        return _AsyncConn(self)
+
+    async def acquire_conn(self):
+        return self
+
+    async def release_conn(self, conn):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+
+class _AsyncConn:
+    def __init__(self, cache):
+        self._cache = cache
+        self._conn = None
+
+    async def __aenter__(self):
+        self._conn = await self._cache.acquire_conn()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self._cache.release_conn(self._conn)
+
+    def __getattr__(self, name):
+        return self._cache.__getattribute__(name)
+
+    @classmethod
+    def _inject_conn(cls, cmd_name):
+        async def _do_inject_conn(self, *args, **kwargs):
+            return await getattr(self._cache, cmd_name)(*args, _conn=self._conn, **kwargs)
+
+        return _do_inject_conn
+
+
+for cmd in AsyncAPI.CMDS:
+    setattr(_AsyncConn, cmd.__name__, _AsyncConn._inject_conn(cmd.__name__))
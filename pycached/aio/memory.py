@@ -0,0 +1,133 @@
+import asyncio
+
+from pycached.aio.base import AsyncBaseCache
+from pycached.serializers import NullSerializer
+
+
+class AsyncSimpleMemoryBackend:
+    """
+    Wrapper around dict operations to use it as an asyncio cache backend. Keys expire through
+    callbacks scheduled in the running loop with ``loop.call_later``, there are no threads
+    involved. Commands never wait, so they are atomic as long as the cache is only used from
+    one loop.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._cache = {}
+        self._handlers = {}
+
+    async def _get(self, key, _conn=None):
+        return self._cache.get(key)
+
+    async def _gets(self, key, _conn=None):
+        return self._cache.get(key)
+
+    async def _multi_get(self, keys, _conn=None):
+        return [self._cache.get(key) for key in keys]
+
+    async def _set(self, key, value, ttl=None, _cas_token=None, _cost=None, _conn=None):
+        if _cas_token is not None and _cas_token != self._cache.get(key):
+            return 0
+        self._store(key, value, ttl)
+        return True
+
+    async def _multi_set(self, pairs, ttl=None, _cost=None, _conn=None):
+        for key, value in pairs:
+            self._store(key, value, ttl)
+        return True
+
+    async def _add(self, key, value, ttl=None, _conn=None):
+        if key in self._cache:
+            raise ValueError("Key {} already exists, use .set to update the value".format(key))
+        self._store(key, value, ttl)
+        return True
+
+    async def _exists(self, key, _conn=None):
+        return key in self._cache
+
+    async def _increment(self, key, delta, _conn=None):
+        if key not in self._cache:
+            self._cache[key] = delta
+        else:
+            try:
+                self._cache[key] = int(self._cache[key]) + delta
+            except ValueError:
+                raise TypeError("Value is not an integer") from None
+        return self._cache[key]
+
+    async def _expire(self, key, ttl, _conn=None):
+        if key not in self._cache:
+            return False
+        self._cancel(key)
+        if ttl:
+            self._schedule(key, ttl)
+        return True
+
+    async def _delete(self, key, _conn=None):
+        return self._pop(key)
+
+    async def _clear(self, namespace=None, _conn=None):
+        if namespace:
+            for key in [key for key in self._cache if key.startswith(namespace)]:
+                self._pop(key)
+        else:
+            for handle in self._handlers.values():
+                handle.cancel()
+            self._cache = {}
+            self._handlers = {}
+        return True
+
+    async def _raw(self, command, *args, _conn=None, **kwargs):
+        return getattr(self._cache, command)(*args, **kwargs)
+
+    async def _redlock_release(self, key, value):
+        if self._cache.get(key) == value:
+            return self._pop(key)
+        return 0
+
+    async def _close(self, *args, **kwargs):
+        for handle in self._handlers.values():
+            handle.cancel()
+        self._handlers = {}
+
+    def _store(self, key, value, ttl):
+        self._cancel(key)
+        self._cache[key] = value
+        if ttl:
+            self._schedule(key, ttl)
+
+    def _schedule(self, key, ttl):
+        self._handlers[key] = asyncio.get_running_loop().call_later(ttl, self._pop, key)
+
+    def _cancel(self, key):
+        handle = self._handlers.pop(key, None)
+        if handle is not None:
+            handle.cancel()
+
+    def _pop(self, key):
+        self._cancel(key)
+        if key in self._cache:
+            del self._cache[key]
+            return 1
+        return 0
+
+    @classmethod
+    def parse_uri_path(cls, path):
+        return {}
+
+
+class AsyncSimpleMemoryCache(AsyncSimpleMemoryBackend, AsyncBaseCache):
+    """
+    asyncio memory cache implementation with the following components as defaults:
+        - serializer: :class:`pycached.serializers.NullSerializer`
+        - plugins: None
+
+    Config options are the ones of :class:`pycached.aio.AsyncBaseCache`. The options of
+    :class:`pycached.SimpleMemoryCache` bounding or sharing the store are not supported.
+    """
+
+    NAME = "memory"
+
+    def __init__(self, serializer=None, **kwargs):
+        super().__init__(serializer=serializer or NullSerializer(), **kwargs)
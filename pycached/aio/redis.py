@@ -0,0 +1,243 @@
+import functools
+import logging
+
+import redis
+import redis.asyncio
+
+from pycached.aio.base import AsyncBaseCache
+from pycached.backends.redis import (
+    RedisBackend,
+    _as_bool,
+    _as_float,
+    _escape_pattern,
+    _expiry_args,
+)
+from pycached.backends.scripts import ScriptRegistry
+from pycached.serializers import JsonSerializer
+
+logger = logging.getLogger(__name__)
+
+
+def conn(func):
+    @functools.wraps(func)
+    async def wrapper(self, *args, _conn=None, **kwargs):
+        if _conn is None:
+            _conn = self._get_pool()
+        return await func(self, *args, _conn=_conn, **kwargs)
+
+    return wrapper
+
+
+class AsyncRedisBackend:
+    """
+    Same commands as :class:`pycached.backends.redis.RedisBackend` on a :mod:`redis.asyncio`
+    client, so waiting for redis doesn't block the loop.
+    """
+
+    CAS_SCRIPT = RedisBackend.CAS_SCRIPT
+    RELEASE_SCRIPT = RedisBackend.RELEASE_SCRIPT
+    MULTI_SET_TTL_SCRIPT = RedisBackend.MULTI_SET_TTL_SCRIPT
+
+    def __init__(
+            self,
+            endpoint="127.0.0.1",
+            port=6379,
+            db=0,
+            password=None,
+            max_connections=10,
+            create_connection_timeout=None,
+            blocking=False,
+            pool_timeout=None,
+            socket_timeout=None,
+            socket_keepalive=False,
+            health_check_interval=0,
+            scan_count=1000,
+            unlink_batch=1000,
+            binary=None,
+            **kwargs
+    ):
+        super().__init__(**kwargs)
+        self.endpoint = endpoint
+        self.port = int(port)
+        self.db = int(db)
+        self.password = password
+        self.max_connections = int(max_connections)
+        self.create_connection_timeout = _as_float(create_connection_timeout)
+        self.blocking = _as_bool(blocking)
+        self.pool_timeout = _as_float(pool_timeout)
+        self.socket_timeout = _as_float(socket_timeout)
+        self.socket_keepalive = _as_bool(socket_keepalive)
+        self.health_check_interval = int(health_check_interval)
+        self.scan_count = int(scan_count)
+        self.unlink_batch = int(unlink_batch)
+        self.binary = _as_bool(binary) if binary is not None else None
+        self._binary = self.binary
+        self._pool = None
+        self._connection_pool = None
+        self.scripts = ScriptRegistry(
+            (self.CAS_SCRIPT, self.RELEASE_SCRIPT, self.MULTI_SET_TTL_SCRIPT)
+        )
+
+    def _get_pool(self):
+        # Creating the client doesn't open connections, they are opened by the commands
+        if self._pool is None:
+            kwargs = RedisBackend._connection_kwargs(self)
+            if self.blocking:
+                self._connection_pool = redis.asyncio.BlockingConnectionPool(
+                    max_connections=self.max_connections, timeout=self.pool_timeout, **kwargs
+                )
+            else:
+                self._connection_pool = redis.asyncio.ConnectionPool(
+                    max_connections=self.max_connections, **kwargs
+                )
+            self._pool = redis.asyncio.Redis(connection_pool=self._connection_pool)
+        return self._pool
+
+    _is_binary = RedisBackend._is_binary
+    _decode = RedisBackend._decode
+    _decode_many = RedisBackend._decode_many
+
+    async def acquire_conn(self):
+        return self._get_pool()
+
+    async def release_conn(self, _conn):
+        return None
+
+    @conn
+    async def _get(self, key, _conn=None):
+        return self._decode(await _conn.get(key))
+
+    @conn
+    async def _gets(self, key, _conn=None):
+        return self._decode(await _conn.get(key))
+
+    @conn
+    async def _multi_get(self, keys, _conn=None):
+        return self._decode_many(await _conn.mget(*keys))
+
+    @conn
+    async def _set(self, key, value, ttl=None, _cas_token=None, _cost=None, _conn=None):
+        if _cas_token is not None:
+            return await self._cas(key, value, _cas_token, ttl=ttl, _conn=_conn)
+        if ttl is None:
+            return await _conn.set(key, value)
+        unit, ttl = _expiry_args(ttl)
+        return await _conn.set(key, value, **{unit.lower(): ttl})
+
+    @conn
+    async def _cas(self, key, value, token, ttl=None, _conn=None):
+        args = [value, token]
+        if ttl is not None:
+            args += _expiry_args(ttl)
+        return await self._raw("eval", self.CAS_SCRIPT, 1, key, *args, _conn=_conn)
+
+    @conn
+    async def _multi_set(self, pairs, ttl=None, _cost=None, _conn=None):
+        flattened = {key: value for key, value in pairs}
+        if ttl:
+            unit, ttl = _expiry_args(ttl)
+            await self.scripts.run_async(
+                _conn,
+                self.MULTI_SET_TTL_SCRIPT,
+                len(flattened),
+                *flattened.keys(),
+                unit,
+                ttl,
+                *flattened.values()
+            )
+        else:
+            await _conn.mset(flattened)
+        return True
+
+    @conn
+    async def _add(self, key, value, ttl=None, _conn=None):
+        expiry = {}
+        if ttl is not None:
+            unit, ttl = _expiry_args(ttl)
+            expiry = {unit.lower(): ttl}
+        was_set = await _conn.set(key, value, nx=True, **expiry)
+        if not was_set:
+            raise ValueError("Key {} already exists, use .set to update the value".format(key))
+        return was_set
+
+    @conn
+    async def _exists(self, key, _conn=None):
+        return await _conn.exists(key) > 0
+
+    @conn
+    async def _increment(self, key, delta, _conn=None):
+        try:
+            return await _conn.incrby(key, delta)
+        except redis.exceptions.RedisError:
+            raise TypeError("Value is not an integer") from None
+
+    @conn
+    async def _expire(self, key, ttl, _conn=None):
+        if ttl == 0:
+            return await _conn.persist(key)
+        return await _conn.expire(key, ttl)
+
+    @conn
+    async def _delete(self, key, _conn=None):
+        return await _conn.delete(key)
+
+    @conn
+    async def _clear(self, namespace=None, _conn=None):
+        if not namespace:
+            await _conn.flushdb()
+            return True
+        match = "{}:*".format(_escape_pattern(namespace))
+        batch = []
+        async for key in _conn.scan_iter(match=match, count=self.scan_count):
+            batch.append(key)
+            if len(batch) >= self.unlink_batch:
+                await _conn.unlink(*batch)
+                batch = []
+        if batch:
+            await _conn.unlink(*batch)
+        return True
+
+    @conn
+    async def _raw(self, command, *args, _conn=None, **kwargs):
+        if command == "eval":
+            return await self.scripts.run_async(_conn, *args, **kwargs)
+        return await getattr(_conn, command)(*args, **kwargs)
+
+    async def _redlock_release(self, key, value):
+        return await self._raw("eval", self.RELEASE_SCRIPT, 1, key, value)
+
+    async def _close(self, *args, **kwargs):
+        if self._connection_pool is not None:
+            await self._connection_pool.disconnect()
+
+    parse_uri_path = RedisBackend.parse_uri_path
+
+
+class AsyncRedisCache(AsyncRedisBackend, AsyncBaseCache):
+    """
+    asyncio Redis cache implementation with the following components as defaults:
+        - serializer: :class:`pycached.serializers.JsonSerializer`
+        - plugins: []
+
+    Config options are the ones of :class:`pycached.RedisCache` for the connection (``endpoint``,
+    ``port``, ``db``, ``password``, ``max_connections``, ``create_connection_timeout``,
+    ``socket_timeout``, ``socket_keepalive``, ``health_check_interval``), the pool
+    (``blocking``, ``pool_timeout``), ``clear`` (``scan_count``, ``unlink_batch``) and
+    ``binary``. Replicas, the near cache, auto pipelining and ``pool_min_size`` are not
+    supported.
+    """
+
+    NAME = "redis"
+
+    def __init__(self, serializer=None, **kwargs):
+        super().__init__(serializer=serializer or JsonSerializer(), **kwargs)
+
+    def _build_key(self, key, namespace=None):
+        if namespace is not None:
+            return "{}{}{}".format(namespace, ":" if namespace else "", key)
+        if self.namespace is not None:
+            return "{}{}{}".format(self.namespace, ":" if self.namespace else "", key)
+        return key
+
+    def __repr__(self):  # pragma: no cover
+        return "AsyncRedisCache ({}:{})".format(self.endpoint, self.port)
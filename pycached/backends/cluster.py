@@ -0,0 +1,262 @@
+import concurrent.futures
+import logging
+import threading
+
+import redis
+from redis.cluster import ClusterNode, RedisCluster
+from redis.crc import key_slot
+
+from pycached.backends.redis import RedisBackend, RedisCache, conn, parse_nodes, _expiry_args
+
+logger = logging.getLogger(__name__)
+
+REDIRECTIONS = (redis.exceptions.MovedError, redis.exceptions.AskError)
+
+
+def _slot(key):
+    return key_slot(key.encode() if isinstance(key, str) else key)
+
+
+def _node_pool_stats(pool):
+    created = pool._created_connections
+    in_use = len(pool._in_use_connections)
+    return {
+        "max_connections": pool.max_connections,
+        "created": created,
+        "in_use": in_use,
+        "idle": max(created - in_use, 0),
+    }
+
+
+class RedisClusterBackend(RedisBackend):
+    def __init__(self, startup_nodes=None, max_workers=None, **kwargs):
+        self.startup_nodes = parse_nodes(startup_nodes)
+        self.max_workers = int(max_workers) if max_workers else None
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        super().__init__(**kwargs)
+        if self.db != 0:
+            raise ValueError("Redis Cluster only supports db 0")
+        if self.replicas or self.near_cache_size or self.auto_pipeline:
+            raise ValueError(
+                "Replicas, near cache and auto pipelining are not supported by Redis Cluster"
+            )
+        if not self.startup_nodes:
+            self.startup_nodes = [(self.endpoint, self.port)]
+
+    def _get_pool(self):
+        if self._pool is not None:
+            return self._pool
+
+        with self._pool_lock:
+            if self._pool is None:
+                kwargs = self._connection_kwargs()
+                for option in ("host", "port", "db"):
+                    kwargs.pop(option)
+                self._pool = RedisCluster(
+                    startup_nodes=[
+                        ClusterNode(host, port)
+                        for host, port in self.startup_nodes or [(self.endpoint, self.port)]
+                    ],
+                    max_connections=self.max_connections,
+                    **kwargs
+                )
+
+        return self._pool
+
+    def pool_stats(self):
+        """
+        Return the usage of the connection pool of each node, by node name: ``max_connections``
+        and connections ``created`` and currently ``in_use`` or ``idle``. The nodes are the ones
+        known by the cluster client, their pools are created by redis-py so the checkout
+        counters and wait times of :meth:`pycached.backends.redis.RedisBackend.pool_stats`
+        are not available.
+        """
+        stats = {}
+        for node in self._get_pool().get_nodes():
+            if node.redis_connection is not None:
+                stats[node.name] = _node_pool_stats(node.redis_connection.connection_pool)
+        return stats
+
+    def _close(self, *args, **kwargs):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+        if self._pool is not None:
+            self._pool.close()
+        return None
+
+    def _get_executor(self):
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="pycached-cluster"
+                )
+            return self._executor
+
+    def _group_by_node(self, cluster, keys):
+        """
+        Group the indexes of the keys by the node owning them and, inside each node, by hash
+        slot, using the slot map cached by the cluster client.
+        """
+        groups = {}
+        for index, key in enumerate(keys):
+            slot = cluster.keyslot(key)
+            node = cluster.nodes_manager.get_node_from_slot(slot)
+            groups.setdefault(node.name, (node, {}))[1].setdefault(slot, []).append(index)
+        return list(groups.values())
+
+    def _scatter(self, groups, send, redirected):
+        """
+        Call ``send(client, slots)`` with the client of each node, concurrently, and return the
+        ``(slots, replies)`` of every node. Nodes answering with a MOVED or ASK redirection
+        because the cached slot map is stale are retried with ``redirected(slots)``, which
+        goes through the cluster client so the redirection is followed and the map refreshed.
+        """
+
+        def run(node, slots):
+            try:
+                return slots, send(node.redis_connection, slots)
+            except REDIRECTIONS as e:
+                logger.debug("Redirected from %s: %s", node.name, e)
+                return slots, redirected(slots)
+
+        if len(groups) == 1:
+            return [run(*groups[0])]
+        executor = self._get_executor()
+        futures = [executor.submit(run, node, slots) for node, slots in groups]
+        return [future.result() for future in futures]
+
+    @conn
+    def _multi_get(self, keys, _conn=None):
+        def send(client, slots):
+            pipeline = client.pipeline(transaction=False)
+            for indexes in slots.values():
+                pipeline.mget([keys[index] for index in indexes])
+            return pipeline.execute()
+
+        def redirected(slots):
+            return [
+                _conn.mget_nonatomic([keys[index] for index in indexes])
+                for indexes in slots.values()
+            ]
+
+        values = [None] * len(keys)
+        for slots, replies in self._scatter(self._group_by_node(_conn, keys), send, redirected):
+            for indexes, reply in zip(slots.values(), replies):
+                for index, value in zip(indexes, reply):
+                    values[index] = self._decode(value)
+        return values
+
+    @conn
+    def _multi_set(self, pairs, ttl=None, _cost=None, _conn=None):
+        pairs = list(pairs)
+        if ttl:
+            # SCRIPT LOAD goes to all the primaries, then each node is sent EVALSHA
+            script = self.scripts.register(self.MULTI_SET_TTL_SCRIPT)
+            if not script.loaded:
+                self.scripts.load(_conn)
+
+        def queue(pipeline, slots):
+            for indexes in slots.values():
+                flattened = dict(pairs[index] for index in indexes)
+                if ttl:
+                    unit, value = _expiry_args(ttl)
+                    pipeline.evalsha(
+                        script.sha,
+                        len(flattened),
+                        *flattened.keys(),
+                        unit,
+                        value,
+                        *flattened.values()
+                    )
+                else:
+                    pipeline.mset(flattened)
+            return pipeline
+
+        def send(client, slots):
+            try:
+                return queue(client.pipeline(transaction=False), slots).execute()
+            except redis.exceptions.NoScriptError:
+                # The node lost its scripts (restart, failover), the commands can be resent
+                logger.debug("Script %s not in a node, loading the scripts again", script.sha)
+                self.scripts.reset()
+                self.scripts.load(_conn)
+                return queue(client.pipeline(transaction=False), slots).execute()
+
+        def redirected(slots):
+            expiry = {}
+            if ttl:
+                unit, value = _expiry_args(ttl)
+                expiry = {unit.lower(): value}
+            pipeline = _conn.pipeline()
+            for indexes in slots.values():
+                for index in indexes:
+                    key, value = pairs[index]
+                    pipeline.set(key, value, **expiry)
+            return pipeline.execute()
+
+        self._scatter(self._group_by_node(_conn, [key for key, _ in pairs]), send, redirected)
+        return True
+
+    @conn
+    def _clear(self, namespace=None, _conn=None):
+        if not namespace:
+            _conn.flushdb(target_nodes=RedisCluster.PRIMARIES)
+            return True
+
+        def clear_node(node):
+            for _ in RedisBackend._scan_unlink(self, namespace, _conn=node.redis_connection):
+                pass
+
+        primaries = _conn.get_primaries()
+        executor = self._get_executor()
+        for future in [executor.submit(clear_node, node) for node in primaries]:
+            future.result()
+        return True
+
+    @conn
+    def _scan_unlink(self, namespace, _conn=None):
+        for node in _conn.get_primaries():
+            yield from super()._scan_unlink(namespace, _conn=node.redis_connection)
+
+    def _unlink(self, conn, keys):
+        # Multi key commands can't span slots, even when they are owned by the same node
+        slots = {}
+        for key in keys:
+            slots.setdefault(_slot(key), []).append(key)
+        pipeline = conn.pipeline(transaction=False)
+        for group in slots.values():
+            pipeline.unlink(*group)
+        return sum(pipeline.execute())
+
+
+class RedisClusterCache(RedisClusterBackend, RedisCache):
+    """
+    Redis Cluster cache implementation with the following components as defaults:
+        - serializer: :class:`pycached.serializers.JsonSerializer`
+        - plugins: []
+
+    Single key commands are sent to the node owning the key by redis-py's
+    :class:`redis.cluster.RedisCluster`, which keeps a map of the hash slots and follows MOVED
+    and ASK redirections. ``multi_get``, ``multi_set`` and ``clear`` are split by owning node
+    and hash slot, sent to all the nodes concurrently with one pipeline per node, and the
+    results are put back in the order of the keys.
+
+    Config options are the same as :class:`pycached.RedisCache` ones, except ``db`` which can
+    only be 0, and ``replicas``, the near cache, auto pipelining and the ``blocking``,
+    ``pool_timeout`` and ``pool_min_size`` pool options which are not supported, plus:
+
+    :param startup_nodes: list of ``"host:port"`` str or comma separated str with the nodes
+        used to discover the cluster. Default is ``endpoint`` and ``port``.
+    :param max_workers: int max number of threads sending commands to the nodes concurrently.
+        Default is the ``concurrent.futures.ThreadPoolExecutor`` one.
+    """
+
+    NAME = "rediscluster"
+
+    def __repr__(self):  # pragma: no cover
+        return "RedisClusterCache ({})".format(
+            ",".join("{}:{}".format(host, port) for host, port in self.startup_nodes)
+        )
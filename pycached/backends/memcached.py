@@ -0,0 +1,265 @@
+import functools
+import hashlib
+import logging
+import math
+import re
+import threading
+import time
+
+from pymemcache.client.base import PooledClient
+from pymemcache.exceptions import MemcacheClientError
+
+from pycached.base import BaseCache
+from pycached.serializers import JsonSerializer
+
+logger = logging.getLogger(__name__)
+
+MAX_KEY_LENGTH = 250
+# memcached takes expirations longer than 30 days as unix timestamps
+MAX_RELATIVE_TTL = 60 * 60 * 24 * 30
+_INVALID_KEY_RE = re.compile(r"[^\x21-\x7e]")
+# Value of the locks being released, it never matches the uuid of a RedLock
+REDLOCK_TOMBSTONE = b"-"
+
+
+def conn(func):
+    @functools.wraps(func)
+    def wrapper(self, *args, _conn=None, **kwargs):
+        if _conn is not None:
+            return func(self, *args, _conn=_conn, **kwargs)
+        # pymemcache pools fail when they are exhausted, wait for a connection instead
+        if not self._slots.acquire(timeout=self.pool_timeout):
+            raise TimeoutError("No memcached connection available")
+        try:
+            return func(self, *args, _conn=self._get_pool(), **kwargs)
+        finally:
+            self._slots.release()
+
+    return wrapper
+
+
+def _as_float(value):
+    return float(value) if value is not None else None
+
+
+def _expire(ttl):
+    """
+    Return the memcached expiration for ``ttl`` seconds: 0 never expires, floats are rounded
+    up because memcached only has seconds and ttls over 30 days are sent as timestamps.
+    """
+    if not ttl:
+        return 0
+    ttl = int(math.ceil(ttl))
+    if ttl > MAX_RELATIVE_TTL:
+        return int(time.time()) + ttl
+    return ttl
+
+
+def memcached_key(key):
+    """
+    Return ``key`` if memcached accepts it, i.e. it is at most 250 bytes of printable ASCII
+    without spaces. Otherwise its SHA1 hex digest, so any str can be used as key.
+    """
+    if len(key) <= MAX_KEY_LENGTH and not _INVALID_KEY_RE.search(key):
+        return key
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+class MemcachedBackend:
+    """
+    Memcached backend on a :class:`pymemcache.client.base.PooledClient`, which keeps a pool of
+    connections shared by all the threads using the cache. When all of them are in use, commands
+    wait up to ``pool_timeout`` for one to be released.
+
+    ``multi_get`` is a single ``get`` with all the keys and ``multi_set`` sends all the ``set``
+    commands in one write and then reads all the replies, so both take one round trip.
+    """
+
+    def __init__(
+            self,
+            endpoint="127.0.0.1",
+            port=11211,
+            max_connections=10,
+            create_connection_timeout=None,
+            socket_timeout=None,
+            pool_timeout=None,
+            pool_idle_timeout=0,
+            **kwargs
+    ):
+        super().__init__(**kwargs)
+        self.endpoint = endpoint
+        self.port = int(port)
+        self.max_connections = int(max_connections)
+        self.create_connection_timeout = _as_float(create_connection_timeout)
+        self.socket_timeout = _as_float(socket_timeout)
+        self.pool_timeout = _as_float(pool_timeout)
+        self.pool_idle_timeout = int(pool_idle_timeout)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_connections)
+
+    def _get_pool(self):
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = PooledClient(
+                        (self.endpoint, self.port),
+                        max_pool_size=self.max_connections,
+                        connect_timeout=self.create_connection_timeout,
+                        timeout=self.socket_timeout,
+                        pool_idle_timeout=self.pool_idle_timeout,
+                        no_delay=True,
+                        default_noreply=False,
+                    )
+        return self._pool
+
+    def _decode(self, value):
+        # Values are always returned as bytes, str serializers get them back as str
+        if value is not None and self.serializer.DATA_TYPE is str:
+            return value.decode("utf-8")
+        return value
+
+    @conn
+    def _get(self, key, _conn=None):
+        return self._decode(_conn.get(key))
+
+    @conn
+    def _gets(self, key, _conn=None):
+        _, token = _conn.gets(key)
+        return token
+
+    @conn
+    def _multi_get(self, keys, _conn=None):
+        values = _conn.get_many(keys)
+        return [self._decode(values.get(key)) for key in keys]
+
+    @conn
+    def _set(self, key, value, ttl=None, _cas_token=None, _cost=None, _conn=None):
+        if _cas_token is not None:
+            return self._cas(key, value, _cas_token, ttl=ttl, _conn=_conn)
+        return _conn.set(key, value, expire=_expire(ttl))
+
+    @conn
+    def _cas(self, key, value, token, ttl=None, _conn=None):
+        return bool(_conn.cas(key, value, token, expire=_expire(ttl)))
+
+    @conn
+    def _multi_set(self, pairs, ttl=None, _cost=None, _conn=None):
+        failed = _conn.set_many(dict(pairs), expire=_expire(ttl))
+        if failed:
+            logger.warning("Couldn't store %s in memcached", failed)
+        return True
+
+    @conn
+    def _add(self, key, value, ttl=None, _conn=None):
+        if not _conn.add(key, value, expire=_expire(ttl)):
+            raise ValueError("Key {} already exists, use .set to update the value".format(key))
+        return True
+
+    @conn
+    def _exists(self, key, _conn=None):
+        # A plain read, writes like append would change the CAS token of the key
+        return _conn.get(key) is not None
+
+    @conn
+    def _increment(self, key, delta, _conn=None):
+        try:
+            if delta >= 0:
+                incremented = _conn.incr(key, delta)
+            else:
+                incremented = _conn.decr(key, -delta)
+        except MemcacheClientError:
+            raise TypeError("Value is not an integer") from None
+        if incremented is None:
+            if _conn.add(key, str(delta)):
+                return delta
+            # Someone else created it in the meantime
+            return self._increment(key, delta, _conn=_conn)
+        return incremented
+
+    @conn
+    def _expire(self, key, ttl, _conn=None):
+        return _conn.touch(key, expire=_expire(ttl))
+
+    @conn
+    def _delete(self, key, _conn=None):
+        return int(_conn.delete(key))
+
+    @conn
+    def _clear(self, namespace=None, _conn=None):
+        if namespace:
+            raise ValueError("MemcachedCache doesn't support flushing by namespace")
+        _conn.flush_all()
+        return True
+
+    @conn
+    def _raw(self, command, *args, _conn=None, **kwargs):
+        return getattr(_conn, command)(*args, **kwargs)
+
+    @conn
+    def _redlock_release(self, key, value, _conn=None):
+        # memcached can't compare and delete in one command. The lock is first replaced by a
+        # tombstone with cas, which fails if it changed since gets, so other locks only lose
+        # their key when the tombstone expires and one is added before the delete below.
+        stored, token = _conn.gets(key)
+        if stored is None or stored != value.encode("utf-8"):
+            return 0
+        if not _conn.cas(key, REDLOCK_TOMBSTONE, token, expire=1):
+            return 0
+        return self._delete(key, _conn=_conn)
+
+    def _close(self, *args, _conn=None, **kwargs):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+
+    @classmethod
+    def parse_uri_path(cls, path):
+        return {}
+
+
+class MemcachedCache(MemcachedBackend, BaseCache):
+    """
+    Memcached cache implementation with the following components as defaults:
+        - serializer: :class:`pycached.serializers.JsonSerializer`
+        - plugins: []
+
+    Keys that memcached doesn't accept, longer than 250 bytes or with spaces, control or non
+    ASCII characters, are replaced by their SHA1 digest, see
+    :func:`pycached.backends.memcached.memcached_key`. The serializer must return str or bytes.
+
+    ``clear`` flushes the whole server, it can't be limited to a namespace. Locks use ``add``
+    and are released with ``gets``, ``cas`` and ``delete``, and
+    :class:`pycached.lock.OptimisticLock` uses ``gets`` and ``cas``.
+
+    Config options are:
+
+    :param serializer: obj derived from :class:`pycached.serializers.BaseSerializer`.
+    :param plugins: list of :class:`pycached.plugins.BasePlugin` derived classes.
+    :param namespace: string to use as default prefix for the key used in all operations of
+        the backend. Default is None
+    :param timeout: int or float in seconds specifying maximum timeout for the operations to last.
+        By default its 5.
+    :param endpoint: str with the endpoint to connect to. Default is 127.0.0.1.
+    :param port: int with the port to connect to. Default is 11211.
+    :param max_connections: int maximum number of connections in the pool. Default is 10
+    :param create_connection_timeout: float timeout for the creation of connection.
+        Default is None
+    :param socket_timeout: float timeout for the commands sent on a connection. Default is None
+    :param pool_timeout: float seconds to wait for a connection when all of them are in use,
+        None waits forever. ``TimeoutError`` is raised when it expires. Default is None
+    :param pool_idle_timeout: int seconds an idle connection is kept in the pool, 0 keeps them
+        forever. Default is 0
+    """
+
+    NAME = "memcached"
+
+    def __init__(self, serializer=None, **kwargs):
+        super().__init__(serializer=serializer or JsonSerializer(), **kwargs)
+
+    def _build_key(self, key, namespace=None):
+        return memcached_key(super()._build_key(key, namespace=namespace))
+
+    def __repr__(self):  # pragma: no cover
+        return "MemcachedCache ({}:{})".format(self.endpoint, self.port)
+
@@ -1,118 +1,1113 @@
-from threading import Timer
+import gc
+import heapq
+import logging
+import os
+import pickle
+import struct
+import sys
+import threading
+import time
+import types
+import weakref
+from array import array
 
 from pycached.base import BaseCache
+from pycached.eviction import get_policy
 from pycached.serializers import NullSerializer
 
+logger = logging.getLogger(__name__)
+
+
+class ExpiryHandle:
+    """
+    Scheduled expiration of a key. Exposes the same ``cancel`` interface
+    ``threading.Timer`` had so callers can keep using it the same way.
+    """
+
+    __slots__ = ("when", "_callback", "_args", "_cancelled", "_engine")
+
+    def __init__(self, when, callback, args, engine):
+        self.when = when
+        self._callback = callback
+        self._args = args
+        self._cancelled = False
+        self._engine = engine
+
+    def __lt__(self, other):
+        return self.when < other.when
+
+    def cancel(self):
+        if not self._cancelled:
+            self._cancelled = True
+            if self._engine is not None:
+                self._engine._handle_cancelled()
+
+    def cancelled(self):
+        return self._cancelled
+
+    def due(self, now=None):
+        return self.when <= (time.monotonic() if now is None else now)
+
+    def _run(self):
+        if not self._cancelled:
+            self._callback(*self._args)
+
+
+class ExpiryEngine:
+    """
+    Keeps all the pending expirations in a single heap and runs a sweeper
+    thread, so the cost of a ttl is O(log n) per write and the number of
+    threads stays constant regardless of how many keys have a ttl.
+
+    The sweeper follows the same approach as Redis active expiration: every
+    ``interval`` seconds it expires at most ``batch`` due keys and, if the
+    whole batch was due, it repeats until ``time_limit`` is consumed. Callers
+    are expected to also expire lazily on read using :meth:`ExpiryHandle.due`.
+
+    Cancelled handles are not removed from the heap straight away, the heap
+    is compacted once they account for more than half of it.
+    """
+
+    MIN_CANCELLED_TO_COMPACT = 100
+
+    def __init__(self, interval=0.1, batch=20, time_limit=0.025):
+        self.interval = interval
+        self.batch = batch
+        self.time_limit = time_limit
+        self._heap = []
+        self._cancelled = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def __len__(self):
+        return len(self._heap) - self._cancelled
+
+    def call_later(self, delay, callback, *args):
+        return self.call_at(time.monotonic() + delay, callback, *args)
+
+    def call_at(self, when, callback, *args):
+        handle = ExpiryHandle(when, callback, args, self)
+        with self._lock:
+            heapq.heappush(self._heap, handle)
+        if self._thread is None or not self._thread.is_alive():
+            self._start_sweeper()
+        return handle
+
+    def call_at_many(self, calls):
+        """
+        Schedule ``(when, callback, args)`` calls taking the lock once. Big batches are
+        merged into the heap in O(n) instead of pushed one by one.
+
+        :returns: list of :class:`ExpiryHandle`, in the same order
+        """
+        handles = [ExpiryHandle(when, callback, args, self) for when, callback, args in calls]
+        with self._lock:
+            if len(handles) > len(self._heap):
+                self._heap.extend(handles)
+                heapq.heapify(self._heap)
+            else:
+                for handle in handles:
+                    heapq.heappush(self._heap, handle)
+        if handles and (self._thread is None or not self._thread.is_alive()):
+            self._start_sweeper()
+        return handles
+
+    def sweep(self, now=None):
+        """
+        Run the callbacks of, at most, ``batch`` due handles.
+
+        :returns: int number of handles run
+        """
+        now = time.monotonic() if now is None else now
+        due = []
+        with self._lock:
+            while self._heap and len(due) < self.batch:
+                handle = self._heap[0]
+                if handle._cancelled:
+                    heapq.heappop(self._heap)
+                    self._cancelled -= 1
+                    continue
+                if handle.when > now:
+                    break
+                heapq.heappop(self._heap)._engine = None
+                due.append(handle)
+
+        for handle in due:
+            handle._run()
+        return len(due)
+
+    def _handle_cancelled(self):
+        with self._lock:
+            self._cancelled += 1
+            if (
+                self._cancelled > self.MIN_CANCELLED_TO_COMPACT
+                and self._cancelled * 2 > len(self._heap)
+            ):
+                heap = []
+                for handle in self._heap:
+                    if handle._cancelled:
+                        handle._engine = None
+                    else:
+                        heap.append(handle)
+                heapq.heapify(heap)
+                self._heap = heap
+                self._cancelled = 0
+
+    def _start_sweeper(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run_sweeper, name="pycached-expiry", daemon=True
+            )
+            self._thread.start()
+
+    def _run_sweeper(self):
+        while True:
+            deadline = time.monotonic() + self.time_limit
+            while self.sweep() == self.batch and time.monotonic() < deadline:
+                pass
+            time.sleep(self.interval)
+
+
+SNAPSHOT_MAGIC = b"PYCSNAP1"
+_CHUNK_HEADER = struct.Struct(">I")
+
+
+def _sizeof(key, value):
+    """
+    Approximate size in bytes of an entry. It is shallow so, for containers,
+    only the container itself is accounted. Use a serializer that returns
+    str/bytes if you need accurate figures.
+    """
+    return sys.getsizeof(key) + sys.getsizeof(value)
+
+
+_MISSING = object()
+
+
+def _expire_ref(store_ref, key):
+    store = store_ref()
+    if store is not None:
+        store._expire_if_due(key)
+
+
+class NamespacedKey(str):
+    """
+    Key built by :class:`SimpleMemoryCache`. It behaves as the plain str key and
+    remembers the namespace it was built with, so the storage can index it.
+    """
+
+    def __new__(cls, namespace, key):
+        instance = super().__new__(cls, "{}{}".format(namespace, key))
+        instance.namespace = namespace
+        return instance
+
+
+class MemoryStore:
+    """
+    Storage behind :class:`SimpleMemoryBackend`. Values live in a flat dict and keys are also
+    indexed by the namespace they were built with, so clearing, sizing or iterating a
+    namespace only touches the keys of that namespace. Keys built without namespace (i.e. with
+    a custom ``key_builder``) are kept apart and matched by prefix.
+
+    If ``max_entries`` or ``max_bytes`` are passed, keys chosen by the eviction ``policy`` are
+    evicted once any of the limits is exceeded.
+
+    The store is thread safe. Keys are spread over ``stripes`` locks by hash, so commands that
+    read and then write a key (``add``, ``increment``, ``set`` with a cas token, ``expire`` and
+    ``release``) are atomic while commands on keys of different stripes don't wait for each
+    other. The namespace index and the eviction policy are shared, they are updated under a
+    separate lock held only for the bookkeeping. Reads don't take any lock: when the cache is
+    bounded, the access is only recorded in the policy if its lock is free, so a contended read
+    never waits for a writer.
+    """
+
+    def __init__(
+        self, max_entries=None, max_bytes=None, policy=None, expiry=None, stripes=16
+    ):
+        self.max_entries = int(max_entries) if max_entries else None
+        self.max_bytes = int(max_bytes) if max_bytes else None
+        self.expiry = expiry if expiry is not None else ExpiryEngine()
+        # The engine can be shared by all the stores, its handles only keep a weak reference
+        self._ref = weakref.ref(self)
+        self.evictions = 0
+        self.evicted_bytes = 0
+
+        self._handlers = {}
+        self._reset()
+        self._namespaces = {}
+        self._owners = {}
+        self.frozen = {}
+        self._stripes = [threading.RLock() for _ in range(max(int(stripes), 1))]
+        self._meta = threading.Lock()
+
+        self._policy = None
+        self._sizes = None
+        self._bytes = 0
+        if self.max_entries or self.max_bytes:
+            self._policy = get_policy(policy)
+            self._sizes = {}
+
+    @property
+    def stripes(self):
+        return len(self._stripes)
+
+    def lock(self, key):
+        """
+        Return the lock of the stripe the key belongs to.
+        """
+        return self._stripes[hash(key) % len(self._stripes)]
+
+    def get(self, key):
+        self._expire_if_due(key)
+        if self._policy is not None and self._meta.acquire(blocking=False):
+            try:
+                if key in self._sizes:
+                    self._policy.access(key)
+                else:
+                    self._policy.miss(key)
+            finally:
+                self._meta.release()
+        return self._read(key)
+
+    def set(self, key, value, ttl=None, cas_token=None, cost=None):
+        with self.lock(key):
+            if cas_token is not None and cas_token != self._read(key):
+                return 0
+            self._replace(key, value, ttl=ttl, cost=cost)
+
+        self._evict()
+        return True
+
+    def add(self, key, value, ttl=None):
+        with self.lock(key):
+            if self.exists(key):
+                raise ValueError(
+                    "Key {} already exists, use .set to update the value".format(key)
+                )
+            self._replace(key, value, ttl=ttl)
+
+        # Evicting takes the stripe locks of the victims, so it can't run under the one of key
+        self._evict()
+        return True
+
+    def exists(self, key):
+        self._expire_if_due(key)
+        return key in self._data
+
+    def increment(self, key, delta):
+        with self.lock(key):
+            self._expire_if_due(key)
+            value = delta
+            if key in self._data:
+                try:
+                    value = int(self._read(key)) + delta
+                except ValueError:
+                    raise TypeError("Value is not an integer") from None
+            self._store(key, value)
+
+        self._evict()
+        return value
+
+    def expire(self, key, ttl):
+        with self.lock(key):
+            if not self.exists(key):
+                return False
+
+            self._cancel_ttl(key)
+            if ttl:
+                self._schedule_ttl(key, ttl)
+            return True
+
+    def delete(self, key):
+        with self.lock(key):
+            self._cancel_ttl(key)
+            if key not in self._data:
+                return 0
+
+            with self._meta:
+                self._drop(key)
+                self._unindex(key)
+                if self._policy is not None:
+                    self._bytes -= self._sizes.pop(key, 0)
+                    self._policy.remove(key)
+            return 1
+
+    def release(self, key, value):
+        with self.lock(key):
+            self._expire_if_due(key)
+            if key in self._data and self._read(key) == value:
+                self.delete(key)
+                return 1
+            return 0
+
+    def clear(self, namespace=None):
+        if namespace:
+            self.unpublish(namespace)
+            for key in list(self.keys(namespace)):
+                self.delete(key)
+            return
+
+        self.frozen = {}
+
+        for stripe in self._stripes:
+            stripe.acquire()
+        try:
+            with self._meta:
+                self._reset()
+                self._namespaces = {}
+                self._owners = {}
+                if self._policy is not None:
+                    self._policy.clear()
+                    self._sizes = {}
+                    self._bytes = 0
+        finally:
+            for stripe in self._stripes:
+                stripe.release()
+
+    def publish(self, namespace, mapping):
+        """
+        Replace the frozen mapping of namespace with a read only copy of mapping. The
+        mapping of all the frozen namespaces is swapped as a whole, so readers looking
+        it up in :attr:`frozen` see either the old or the new one, never a mix.
+        """
+        if namespace is None:
+            raise ValueError("Only namespaces can be published, namespace can't be None")
+        frozen = dict(self.frozen)
+        frozen[namespace] = types.MappingProxyType(dict(mapping))
+        self.frozen = frozen
+
+    def unpublish(self, namespace):
+        if namespace in self.frozen:
+            frozen = dict(self.frozen)
+            frozen.pop(namespace, None)
+            self.frozen = frozen
+
+    def keys(self, namespace=None):
+        """
+        Iterate over the stored keys. If namespace is passed, only the keys built with
+        that namespace (or a namespace starting with it) are returned, plus the keys built
+        without namespace that start with it.
+        """
+        with self._meta:
+            if namespace is None:
+                keys = list(self._data)
+            else:
+                keys = [
+                    key
+                    for name, partition in self._namespaces.items()
+                    if name and name.startswith(namespace)
+                    for key in partition
+                ]
+                keys.extend(
+                    key for key in self._namespaces.get(None, ()) if key.startswith(namespace)
+                )
+        yield from keys
+
+    def size(self, namespace=None):
+        if namespace is None:
+            return len(self._data)
+        return sum(1 for _ in self.keys(namespace))
+
+    def stats(self):
+        return {
+            "entries": len(self._data),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+            "evicted_bytes": self.evicted_bytes,
+        }
+
+    def items(self):
+        """
+        Iterate over ``(key, namespace, value, expires)`` tuples of the stored keys, where
+        expires is the wall clock timestamp when the key expires or None.
+        """
+        with self._meta:
+            keys = list(self._data)
+        for key in keys:
+            value = self._read(key, _MISSING)
+            if value is _MISSING or self._is_due(key):
+                continue
+            expires = self._expiration(key)
+            if expires is not None:
+                expires += time.time() - time.monotonic()
+            yield key, self._owners.get(key), value, expires
+
+    def restore(self, items):
+        """
+        Store the ``(key, namespace, value, expires)`` tuples returned by :meth:`items`. Keys
+        already expired are skipped. All the locks are taken once for the whole batch.
+
+        :returns: int number of keys stored
+        """
+        now, wall = time.monotonic(), time.time()
+        restored = 0
+        for stripe in self._stripes:
+            stripe.acquire()
+        try:
+            with self._meta:
+                expiring = []
+                for key, namespace, value, expires in items:
+                    if expires is not None and expires <= wall:
+                        continue
+                    self._cancel_ttl(key)
+                    self._put(key, value, namespace=namespace)
+                    if expires is not None:
+                        expiring.append((key, now + expires - wall))
+                    restored += 1
+                self._schedule_many(expiring)
+        finally:
+            for stripe in self._stripes:
+                stripe.release()
+
+        self._evict()
+        return restored
+
+    def _store(self, key, value, cost=None):
+        with self._meta:
+            return self._put(key, value, cost=cost)
+
+    def _put(self, key, value, cost=None, namespace=None):
+        if key not in self._data:
+            self._index(key, namespace)
+        key = str(key)
+        self._write(key, value)
+        if self._policy is None:
+            return key
+
+        size = self._entry_size(key, value)
+        previous = self._sizes.get(key)
+        if previous is None:
+            self._policy.insert(key, size, cost=cost)
+            previous = 0
+        else:
+            self._policy.update(key, size, cost=cost)
+        self._bytes += size - previous
+        self._sizes[key] = size
+        return key
+
+    def _index(self, key, namespace=None):
+        if namespace is None:
+            namespace = getattr(key, "namespace", None)
+        key = str(key)
+        self._namespaces.setdefault(namespace, set()).add(key)
+        if namespace is not None:
+            self._owners[key] = namespace
+
+    def _unindex(self, key):
+        namespace = self._owners.pop(key, None)
+        keys = self._namespaces.get(namespace)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._namespaces[namespace]
+
+    def _replace(self, key, value, ttl=None, cost=None):
+        # Called with the lock of key held
+        self._cancel_ttl(key)
+        key = self._store(key, value, cost=cost)
+        if ttl:
+            self._schedule_ttl(key, ttl)
+
+    def _over_limits(self):
+        return self._data and (
+            (self.max_entries and len(self._data) > self.max_entries)
+            or (self.max_bytes and self._bytes > self.max_bytes)
+        )
+
+    def _evict(self):
+        # The victim is chosen under the policy lock but deleted under its stripe lock, which
+        # can't be acquired while holding the former without risking a deadlock with writers.
+        if self._policy is None:
+            return
+
+        while True:
+            with self._meta:
+                if not self._over_limits():
+                    return
+                key = self._policy.victim()
+                size = self._sizes.get(key, 0)
+            if self.delete(key):
+                with self._meta:
+                    self.evictions += 1
+                    self.evicted_bytes += size
+
+    def _expire_if_due(self, key):
+        if self._is_due(key):
+            with self.lock(key):
+                if self._is_due(key):
+                    self.delete(key)
+
+    # Values and expirations. Subclasses can override these to store them differently, they
+    # are called with the lock of the key held and, the ones changing values, the meta lock.
+
+    def _read(self, key, default=None):
+        return self._data.get(key, default)
+
+    def _write(self, key, value):
+        self._data[key] = value
+
+    def _drop(self, key):
+        del self._data[key]
+
+    def _reset(self):
+        for handle in self._handlers.values():
+            handle.cancel()
+        self._data = {}
+        self._handlers = {}
+
+    def _entry_size(self, key, value):
+        return _sizeof(key, value)
+
+    def _schedule_ttl(self, key, ttl):
+        self._handlers[key] = self.expiry.call_later(ttl, _expire_ref, self._ref, key)
+
+    def _schedule_many(self, deadlines):
+        calls = [(when, _expire_ref, (self._ref, key)) for key, when in deadlines]
+        for handle in self.expiry.call_at_many(calls):
+            self._handlers[handle._args[1]] = handle
+
+    def _cancel_ttl(self, key):
+        handle = self._handlers.pop(key, None)
+        if handle:
+            handle.cancel()
+
+    def _is_due(self, key):
+        handle = self._handlers.get(key)
+        return handle is not None and handle.due()
+
+    def _expiration(self, key):
+        """
+        Return the ``time.monotonic`` deadline of the key or None if it doesn't expire.
+        """
+        handle = self._handlers.get(key)
+        return None if handle is None else handle.when
+
+
+class ArenaMemoryStore(MemoryStore):
+    """
+    :class:`MemoryStore` keeping the values in big preallocated ``bytearray`` arenas instead
+    of one object per value. ``_data`` maps each key to a slot number and the slot metadata
+    (arena, offset, length, type and expiration) lives in ``array`` columns, so the store
+    holds no container objects for the garbage collector to traverse and no per value object
+    headers.
+
+    Values must be str, bytes or int, which is what serializers return. Reads decode them
+    straight from a ``memoryview`` of the arena, without intermediate copies.
+
+    Writes are appended to the active arena. Overwritten and deleted values leave garbage
+    behind; arenas that end up with less than ``compact_ratio`` of live bytes are compacted
+    every ``compact_interval`` seconds by a background thread, which moves their live values
+    to the active arena and frees them. Expired keys found meanwhile are removed.
+    """
+
+    BYTES, STR, INT = 0, 1, 2
+    COMPACT_BATCH = 1000
+
+    def __init__(self, arena_size=None, compact_ratio=0.5, compact_interval=1, **kwargs):
+        self.arena_size = int(arena_size) if arena_size else 4 * 1024 * 1024
+        self.compact_ratio = float(compact_ratio)
+        self.compact_interval = float(compact_interval)
+        super().__init__(**kwargs)
+        self._compactor = None
+        if self.compact_interval:
+            self._start_compactor()
+
+    def _reset(self):
+        self._data = {}
+        self._handlers = {}
+        self._arenas = [bytearray(self.arena_size)]
+        self._arena_used = array("Q", [0])
+        self._arena_live = array("Q", [0])
+        self._free_arenas = []
+        self._active = 0
+        self._arena_of = array("I")
+        self._offsets = array("Q")
+        self._lengths = array("Q")
+        self._kinds = array("B")
+        self._expires = array("d")
+        self._free_slots = []
+
+    @property
+    def arenas(self):
+        return sum(1 for arena in self._arenas if arena is not None)
+
+    def _encode(self, value):
+        if isinstance(value, bytes):
+            return self.BYTES, value
+        if isinstance(value, (bytearray, memoryview)):
+            return self.BYTES, bytes(value)
+        if isinstance(value, str):
+            return self.STR, value.encode()
+        if type(value) is int:
+            return self.INT, str(value).encode()
+        raise TypeError(
+            "The arena storage can only store str, bytes or int values, got {}. "
+            "Use a serializer to store other types".format(type(value).__name__)
+        )
+
+    def _read(self, key, default=None):
+        with self.lock(key):
+            slot = self._data.get(key)
+            if slot is None:
+                return default
+            start = self._offsets[slot]
+            value = memoryview(self._arenas[self._arena_of[slot]])[
+                start : start + self._lengths[slot]
+            ]
+            kind = self._kinds[slot]
+            try:
+                if kind == self.STR:
+                    return str(value, "utf-8")
+                if kind == self.INT:
+                    return int(value.tobytes())
+                return value.tobytes()
+            finally:
+                value.release()
+
+    def _allocate(self, length):
+        if length > self.arena_size:
+            return self._new_arena(length), 0
+
+        active = self._active
+        offset = self._arena_used[active]
+        if offset + length > self.arena_size:
+            previous = active
+            active = self._active = self._new_arena(self.arena_size)
+            offset = 0
+            # Its values could all be gone while it was active, nothing else would free it
+            if not self._arena_live[previous]:
+                self._free_arena(previous)
+        self._arena_used[active] = offset + length
+        return active, offset
+
+    def _new_arena(self, size):
+        if self._free_arenas:
+            index = self._free_arenas.pop()
+            self._arenas[index] = bytearray(size)
+            self._arena_used[index] = 0
+            self._arena_live[index] = 0
+            return index
+        self._arenas.append(bytearray(size))
+        self._arena_used.append(0)
+        self._arena_live.append(0)
+        return len(self._arenas) - 1
+
+    def _release(self, index, length):
+        self._arena_live[index] -= length
+        if not self._arena_live[index] and index != self._active:
+            self._free_arena(index)
+
+    def _free_arena(self, index):
+        self._arenas[index] = None
+        self._free_arenas.append(index)
+
+    def _place(self, slot, data):
+        index, offset = self._allocate(len(data))
+        self._arenas[index][offset : offset + len(data)] = data
+        self._arena_live[index] += len(data)
+        self._arena_of[slot] = index
+        self._offsets[slot] = offset
+        self._lengths[slot] = len(data)
+
+    def _write(self, key, value):
+        kind, data = self._encode(value)
+        slot = self._data.get(key)
+        if slot is not None:
+            self._release(self._arena_of[slot], self._lengths[slot])
+        elif self._free_slots:
+            slot = self._free_slots.pop()
+            self._expires[slot] = 0.0
+        else:
+            slot = len(self._kinds)
+            self._arena_of.append(0)
+            self._offsets.append(0)
+            self._lengths.append(0)
+            self._kinds.append(0)
+            self._expires.append(0.0)
+        self._place(slot, data)
+        self._kinds[slot] = kind
+        self._data[key] = slot
+
+    def _drop(self, key):
+        slot = self._data.pop(key)
+        self._release(self._arena_of[slot], self._lengths[slot])
+        self._expires[slot] = 0.0
+        self._free_slots.append(slot)
+
+    def _entry_size(self, key, value):
+        return sys.getsizeof(key) + self._lengths[self._data[key]]
+
+    def _schedule_ttl(self, key, ttl):
+        self._expires[self._data[key]] = time.monotonic() + ttl
+
+    def _schedule_many(self, deadlines):
+        for key, when in deadlines:
+            self._expires[self._data[key]] = when
+
+    def _cancel_ttl(self, key):
+        slot = self._data.get(key)
+        if slot is not None:
+            self._expires[slot] = 0.0
+
+    def _is_due(self, key):
+        slot = self._data.get(key)
+        expires = self._expires
+        if slot is None or slot >= len(expires):
+            return False
+        return 0.0 < expires[slot] <= time.monotonic()
+
+    def _expiration(self, key):
+        expires = self._expires[self._data[key]]
+        return expires or None
+
+    def compact(self):
+        """
+        Remove the expired keys and move the live values of the arenas with less than
+        ``compact_ratio`` live bytes to the active arena, freeing them.
+
+        :returns: int number of arenas freed
+        """
+        now = time.monotonic()
+        with self._meta:
+            freed = 0
+            for index, arena in enumerate(self._arenas):
+                if arena is not None and index != self._active and not self._arena_live[index]:
+                    self._free_arena(index)
+                    freed += 1
+            sparse = {
+                index
+                for index, arena in enumerate(self._arenas)
+                if arena is not None
+                and index != self._active
+                and self._arena_live[index] < self._arena_used[index] * self.compact_ratio
+            }
+            keys = list(self._data)
+
+        # Scanned in batches, so writers wait at most one batch for the meta lock
+        expired, moving = [], []
+        for start in range(0, len(keys), self.COMPACT_BATCH):
+            with self._meta:
+                for key in keys[start : start + self.COMPACT_BATCH]:
+                    slot = self._data.get(key)
+                    if slot is None:
+                        continue
+                    if 0.0 < self._expires[slot] <= now:
+                        expired.append(key)
+                    elif self._arena_of[slot] in sparse:
+                        moving.append(key)
+
+        for key in expired:
+            self._expire_if_due(key)
+
+        for key in moving:
+            with self.lock(key):
+                with self._meta:
+                    slot = self._data.get(key)
+                    if slot is None or self._arena_of[slot] not in sparse:
+                        continue
+                    index, start = self._arena_of[slot], self._offsets[slot]
+                    with memoryview(self._arenas[index]) as view:
+                        data = view[start : start + self._lengths[slot]].tobytes()
+                    # Placed before releasing, or the arena could be reused for the copy.
+                    self._place(slot, data)
+                    self._release(index, len(data))
+
+        with self._meta:
+            return freed + sum(1 for index in sparse if self._arenas[index] is None)
+
+    def _start_compactor(self):
+        self._compactor = threading.Thread(
+            target=_run_compactor,
+            args=(weakref.ref(self), self.compact_interval),
+            name="pycached-compactor",
+            daemon=True,
+        )
+        self._compactor.start()
+
+
+def _run_compactor(store_ref, interval):
+    # Only a weak reference is kept, so the thread ends once the store is not used anymore.
+    while True:
+        time.sleep(interval)
+        store = store_ref()
+        if store is None:
+            return
+        try:
+            store.compact()
+        except Exception:
+            logger.exception("Couldn't compact the memory arenas")
+        del store
+
+
+STORAGES = {"dict": MemoryStore, "arena": ArenaMemoryStore}
+
 
 class SimpleMemoryBackend:
     """
-    Wrapper around dict operations to use it as a cache backend
+    Wrapper around dict operations to use it as a cache backend.
+
+    Each instance has its own :class:`MemoryStore` unless a ``store`` name is passed, in which
+    case all the instances using that name share it. The bounds of a shared store are the ones
+    of the first instance that created it.
     """
 
-    _cache = {}
-    _handlers = {}
+    _stores = {}
+    _expiry = ExpiryEngine()
+
+    _stores_lock = threading.Lock()
 
-    def __init__(self, **kwargs):
+    def __init__(
+        self,
+        store=None,
+        max_entries=None,
+        max_bytes=None,
+        policy=None,
+        stripes=16,
+        storage="dict",
+        arena_size=None,
+        compact_ratio=None,
+        compact_interval=None,
+        snapshot=None,
+        snapshot_interval=None,
+        **kwargs
+    ):
         super().__init__(**kwargs)
+        self.store_name = store
+        store_kwargs = {
+            "max_entries": max_entries,
+            "max_bytes": max_bytes,
+            "policy": policy,
+            "stripes": stripes,
+            "storage": storage,
+        }
+        arena_kwargs = {
+            "arena_size": arena_size,
+            "compact_ratio": compact_ratio,
+            "compact_interval": compact_interval,
+        }
+        for name, value in arena_kwargs.items():
+            if value is not None:
+                store_kwargs[name] = value
+        if store is None:
+            self._store = self._new_store(**store_kwargs)
+        else:
+            with SimpleMemoryBackend._stores_lock:
+                if store not in SimpleMemoryBackend._stores:
+                    SimpleMemoryBackend._stores[store] = self._new_store(**store_kwargs)
+                self._store = SimpleMemoryBackend._stores[store]
+
+        self.snapshot = snapshot
+        self.snapshot_interval = float(snapshot_interval) if snapshot_interval else None
+        self._snapshot_stop = None
+        if snapshot is not None:
+            if os.path.exists(snapshot):
+                self.load(snapshot)
+            if self.snapshot_interval:
+                self._start_snapshots()
+
+    def _new_store(self, storage="dict", **kwargs):
+        try:
+            store_class = STORAGES[storage]
+        except KeyError:
+            raise ValueError(
+                "Invalid storage {!r}, you can only use {}".format(storage, list(STORAGES))
+            ) from None
+        return store_class(expiry=self._expiry, **kwargs)
+
+    @property
+    def max_entries(self):
+        return self._store.max_entries
+
+    @property
+    def max_bytes(self):
+        return self._store.max_bytes
 
     def _get(self, key, _conn=None):
-        return SimpleMemoryBackend._cache.get(key)
+        return self._store.get(key)
 
     def _gets(self, key, _conn=None):
         return self._get(key, _conn=_conn)
 
     def _multi_get(self, keys, _conn=None):
-        return [SimpleMemoryBackend._cache.get(key) for key in keys]
+        return [self._store.get(key) for key in keys]
 
-    def _set(self, key, value, ttl=None, _cas_token=None, _conn=None):
-        if _cas_token is not None and _cas_token != SimpleMemoryBackend._cache.get(key):
-            return 0
-
-        if key in SimpleMemoryBackend._handlers:
-            SimpleMemoryBackend._handlers[key].cancel()
-
-        SimpleMemoryBackend._cache[key] = value
-        if ttl:
-            handle = Timer(ttl, self.__delete, args=[key])
-            handle.start()
-            SimpleMemoryBackend._handlers[key] = handle
-
-        return True
+    def _set(self, key, value, ttl=None, _cas_token=None, _cost=None, _conn=None):
+        return self._store.set(key, value, ttl=ttl, cas_token=_cas_token, cost=_cost)
 
-    def _multi_set(self, pairs, ttl=None, _conn=None):
+    def _multi_set(self, pairs, ttl=None, _cost=None, _conn=None):
         for key, value in pairs:
-            self._set(key, value, ttl=ttl)
+            self._store.set(key, value, ttl=ttl, cost=_cost)
         return True
 
     def _add(self, key, value, ttl=None, _conn=None):
-        if key in SimpleMemoryBackend._cache:
-            raise ValueError("Key {} already exists, use .set to update the value".format(key))
-
-        self._set(key, value, ttl=ttl)
-        return True
+        return self._store.add(key, value, ttl=ttl)
 
     def _exists(self, key, _conn=None):
-        return key in SimpleMemoryBackend._cache
+        return self._store.exists(key)
 
     def _increment(self, key, delta, _conn=None):
-        if key not in SimpleMemoryBackend._cache:
-            SimpleMemoryBackend._cache[key] = delta
-        else:
-            try:
-                SimpleMemoryBackend._cache[key] = int(SimpleMemoryBackend._cache[key]) + delta
-            except ValueError:
-                raise TypeError("Value is not an integer") from None
-        return SimpleMemoryBackend._cache[key]
+        return self._store.increment(key, delta)
 
     def _expire(self, key, ttl, _conn=None):
-        if key in SimpleMemoryBackend._cache:
-            handle = SimpleMemoryBackend._handlers.pop(key, None)
-            if handle:
-                handle.cancel()
-            if ttl:
-                handle = Timer(ttl, self.__delete, args=[key])
-                handle.start()
-                SimpleMemoryBackend._handlers[key] = handle
-            return True
-
-        return False
+        return self._store.expire(key, ttl)
 
     def _delete(self, key, _conn=None):
-        return self.__delete(key)
+        return self._store.delete(key)
 
     def _clear(self, namespace=None, _conn=None):
-        if namespace:
-            for key in list(SimpleMemoryBackend._cache):
-                if key.startswith(namespace):
-                    self.__delete(key)
-        else:
-            SimpleMemoryBackend._cache = {}
-            SimpleMemoryBackend._handlers = {}
+        self._store.clear(namespace)
         return True
 
     def _raw(self, command, *args, _conn=None, **kwargs):
-        return getattr(SimpleMemoryBackend._cache, command)(*args, **kwargs)
+        return getattr(self._store._data, command)(*args, **kwargs)
 
     def _redlock_release(self, key, value):
-        if SimpleMemoryBackend._cache.get(key) == value:
-            SimpleMemoryBackend._cache.pop(key)
-            return 1
-        return 0
+        return self._store.release(key, value)
 
-    @classmethod
-    def __delete(cls, key):
-        if cls._cache.pop(key, None):
-            handle = cls._handlers.pop(key, None)
-            if handle:
-                handle.cancel()
-            return 1
+    def publish(self, namespace, mapping):
+        """
+        Publish mapping as the frozen content of namespace, replacing the previous one
+        atomically. :meth:`SimpleMemoryCache.get` and :meth:`SimpleMemoryCache.multi_get`
+        with that namespace read from it directly: no locks, no expiration, no serializer
+        and no plugins. Values are returned as they are in mapping.
 
-        return 0
+        Frozen namespaces are shared by the instances using the same ``store`` and
+        removed with :meth:`unpublish` or ``clear``.
+        """
+        self._store.publish(namespace, mapping)
+
+    def unpublish(self, namespace):
+        """
+        Remove the frozen mapping of namespace, if any.
+        """
+        self._store.unpublish(namespace)
+
+    def keys(self, namespace=None):
+        """
+        Iterate over the keys of the store. If namespace is passed, only over the ones in that
+        namespace. The cost is proportional to the size of the namespace, not of the store.
+        """
+        return self._store.keys(namespace)
+
+    def size(self, namespace=None):
+        """
+        Return the number of keys in the store or, if namespace is passed, in that namespace.
+        """
+        return self._store.size(namespace)
+
+    def stats(self):
+        """
+        Return a dict with the number of entries, approximate bytes used (only tracked
+        when the cache is bounded), configured limits and eviction counters.
+        """
+        return self._store.stats()
+
+    def dump(self, path, chunk_size=10000):
+        """
+        Write the keys of the store, with their values and remaining ttls, to ``path``. The
+        snapshot is streamed in pickled chunks of ``chunk_size`` keys, so it doesn't need to
+        hold a copy of the whole store in memory. The file is written next to ``path`` and
+        renamed once complete, so readers never see a partial snapshot.
+
+        Values are stored as the serializer of the cache returned them, so any serializer
+        works as long as its output can be pickled.
+
+        :returns: int number of keys written
+        """
+        tmp_path = "{}.{}.tmp".format(path, os.getpid())
+        dumped = 0
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(SNAPSHOT_MAGIC)
+                chunk = []
+                for item in self._store.items():
+                    chunk.append(item)
+                    if len(chunk) >= chunk_size:
+                        dumped += self._write_chunk(f, chunk)
+                        chunk = []
+                dumped += self._write_chunk(f, chunk)
+                f.write(_CHUNK_HEADER.pack(0))
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return dumped
+
+    @staticmethod
+    def _write_chunk(f, chunk):
+        if not chunk:
+            return 0
+        data = pickle.dumps(chunk, protocol=pickle.HIGHEST_PROTOCOL)
+        f.write(_CHUNK_HEADER.pack(len(data)))
+        f.write(data)
+        return len(chunk)
+
+    def load(self, path):
+        """
+        Restore the keys of a snapshot written by :meth:`dump`, one chunk at a time. Keys
+        keep the ttl they had left when dumped, minus the time elapsed since, and the ones
+        expired meanwhile are skipped. Existing keys are overwritten.
+
+        Snapshots are pickled, only load the ones you trust.
+
+        :returns: int number of keys restored
+        """
+        restored = 0
+        # Millions of new objects trigger full collections over and over, none of them
+        # can be garbage so the collector is paused meanwhile.
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            with open(path, "rb") as f:
+                if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+                    raise ValueError("{} is not a pycached snapshot".format(path))
+                while True:
+                    header = f.read(_CHUNK_HEADER.size)
+                    if len(header) != _CHUNK_HEADER.size:
+                        raise ValueError("Snapshot {} is truncated".format(path))
+                    (length,) = _CHUNK_HEADER.unpack(header)
+                    if not length:
+                        return restored
+                    data = f.read(length)
+                    if len(data) != length:
+                        raise ValueError("Snapshot {} is truncated".format(path))
+                    restored += self._store.restore(pickle.loads(data))
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    def _start_snapshots(self):
+        self._snapshot_stop = threading.Event()
+        threading.Thread(
+            target=self._run_snapshots,
+            args=(self._snapshot_stop,),
+            name="pycached-snapshot",
+            daemon=True,
+        ).start()
+
+    def _run_snapshots(self, stop):
+        while not stop.wait(self.snapshot_interval):
+            try:
+                self.dump(self.snapshot)
+            except Exception:
+                logger.exception("Couldn't write snapshot %s", self.snapshot)
+
+    def _close(self, *args, **kwargs):
+        if self._snapshot_stop is not None:
+            self._snapshot_stop.set()
+            self._snapshot_stop = None
+            self.dump(self.snapshot)
 
     @classmethod
     def parse_uri_path(cls, path):
         return {}
 
+
 class SimpleMemoryCache(SimpleMemoryBackend, BaseCache):
     """
     Memory cache implementation with the following components as defaults:
@@ -127,6 +1122,41 @@ class SimpleMemoryCache(SimpleMemoryBackend, BaseCache):
         the backend. Default is None.
     :param timeout: int or float in seconds specifying maximum timeout for the operations to last.
         By default its 5.
+    :param max_entries: int maximum number of keys to keep. When exceeded, keys are evicted
+        according to ``policy``. Default is None which means no limit.
+    :param max_bytes: int approximate maximum size in bytes of the stored keys and values. When
+        exceeded, keys are evicted according to ``policy``. Default is None which means no limit.
+    :param policy: eviction policy used when the cache is bounded. Either a name from
+        :data:`pycached.eviction.POLICIES` ("lru", "tinylfu" or "gdsf"), a class or an
+        instance of :class:`pycached.eviction.BasePolicy`. Default is "lru".
+    :param store: str name of the storage to use. Instances created with the same name share
+        their keys, otherwise each instance has its own. Default is None.
+    :param stripes: int number of locks the keys are spread over. Commands on keys of
+        different stripes can run concurrently from different threads. Default is 16.
+    :param storage: str "dict" to keep the values as they are or "arena" to keep them packed
+        in big preallocated buffers (see :class:`pycached.backends.memory.ArenaMemoryStore`),
+        which saves memory and garbage collection time with millions of small values. The
+        arena storage needs a serializer returning str or bytes. Default is "dict".
+    :param arena_size: int bytes of each arena when ``storage`` is "arena". Default is 4MB.
+    :param compact_ratio: float fraction of live bytes under which an arena is compacted when
+        ``storage`` is "arena". Default is 0.5.
+    :param compact_interval: int or float seconds between the compactions of the arenas when
+        ``storage`` is "arena", 0 disables the background compaction. Default is 1.
+    :param snapshot: str path of a snapshot file (see :meth:`dump`). If it exists, it is
+        loaded when the cache is created. Default is None.
+    :param snapshot_interval: int or float seconds between the snapshots written to
+        ``snapshot`` by a background thread. A last one is written on :meth:`close`.
+        Default is None, which means no periodic snapshots.
+
+    Keys are indexed by namespace, so ``clear(namespace=...)``, :meth:`size` and :meth:`keys`
+    with a namespace only cost as much as the keys in that namespace. Eviction counters are
+    available through :meth:`stats`.
+
+    The cache is safe to share between threads: ``add``, ``increment``, ``set`` with
+    ``_cas_token``, ``expire`` and the lock release are atomic.
+
+    Reference data rebuilt periodically can be published as a frozen namespace with
+    :meth:`publish`. Reads of that namespace are a lookup in an immutable mapping.
     """
 
     NAME = "memory"
@@ -135,6 +1165,31 @@ class SimpleMemoryCache(SimpleMemoryBackend, BaseCache):
         super().__init__(**kwargs)
         self.serializer = serializer or NullSerializer()
 
+    def get(self, key, default=None, loads_fn=None, namespace=None, _conn=None):
+        frozen = self._store.frozen.get(self.namespace if namespace is None else namespace)
+        if frozen is not None:
+            return frozen.get(key, default)
+        return super().get(
+            key, default=default, loads_fn=loads_fn, namespace=namespace, _conn=_conn
+        )
+
+    get.__doc__ = BaseCache.get.__doc__
+
+    def multi_get(self, keys, loads_fn=None, namespace=None, _conn=None):
+        frozen = self._store.frozen.get(self.namespace if namespace is None else namespace)
+        if frozen is not None:
+            return [frozen.get(key) for key in keys]
+        return super().multi_get(keys, loads_fn=loads_fn, namespace=namespace, _conn=_conn)
+
+    multi_get.__doc__ = BaseCache.multi_get.__doc__
+
+    def _build_key(self, key, namespace=None):
+        if namespace is None:
+            namespace = self.namespace
+        if namespace is None:
+            return key
+        return NamespacedKey(namespace, key)
+
     @classmethod
     def parse_uri_path(cls, path):
         return {}
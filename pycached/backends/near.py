@@ -0,0 +1,230 @@
+"""
+Near cache used by :class:`pycached.RedisCache` to keep the hottest values in process. Entries
+are dropped as soon as redis reports the key changed, through a dedicated connection
+subscribed to the invalidation messages of CLIENT TRACKING or to keyspace notifications.
+"""
+
+import itertools
+import logging
+import threading
+from collections import OrderedDict
+
+import redis
+
+logger = logging.getLogger(__name__)
+
+INVALIDATE_CHANNEL = "__redis__:invalidate"
+MODES = ("tracking", "bcast", "keyspace")
+
+
+class NearCache:
+    """
+    Bounded LRU mapping of keys to the raw values read from redis. Values are only stored while
+    the cache is ``available``, meaning the invalidation connection is up, and only if the key
+    wasn't invalidated while it was being read (see :meth:`begin` and :meth:`finish`).
+    """
+
+    def __init__(self, max_size):
+        self.max_size = int(max_size)
+        self.available = False
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._tokens = itertools.count()
+        self._lock = threading.Lock()
+        self._local_hits = 0
+        self._remote_hits = 0
+        self._remote_misses = 0
+        self._invalidations = 0
+        self._flushes = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self._local_hits += 1
+            return value
+
+    def begin(self, key):
+        """
+        Called before reading the key from redis. Returns a token to pass to :meth:`finish`.
+        """
+        if not self.available:
+            return None
+        with self._lock:
+            token = next(self._tokens)
+            self._pending[key] = token
+            return token
+
+    def finish(self, key, token, value):
+        """
+        Store the value read from redis unless the key was invalidated since :meth:`begin`.
+        """
+        with self._lock:
+            if value is None:
+                self._remote_misses += 1
+            else:
+                self._remote_hits += 1
+            if token is None or self._pending.get(key) != token:
+                return
+            del self._pending[key]
+            if value is None or not self.available:
+                return
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, keys):
+        with self._lock:
+            for key in keys:
+                self._pending.pop(key, None)
+                if self._entries.pop(key, None) is not None:
+                    self._invalidations += 1
+
+    def flush(self):
+        with self._lock:
+            self._entries = OrderedDict()
+            self._pending = {}
+            self._flushes += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "available": self.available,
+                "entries": len(self._entries),
+                "max_size": self.max_size,
+                "local_hits": self._local_hits,
+                "remote_hits": self._remote_hits,
+                "remote_misses": self._remote_misses,
+                "invalidations": self._invalidations,
+                "flushes": self._flushes,
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class InvalidationListener:
+    """
+    Keeps a dedicated connection to redis receiving the invalidation messages for the near
+    cache, from a daemon thread. Modes are:
+
+        - ``tracking``: CLIENT TRACKING redirected to this connection. The connections reading
+          the keys must enable it, see :meth:`enable_tracking`.
+        - ``bcast``: CLIENT TRACKING in BCAST mode for the ``prefixes``, enabled on a second
+          connection kept open by the listener.
+        - ``keyspace``: keyspace notifications for the ``prefixes``. The server must be
+          configured with ``notify-keyspace-events`` including ``K`` and the event classes
+          to follow. FLUSHDB and FLUSHALL are not notified in this mode.
+
+    When the connection is lost the near cache is flushed and disabled until the listener
+    reconnects, and ``on_connect`` is called every time it (re)connects so the reading
+    connections can redirect their tracking to the new client id.
+    """
+
+    RECONNECT_DELAY = 1
+
+    def __init__(self, near, connection_factory, mode="tracking", prefixes=None, db=0,
+                 on_connect=None):
+        self.near = near
+        self.mode = mode
+        self.prefixes = list(prefixes or [""])
+        self.db = db
+        self.client_id = None
+        self._connection_factory = connection_factory
+        self._on_connect = on_connect
+        self._connection = None
+        self._tracker = None
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._run, name="pycached-near-cache", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(self.RECONNECT_DELAY + 1)
+        self._disconnect()
+
+    def enable_tracking(self, connection):
+        """
+        ``redis_connect_func`` for the reading connections in ``tracking`` mode.
+        """
+        connection.on_connect()
+        if self.mode == "tracking" and self.client_id is not None:
+            connection.send_command("CLIENT", "TRACKING", "ON", "REDIRECT", self.client_id)
+            connection.read_response()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                if self._connection is None:
+                    self._connect()
+                if self._connection.can_read(timeout=self.RECONNECT_DELAY):
+                    self._handle(self._connection.read_response())
+            except (redis.RedisError, OSError) as e:
+                if self._stopped.is_set():
+                    break
+                logger.warning("Near cache invalidation connection lost: %s", e)
+                self._disconnect()
+                self.near.available = False
+                self.near.flush()
+                self._stopped.wait(self.RECONNECT_DELAY)
+
+    def _connect(self):
+        connection = self._connection_factory()
+        self._connection = connection
+        connection.connect()
+        connection.send_command("CLIENT", "ID")
+        self.client_id = connection.read_response()
+
+        if self.mode == "keyspace":
+            patterns = ["__keyspace@{}__:{}*".format(self.db, prefix) for prefix in self.prefixes]
+            connection.send_command("PSUBSCRIBE", *patterns)
+            for _ in patterns:
+                connection.read_response()
+        else:
+            connection.send_command("SUBSCRIBE", INVALIDATE_CHANNEL)
+            connection.read_response()
+
+        if self.mode == "bcast":
+            self._tracker = self._connection_factory()
+            self._tracker.connect()
+            args = ["CLIENT", "TRACKING", "ON", "REDIRECT", self.client_id, "BCAST"]
+            for prefix in self.prefixes:
+                args += ["PREFIX", prefix]
+            self._tracker.send_command(*args)
+            self._tracker.read_response()
+
+        if self._on_connect is not None:
+            self._on_connect()
+        self.near.flush()
+        self.near.available = True
+
+    def _disconnect(self):
+        for connection in (self._connection, self._tracker):
+            if connection is not None:
+                try:
+                    connection.disconnect()
+                except (redis.RedisError, OSError):
+                    pass
+        self._connection = None
+        self._tracker = None
+        self.client_id = None
+
+    def _handle(self, message):
+        kind = message[0]
+        if kind == "message" and message[1] == INVALIDATE_CHANNEL:
+            keys = message[2]
+            if keys is None:
+                self.near.flush()
+            else:
+                self.near.invalidate(keys)
+        elif kind == "pmessage":
+            channel = message[2]
+            self.near.invalidate([channel.split(":", 1)[1]])
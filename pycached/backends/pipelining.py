@@ -0,0 +1,164 @@
+"""
+Automatic pipelining used by :class:`pycached.RedisCache`. Commands sent by any thread are
+queued and a single flusher thread sends them in pipelines, so concurrent callers share round
+trips instead of paying one each.
+"""
+
+import concurrent.futures
+import logging
+import threading
+import time
+
+import redis
+
+logger = logging.getLogger(__name__)
+
+# Commands sent through the pipeline. Anything else (SCAN iterators, pubsub, pool access...) goes
+# to the client directly.
+PIPELINED = frozenset(
+    (
+        "get",
+        "mget",
+        "set",
+        "setex",
+        "mset",
+        "exists",
+        "incrby",
+        "expire",
+        "persist",
+        "delete",
+        "unlink",
+        "eval",
+        "evalsha",
+    )
+)
+
+
+class AutoPipeline:
+    """
+    Proxy of a :class:`redis.Redis` client coalescing the commands of all the threads using it.
+    The first command queued opens a batch, which is sent in one pipeline once ``window``
+    seconds have passed or ``max_batch`` commands are queued. Commands queued while a batch is
+    being sent go in the next one. Every caller blocks until the reply of its own command
+    arrives, and errors are raised only to the caller whose command failed.
+    """
+
+    def __init__(self, client, window=0.0005, max_batch=128):
+        self.client = client
+        self.window = window
+        self.max_batch = max_batch
+        self._queue = []
+        self._opened_at = None
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread = None
+        self._batches = 0
+        self._commands = 0
+        self._max_batch_size = 0
+
+    def __getattr__(self, name):
+        if name not in PIPELINED:
+            return getattr(self.client, name)
+
+        def command(*args, **kwargs):
+            return self.submit(name, args, kwargs).result()
+
+        return command
+
+    def submit(self, name, args, kwargs):
+        """
+        Queue the command and return a :class:`concurrent.futures.Future` with its reply.
+        """
+        future = concurrent.futures.Future()
+        with self._cond:
+            if self._thread is None:
+                self._stopped = False
+                self._thread = threading.Thread(
+                    target=self._run, name="pycached-pipeline", daemon=True
+                )
+                self._thread.start()
+            self._queue.append((name, args, kwargs, future))
+            if len(self._queue) == 1:
+                self._opened_at = time.monotonic()
+                self._cond.notify()
+            elif len(self._queue) >= self.max_batch:
+                self._cond.notify()
+        return future
+
+    def stop(self):
+        """
+        Send the commands already queued and stop the flusher thread. It's started again by the
+        next command.
+        """
+        with self._cond:
+            thread = self._thread
+            self._stopped = True
+            self._cond.notify()
+        if thread is not None:
+            thread.join()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "batches": self._batches,
+                "commands": self._commands,
+                "avg_batch_size": self._commands / self._batches if self._batches else 0.0,
+                "max_batch_size": self._max_batch_size,
+                "pending": len(self._queue),
+            }
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._queue:
+                if self._stopped:
+                    self._thread = None
+                    return None
+                self._cond.wait()
+            # Commands left over from a full batch already waited, they go out right away
+            while len(self._queue) < self.max_batch and not self._stopped:
+                remaining = self._opened_at + self.window - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = self._queue[: self.max_batch]
+            del self._queue[: self.max_batch]
+            self._batches += 1
+            self._commands += len(batch)
+            self._max_batch_size = max(self._max_batch_size, len(batch))
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self._send(batch)
+
+    def _send(self, batch):
+        pipeline = self.client.pipeline(transaction=False)
+        try:
+            for name, args, kwargs, _ in batch:
+                getattr(pipeline, name)(*args, **kwargs)
+            replies = pipeline.execute(raise_on_error=False)
+        except (redis.ConnectionError, redis.TimeoutError) as e:
+            for *_, future in batch:
+                future.set_exception(e)
+            return
+        except Exception as e:
+            # Errors building the pipeline (i.e. values that can't be encoded) would fail the
+            # whole batch, send the commands one by one so only the faulty one fails.
+            logger.debug("Couldn't send pipeline, sending commands one by one: %s", e)
+            for name, args, kwargs, future in batch:
+                try:
+                    future.set_result(getattr(self.client, name)(*args, **kwargs))
+                except Exception as error:
+                    future.set_exception(error)
+            return
+        finally:
+            pipeline.reset()
+
+        for (*_, future), reply in zip(batch, replies):
+            if isinstance(reply, Exception):
+                future.set_exception(reply)
+            else:
+                future.set_result(reply)
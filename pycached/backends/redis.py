@@ -1,10 +1,21 @@
 import functools
+import itertools
+import logging
+import math
+import re
+import threading
+import time
 
 import redis
 
+from pycached.backends.near import MODES as NEAR_CACHE_MODES, InvalidationListener, NearCache
+from pycached.backends.pipelining import AutoPipeline
+from pycached.backends.scripts import ScriptRegistry
 from pycached.base import BaseCache
 from pycached.serializers import JsonSerializer
 
+logger = logging.getLogger(__name__)
+
 REDIS_BEFORE_ONE = redis.__version__.startswith("2.")
 
 
@@ -18,7 +29,231 @@ def conn(func):
     return wrapper
 
 
+def read_conn(func):
+    """
+    Like :func:`conn` for read only commands. When the backend has replicas, the command is
+    sent to one of them unless its keys were written recently (see ``read_your_writes``). If the
+    replica can't be reached, the command is retried on the primary.
+    """
+
+    @functools.wraps(func)
+    def wrapper(self, keys, *args, _conn=None, **kwargs):
+        if _conn is not None or not self.replicas:
+            return func(self, keys, *args, _conn=_conn or self._get_pool(), **kwargs)
+
+        replica = self._pick_replica(keys)
+        if replica is None:
+            return func(self, keys, *args, _conn=self._get_pool(), **kwargs)
+
+        start = time.monotonic()
+        try:
+            result = func(self, keys, *args, _conn=replica.client, **kwargs)
+        except (redis.ConnectionError, redis.TimeoutError) as e:
+            replica.fail()
+            logger.warning("Couldn't read from replica %s, using the primary: %s", replica.name, e)
+            return func(self, keys, *args, _conn=self._get_pool(), **kwargs)
+        replica.observe(time.monotonic() - start)
+        return result
+
+    return wrapper
+
+
+def parse_nodes(nodes):
+    """
+    Return a list of ``(host, port)`` given a list of nodes, each of them a ``"host:port"`` str,
+    a tuple or an object with ``host`` and ``port`` attributes, or a comma separated str of
+    nodes.
+    """
+    if not nodes:
+        return []
+    if isinstance(nodes, str):
+        nodes = [node for node in nodes.split(",") if node.strip()]
+    parsed = []
+    for node in nodes:
+        if isinstance(node, str):
+            host, _, port = node.strip().rpartition(":")
+        elif hasattr(node, "host"):
+            host, port = node.host, node.port
+        else:
+            host, port = node
+        parsed.append((host, int(port)))
+    return parsed
+
+
+def _as_bool(value):
+    if isinstance(value, str):
+        return value.lower() in ("1", "true", "yes", "on")
+    return bool(value)
+
+
+def _as_float(value):
+    return float(value) if value is not None else None
+
+
+def _expiry_args(ttl):
+    """
+    Return the SET option and value for the ttl: PX with milliseconds for floats, EX otherwise.
+    """
+    if isinstance(ttl, float):
+        return "PX", int(ttl * 1000)
+    return "EX", ttl
+
+
+class _PoolStatsMixin:
+    """
+    Keeps track of how the connections of a redis-py pool are used: connections created and
+    currently checked out, and how long callers waited to check one out.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._stats_lock = threading.Lock()
+        self._checked_out = set()
+        self._created = 0
+        self._acquired = 0
+        self._errors = 0
+        self._wait_time = 0.0
+        self._max_wait = 0.0
+        super().__init__(*args, **kwargs)
+
+    def make_connection(self):
+        connection = super().make_connection()
+        with self._stats_lock:
+            self._created += 1
+        return connection
+
+    def get_connection(self, *args, **kwargs):
+        start = time.monotonic()
+        try:
+            connection = super().get_connection(*args, **kwargs)
+        except redis.ConnectionError:
+            with self._stats_lock:
+                self._errors += 1
+            raise
+        finally:
+            waited = time.monotonic() - start
+            with self._stats_lock:
+                self._wait_time += waited
+                self._max_wait = max(self._max_wait, waited)
+        with self._stats_lock:
+            self._acquired += 1
+            self._checked_out.add(id(connection))
+        return connection
+
+    def release(self, connection):
+        with self._stats_lock:
+            self._checked_out.discard(id(connection))
+        return super().release(connection)
+
+    def reset(self):
+        super().reset()
+        with self._stats_lock:
+            self._checked_out = set()
+            self._created = 0
+
+    def stats(self):
+        with self._stats_lock:
+            in_use = len(self._checked_out)
+            return {
+                "max_connections": self.max_connections,
+                "created": self._created,
+                "in_use": in_use,
+                "idle": max(self._created - in_use, 0),
+                "acquired": self._acquired,
+                "errors": self._errors,
+                "wait_time": self._wait_time,
+                "max_wait": self._max_wait,
+            }
+
+
+class ConnectionPool(_PoolStatsMixin, redis.ConnectionPool):
+    pass
+
+
+class BlockingConnectionPool(_PoolStatsMixin, redis.BlockingConnectionPool):
+    pass
+
+
+class _Replica:
+    """
+    Client of a replica and the moving average of the latency of the reads sent to it.
+    """
+
+    SMOOTHING = 0.2
+
+    def __init__(self, name, client, pool):
+        self.name = name
+        self.client = client
+        self.pool = pool
+        self.latency = None
+
+    def observe(self, elapsed):
+        if self.latency is None or math.isinf(self.latency):
+            self.latency = elapsed
+        else:
+            self.latency += self.SMOOTHING * (elapsed - self.latency)
+
+    def fail(self):
+        self.latency = math.inf
+
+
+class ClearJob:
+    """
+    Namespace clear running in a background thread, returned by
+    :meth:`RedisBackend.clear_in_background`. ``matched`` and ``deleted`` report the progress,
+    ``error`` holds the exception that stopped the job, if any.
+    """
+
+    def __init__(self, namespace, progress=None):
+        self.namespace = namespace
+        self.matched = 0
+        self.deleted = 0
+        self.error = None
+        self._progress = progress
+        self._cancelled = threading.Event()
+        self._done = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def cancel(self):
+        """
+        Stop the job after the batch being deleted. Keys already unlinked stay deleted.
+        """
+        self._cancelled.set()
+
+    def wait(self, timeout=None):
+        """
+        Block until the job finishes. Returns False if ``timeout`` expires first.
+        """
+        return self._done.wait(timeout)
+
+    def _run(self, batches):
+        try:
+            for matched, deleted in batches:
+                self.matched += matched
+                self.deleted += deleted
+                if self._progress is not None:
+                    self._progress(self)
+                if self._cancelled.is_set():
+                    break
+        except Exception as e:
+            logger.exception("Couldn't clear namespace %s", self.namespace)
+            self.error = e
+        finally:
+            self._done.set()
+
+
 class RedisBackend:
+    REPLICA_STRATEGIES = ("round_robin", "least_latency")
+    # With least_latency, one read out of LATENCY_PROBE_EVERY goes round robin so the latency
+    # of the slower or failed replicas keeps being measured.
+    LATENCY_PROBE_EVERY = 16
+
     RELEASE_SCRIPT = (
         "if redis.call('get',KEYS[1]) == ARGV[1] then"
         " return redis.call('del',KEYS[1])"
@@ -39,6 +274,13 @@ class RedisBackend:
         " end"
     )
 
+    MULTI_SET_TTL_SCRIPT = (
+        "for i = 1, #KEYS do"
+        " redis.call('set', KEYS[i], ARGV[i + 2], ARGV[1], ARGV[2])"
+        " end"
+        " return #KEYS"
+    )
+
     def __init__(
             self,
             endpoint="127.0.0.1",
@@ -48,6 +290,24 @@ class RedisBackend:
             max_connections=10,
             loop=None,
             create_connection_timeout=None,
+            blocking=False,
+            pool_timeout=None,
+            pool_min_size=0,
+            socket_timeout=None,
+            socket_keepalive=False,
+            health_check_interval=0,
+            scan_count=1000,
+            unlink_batch=1000,
+            replicas=None,
+            replica_strategy="round_robin",
+            read_your_writes=None,
+            near_cache_size=0,
+            near_cache_mode="tracking",
+            near_cache_prefixes=None,
+            auto_pipeline=False,
+            pipeline_window=0.5,
+            pipeline_max_batch=128,
+            binary=None,
             **kwargs
     ):
         super().__init__(**kwargs)
@@ -57,55 +317,333 @@ class RedisBackend:
         self.password = password
         self.max_connections = int(max_connections)
         self.create_connection_timeout = float(create_connection_timeout) if create_connection_timeout else None
+        self.blocking = _as_bool(blocking)
+        self.pool_timeout = _as_float(pool_timeout)
+        self.pool_min_size = int(pool_min_size)
+        self.socket_timeout = _as_float(socket_timeout)
+        self.socket_keepalive = _as_bool(socket_keepalive)
+        self.health_check_interval = int(health_check_interval)
+        self.scan_count = int(scan_count)
+        self.unlink_batch = int(unlink_batch)
+        self.replicas = parse_nodes(replicas)
+        if replica_strategy not in self.REPLICA_STRATEGIES:
+            raise ValueError(
+                "Invalid replica strategy, you can only use {}".format(self.REPLICA_STRATEGIES)
+            )
+        self.replica_strategy = replica_strategy
+        self.read_your_writes = int(read_your_writes) if read_your_writes else None
+        self.near_cache_size = int(near_cache_size)
+        if near_cache_mode not in NEAR_CACHE_MODES:
+            raise ValueError(
+                "Invalid near cache mode, you can only use {}".format(NEAR_CACHE_MODES)
+            )
+        if self.near_cache_size and self.replicas:
+            raise ValueError("The near cache can't be used with replicas")
+        self.near_cache_mode = near_cache_mode
+        if isinstance(near_cache_prefixes, str):
+            near_cache_prefixes = near_cache_prefixes.split(",")
+        self.near_cache_prefixes = near_cache_prefixes
+        self.auto_pipeline = _as_bool(auto_pipeline)
+        self.pipeline_window = float(pipeline_window)
+        self.pipeline_max_batch = int(pipeline_max_batch)
+        self.binary = _as_bool(binary) if binary is not None else None
+        self._binary = self.binary
         self._loop = loop
         self._pool = None
+        self._pool_lock = threading.Lock()
+        self._connection_pool = None
+        self._replicas = None
+        self._replicas_lock = threading.Lock()
+        self._reads = itertools.count()
+        self._written = {}
+        self._written_lock = threading.Lock()
+        self._prune_written_at = 1024
+        self._pinned_until = 0.0
+        self._near = NearCache(self.near_cache_size) if self.near_cache_size else None
+        self._listener = None
+        self._pipeline = None
+        self.scripts = ScriptRegistry(
+            (self.CAS_SCRIPT, self.RELEASE_SCRIPT, self.MULTI_SET_TTL_SCRIPT)
+        )
+        if self.pool_min_size:
+            self._get_pool()
 
     def _get_pool(self):
-        if self._pool is None:
-            kwargs = {
-                "host": self.endpoint,
-                "port": self.port,
-                "db": self.db,
-                "password": self.password,
-                "connection_pool": self._loop,
-                "encoding": "utf-8",
-                "decode_responses": True,
-                "max_connections": self.max_connections,
-            }
-            self._pool = redis.Redis(**kwargs)
+        if self._pool is not None:
+            return self._pool
+
+        with self._pool_lock:
+            if self._pool is None:
+                self._connection_pool = self._create_connection_pool()
+                pool = redis.Redis(connection_pool=self._connection_pool)
+                if self.auto_pipeline:
+                    self._pipeline = AutoPipeline(
+                        pool,
+                        window=self.pipeline_window / 1000,
+                        max_batch=self.pipeline_max_batch,
+                    )
+                    pool = self._pipeline
+                if self._near is not None:
+                    self._start_near_cache()
+                self._warm_up()
+                # Published once the pipeline and listener are up, other threads can use it
+                self._pool = pool
 
         return self._pool
 
+    def _connection_kwargs(self):
+        return {
+            "host": self.endpoint,
+            "port": self.port,
+            "db": self.db,
+            "password": self.password,
+            "encoding": "utf-8",
+            "decode_responses": not self._is_binary(),
+            "socket_timeout": self.socket_timeout,
+            "socket_connect_timeout": self.create_connection_timeout,
+            "socket_keepalive": self.socket_keepalive,
+            "health_check_interval": self.health_check_interval,
+        }
+
+    def _is_binary(self):
+        """
+        Whether the connections return bytes. When ``binary`` is not set, it's decided from the
+        ``DATA_TYPE`` of the serializer the first time connections are configured.
+        """
+        if self._binary is None:
+            serializer = getattr(self, "serializer", None)
+            self._binary = getattr(serializer, "DATA_TYPE", str) is bytes
+        return self._binary
+
+    def _decode(self, value):
+        """
+        Decode the value read from redis in binary mode when the serializer works with str.
+        """
+        if value is None or not self._binary:
+            return value
+        serializer = getattr(self, "serializer", None)
+        if getattr(serializer, "DATA_TYPE", str) is not str:
+            return value
+        return value.decode(getattr(serializer, "encoding", None) or "utf-8")
+
+    def _decode_many(self, values):
+        if not self._binary:
+            return values
+        return [self._decode(value) for value in values]
+
+    def _create_connection_pool(self, **overrides):
+        kwargs = self._connection_kwargs()
+        if self._near is not None:
+            kwargs["redis_connect_func"] = self._enable_tracking
+        kwargs.update(overrides)
+        if self.blocking:
+            return BlockingConnectionPool(
+                max_connections=self.max_connections, timeout=self.pool_timeout, **kwargs
+            )
+        return ConnectionPool(max_connections=self.max_connections, **kwargs)
+
+    def _warm_up(self):
+        """
+        Open ``pool_min_size`` connections upfront so the first commands don't pay for the
+        connection setup. Failures are logged, connections will be opened on demand instead.
+        """
+        connections = []
+        try:
+            for _ in range(min(self.pool_min_size, self.max_connections)):
+                connections.append(self._connection_pool.get_connection())
+        except (redis.RedisError, OSError) as e:
+            logger.warning("Couldn't pre-warm the redis connection pool: %s", e)
+        finally:
+            for connection in connections:
+                self._connection_pool.release(connection)
+
+    def pool_stats(self):
+        """
+        Return the usage of the connection pool: ``max_connections``, connections ``created``
+        and currently ``in_use`` or ``idle``, number of times a connection was ``acquired``, number
+        of ``errors`` checking one out (pool exhausted or connection refused), and the total and
+        max seconds spent checking out connections (``wait_time``, ``max_wait``).
+        """
+        self._get_pool()
+        stats = self._connection_pool.stats()
+        if self.replicas:
+            stats["replicas"] = {
+                replica.name: dict(replica.pool.stats(), latency=replica.latency)
+                for replica in self._get_replicas()
+            }
+        return stats
+
+    def _start_near_cache(self):
+        prefixes = self.near_cache_prefixes
+        if prefixes is None:
+            prefixes = ["{}:".format(self.namespace) if getattr(self, "namespace", None) else ""]
+        self._listener = InvalidationListener(
+            self._near,
+            lambda: redis.Connection(**dict(self._connection_kwargs(), decode_responses=True)),
+            mode=self.near_cache_mode,
+            prefixes=prefixes,
+            db=self.db,
+            on_connect=self._near_cache_connected,
+        )
+        self._listener.start()
+
+    def _enable_tracking(self, connection):
+        if self._listener is None:
+            connection.on_connect()
+        else:
+            self._listener.enable_tracking(connection)
+
+    def _near_cache_connected(self):
+        # The client id receiving the invalidations changed, reconnect so tracking is enabled
+        # again on every connection.
+        if self.near_cache_mode == "tracking":
+            self._connection_pool.disconnect()
+
+    def near_cache_stats(self):
+        """
+        Return the near cache stats: whether it's ``available`` (invalidation connection up),
+        number of ``entries`` and ``max_size``, ``local_hits`` served from the process,
+        ``remote_hits`` and ``remote_misses`` read from redis, ``invalidations`` received for
+        local entries and ``flushes``.
+        """
+        if self._near is None:
+            raise ValueError("The near cache is not enabled, set near_cache_size")
+        return self._near.stats()
+
+    def pipeline_stats(self):
+        """
+        Return the auto pipelining stats: number of ``batches`` sent and ``commands`` in them,
+        ``avg_batch_size`` and ``max_batch_size``, and commands ``pending`` in the queue.
+        """
+        if not self.auto_pipeline:
+            raise ValueError("Auto pipelining is not enabled, set auto_pipeline")
+        self._get_pool()
+        return self._pipeline.stats()
+
     def _close(self, *args, **kwargs):
+        if self._pipeline is not None:
+            self._pipeline.stop()
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+            self._near.available = False
+            self._near.flush()
+        if self._connection_pool is not None:
+            self._connection_pool.disconnect()
+        for replica in self._replicas or []:
+            replica.pool.disconnect()
         return None
 
+    def _get_replicas(self):
+        with self._replicas_lock:
+            if self._replicas is None:
+                replicas = []
+                for host, port in self.replicas:
+                    pool = self._create_connection_pool(host=host, port=port)
+                    replicas.append(
+                        _Replica(
+                            "{}:{}".format(host, port),
+                            redis.Redis(connection_pool=pool),
+                            pool,
+                        )
+                    )
+                self._replicas = replicas
+            return self._replicas
+
+    def _pick_replica(self, keys):
+        """
+        Return the replica to read the keys from, or None when they must be read from the
+        primary because they were written less than ``read_your_writes`` ms ago.
+        """
+        if self.read_your_writes and self._recently_written(keys):
+            return None
+        replicas = self._get_replicas()
+        read = next(self._reads)
+        if self.replica_strategy == "least_latency" and read % self.LATENCY_PROBE_EVERY:
+            return min(
+                replicas, key=lambda replica: -1 if replica.latency is None else replica.latency
+            )
+        return replicas[read % len(replicas)]
+
+    def _wrote(self, *keys):
+        if self._near is not None:
+            self._near.invalidate(keys)
+        if not self.read_your_writes:
+            return
+        now = time.monotonic()
+        until = now + self.read_your_writes / 1000
+        with self._written_lock:
+            for key in keys:
+                self._written[key] = until
+            if len(self._written) >= self._prune_written_at:
+                self._written = {
+                    key: expires for key, expires in self._written.items() if expires > now
+                }
+                self._prune_written_at = max(1024, len(self._written) * 2)
+
+    def _wrote_all(self):
+        if self._near is not None:
+            self._near.flush()
+        if self.read_your_writes:
+            self._pinned_until = time.monotonic() + self.read_your_writes / 1000
+
+    def _recently_written(self, keys):
+        now = time.monotonic()
+        if self._pinned_until > now:
+            return True
+        if isinstance(keys, (str, bytes)):
+            keys = (keys,)
+        written = self._written
+        return any(written.get(key, 0) > now for key in keys)
+
     def acquire_conn(self):
         return self._get_pool()
 
     def release_conn(self, _conn):
         return None
 
-    @conn
+    @read_conn
     def _get(self, key, _conn=None):
-        return _conn.get(key)
+        if self._near is None:
+            return self._decode(_conn.get(key))
+        value = self._near.get(key)
+        if value is None:
+            token = self._near.begin(key)
+            value = _conn.get(key)
+            self._near.finish(key, token, value)
+        return self._decode(value)
 
     @conn
     def _gets(self, key, _conn=None):
-        return self._get(key, _conn=_conn)
+        # Always read from redis, the token must be the value it will compare with
+        return self._decode(_conn.get(key))
 
-    @conn
+    @read_conn
     def _multi_get(self, keys, _conn=None):
-        return _conn.mget(*keys)
+        if self._near is None:
+            return self._decode_many(_conn.mget(*keys))
+        values = [self._near.get(key) for key in keys]
+        missing = [index for index, value in enumerate(values) if value is None]
+        if missing:
+            tokens = [self._near.begin(keys[index]) for index in missing]
+            fetched = _conn.mget(*[keys[index] for index in missing])
+            for index, token, value in zip(missing, tokens, fetched):
+                self._near.finish(keys[index], token, value)
+                values[index] = value
+        return self._decode_many(values)
 
     @conn
-    def _set(self, key, value, ttl=None, _cas_token=None, _conn=None):
+    def _set(self, key, value, ttl=None, _cas_token=None, _cost=None, _conn=None):
         if _cas_token is not None:
-            return self._cas(key, value, _cas_token, ttl=ttl, _conn=_conn)
-        if ttl is None:
-            return _conn.set(key, value)
-        if REDIS_BEFORE_ONE:
-            return _conn.setex(key, value, ttl)
-        return _conn.setex(key, ttl, value)
+            ret = self._cas(key, value, _cas_token, ttl=ttl, _conn=_conn)
+        elif ttl is None:
+            ret = _conn.set(key, value)
+        elif REDIS_BEFORE_ONE:
+            ret = _conn.setex(key, value, ttl)
+        else:
+            ret = _conn.setex(key, ttl, value)
+        self._wrote(key)
+        return ret
 
     @conn
     def _cas(self, key, value, token, ttl=None, _conn=None):
@@ -115,11 +653,11 @@ class RedisBackend:
                 args += ["PX", int(ttl * 1000)]
             else:
                 args += ["EX", ttl]
-        res = self._raw("eval", self.CAS_SCRIPT, [key], args, _conn=_conn)
+        res = self._raw("eval", self.CAS_SCRIPT, 1, key, *args, _conn=_conn)
         return res
 
     @conn
-    def _multi_set(self, pairs, ttl=None, _conn=None):
+    def _multi_set(self, pairs, ttl=None, _cost=None, _conn=None):
         ttl = ttl or 0
 
         flattened = {key: value for key, value in pairs}
@@ -129,14 +667,22 @@ class RedisBackend:
         else:
             _conn.mset(flattened)
 
+        self._wrote(*flattened)
         return True
 
     def __multi_set_ttl(self, conn, flattened, ttl):
-        redis = conn.pipeline()
-        redis.mset(flattened)
-        for key in flattened:
-            redis.expire(key, ttl)
-        redis.execute()
+        # A single script call sets all the keys with their ttl atomically, in one round trip
+        # and with one reply to parse no matter how many keys there are.
+        unit, ttl = _expiry_args(ttl)
+        self.scripts.run(
+            conn,
+            self.MULTI_SET_TTL_SCRIPT,
+            len(flattened),
+            *flattened.keys(),
+            unit,
+            ttl,
+            *flattened.values()
+        )
 
     @conn
     def _add(self, key, value, ttl=None, _conn=None):
@@ -144,11 +690,12 @@ class RedisBackend:
         if isinstance(ttl, float):
             expx = {"pexpire": int(ttl * 1000)}
         was_set = _conn.set(key, value, exist=_conn.SET_IF_NOT_EXIST, **expx)
+        self._wrote(key)
         if not was_set:
             raise ValueError("Key {} already exists, use .set to update the value".format(key))
         return was_set
 
-    @conn
+    @read_conn
     def _exists(self, key, _conn=None):
         exists = _conn.exists(key)
         return True if exists > 0 else False
@@ -156,35 +703,87 @@ class RedisBackend:
     @conn
     def _increment(self, key, delta, _conn=None):
         try:
-            return _conn.incrby(key, delta)
+            ret = _conn.incrby(key, delta)
         except redis.exceptions.RedisError:
             raise TypeError("Value is not an integer") from None
+        self._wrote(key)
+        return ret
 
     @conn
     def _expire(self, key, ttl, _conn=None):
         if ttl == 0:
-            return _conn.persist(key)
-        return _conn.expire(key, ttl)
+            ret = _conn.persist(key)
+        else:
+            ret = _conn.expire(key, ttl)
+        self._wrote(key)
+        return ret
 
     @conn
     def _delete(self, key, _conn=None):
-        return _conn.delete(key)
+        ret = _conn.delete(key)
+        self._wrote(key)
+        return ret
 
     @conn
     def _clear(self, namespace=None, _conn=None):
         if namespace:
-            keys = _conn.keys("{}:*".format(namespace))
-            _conn.delete(*keys)
+            for _ in self._scan_unlink(namespace, _conn=_conn):
+                pass
         else:
             _conn.flushdb()
+        self._wrote_all()
         return True
 
+    def clear_in_background(self, namespace=None, progress=None):
+        """
+        Clear the keys of the namespace from a daemon thread, the same way ``clear`` does. When
+        no namespace is given the cache namespace is used and, if it is empty, all the keys in
+        the database are scanned and unlinked instead of flushing it.
+
+        :param namespace: str alternative namespace to use
+        :param progress: callable receiving the :class:`ClearJob` after every deleted batch
+        :returns: :class:`ClearJob` to follow the progress, wait for it or cancel it
+        """
+        namespace = self.namespace if namespace is None else namespace
+        job = ClearJob(namespace, progress=progress)
+        thread = threading.Thread(
+            target=job._run,
+            args=(self._scan_unlink(namespace),),
+            name="pycached-clear",
+            daemon=True,
+        )
+        thread.start()
+        return job
+
+    @conn
+    def _scan_unlink(self, namespace, _conn=None):
+        """
+        Walk the keyspace with SCAN and UNLINK the keys of the namespace in batches of
+        ``unlink_batch`` keys, so redis is never blocked for long and frees the memory in its
+        background thread. Yields the number of keys matched and deleted for each batch.
+        """
+        match = "{}:*".format(_escape_pattern(namespace)) if namespace else "*"
+        batch = []
+        for key in _conn.scan_iter(match=match, count=self.scan_count):
+            batch.append(key)
+            if len(batch) >= self.unlink_batch:
+                yield len(batch), self._unlink(_conn, batch)
+                batch = []
+        if batch:
+            yield len(batch), self._unlink(_conn, batch)
+
+    def _unlink(self, conn, keys):
+        return conn.unlink(*keys)
+
     @conn
     def _raw(self, command, *args, _conn=None, **kwargs):
+        if command == "eval":
+            # Scripts go through the registry so they are sent once and then called by SHA
+            return self.scripts.run(_conn, *args, **kwargs)
         return getattr(_conn, command)(*args, **kwargs)
 
     def _redlock_release(self, key, value):
-        return self._raw("eval", self.RELEASE_SCRIPT, [key], [value])
+        return self._raw("eval", self.RELEASE_SCRIPT, 1, key, value)
 
     @classmethod
     def parse_uri_path(self, path):
@@ -202,12 +801,20 @@ class RedisBackend:
         return options
 
 
+def _escape_pattern(namespace):
+    return re.sub(r"([*?\[\]\\])", r"\\\1", namespace)
+
+
 class RedisCache(RedisBackend, BaseCache):
     """
     Redis cache implementation with the following components as defaults:
         - serializer: :class:`pycached.serializers.JsonSerializer`
         - plugins: []
 
+    Lua scripts, the ones used by the cache and the ones sent with
+    ``raw("eval", script, numkeys, *keys_and_args)``, are loaded once and then called by SHA,
+    see :class:`pycached.backends.scripts.ScriptRegistry`.
+
     Config options are:
 
     :param serializer: obj derived from :class:`pycached.serializers.BaseSerializer`.
@@ -220,15 +827,59 @@ class RedisCache(RedisBackend, BaseCache):
     :param port: int with the port to connect to. Default is 6379.
     :param db: int indicating database to use. Default is 0.
     :param password: str indicating password to use. Default is None.
-    :param pool_min_size: int minimum pool size for the redis connections pool. Default is 1
-    :param pool_max_size: int maximum pool size for the redis connections pool. Default is 10
-    :param create_connection_timeout: int timeout for the creation of connection,
-        only for redis>=1. Default is None
+    :param max_connections: int maximum number of connections in the pool. Default is 10
+    :param blocking: bool, when all the connections are in use, wait for one to be released
+        instead of raising ``redis.ConnectionError``. Default is False
+    :param pool_timeout: float seconds to wait for a connection when ``blocking`` is set, None
+        waits forever. Default is None
+    :param pool_min_size: int number of connections opened when the cache is created.
+        Default is 0
+    :param create_connection_timeout: float timeout for the creation of connection.
+        Default is None
+    :param socket_timeout: float timeout for the commands sent on a connection. Default is None
+    :param socket_keepalive: bool enabling TCP keepalive on the connections. Default is False
+    :param health_check_interval: int seconds a connection can stay idle before it is checked
+        with a PING when it is used again, 0 disables it. Default is 0
+    :param replicas: list of ``"host:port"`` str or comma separated str with replicas of the
+        endpoint. When set, ``get``, ``multi_get`` and ``exists`` are sent to them while the
+        other commands, including CAS and locks, still go to the endpoint. Default is None
+    :param replica_strategy: str, how the replica for each read is chosen, "round_robin" or
+        "least_latency". Default is "round_robin"
+    :param read_your_writes: int milliseconds after a write during which the keys written are
+        read from the endpoint instead of a replica, so the replication lag doesn't return
+        stale values. Default is None
+    :param near_cache_size: int max number of values kept in process by the near cache, 0
+        disables it. ``get`` and ``multi_get`` are served from it and local entries are dropped
+        as soon as redis reports the key changed, see
+        :class:`pycached.backends.near.InvalidationListener`. Can't be used with ``replicas``.
+        Default is 0
+    :param near_cache_mode: str, how changes are reported: "tracking" (CLIENT TRACKING of the
+        keys read), "bcast" (CLIENT TRACKING of all the keys with the near cache prefixes) or
+        "keyspace" (keyspace notifications, they must be enabled in the server).
+        Default is "tracking"
+    :param near_cache_prefixes: list or comma separated str of key prefixes followed in "bcast"
+        and "keyspace" modes. Default is the namespace
+    :param auto_pipeline: bool, queue the commands of all the threads and send them together
+        in pipelines from a background thread, see
+        :class:`pycached.backends.pipelining.AutoPipeline`. Each command waits up to
+        ``pipeline_window`` for others to share its round trip, so it pays off with many
+        concurrent callers. Default is False
+    :param pipeline_window: float milliseconds a batch of commands stays open before it is
+        sent. Default is 0.5
+    :param pipeline_max_batch: int max number of commands in a batch, it's sent as soon as it's
+        full. Default is 128
+    :param binary: bool, connections return bytes instead of decoding every reply to str.
+        Values are passed to the serializer as they come when it works with bytes (its
+        ``DATA_TYPE``, i.e. :class:`pycached.serializers.PickleSerializer`), and decoded once
+        otherwise. Replies of ``raw`` are bytes too. Default is None, which enables it when the
+        serializer works with bytes
+    :param scan_count: int COUNT hint given to SCAN when clearing a namespace. Default is 1000
+    :param unlink_batch: int max number of keys sent in each UNLINK when clearing a namespace.
+        Default is 1000
     """
 
     def __init__(self, serializer=None, **kwargs):
-        super().__init__(**kwargs)
-        self.serializer = serializer or JsonSerializer()
+        super().__init__(serializer=serializer or JsonSerializer(), **kwargs)
 
     def _build_key(self, key, namespace=None):
         if namespace is not None:
@@ -0,0 +1,110 @@
+"""
+Lua scripts registry used by :class:`pycached.RedisCache`. Scripts are loaded in redis once and
+then called by their SHA1 digest with EVALSHA instead of sending the whole source with EVAL.
+"""
+
+import hashlib
+import logging
+
+import redis
+
+logger = logging.getLogger(__name__)
+
+
+class Script:
+    """
+    Lua script and its SHA1 digest, computed locally so it doesn't depend on the server reply.
+    ``loaded`` tells whether the script was loaded in the server by the registry.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.sha = hashlib.sha1(source.encode("utf-8")).hexdigest()
+        self.loaded = False
+
+
+class ScriptRegistry:
+    """
+    Keeps the scripts run by a backend. The first time a script runs, all the scripts registered
+    and not loaded yet are loaded with SCRIPT LOAD. Scripts are then called with EVALSHA and,
+    when the server answers NOSCRIPT because its script cache was flushed (restart, failover,
+    SCRIPT FLUSH), they are all loaded again and the call is retried once.
+
+    Scripts run with :meth:`run` are registered on the fly, which is how ``raw("eval", ...)``
+    calls get the same treatment as the backend ones.
+    """
+
+    def __init__(self, scripts=()):
+        self._scripts = {}
+        for source in scripts:
+            self.register(source)
+
+    def register(self, source):
+        """
+        Register the script and return its :class:`Script`.
+        """
+        script = self._scripts.get(source)
+        if script is None:
+            script = self._scripts.setdefault(source, Script(source))
+        return script
+
+    def load(self, conn):
+        """
+        Load in the server the scripts that aren't loaded yet.
+        """
+        for script in list(self._scripts.values()):
+            if not script.loaded:
+                conn.script_load(script.source)
+                script.loaded = True
+
+    def reset(self):
+        """
+        Mark all the scripts as not loaded, they will be loaded again on next use.
+        """
+        for script in list(self._scripts.values()):
+            script.loaded = False
+
+    def run(self, conn, source, numkeys, *keys_and_args):
+        """
+        Run the script with EVALSHA, taking the same arguments as redis-py ``eval``.
+        """
+        script = self.register(source)
+        if not script.loaded:
+            self.load(conn)
+        try:
+            return conn.evalsha(script.sha, numkeys, *keys_and_args)
+        except redis.exceptions.NoScriptError:
+            logger.debug("Script %s not in the server, loading the scripts again", script.sha)
+            self.reset()
+            self.load(conn)
+            return conn.evalsha(script.sha, numkeys, *keys_and_args)
+
+    async def run_async(self, conn, source, numkeys, *keys_and_args):
+        """
+        Same as :meth:`run` with a :mod:`redis.asyncio` client.
+        """
+        script = self.register(source)
+        if not script.loaded:
+            await self.load_async(conn)
+        try:
+            return await conn.evalsha(script.sha, numkeys, *keys_and_args)
+        except redis.exceptions.NoScriptError:
+            logger.debug("Script %s not in the server, loading the scripts again", script.sha)
+            self.reset()
+            await self.load_async(conn)
+            return await conn.evalsha(script.sha, numkeys, *keys_and_args)
+
+    async def load_async(self, conn):
+        """
+        Same as :meth:`load` with a :mod:`redis.asyncio` client.
+        """
+        for script in list(self._scripts.values()):
+            if not script.loaded:
+                await conn.script_load(script.source)
+                script.loaded = True
+
+    def __contains__(self, source):
+        return source in self._scripts
+
+    def __len__(self):
+        return len(self._scripts)
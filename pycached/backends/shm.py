@@ -0,0 +1,742 @@
+import fcntl
+import hashlib
+import mmap
+import os
+import re
+import struct
+import tempfile
+import threading
+import time
+
+from pycached.base import BaseCache
+from pycached.serializers import JsonSerializer
+
+MAGIC = b"PYCSHM01"
+VERSION = 1
+
+MIN_CHUNK_BITS = 6
+N_CLASSES = 24
+NONE = 0xFFFFFFFFFFFFFFFF
+
+HEADER_SIZE = 512
+_Q = struct.Struct("<Q")
+_HEADER = struct.Struct("<8sIIQQQ")
+BUMP_OFFSET = 40
+HAND_OFFSET = 48
+EVICTIONS_OFFSET = 56
+ENTRIES_OFFSET = 64
+USED_OFFSET = 72
+HEADS_OFFSET = 80
+
+# state, slab class, value type, referenced, key length, value length, key hash,
+# expiration timestamp and offset of the chunk in the arena.
+_SLOT = struct.Struct("<BBBBHxxIQdQ4x")
+_EXPIRES = struct.Struct("<d")
+EXPIRES_OFFSET = struct.calcsize("<BBBBHxxIQ")
+EMPTY, USED, DELETED = 0, 1, 2
+BYTES, STR, INT = 0, 1, 2
+
+_SIZE_RE = re.compile(r"^\s*(\d+)\s*([kmg]?)b?\s*$", re.IGNORECASE)
+_UNITS = {"": 1, "k": 1 << 10, "m": 1 << 20, "g": 1 << 30}
+
+
+def parse_size(size):
+    """
+    Return the number of bytes of a size given as int or str with an optional
+    k, m or g unit (i.e. "64m" or "1gb").
+    """
+    if isinstance(size, int):
+        return size
+    match = _SIZE_RE.match(size)
+    if match is None:
+        raise ValueError("Invalid size {!r}, use a number of bytes or i.e. '64m'".format(size))
+    return int(match.group(1)) * _UNITS[match.group(2).lower()]
+
+
+def _hash(key):
+    # hash() is randomized per process, the segment needs a hash all the workers agree on.
+    return _Q.unpack(hashlib.blake2b(key, digest_size=8).digest())[0]
+
+
+def _slab_class(size):
+    return max(0, (size - 1).bit_length() - MIN_CHUNK_BITS)
+
+
+def _chunk_size(slab_class):
+    return 1 << (slab_class + MIN_CHUNK_BITS)
+
+
+def _encode(value):
+    if isinstance(value, bytes):
+        return BYTES, value
+    if isinstance(value, (bytearray, memoryview)):
+        return BYTES, bytes(value)
+    if isinstance(value, str):
+        return STR, value.encode()
+    if type(value) is int:
+        return INT, str(value).encode()
+    raise TypeError(
+        "SharedMemoryCache can only store str, bytes or int values, got {}. "
+        "Use a serializer to store other types".format(type(value).__name__)
+    )
+
+
+def _decode(flag, data):
+    if flag == STR:
+        return data.decode()
+    if flag == INT:
+        return int(data)
+    return data
+
+
+class SharedMemorySegment:
+    """
+    Hash table and slab arena living in a memory mapped file, so every process mapping the
+    same file sees the same keys.
+
+    The file starts with a header, followed by a table of fixed size slots and the arena
+    where keys and values are stored. The table is split in ``stripes`` regions: a key always
+    lives in the region its hash points to (open addressing with linear probing inside the
+    region), so holding the lock of a region is enough to operate on its keys. Locks are
+    ``fcntl`` byte range locks on the file, which work across processes, paired with a thread
+    lock as the former are owned by the whole process.
+
+    The arena is a slab allocator with power of two chunk classes. Freed chunks are kept in a
+    free list per class and bigger free chunks are split when a class runs out. When the arena
+    is full, entries are evicted following the CLOCK algorithm (entries read since the hand
+    last passed get a second chance), expired entries being reclaimed first. Free chunks are
+    not merged: if there is no entry big enough to make room, smaller ones are evicted, and
+    the arena is handed out from the start again once it has no entries.
+    """
+
+    def __init__(self, path, size, slots=None, stripes=16):
+        self.path = path
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, 0)
+        try:
+            if os.fstat(self._fd).st_size == 0:
+                self._create(size, slots, stripes)
+            else:
+                self._attach()
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, 0)
+        self._reset_thread_locks()
+
+    def _create(self, size, slots, stripes):
+        stripes = max(int(stripes), 1)
+        slots = int(slots) if slots else max(stripes * 8, size // 512)
+        slots = -(-slots // stripes) * stripes
+        arena_offset = HEADER_SIZE + slots * _SLOT.size
+        arena_offset = -(-arena_offset // 64) * 64
+        if size - arena_offset < _chunk_size(0):
+            raise ValueError(
+                "Size {} is too small for {} slots, at least {} bytes are needed".format(
+                    size, slots, arena_offset + _chunk_size(0)
+                )
+            )
+
+        os.ftruncate(self._fd, size)
+        self._mm = mmap.mmap(self._fd, size)
+        _HEADER.pack_into(self._mm, 0, MAGIC, VERSION, stripes, slots, arena_offset, size)
+        self._load_geometry()
+        self._reset()
+
+    def _attach(self):
+        self._mm = mmap.mmap(self._fd, os.fstat(self._fd).st_size)
+        magic, version, *_ = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("{} is not a pycached shared memory segment".format(self.path))
+        self._load_geometry()
+
+    def _load_geometry(self):
+        _, _, self.stripes, self.slots, self.arena_offset, self.size = _HEADER.unpack_from(
+            self._mm, 0
+        )
+        self.arena_size = self.size - self.arena_offset
+        self.stripe_slots = self.slots // self.stripes
+
+    def _reset(self):
+        self._mm[HEADER_SIZE : self.arena_offset] = bytes(self.arena_offset - HEADER_SIZE)
+        for offset in (BUMP_OFFSET, HAND_OFFSET, EVICTIONS_OFFSET, ENTRIES_OFFSET, USED_OFFSET):
+            self._write_counter(offset, 0)
+        for slab_class in range(N_CLASSES):
+            self._write_counter(HEADS_OFFSET + slab_class * 8, NONE)
+
+    def _reset_thread_locks(self):
+        self._thread_locks = [threading.Lock() for _ in range(self.stripes + 1)]
+
+    def close(self):
+        self._mm.close()
+        os.close(self._fd)
+
+    # Locking
+
+    def _acquire(self, index, blocking=True):
+        lock = self._thread_locks[index]
+        if not lock.acquire(blocking):
+            return False
+        try:
+            fcntl.lockf(
+                self._fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB, 1, 1 + index
+            )
+        except OSError:
+            lock.release()
+            if blocking:
+                raise
+            return False
+        return True
+
+    def _release(self, index):
+        fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, 1 + index)
+        self._thread_locks[index].release()
+
+    def locked(self, stripe):
+        return _Locked(self, stripe)
+
+    def _allocator_lock(self):
+        return _Locked(self, self.stripes)
+
+    def stripe(self, key_hash):
+        return key_hash % self.stripes
+
+    # Header counters
+
+    def _read_counter(self, offset):
+        return _Q.unpack_from(self._mm, offset)[0]
+
+    def _write_counter(self, offset, value):
+        _Q.pack_into(self._mm, offset, value)
+
+    def _add_counter(self, offset, delta):
+        self._write_counter(offset, self._read_counter(offset) + delta)
+
+    # Arena, callers must hold the allocator lock
+
+    def _pop_free(self, slab_class):
+        head_offset = HEADS_OFFSET + slab_class * 8
+        head = self._read_counter(head_offset)
+        if head != NONE:
+            self._write_counter(head_offset, self._read_counter(self.arena_offset + head))
+        return head
+
+    def _push_free(self, slab_class, chunk):
+        head_offset = HEADS_OFFSET + slab_class * 8
+        self._write_counter(self.arena_offset + chunk, self._read_counter(head_offset))
+        self._write_counter(head_offset, chunk)
+
+    def _alloc(self, slab_class):
+        chunk = self._pop_free(slab_class)
+        if chunk == NONE:
+            bump = self._read_counter(BUMP_OFFSET)
+            if bump + _chunk_size(slab_class) <= self.arena_size:
+                self._write_counter(BUMP_OFFSET, bump + _chunk_size(slab_class))
+                chunk = bump
+
+        if chunk == NONE:
+            for bigger in range(slab_class + 1, N_CLASSES):
+                chunk = self._pop_free(bigger)
+                if chunk != NONE:
+                    for split in range(slab_class, bigger):
+                        self._push_free(split, chunk + _chunk_size(split))
+                    break
+
+        if chunk == NONE:
+            return None
+        self._add_counter(ENTRIES_OFFSET, 1)
+        self._add_counter(USED_OFFSET, _chunk_size(slab_class))
+        return chunk
+
+    def _free(self, slab_class, chunk):
+        self._add_counter(ENTRIES_OFFSET, -1)
+        self._add_counter(USED_OFFSET, -_chunk_size(slab_class))
+        if not self._read_counter(ENTRIES_OFFSET):
+            # Free chunks are never merged, start over from a whole arena once it is empty
+            self._write_counter(BUMP_OFFSET, 0)
+            for free_class in range(N_CLASSES):
+                self._write_counter(HEADS_OFFSET + free_class * 8, NONE)
+            return
+        self._push_free(slab_class, chunk)
+
+    def _allocate(self, slab_class, held):
+        while True:
+            with self._allocator_lock():
+                chunk = self._alloc(slab_class)
+            if chunk is not None:
+                return chunk
+            # Entries of smaller classes are evicted too when there are no big enough ones,
+            # emptying the arena if it is split in smaller chunks than needed.
+            if not self._evict(slab_class, held) and not self._evict(0, held):
+                raise ValueError(
+                    "Not enough space in the shared memory segment for a {} bytes entry".format(
+                        _chunk_size(slab_class)
+                    )
+                )
+
+    def _evict(self, slab_class, held):
+        """
+        Free one entry whose chunk can hold ``slab_class``. Stripes locked by someone else are
+        skipped, otherwise two writers evicting from each other's stripe could deadlock.
+        """
+        with self._allocator_lock():
+            start = self._read_counter(HAND_OFFSET)
+        now = time.time()
+        for step in range(2 * self.stripes):
+            stripe = (start + step) % self.stripes
+            if stripe != held and not self._acquire(stripe, blocking=False):
+                continue
+            try:
+                for index in self._stripe_range(stripe):
+                    slot = self._read_slot(index)
+                    if slot[0] != USED or slot[1] < slab_class:
+                        continue
+                    if self._expired(slot, now):
+                        self._delete_slot(index, slot)
+                        return True
+                    if slot[3]:
+                        self._mm[self._slot_offset(index) + 3] = 0
+                        continue
+                    self._delete_slot(index, slot)
+                    with self._allocator_lock():
+                        self._add_counter(EVICTIONS_OFFSET, 1)
+                        self._write_counter(HAND_OFFSET, (stripe + 1) % self.stripes)
+                    return True
+            finally:
+                if stripe != held:
+                    self._release(stripe)
+        return False
+
+    # Table, callers must hold the lock of the stripe
+
+    def _slot_offset(self, index):
+        return HEADER_SIZE + index * _SLOT.size
+
+    def _read_slot(self, index):
+        return _SLOT.unpack_from(self._mm, self._slot_offset(index))
+
+    def _stripe_range(self, stripe):
+        return range(stripe * self.stripe_slots, (stripe + 1) * self.stripe_slots)
+
+    @staticmethod
+    def _expired(slot, now=None):
+        return slot[7] and slot[7] <= (time.time() if now is None else now)
+
+    def _slot_key(self, slot):
+        start = self.arena_offset + slot[8]
+        return self._mm[start : start + slot[4]]
+
+    def _slot_value(self, slot):
+        start = self.arena_offset + slot[8] + slot[4]
+        return _decode(slot[2], self._mm[start : start + slot[5]])
+
+    def find(self, key, key_hash):
+        """
+        Return ``(index, slot)`` of the key or ``(None, index)`` with the slot where it can be
+        inserted (None if the stripe is full). Expired entries found on the way are deleted.
+        """
+        stripe = self.stripe(key_hash)
+        home = (key_hash // self.stripes) % self.stripe_slots
+        base = stripe * self.stripe_slots
+        free = None
+        for step in range(self.stripe_slots):
+            index = base + (home + step) % self.stripe_slots
+            slot = self._read_slot(index)
+            if slot[0] == EMPTY:
+                return None, index if free is None else free
+            if slot[0] == DELETED:
+                if free is None:
+                    free = index
+                continue
+            if slot[6] == key_hash and slot[4] == len(key) and self._slot_key(slot) == key:
+                if self._expired(slot):
+                    self._delete_slot(index, slot)
+                    return None, index if free is None else free
+                return index, slot
+        return None, free
+
+    def read(self, key, key_hash):
+        index, slot = self.find(key, key_hash)
+        if index is None:
+            return None
+        if not slot[3]:
+            self._mm[self._slot_offset(index) + 3] = 1
+        return self._slot_value(slot)
+
+    def write(self, key, key_hash, value, expires=None, keep_ttl=False):
+        if len(key) > 0xFFFF:
+            raise ValueError("Keys can't be longer than 65535 bytes")
+        flag, data = _encode(value)
+        slab_class = _slab_class(len(key) + len(data))
+        if slab_class >= N_CLASSES or _chunk_size(slab_class) > self.arena_size:
+            raise ValueError(
+                "Entry of {} bytes doesn't fit in the shared memory segment".format(
+                    len(key) + len(data)
+                )
+            )
+
+        stripe = self.stripe(key_hash)
+        index, slot = self.find(key, key_hash)
+        if index is not None:
+            if keep_ttl:
+                expires = slot[7]
+            if slot[1] == slab_class:
+                chunk = slot[8]
+            else:
+                self._delete_slot(index, slot)
+                index, chunk = None, None
+        else:
+            chunk = None
+
+        if chunk is None:
+            chunk = self._allocate(slab_class, stripe)
+            index, free = self.find(key, key_hash)
+            if free is None:
+                free = self._make_room(stripe, key_hash)
+            index = free
+
+        start = self.arena_offset + chunk
+        self._mm[start : start + len(key)] = key
+        self._mm[start + len(key) : start + len(key) + len(data)] = data
+        _SLOT.pack_into(
+            self._mm,
+            self._slot_offset(index),
+            USED,
+            slab_class,
+            flag,
+            0,
+            len(key),
+            len(data),
+            key_hash,
+            expires or 0.0,
+            chunk,
+        )
+
+    def _make_room(self, stripe, key_hash):
+        now = time.time()
+        for index in self._stripe_range(stripe):
+            slot = self._read_slot(index)
+            if self._expired(slot, now):
+                self._delete_slot(index, slot)
+                return index
+
+        index = stripe * self.stripe_slots + (key_hash // self.stripes) % self.stripe_slots
+        self._delete_slot(index, self._read_slot(index))
+        with self._allocator_lock():
+            self._add_counter(EVICTIONS_OFFSET, 1)
+        return index
+
+    def set_expiration(self, index, expires):
+        _EXPIRES.pack_into(self._mm, self._slot_offset(index) + EXPIRES_OFFSET, expires or 0.0)
+
+    def delete(self, key, key_hash):
+        index, slot = self.find(key, key_hash)
+        if index is None:
+            return 0
+        self._delete_slot(index, slot)
+        return 1
+
+    def _delete_slot(self, index, slot):
+        with self._allocator_lock():
+            self._free(slot[1], slot[8])
+
+        offset = self._slot_offset(index)
+        self._mm[offset] = DELETED
+        # If the probe sequence ends right after, tombstones are not needed anymore.
+        base = index - index % self.stripe_slots
+        following = base + (index - base + 1) % self.stripe_slots
+        if self._mm[self._slot_offset(following)] != EMPTY:
+            return
+        while self._mm[offset] == DELETED:
+            self._mm[offset] = EMPTY
+            index = base + (index - base - 1) % self.stripe_slots
+            offset = self._slot_offset(index)
+
+    def entries(self, stripe, prefix=b""):
+        """
+        Return the list of ``(index, slot, key)`` live entries of the stripe whose key starts
+        with prefix.
+        """
+        now = time.time()
+        found = []
+        for index in self._stripe_range(stripe):
+            slot = self._read_slot(index)
+            if slot[0] != USED:
+                continue
+            if self._expired(slot, now):
+                self._delete_slot(index, slot)
+                continue
+            key = self._slot_key(slot)
+            if key.startswith(prefix):
+                found.append((index, slot, key))
+        return found
+
+    def clear(self):
+        for stripe in range(self.stripes + 1):
+            self._acquire(stripe)
+        try:
+            self._reset()
+        finally:
+            for stripe in reversed(range(self.stripes + 1)):
+                self._release(stripe)
+
+    def stats(self):
+        return {
+            "entries": self._read_counter(ENTRIES_OFFSET),
+            "bytes": self._read_counter(USED_OFFSET),
+            "slots": self.slots,
+            "arena_bytes": self.arena_size,
+            "evictions": self._read_counter(EVICTIONS_OFFSET),
+        }
+
+
+class _Locked:
+    __slots__ = ("_segment", "_index")
+
+    def __init__(self, segment, index):
+        self._segment = segment
+        self._index = index
+
+    def __enter__(self):
+        self._segment._acquire(self._index)
+
+    def __exit__(self, *exc_info):
+        self._segment._release(self._index)
+
+
+class SharedMemoryBackend:
+    """
+    Backend storing the keys in a :class:`SharedMemorySegment`, shared by all the processes of
+    the host using the same segment name.
+    """
+
+    _segments = {}
+    _segments_lock = threading.Lock()
+
+    def __init__(
+        self,
+        name="pycached",
+        size="64m",
+        slots=None,
+        stripes=16,
+        directory=None,
+        endpoint=None,
+        **kwargs
+    ):
+        super().__init__(**kwargs)
+        self.name = endpoint or name
+        self.segment_size = parse_size(size)
+        self.directory = directory or ("/dev/shm" if os.path.isdir("/dev/shm") else None)
+        self.path = os.path.join(
+            self.directory or tempfile.gettempdir(), "pycached-{}".format(self.name)
+        )
+        with SharedMemoryBackend._segments_lock:
+            if self.path not in SharedMemoryBackend._segments:
+                SharedMemoryBackend._segments[self.path] = SharedMemorySegment(
+                    self.path, self.segment_size, slots=slots, stripes=stripes
+                )
+            self._segment = SharedMemoryBackend._segments[self.path]
+
+    @staticmethod
+    def _key(key):
+        key = key.encode() if isinstance(key, str) else bytes(key)
+        return key, _hash(key)
+
+    @staticmethod
+    def _expires(ttl):
+        return time.time() + ttl if ttl else 0.0
+
+    def _get(self, key, _conn=None):
+        key, key_hash = self._key(key)
+        with self._segment.locked(self._segment.stripe(key_hash)):
+            return self._segment.read(key, key_hash)
+
+    def _gets(self, key, _conn=None):
+        return self._get(key, _conn=_conn)
+
+    def _multi_get(self, keys, _conn=None):
+        return [self._get(key) for key in keys]
+
+    def _set(self, key, value, ttl=None, _cas_token=None, _cost=None, _conn=None):
+        key, key_hash = self._key(key)
+        with self._segment.locked(self._segment.stripe(key_hash)):
+            if _cas_token is not None and _cas_token != self._segment.read(key, key_hash):
+                return 0
+            self._segment.write(key, key_hash, value, self._expires(ttl))
+        return True
+
+    def _multi_set(self, pairs, ttl=None, _cost=None, _conn=None):
+        for key, value in pairs:
+            self._set(key, value, ttl=ttl)
+        return True
+
+    def _add(self, key, value, ttl=None, _conn=None):
+        key, key_hash = self._key(key)
+        with self._segment.locked(self._segment.stripe(key_hash)):
+            if self._segment.find(key, key_hash)[0] is not None:
+                raise ValueError(
+                    "Key {} already exists, use .set to update the value".format(key.decode())
+                )
+            self._segment.write(key, key_hash, value, self._expires(ttl))
+        return True
+
+    def _exists(self, key, _conn=None):
+        key, key_hash = self._key(key)
+        with self._segment.locked(self._segment.stripe(key_hash)):
+            return self._segment.find(key, key_hash)[0] is not None
+
+    def _increment(self, key, delta, _conn=None):
+        key, key_hash = self._key(key)
+        with self._segment.locked(self._segment.stripe(key_hash)):
+            current = self._segment.read(key, key_hash)
+            if current is None:
+                value = delta
+                current = ""
+            else:
+                try:
+                    value = int(current) + delta
+                except ValueError:
+                    raise TypeError("Value is not an integer") from None
+            stored = value if type(current) is int else str(value)
+            if isinstance(current, bytes):
+                stored = stored.encode()
+            self._segment.write(key, key_hash, stored, keep_ttl=True)
+        return value
+
+    def _expire(self, key, ttl, _conn=None):
+        key, key_hash = self._key(key)
+        with self._segment.locked(self._segment.stripe(key_hash)):
+            index, _ = self._segment.find(key, key_hash)
+            if index is None:
+                return False
+            self._segment.set_expiration(index, self._expires(ttl))
+        return True
+
+    def _delete(self, key, _conn=None):
+        key, key_hash = self._key(key)
+        with self._segment.locked(self._segment.stripe(key_hash)):
+            return self._segment.delete(key, key_hash)
+
+    def _clear(self, namespace=None, _conn=None):
+        if not namespace:
+            self._segment.clear()
+            return True
+
+        prefix = "{}:".format(namespace).encode()
+        for stripe in range(self._segment.stripes):
+            with self._segment.locked(stripe):
+                for index, slot, _ in self._segment.entries(stripe, prefix):
+                    self._segment._delete_slot(index, slot)
+        return True
+
+    def _raw(self, command, *args, _conn=None, **kwargs):
+        return getattr(self._segment, command)(*args, **kwargs)
+
+    def _redlock_release(self, key, value):
+        key, key_hash = self._key(key)
+        with self._segment.locked(self._segment.stripe(key_hash)):
+            if self._segment.read(key, key_hash) == value:
+                return self._segment.delete(key, key_hash)
+        return 0
+
+    def keys(self, namespace=None):
+        """
+        Iterate over the keys stored in the segment or, if namespace is passed, in that
+        namespace. It has to scan the whole table.
+        """
+        prefix = "{}:".format(namespace).encode() if namespace else b""
+        for stripe in range(self._segment.stripes):
+            with self._segment.locked(stripe):
+                keys = [key.decode() for _, _, key in self._segment.entries(stripe, prefix)]
+            yield from keys
+
+    def size(self, namespace=None):
+        """
+        Return the number of keys in the segment or, if namespace is passed, in that namespace.
+        """
+        if namespace is None:
+            return self._segment.stats()["entries"]
+        return sum(1 for _ in self.keys(namespace))
+
+    def stats(self):
+        """
+        Return a dict with the number of entries, bytes of the arena in use, number of slots,
+        arena size and evictions. Counters are shared by all the processes.
+        """
+        return self._segment.stats()
+
+    def unlink(self):
+        """
+        Remove the file backing the segment. Processes that already mapped it keep using it,
+        new instances will create a new one.
+        """
+        with SharedMemoryBackend._segments_lock:
+            segment = SharedMemoryBackend._segments.pop(self.path, None)
+        if segment is not None:
+            segment.close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    @classmethod
+    def parse_uri_path(cls, path):
+        return {}
+
+
+def _after_fork():
+    # Thread locks may have been held by threads that don't exist in the child.
+    for segment in SharedMemoryBackend._segments.values():
+        segment._reset_thread_locks()
+    SharedMemoryBackend._segments_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork)
+
+
+class SharedMemoryCache(SharedMemoryBackend, BaseCache):
+    """
+    Cache shared by all the processes of the host, with the following components as defaults:
+        - serializer: :class:`pycached.serializers.JsonSerializer`
+        - plugins: []
+
+    Values are stored in a memory mapped file (under ``/dev/shm`` when available) instead of
+    the heap of each process, so pre-forked workers share a single copy and each other's hits.
+    Serialized values must be str, bytes or int. Instantiate it with
+    ``Cache.from_url("shm://name?size=1g")``.
+
+    Config options are:
+
+    :param serializer: obj derived from :class:`pycached.serializers.BaseSerializer`.
+    :param plugins: list of :class:`pycached.plugins.BasePlugin` derived classes.
+    :param namespace: string to use as default prefix for the key used in all operations of
+        the backend. Default is None.
+    :param timeout: int or float in seconds specifying maximum timeout for the operations to last.
+        By default its 5.
+    :param name: str name of the segment. Caches using the same name share their keys. When
+        created from a url, the host is used. Default is "pycached".
+    :param size: int bytes or str like "64m" or "1g" with the size of the segment. Only used by
+        the first process creating it. Default is "64m".
+    :param slots: int maximum number of keys. Default is one per 512 bytes of ``size``.
+    :param stripes: int number of locks the keys are spread over. Default is 16.
+    :param directory: str directory where the segment file is created. Default is
+        ``/dev/shm`` or the temporary directory if it doesn't exist.
+
+    When the segment is full, the least recently read entries are evicted (CLOCK algorithm).
+    Expired keys are removed when found by reads, writes and evictions.
+    """
+
+    NAME = "shm"
+
+    def __init__(self, serializer=None, **kwargs):
+        super().__init__(**kwargs)
+        self.serializer = serializer or JsonSerializer()
+
+    def _build_key(self, key, namespace=None):
+        if namespace is not None:
+            return "{}{}{}".format(namespace, ":" if namespace else "", key)
+        if self.namespace is not None:
+            return "{}{}{}".format(self.namespace, ":" if self.namespace else "", key)
+        return key
+
+    def __repr__(self):  # pragma: no cover
+        return "SharedMemoryCache ({})".format(self.path)
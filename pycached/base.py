@@ -1,4 +1,5 @@
 import functools
+import inspect
 import logging
 import os
 import time
@@ -12,6 +13,19 @@ logger = logging.getLogger(__name__)
 SENTINEL = object()
 
 
+@functools.lru_cache(maxsize=256)
+def _takes_cost(function):
+    params = inspect.signature(function).parameters.values()
+    return any(param.name == "_cost" or param.kind == param.VAR_KEYWORD for param in params)
+
+
+def _cost_kwargs(method, cost):
+    # Only cost aware backends take _cost, the rest keep their documented _set signature
+    if cost is None or not _takes_cost(getattr(method, "__func__", method)):
+        return {}
+    return {"_cost": cost}
+
+
 class API:
     CMDS = set()
 
@@ -239,7 +253,15 @@ class BaseCache:
     # @API.timeout
     @API.plugins
     def set(
-            self, key, value, ttl=SENTINEL, dumps_fn=None, namespace=None, _cas_token=None, _conn=None
+            self,
+            key,
+            value,
+            ttl=SENTINEL,
+            dumps_fn=None,
+            namespace=None,
+            _cas_token=None,
+            _cost=None,
+            _conn=None,
     ):
         """
         Stores the value in the given key with ttl if specified
@@ -253,6 +275,8 @@ class BaseCache:
         :param namespace: str alternative namespace to use
         :param timeout: int or float in seconds specifying maximum timeout
             for the operations to last
+        :param _cost: float seconds it took to compute the value. Used by cost aware
+            eviction policies, ignored by the rest
         :returns: True if the value was set
         :raises: :class:`asyncio.TimeoutError` if it lasts more than self.timeout
         """
@@ -261,20 +285,27 @@ class BaseCache:
         ns_key = self.build_key(key, namespace=namespace)
 
         res = self._set(
-            ns_key, dumps(value), ttl=self._get_ttl(ttl), _cas_token=_cas_token, _conn=_conn
+            ns_key,
+            dumps(value),
+            ttl=self._get_ttl(ttl),
+            _cas_token=_cas_token,
+            _conn=_conn,
+            **_cost_kwargs(self._set, _cost),
         )
 
         logger.debug("SET %s %d (%.4f)s", ns_key, True, time.monotonic() - start)
         return res
 
-    def _set(self, key, value, ttl, _cas_token=None, _conn=None):
+    def _set(self, key, value, ttl, _cas_token=None, _cost=None, _conn=None):
         raise NotImplementedError()
 
     @API.register
     @API.pycached_enabled(fake_return=True)
     # @API.timeout
     @API.plugins
-    def multi_set(self, pairs, ttl=SENTINEL, dumps_fn=None, namespace=None, _conn=None):
+    def multi_set(
+            self, pairs, ttl=SENTINEL, dumps_fn=None, namespace=None, _cost=None, _conn=None
+    ):
         """
         Stores multiple values in the given keys.
 
@@ -286,6 +317,8 @@ class BaseCache:
         :param namespace: str alternative namespace to use
         :param timeout: int or float in seconds specifying maximum timeout
             for the operations to last
+        :param _cost: float seconds it took to compute each value. Used by cost aware
+            eviction policies, ignored by the rest
         :returns: True
         :raises: :class:`asyncio.TimeoutError` if it lasts more than self.timeout
         """
@@ -296,7 +329,9 @@ class BaseCache:
         for key, value in pairs:
             tmp_pairs.append((self.build_key(key, namespace=namespace), dumps(value)))
 
-        self._multi_set(tmp_pairs, ttl=self._get_ttl(ttl), _conn=_conn)
+        self._multi_set(
+            tmp_pairs, ttl=self._get_ttl(ttl), _conn=_conn, **_cost_kwargs(self._multi_set, _cost)
+        )
 
         logger.debug(
             "MULTI_SET %s %d (%.4f)s",
@@ -306,7 +341,7 @@ class BaseCache:
         )
         return True
 
-    def _multi_set(self, pairs, ttl, _conn=None):
+    def _multi_set(self, pairs, ttl, _cost=None, _conn=None):
         raise NotImplementedError()
 
     @API.register
@@ -1,14 +1,22 @@
+import asyncio
 import inspect
 import functools
 import logging
+import time
 
 from pycached import caches, SimpleMemoryCache
+from pycached.aio.base import _maybe_await
 from pycached.base import SENTINEL
+from pycached.exceptions import InvalidCacheType
+from pycached.factory import _async_class
 from pycached.lock import RedLock
 
 
 logger = logging.getLogger(__name__)
 
+# Result given to the calls waiting for a cached_stampede call that was cancelled
+_RETRY = object()
+
 
 class cached:
     """
@@ -25,6 +33,13 @@ class cached:
     When calling the decorated function, the reads and writes from/to the cache can be controlled
     with the parameters ``cache_read`` and ``cache_write`` (both are enabled by default).
 
+    The time the function takes is stored along with the value as its recompute cost, which
+    cost aware eviction policies like :class:`pycached.eviction.GDSFPolicy` use.
+
+    Coroutine functions are decorated with a coroutine that awaits them. Their cache is the
+    asyncio flavour of ``cache`` (or of the ``alias`` config), see :mod:`pycached.aio`. If the
+    cache has no asyncio flavour, the sync one is used.
+
     :param ttl: int seconds to store the function call. Default is None which means no expiration.
     :param key: str value to set as key for the function return. Takes precedence over
         key_builder param. If key and key_builder are not passed, it will use module_name
@@ -70,8 +85,17 @@ class cached:
         self._kwargs = kwargs
 
     def __call__(self, f):
+        asynchronous = inspect.iscoroutinefunction(f)
         if self.alias:
-            self.cache = caches.get(self.alias)
+            self.cache = _get_alias_cache(self.alias, asynchronous=asynchronous)
+        elif asynchronous:
+            self.cache = _get_cache(
+                cache=self._cache,
+                serializer=self._serializer,
+                plugins=self._plugins,
+                asynchronous=True,
+                **self._kwargs
+            )
         else:
             self.cache = _get_cache(
                 cache=self._cache,
@@ -80,9 +104,17 @@ class cached:
                 **self._kwargs
             )
 
-        @functools.wraps(f)
-        def wrapper(*args, **kwargs):
-            return self.decorator(f, *args, **kwargs)
+        if asynchronous:
+
+            @functools.wraps(f)
+            async def wrapper(*args, **kwargs):
+                return await self.async_decorator(f, *args, **kwargs)
+
+        else:
+
+            @functools.wraps(f)
+            def wrapper(*args, **kwargs):
+                return self.decorator(f, *args, **kwargs)
 
         wrapper.cache = self.cache
         return wrapper
@@ -95,10 +127,12 @@ class cached:
             if value is not None:
                 return value
 
+        start = time.monotonic()
         result = f(*args, **kwargs)
+        cost = time.monotonic() - start
 
         if cache_write:
-            self.set_in_cache(key, result)
+            self.set_in_cache(key, result, cost=cost)
 
         return result
 
@@ -126,9 +160,39 @@ class cached:
         except Exception:
             logger.exception("Couldn't retrieve %s, unexpected error", key)
 
-    def set_in_cache(self, key, value):
+    def set_in_cache(self, key, value, cost=None):
         try:
-            self.cache.set(key, value, self.ttl)
+            self.cache.set(key, value, self.ttl, _cost=cost)
+        except Exception:
+            logger.exception("Couldn't set %s in key %s, unexpected error", value, key)
+
+    async def async_decorator(self, f, *args, cache_read=True, cache_write=True, **kwargs):
+        key = self.get_cache_key(f, args, kwargs)
+
+        if cache_read:
+            value = await self.async_get_from_cache(key)
+            if value is not None:
+                return value
+
+        start = time.monotonic()
+        result = await f(*args, **kwargs)
+        cost = time.monotonic() - start
+
+        if cache_write:
+            await self.async_set_in_cache(key, result, cost=cost)
+
+        return result
+
+    async def async_get_from_cache(self, key):
+        try:
+            value = await _maybe_await(self.cache.get(key))
+            return value
+        except Exception:
+            logger.exception("Couldn't retrieve %s, unexpected error", key)
+
+    async def async_set_in_cache(self, key, value, cost=None):
+        try:
+            await _maybe_await(self.cache.set(key, value, self.ttl, _cost=cost))
         except Exception:
             logger.exception("Couldn't set %s in key %s, unexpected error", value, key)
 
@@ -145,6 +209,10 @@ class cached_stampede(cached):
     Only one cache instance is created per decorated function. If you expect high concurrency
     of calls to the same function, you should adapt the pool size as needed.
 
+    Coroutine functions are decorated with a coroutine using the asyncio flavour of the cache.
+    It waits for the lock without blocking the loop, and concurrent calls for the same key in
+    one loop share the result of the first one instead of competing for the lock.
+
     :param lease: int seconds to lock function call to avoid cache stampede effects.
         If 0 or None, no locking happens (default is 2). redis and memory backends support
         float ttls
@@ -169,6 +237,7 @@ class cached_stampede(cached):
     def __init__(self, lease=2, **kwargs):
         super().__init__(**kwargs)
         self.lease = lease
+        self._inflight = {}
 
     def decorator(self, f, *args, **kwargs):
         key = self.get_cache_key(f, args, kwargs)
@@ -182,17 +251,88 @@ class cached_stampede(cached):
             if value is not None:
                 return value
 
+            start = time.monotonic()
             result = f(*args, **kwargs)
+            cost = time.monotonic() - start
+
+            self.set_in_cache(key, result, cost=cost)
+
+        return result
+
+    async def async_decorator(self, f, *args, **kwargs):
+        key = self.get_cache_key(f, args, kwargs)
+
+        # Calls for the same key in this loop wait for the one already computing it
+        flight = (asyncio.get_running_loop(), key)
+        while True:
+            value = await self.async_get_from_cache(key)
+            if value is not None:
+                return value
+            if flight not in self._inflight:
+                break
+            result = await asyncio.shield(self._inflight[flight])
+            if result is not _RETRY:
+                return result
+            # The call computing it was cancelled, so look it up again or compute it
+
+        future = self._inflight[flight] = asyncio.get_running_loop().create_future()
+        try:
+            result = await self._async_locked_call(f, key, args, kwargs)
+        except asyncio.CancelledError:
+            future.set_result(_RETRY)
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark it as retrieved in case nobody else was waiting
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            self._inflight.pop(flight, None)
 
-            self.set_in_cache(key, result)
+        return result
+
+    async def _async_locked_call(self, f, key, args, kwargs):
+        async with RedLock(self.cache, key, self.lease):
+            value = await self.async_get_from_cache(key)
+            if value is not None:
+                return value
+
+            start = time.monotonic()
+            result = await f(*args, **kwargs)
+            cost = time.monotonic() - start
+
+            await self.async_set_in_cache(key, result, cost=cost)
 
         return result
 
 
-def _get_cache(cache=SimpleMemoryCache, serializer=None, plugins=None, **cache_kwargs):
+def _get_cache(
+    cache=SimpleMemoryCache, serializer=None, plugins=None, asynchronous=False, **cache_kwargs
+):
+    if asynchronous:
+        cache = _async_flavour(cache, cache_kwargs)
     return cache(serializer=serializer, plugins=plugins, **cache_kwargs)
 
 
+def _async_flavour(cache, options=()):
+    try:
+        return _async_class(cache, options)
+    except InvalidCacheType as e:
+        logger.debug("%s, using %s from coroutines", e, cache.__name__)
+        return cache
+
+
+def _get_alias_cache(alias, asynchronous=False):
+    if asynchronous:
+        try:
+            return caches.get(alias, asynchronous=True)
+        except InvalidCacheType as e:
+            logger.debug("%s, using %s cache from coroutines", e, alias)
+    return caches.get(alias)
+
+
 def _get_args_dict(func, args, kwargs):
     defaults = {
         arg_name: arg.default
@@ -225,6 +365,12 @@ class multi_cached:
     When calling the decorated function, the reads and writes from/to the cache can be controlled
     with the parameters ``cache_read`` and ``cache_write`` (both are enabled by default).
 
+    The time the function takes is stored along with the value as its recompute cost, which
+    cost aware eviction policies like :class:`pycached.eviction.GDSFPolicy` use.
+
+    Coroutine functions are decorated with a coroutine, using the asyncio flavour of the cache
+    like :class:`cached` does.
+
     :param keys_from_attr: arg or kwarg name from the function containing an iterable to use
         as keys to index in the cache.
     :param key_builder: Callable that allows to change the format of the keys before storing.
@@ -264,8 +410,17 @@ class multi_cached:
         self._kwargs = kwargs
 
     def __call__(self, f):
+        asynchronous = inspect.iscoroutinefunction(f)
         if self.alias:
-            self.cache = caches.get(self.alias)
+            self.cache = _get_alias_cache(self.alias, asynchronous=asynchronous)
+        elif asynchronous:
+            self.cache = _get_cache(
+                cache=self._cache,
+                serializer=self._serializer,
+                plugins=self._plugins,
+                asynchronous=True,
+                **self._kwargs
+            )
         else:
             self.cache = _get_cache(
                 cache=self._cache,
@@ -274,9 +429,17 @@ class multi_cached:
                 **self._kwargs
             )
 
-        @functools.wraps(f)
-        def wrapper(*args, **kwargs):
-            return self.decorator(f, *args, **kwargs)
+        if asynchronous:
+
+            @functools.wraps(f)
+            async def wrapper(*args, **kwargs):
+                return await self.async_decorator(f, *args, **kwargs)
+
+        else:
+
+            @functools.wraps(f)
+            def wrapper(*args, **kwargs):
+                return self.decorator(f, *args, **kwargs)
 
         wrapper.cache = self.cache
         return wrapper
@@ -303,11 +466,13 @@ class multi_cached:
         else:
             kwargs[self.keys_from_attr] = missing_keys
 
+        start = time.monotonic()
         result = f(*new_args, **kwargs)
+        cost = (time.monotonic() - start) / max(len(missing_keys), 1)
         result.update(partial)
 
         if cache_write:
-            self.set_in_cache(result, f, args, kwargs)
+            self.set_in_cache(result, f, args, kwargs, cost=cost)
 
         return result
 
@@ -335,11 +500,69 @@ class multi_cached:
             logger.exception("Couldn't retrieve %s, unexpected error", keys)
             return [None] * len(keys)
 
-    def set_in_cache(self, result, fn, fn_args, fn_kwargs):
+    def set_in_cache(self, result, fn, fn_args, fn_kwargs, cost=None):
         try:
             self.cache.multi_set(
                 [(self.key_builder(k, fn, *fn_args, **fn_kwargs), v) for k, v in result.items()],
                 ttl=self.ttl,
+                _cost=cost,
+            )
+        except Exception:
+            logger.exception("Couldn't set %s, unexpected error", result)
+
+    async def async_decorator(self, f, *args, cache_read=True, cache_write=True, **kwargs):
+        missing_keys = []
+        partial = {}
+        keys, new_args, args_index = self.get_cache_keys(f, args, kwargs)
+
+        if cache_read:
+            values = await self.async_get_from_cache(*keys)
+            for key, value in zip(keys, values):
+                if value is None:
+                    missing_keys.append(key)
+                else:
+                    partial[key] = value
+            if values and None not in values:
+                return partial
+        else:
+            missing_keys = list(keys)
+
+        if args_index > -1:
+            new_args[args_index] = missing_keys
+        else:
+            kwargs[self.keys_from_attr] = missing_keys
+
+        start = time.monotonic()
+        result = await f(*new_args, **kwargs)
+        cost = (time.monotonic() - start) / max(len(missing_keys), 1)
+        result.update(partial)
+
+        if cache_write:
+            await self.async_set_in_cache(result, f, args, kwargs, cost=cost)
+
+        return result
+
+    async def async_get_from_cache(self, *keys):
+        if not keys:
+            return []
+        try:
+            values = await _maybe_await(self.cache.multi_get(keys))
+            return values
+        except Exception:
+            logger.exception("Couldn't retrieve %s, unexpected error", keys)
+            return [None] * len(keys)
+
+    async def async_set_in_cache(self, result, fn, fn_args, fn_kwargs, cost=None):
+        try:
+            await _maybe_await(
+                self.cache.multi_set(
+                    [
+                        (self.key_builder(k, fn, *fn_args, **fn_kwargs), v)
+                        for k, v in result.items()
+                    ],
+                    ttl=self.ttl,
+                    _cost=cost,
+                )
             )
         except Exception:
             logger.exception("Couldn't set %s, unexpected error", result)
@@ -0,0 +1,354 @@
+"""
+This module implements the eviction policies :class:`pycached.SimpleMemoryCache` can use
+when it is bounded with ``max_entries`` or ``max_bytes``. Policies only keep track of keys,
+the cache owns the values and asks the policy for a victim while it is over its limits.
+"""
+
+import heapq
+import itertools
+from collections import OrderedDict
+
+
+class BasePolicy:
+    """
+    Interface for eviction policies. The cache calls:
+
+        - ``insert`` when a new key is stored.
+        - ``update`` when an existing key is overwritten.
+        - ``access`` when a key is read and found.
+        - ``miss`` when a key is read and not found.
+        - ``remove`` when a key leaves the cache for any reason (delete, expiration, eviction).
+        - ``victim`` to know which key to evict next. It must return a key currently tracked.
+
+    ``insert`` and ``update`` receive the approximate ``size`` of the entry and, when known, the
+    ``cost`` in seconds it took to compute the value (see :meth:`pycached.base.BaseCache.set`).
+    """
+
+    def insert(self, key, size, cost=None):
+        raise NotImplementedError()
+
+    def update(self, key, size, cost=None):
+        self.access(key)
+
+    def access(self, key):
+        raise NotImplementedError()
+
+    def miss(self, key):
+        pass
+
+    def remove(self, key):
+        raise NotImplementedError()
+
+    def victim(self):
+        raise NotImplementedError()
+
+    def clear(self):
+        raise NotImplementedError()
+
+    def __len__(self):
+        raise NotImplementedError()
+
+
+class LRUPolicy(BasePolicy):
+    """
+    Evicts the least recently used key. All operations are O(1).
+    """
+
+    def __init__(self):
+        self._order = OrderedDict()
+
+    def insert(self, key, size, cost=None):
+        self._order[key] = None
+
+    def access(self, key):
+        self._order.move_to_end(key)
+
+    def remove(self, key):
+        self._order.pop(key, None)
+
+    def victim(self):
+        return next(iter(self._order))
+
+    def clear(self):
+        self._order = OrderedDict()
+
+    def __len__(self):
+        return len(self._order)
+
+
+_HALVE = bytes(counter >> 1 for counter in range(256))
+_MASK_64 = 0xFFFFFFFFFFFFFFFF
+
+
+class CountMinSketch:
+    """
+    Frequency estimator with 4 rows of 4 bit counters and ``WIDTH_FACTOR`` counters per row
+    for each key it is sized for. Once ``sample_factor`` times ``capacity`` increments have
+    been recorded, all counters are halved so old popularity fades away.
+
+    :meth:`ensure_capacity` doubles the width when the number of tracked keys grows. Rows are
+    indexed with the top bits of the hash, so counters are carried over to the two slots they
+    split into instead of being reset.
+    """
+
+    SEEDS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93)
+    MAX_COUNT = 15
+    WIDTH_FACTOR = 8
+
+    def __init__(self, capacity=16, sample_factor=10):
+        self.sample_factor = sample_factor
+        width = 1 << max(int(capacity) * self.WIDTH_FACTOR - 1, 1).bit_length()
+        self._mask = width - 1
+        self._shift = 64 - width.bit_length() + 1
+        self._rows = [bytearray(width) for _ in self.SEEDS]
+        self._additions = 0
+
+    @property
+    def width(self):
+        return self._mask + 1
+
+    @property
+    def capacity(self):
+        return self.width // self.WIDTH_FACTOR
+
+    def ensure_capacity(self, capacity):
+        while capacity > self.capacity:
+            rows = []
+            for row in self._rows:
+                wider = bytearray(len(row) * 2)
+                wider[0::2] = row
+                wider[1::2] = row
+                rows.append(wider)
+            self._rows = rows
+            self._mask = self._mask * 2 + 1
+            self._shift -= 1
+
+    def _indexes(self, key):
+        h = hash(key) & _MASK_64
+        return [((h * seed) & _MASK_64) >> self._shift & self._mask for seed in self.SEEDS]
+
+    def increment(self, key):
+        added = False
+        for row, index in zip(self._rows, self._indexes(key)):
+            if row[index] < self.MAX_COUNT:
+                row[index] += 1
+                added = True
+
+        if added:
+            self._additions += 1
+            if self._additions >= self.sample_factor * self.capacity:
+                self._age()
+
+    def frequency(self, key):
+        return min(row[index] for row, index in zip(self._rows, self._indexes(key)))
+
+    def _age(self):
+        self._rows = [row.translate(_HALVE) for row in self._rows]
+        self._additions //= 2
+
+
+class TinyLFUPolicy(BasePolicy):
+    """
+    Window TinyLFU policy. New keys enter a small LRU admission window (``window`` ratio of the
+    entries). Keys overflowing the window move to the probation segment of the main region and,
+    when the cache needs to evict, the most recently admitted key competes with the least
+    recently used one in probation: the one with lower estimated frequency is evicted. Keys read
+    while in probation are promoted to the protected segment (``protected`` ratio of the main
+    region).
+
+    This keeps scans and one-hit wonders from flushing popular keys, which plain LRU does.
+    Frequencies are estimated with a :class:`CountMinSketch` that ages periodically.
+
+    :param window: float ratio of the entries kept in the admission window. Default is 0.01
+    :param protected: float ratio of the main region reserved to the protected segment.
+        Default is 0.8
+    """
+
+    def __init__(self, window=0.01, protected=0.8):
+        self.window_ratio = float(window)
+        self.protected_ratio = float(protected)
+        self.sketch = CountMinSketch()
+        self._window = OrderedDict()
+        self._probation = OrderedDict()
+        self._protected = OrderedDict()
+
+    def insert(self, key, size, cost=None):
+        self.sketch.increment(key)
+        self._window[key] = None
+        self.sketch.ensure_capacity(len(self))
+
+        window_max = max(1, int(len(self) * self.window_ratio))
+        while len(self._window) > window_max:
+            candidate, _ = self._window.popitem(last=False)
+            self._probation[candidate] = None
+
+    def access(self, key):
+        self.sketch.increment(key)
+        if key in self._window:
+            self._window.move_to_end(key)
+        elif key in self._protected:
+            self._protected.move_to_end(key)
+        elif key in self._probation:
+            del self._probation[key]
+            self._protected[key] = None
+            protected_max = max(
+                1, int((len(self._probation) + len(self._protected)) * self.protected_ratio)
+            )
+            while len(self._protected) > protected_max:
+                demoted, _ = self._protected.popitem(last=False)
+                self._probation[demoted] = None
+
+    def miss(self, key):
+        self.sketch.increment(key)
+
+    def remove(self, key):
+        if key in self._window:
+            del self._window[key]
+        elif key in self._probation:
+            del self._probation[key]
+        else:
+            self._protected.pop(key, None)
+
+    def victim(self):
+        if not self._probation:
+            if self._protected:
+                return next(iter(self._protected))
+            return next(iter(self._window))
+
+        victim = next(iter(self._probation))
+        candidate = next(reversed(self._probation))
+        if candidate == victim:
+            return victim
+        if self.sketch.frequency(candidate) > self.sketch.frequency(victim):
+            return victim
+        return candidate
+
+    def clear(self):
+        self._window = OrderedDict()
+        self._probation = OrderedDict()
+        self._protected = OrderedDict()
+
+    def __len__(self):
+        return len(self._window) + len(self._probation) + len(self._protected)
+
+
+class _GDSFEntry:
+    __slots__ = ("priority", "frequency", "cost", "size", "version")
+
+    def __init__(self, cost, size):
+        self.priority = 0.0
+        self.frequency = 1
+        self.cost = cost
+        self.size = size
+        self.version = 0
+
+
+class GDSFPolicy(BasePolicy):
+    """
+    GreedyDual-Size-Frequency policy. Each key has a priority of
+    ``clock + frequency * cost / size`` and the key with the lowest priority is evicted. Every
+    eviction advances the clock to the priority of the evicted key, so keys that are not read
+    anymore age out even if they were expensive.
+
+    This keeps the results that are the most expensive to recompute per byte resident. The cost
+    is provided by :class:`pycached.cached` and :class:`pycached.multi_cached`, which measure how
+    long the decorated function took. Keys stored without a cost use the average of the known
+    costs.
+    """
+
+    def __init__(self):
+        self.clock = 0.0
+        self._entries = {}
+        self._heap = []
+        self._counter = itertools.count()
+        self._total_cost = 0.0
+        self._costs = 0
+
+    def _default_cost(self):
+        return self._total_cost / self._costs if self._costs else 1.0
+
+    def _push(self, key, entry):
+        entry.priority = self.clock + entry.frequency * entry.cost / entry.size
+        entry.version = next(self._counter)
+        heapq.heappush(self._heap, (entry.priority, entry.version, key))
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [
+                (entry.priority, entry.version, key) for key, entry in self._entries.items()
+            ]
+            heapq.heapify(self._heap)
+
+    def _track_cost(self, cost):
+        self._total_cost += cost
+        self._costs += 1
+
+    def insert(self, key, size, cost=None):
+        if cost is None:
+            cost = self._default_cost()
+        else:
+            self._track_cost(cost)
+        entry = _GDSFEntry(cost, max(size, 1))
+        self._entries[key] = entry
+        self._push(key, entry)
+
+    def update(self, key, size, cost=None):
+        entry = self._entries[key]
+        if cost is not None:
+            self._track_cost(cost)
+            entry.cost = cost
+        entry.frequency += 1
+        entry.size = max(size, 1)
+        self._push(key, entry)
+
+    def access(self, key):
+        entry = self._entries[key]
+        entry.frequency += 1
+        self._push(key, entry)
+
+    def remove(self, key):
+        self._entries.pop(key, None)
+
+    def victim(self):
+        while True:
+            priority, version, key = self._heap[0]
+            entry = self._entries.get(key)
+            if entry is not None and entry.version == version:
+                self.clock = priority
+                return key
+            heapq.heappop(self._heap)
+
+    def priority(self, key):
+        return self._entries[key].priority
+
+    def clear(self):
+        self.clock = 0.0
+        self._entries = {}
+        self._heap = []
+
+    def __len__(self):
+        return len(self._entries)
+
+
+POLICIES = {
+    "lru": LRUPolicy,
+    "tinylfu": TinyLFUPolicy,
+    "gdsf": GDSFPolicy,
+}
+
+
+def get_policy(policy=None):
+    """
+    Return a policy instance given its name (one of ``POLICIES`` keys), class or instance.
+    Default is :class:`LRUPolicy`.
+    """
+    if policy is None:
+        return LRUPolicy()
+    if isinstance(policy, BasePolicy):
+        return policy
+    if isinstance(policy, str):
+        try:
+            policy = POLICIES[policy.lower()]
+        except KeyError:
+            raise ValueError(
+                "Invalid eviction policy, you can only use {}".format(list(POLICIES.keys()))
+            ) from None
+    return policy()
@@ -1,8 +1,10 @@
+import inspect
 import urllib
 import warnings
 from copy import deepcopy
 
-from pycached import CACHE_CACHES
+from pycached import ASYNC_CACHES, CACHE_CACHES
+from pycached.aio import AsyncBaseCache
 from pycached.exceptions import InvalidCacheType
 
 
@@ -12,7 +14,55 @@ def _class_from_string(class_path):
     return getattr(__import__(module_name, fromlist=[class_name]), class_name)
 
 
-def _create_cache(cache, serializer=None, plugins=None, **kwargs):
+def _async_class(cache, options=()):
+    flavour = cache if issubclass(cache, AsyncBaseCache) else _registered_async_class(cache)
+    # Configs are shared by both flavours, options only the sync one has can't be honoured
+    unsupported = sorted(set(options) - _init_options(flavour))
+    if unsupported:
+        raise InvalidCacheType(
+            "{} doesn't support {}, use the sync flavour of the cache".format(
+                flavour.__name__, unsupported
+            )
+        )
+    return flavour
+
+
+def _registered_async_class(cache):
+    # The closest registered class decides the flavour, so subclasses of a cache get it too
+    names = {registered: name for name, registered in CACHE_CACHES.items()}
+    for klass in cache.__mro__:
+        if klass in names:
+            if names[klass] in ASYNC_CACHES:
+                return ASYNC_CACHES[names[klass]]
+            break
+    raise InvalidCacheType(
+        "{} has no asyncio flavour, you can only use {}".format(
+            cache.__name__, list(ASYNC_CACHES.keys())
+        )
+    )
+
+
+def _init_options(cache):
+    """
+    Names of the params accepted by the constructors of the class, following the ``**kwargs``
+    passed up to the parents.
+    """
+    options = set()
+    for klass in cache.__mro__:
+        if "__init__" not in vars(klass):
+            continue
+        params = inspect.signature(klass.__init__).parameters.values()
+        options.update(
+            param.name for param in params
+            if param.kind in (param.POSITIONAL_OR_KEYWORD, param.KEYWORD_ONLY)
+        )
+        if not any(param.kind == param.VAR_KEYWORD for param in params):
+            break
+    options.discard("self")
+    return options
+
+
+def _create_cache(cache, serializer=None, plugins=None, asynchronous=False, **kwargs):
     if serializer is not None:
         cls = serializer.pop("class")
         cls = _class_from_string(cls) if isinstance(cls, str) else cls
@@ -26,6 +76,8 @@ def _create_cache(cache, serializer=None, plugins=None, **kwargs):
             plugins_instances.append(cls(**plugin))
 
     cache = _class_from_string(cache) if isinstance(cache, str) else cache
+    if asynchronous:
+        cache = _async_class(cache, kwargs)
     instance = cache(serializer=serializer, plugins=plugins_instances, **kwargs)
     return instance
 
@@ -46,28 +98,37 @@ class Cache:
     Only ``Cache.MEMORY``, ``Cache.REDIS`` and ``Cache.MEMCACHED`` types
     are allowed. If the type passed is invalid, it will raise a
     :class:`pycached.exceptions.InvalidCacheType` exception.
+
+    Passing ``asynchronous=True`` returns the asyncio flavour of the cache type
+    (see :mod:`pycached.aio`) with the same config:
+    >>> Cache(Cache.MEMORY, asynchronous=True)
+    <pycached.aio.memory.AsyncSimpleMemoryCache object at 0x1081dbb00>
     """
 
     MEMORY = "memory"
     REDIS = "redis"
+    REDIS_CLUSTER = "rediscluster"
+    MEMCACHED = "memcached"
+    SHM = "shm"
 
-    def __new__(cls, cache_type=MEMORY, **kwargs):
-        cache_class = cls.get_scheme_class(cache_type)
+    def __new__(cls, cache_type=MEMORY, asynchronous=False, **kwargs):
+        cache_class = cls.get_scheme_class(cache_type, asynchronous=asynchronous)
         instance = cache_class.__new__(cache_class, **kwargs)
         instance.__init__(**kwargs)
         return instance
 
     @classmethod
-    def get_scheme_class(cls, scheme):
+    def get_scheme_class(cls, scheme, asynchronous=False):
+        schemes = ASYNC_CACHES if asynchronous else CACHE_CACHES
         try:
-            return CACHE_CACHES[scheme]
+            return schemes[scheme]
         except KeyError as e:
             raise InvalidCacheType(
-                "Invalid cache type, you can only use {}".format(list(CACHE_CACHES.keys()))
+                "Invalid cache type, you can only use {}".format(list(schemes.keys()))
             ) from e
 
     @classmethod
-    def from_url(cls, url):
+    def from_url(cls, url, asynchronous=False):
         """
         Given a resource uri, return an instance of that cache initialized with the given
         parameters. An example usage:
@@ -86,13 +147,16 @@ class Cache:
         1
 
         :param url: string identifying the resource uri of the cache to connect to
+        :param asynchronous: build the asyncio flavour of the cache
         """
 
+        flavour = {"asynchronous": True} if asynchronous else {}
         parsed_url = urllib.parse.urlparse(url)
         kwargs = dict(urllib.parse.parse_qsl(parsed_url.query))
 
         if parsed_url.path:
-            kwargs.update(Cache.get_scheme_class(parsed_url.scheme).parse_uri_path(parsed_url.path))
+            scheme_class = Cache.get_scheme_class(parsed_url.scheme, **flavour)
+            kwargs.update(scheme_class.parse_uri_path(parsed_url.path))
 
         if parsed_url.hostname:
             kwargs["endpoint"] = parsed_url.hostname
@@ -103,7 +167,7 @@ class Cache:
         if parsed_url.password:
             kwargs["password"] = parsed_url.password
 
-        return Cache(parsed_url.scheme, **kwargs)
+        return Cache(parsed_url.scheme, **flavour, **kwargs)
 
 
 class CacheHandler:
@@ -116,6 +180,7 @@ class CacheHandler:
 
     def __init__(self):
         self._caches = {}
+        self._async_caches = {}
 
     def add(self, alias: str, config: dict) -> None:
         """
@@ -134,7 +199,7 @@ class CacheHandler:
         """
         self._config[alias] = config
 
-    def get(self, alias):
+    def get(self, alias, asynchronous=False):
         """
         Retrieve cache identified by alias. Will return always the same instance
 
@@ -142,16 +207,21 @@ class CacheHandler:
         this is called.
 
         :param alias: str cache alias
+        :param asynchronous: return the asyncio flavour of the cache, built from the same
+            config. It is a different instance than the sync one.
         :return: cache instance
+        :raises: :class:`pycached.exceptions.InvalidCacheType` if the cache has no asyncio
+            flavour or the config has options it doesn't support
         """
+        instances = self._async_caches if asynchronous else self._caches
         try:
-            return self._caches[alias]
+            return instances[alias]
         except KeyError:
             pass
 
         config = self.get_alias_config(alias)
-        cache = _create_cache(**deepcopy(config))
-        self._caches[alias] = cache
+        cache = _create_cache(asynchronous=asynchronous, **deepcopy(config))
+        instances[alias] = cache
         return cache
 
     def create(self, alias=None, cache=None, **kwargs):
@@ -247,6 +317,7 @@ class CacheHandler:
             raise ValueError("default config must be provided")
         for config_name in config.keys():
             self._caches.pop(config_name, None)
+            self._async_caches.pop(config_name, None)
         self._config = config
 
 
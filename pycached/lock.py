@@ -1,7 +1,9 @@
+import asyncio
 import time
 import uuid
 from typing import Union, Any
 
+from pycached.aio.base import _maybe_await
 from pycached.base import BaseCache
 
 
@@ -58,6 +60,10 @@ class RedLock:
     while consecutive calls will block at most 1 second. If the blocking lasts for
     more than 1 second, the calls will proceed to also calculate the
     result of ``super_expensive_function``.
+
+    With ``async with`` the lock works the same but waits with ``asyncio.sleep``, so the
+    loop keeps running while it waits. The client can be an asyncio cache from
+    :mod:`pycached.aio` or a sync one.
     """
 
     _EVENTS = {}
@@ -96,6 +102,34 @@ class RedLock:
         if removed:
             RedLock._EVENTS.pop(self.key)
 
+    async def __aenter__(self):
+        return await self._async_acquire()
+
+    async def _async_acquire(self):
+        self._value = str(uuid.uuid4())
+        try:
+            await _maybe_await(self.client._add(self.key, self._value, ttl=self.lease))
+            RedLock._EVENTS[self.key] = False
+        except ValueError:
+            await self._async_wait_for_release()
+
+    async def _async_wait_for_release(self):
+        while True:
+            if self.key not in RedLock._EVENTS:
+                break
+            await asyncio.sleep(0.01)
+            self.lease -= 0.01
+            if self.lease <= 0:
+                break
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self._async_release()
+
+    async def _async_release(self):
+        removed = await _maybe_await(self.client._redlock_release(self.key, self._value))
+        if removed:
+            RedLock._EVENTS.pop(self.key)
+
 
 class OptimisticLock:
     """
@@ -0,0 +1,329 @@
+import logging
+import time
+
+from pycached.base import API, BaseCache, SENTINEL
+from pycached.tiered import _create_tier
+
+logger = logging.getLogger(__name__)
+
+# Key of the trie nodes holding the value of the prefix ending there, chars are never None
+_END = None
+
+
+def _routing_key(key, namespace=None):
+    return "{}:{}".format(namespace, key) if namespace else key
+
+
+class PrefixTrie:
+    """
+    Trie of prefixes returning the value of the longest prefix of a key, walking it once
+    whatever the number of prefixes.
+
+    :param items: iterable of ``(prefix, value)``.
+    """
+
+    def __init__(self, items=()):
+        self._root = {}
+        for prefix, value in items:
+            self.insert(prefix, value)
+
+    def insert(self, prefix, value):
+        node = self._root
+        for char in prefix:
+            node = node.setdefault(char, {})
+        node[_END] = value
+
+    def longest(self, key, default=None):
+        """
+        Return the value of the longest prefix of ``key``, ``default`` if there is none.
+        """
+        node = self._root
+        found = node.get(_END, default)
+        for char in key:
+            node = node.get(char)
+            if node is None:
+                break
+            if _END in node:
+                found = node[_END]
+        return found
+
+
+class RouterCache(BaseCache):
+    """
+    Cache sending each key to the cache of the longest route prefixing it, i.e. sessions to
+    one redis, results of ``cached`` functions to another one and the rest to memory::
+
+        RouterCache(
+            routes={"session:": RedisCache(endpoint="10.0.0.1"), "myapp.": RedisCache()},
+            fallback=SimpleMemoryCache(),
+        )
+
+    Routes are plain prefixes of the routing key, the longest match wins. They are compiled
+    into a :class:`pycached.router.PrefixTrie`. The routing key is ``"{namespace}:{key}"``
+    when there is a namespace, as redis builds keys, and the key otherwise. So ``"session:"``
+    routes both ``set("session:1", ...)`` and ``set("1", ..., namespace="session")``, while
+    a bare ``"session"`` route would also match the ``"sessions_v2"`` namespace.
+
+    ``multi_get`` and ``multi_set`` are split in one call per route and ``multi_get`` returns
+    the values in the order of the keys. ``clear`` without namespace goes to all the routes,
+    with a namespace only to the ones that can have keys in it. ``raw`` goes to the route of
+    its first arg.
+
+    Values are serialized by the cache of their route unless ``serializer`` is given.
+
+    It can be configured with ``caches.set_config``, giving the caches as configs like the
+    ones of the other caches or as aliases of other configs::
+
+        caches.set_config({
+            'default': {
+                'cache': "pycached.RouterCache",
+                'routes': {
+                    'session:': 'sessions',
+                    'config:': {'cache': "pycached.SimpleMemoryCache"},
+                },
+                'fallback': {'cache': "pycached.RedisCache", 'endpoint': "10.0.0.2"},
+            },
+            'sessions': {'cache': "pycached.RedisCache", 'endpoint': "10.0.0.1"},
+        })
+
+    :param routes: dict of key prefix to :class:`pycached.base.BaseCache` instance, config or
+        alias.
+    :param fallback: cache instance, config or alias for the keys not matching any route.
+        Default is None, which makes commands on those keys raise ``KeyError``.
+    :param serializer: obj derived from :class:`pycached.serializers.BaseSerializer` used for
+        the values of all the routes. Default is the serializer of each route.
+    :param plugins: list of :class:`pycached.plugins.BasePlugin` derived classes.
+    :param namespace: string to use as default namespace in all the routes. Default is None
+    :param ttl: int the expiration time in seconds to use as a default in all operations.
+    """
+
+    NAME = "router"
+
+    def __init__(self, routes=None, fallback=None, serializer=None, **kwargs):
+        routes = {prefix: _create_tier(cache) for prefix, cache in (routes or {}).items()}
+        if fallback is not None:
+            routes[""] = _create_tier(fallback)
+        if not routes:
+            raise ValueError("RouterCache needs at least one route")
+        super().__init__(serializer=serializer or next(iter(routes.values())).serializer, **kwargs)
+        self._serialize = serializer is not None
+        self.routes = routes
+        self._trie = PrefixTrie(routes.items())
+
+    @property
+    def caches(self):
+        """
+        Caches of the routes, without repetitions.
+        """
+        unique = {}
+        for cache in self.routes.values():
+            unique.setdefault(id(cache), cache)
+        return list(unique.values())
+
+    def route(self, key, namespace=None):
+        """
+        Return the cache of the key, raising ``KeyError`` if no route matches it.
+        """
+        cache = self._trie.longest(_routing_key(key, namespace))
+        if cache is None:
+            raise KeyError("No route for key {}".format(key))
+        return cache
+
+    def _codecs(self, dumps_fn=None, loads_fn=None):
+        if self._serialize:
+            return dumps_fn or self.serializer.dumps, loads_fn or self.serializer.loads
+        return dumps_fn, loads_fn
+
+    def _namespace(self, namespace):
+        return self.namespace if namespace is None else namespace
+
+    def _split(self, items, key, namespace):
+        """
+        Group ``items`` by the cache routing their key, returns ``(cache, items)`` pairs.
+        """
+        groups = {}
+        for item in items:
+            cache = self.route(key(item), namespace)
+            groups.setdefault(id(cache), (cache, []))[1].append(item)
+        return list(groups.values())
+
+    @API.pycached_enabled(fake_return=True)
+    @API.plugins
+    def add(self, key, value, ttl=SENTINEL, dumps_fn=None, namespace=None, _conn=None):
+        dumps, _ = self._codecs(dumps_fn=dumps_fn)
+        namespace = self._namespace(namespace)
+        return self.route(key, namespace).add(
+            key, value, ttl=self._get_ttl(ttl), dumps_fn=dumps, namespace=namespace
+        )
+
+    add.__doc__ = BaseCache.add.__doc__
+
+    @API.pycached_enabled()
+    @API.plugins
+    def get(self, key, default=None, loads_fn=None, namespace=None, _conn=None):
+        _, loads = self._codecs(loads_fn=loads_fn)
+        namespace = self._namespace(namespace)
+        return self.route(key, namespace).get(
+            key, default=default, loads_fn=loads, namespace=namespace
+        )
+
+    get.__doc__ = BaseCache.get.__doc__
+
+    @API.pycached_enabled(fake_return=[])
+    @API.plugins
+    def multi_get(self, keys, loads_fn=None, namespace=None, _conn=None):
+        start = time.monotonic()
+        _, loads = self._codecs(loads_fn=loads_fn)
+        namespace = self._namespace(namespace)
+
+        values = [None] * len(keys)
+        for cache, group in self._split(enumerate(keys), lambda item: item[1], namespace):
+            found = cache.multi_get([key for _, key in group], loads_fn=loads, namespace=namespace)
+            for (index, _), value in zip(group, found):
+                values[index] = value
+
+        logger.debug(
+            "MULTI_GET %s %d (%.4f)s",
+            keys,
+            len([value for value in values if value is not None]),
+            time.monotonic() - start,
+        )
+        return values
+
+    multi_get.__doc__ = BaseCache.multi_get.__doc__
+
+    @API.pycached_enabled(fake_return=True)
+    @API.plugins
+    def set(
+            self,
+            key,
+            value,
+            ttl=SENTINEL,
+            dumps_fn=None,
+            namespace=None,
+            _cas_token=None,
+            _cost=None,
+            _conn=None,
+    ):
+        dumps, _ = self._codecs(dumps_fn=dumps_fn)
+        namespace = self._namespace(namespace)
+        return self.route(key, namespace).set(
+            key,
+            value,
+            ttl=self._get_ttl(ttl),
+            dumps_fn=dumps,
+            namespace=namespace,
+            _cas_token=_cas_token,
+            _cost=_cost,
+        )
+
+    set.__doc__ = BaseCache.set.__doc__
+
+    @API.pycached_enabled(fake_return=True)
+    @API.plugins
+    def multi_set(
+            self, pairs, ttl=SENTINEL, dumps_fn=None, namespace=None, _cost=None, _conn=None
+    ):
+        start = time.monotonic()
+        dumps, _ = self._codecs(dumps_fn=dumps_fn)
+        namespace = self._namespace(namespace)
+        ttl = self._get_ttl(ttl)
+
+        for cache, group in self._split(pairs, lambda pair: pair[0], namespace):
+            cache.multi_set(group, ttl=ttl, dumps_fn=dumps, namespace=namespace, _cost=_cost)
+
+        logger.debug(
+            "MULTI_SET %s %d (%.4f)s",
+            [key for key, _ in pairs],
+            len(pairs),
+            time.monotonic() - start,
+        )
+        return True
+
+    multi_set.__doc__ = BaseCache.multi_set.__doc__
+
+    @API.pycached_enabled(fake_return=0)
+    @API.plugins
+    def delete(self, key, namespace=None, _conn=None):
+        namespace = self._namespace(namespace)
+        return self.route(key, namespace).delete(key, namespace=namespace)
+
+    delete.__doc__ = BaseCache.delete.__doc__
+
+    @API.pycached_enabled(fake_return=False)
+    @API.plugins
+    def exists(self, key, namespace=None, _conn=None):
+        namespace = self._namespace(namespace)
+        return self.route(key, namespace).exists(key, namespace=namespace)
+
+    exists.__doc__ = BaseCache.exists.__doc__
+
+    @API.pycached_enabled(fake_return=1)
+    @API.plugins
+    def increment(self, key, delta=1, namespace=None, _conn=None):
+        namespace = self._namespace(namespace)
+        return self.route(key, namespace).increment(key, delta, namespace=namespace)
+
+    increment.__doc__ = BaseCache.increment.__doc__
+
+    @API.pycached_enabled(fake_return=True)
+    @API.plugins
+    def expire(self, key, ttl, namespace=None, _conn=None):
+        namespace = self._namespace(namespace)
+        return self.route(key, namespace).expire(key, ttl, namespace=namespace)
+
+    expire.__doc__ = BaseCache.expire.__doc__
+
+    @API.pycached_enabled(fake_return=True)
+    @API.plugins
+    def clear(self, namespace=None, _conn=None):
+        namespace = self._namespace(namespace)
+        if not namespace:
+            targets = self.caches
+        else:
+            # The route of the namespace and the ones of longer prefixes inside it
+            prefix_of_keys = _routing_key("", namespace)
+            targets = {}
+            for prefix, cache in self.routes.items():
+                if prefix.startswith(prefix_of_keys):
+                    targets.setdefault(id(cache), cache)
+            cache = self._trie.longest(prefix_of_keys)
+            if cache is not None:
+                targets.setdefault(id(cache), cache)
+            targets = list(targets.values())
+        for cache in targets:
+            cache.clear(namespace=namespace)
+        return True
+
+    clear.__doc__ = BaseCache.clear.__doc__
+
+    @API.pycached_enabled()
+    @API.plugins
+    def raw(self, command, *args, _conn=None, **kwargs):
+        """
+        Send the raw command to the route of its first arg.
+        """
+        if not args:
+            raise ValueError("raw commands need a key to choose the route")
+        return self.route(args[0]).raw(command, *args, **kwargs)
+
+    def _close(self, *args, **kwargs):
+        for cache in self.caches:
+            cache.close()
+
+    def _route_call(self, key, method, *args, **kwargs):
+        cache = self.route(key, self.namespace)
+        key = cache.build_key(key, namespace=self.namespace)
+        return getattr(cache, method)(key, *args, **kwargs)
+
+    def _gets(self, key, _conn=None):
+        return self._route_call(key, "_gets")
+
+    def _add(self, key, value, ttl=None, _conn=None):
+        return self._route_call(key, "_add", value, ttl=ttl)
+
+    def _redlock_release(self, key, value):
+        return self._route_call(key, "_redlock_release", value)
+
+    def _build_key(self, key, namespace=None):
+        return key
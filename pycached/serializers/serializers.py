@@ -19,8 +19,14 @@ _NOT_SET = object()
 
 
 class BaseSerializer:
+    """
+    ``DATA_TYPE`` declares what ``dumps`` returns and ``loads`` expects: ``str``, ``bytes`` or
+    None if it works with any type. Backends storing bytes use it to decode the values only
+    for the serializers working with ``str``.
+    """
 
     DEFAULT_ENCODING = "utf-8"
+    DATA_TYPE = str
 
     def __init__(self, *args, encoding=_NOT_SET, **kwargs):
         self.encoding = self.DEFAULT_ENCODING if encoding is _NOT_SET else encoding
@@ -49,6 +55,8 @@ class NullSerializer(BaseSerializer):
         cache.get("key")  # Will return [1, 2]
     """
 
+    DATA_TYPE = None
+
     def dumps(self, value):
         """
         Returns the same value
@@ -96,6 +104,7 @@ class PickleSerializer(BaseSerializer):
     """
 
     DEFAULT_ENCODING = None
+    DATA_TYPE = bytes
 
     def dumps(self, value):
         """
@@ -110,7 +119,7 @@ class PickleSerializer(BaseSerializer):
         """
         Deserialize value using ``pickle.loads``.
 
-        :param value: bytes
+        :param value: bytes-like object
         :returns: obj
         """
         if value is None:
@@ -161,6 +170,8 @@ class MsgPackSerializer(BaseSerializer):
         Default is True.
     """
 
+    DATA_TYPE = bytes
+
     def __init__(self, *args, use_list=True, **kwargs):
         self.use_list = use_list
         super().__init__(*args, **kwargs)
@@ -178,7 +189,7 @@ class MsgPackSerializer(BaseSerializer):
         """
         Deserialize value using ``msgpack.loads``.
 
-        :param value: bytes
+        :param value: bytes-like object
         :returns: obj
         """
         raw = False if self.encoding == "utf-8" else True
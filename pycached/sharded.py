@@ -0,0 +1,481 @@
+import bisect
+import hashlib
+import logging
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pycached.base import API, BaseCache, SENTINEL
+from pycached.tiered import _create_tier
+
+logger = logging.getLogger(__name__)
+
+FAILURES = [OSError]
+try:
+    import redis
+except ImportError:
+    pass
+else:
+    FAILURES += [redis.exceptions.ConnectionError, redis.exceptions.TimeoutError]
+    del redis
+try:
+    from pymemcache.exceptions import MemcacheUnexpectedCloseError
+except ImportError:
+    pass
+else:
+    FAILURES.append(MemcacheUnexpectedCloseError)
+FAILURES = tuple(FAILURES)
+
+_POINTS = struct.Struct("<IIII")
+
+
+def _hash(key):
+    return _POINTS.unpack(hashlib.md5(key.encode("utf-8")).digest())[0]
+
+
+class HashRing:
+    """
+    Ketama consistent hash ring. Each node gets ``vnodes`` points on the ring, four from each
+    md5 digest of ``"<node>-<i>"``, and a key belongs to the node of the first point after its
+    hash. Adding or removing a node only moves the keys of that node.
+
+    :param nodes: iterable of str with the names of the nodes.
+    :param vnodes: int points per node. Default is 160
+    """
+
+    def __init__(self, nodes=(), vnodes=160):
+        self.vnodes = int(vnodes)
+        self._nodes = set()
+        # Sorted points and their nodes, replaced at once so readers never see them half updated
+        self._ring = ([], [])
+        for node in nodes:
+            self.add(node)
+
+    def _node_points(self, node):
+        for i in range(max(self.vnodes // 4, 1)):
+            digest = hashlib.md5("{}-{}".format(node, i).encode("utf-8")).digest()
+            yield from _POINTS.unpack(digest)
+
+    def _rebuild(self, ring):
+        self._ring = ([point for point, _ in ring], [owner for _, owner in ring])
+
+    def add(self, node):
+        if node in self._nodes:
+            return
+        self._nodes.add(node)
+        self._rebuild(
+            sorted(list(zip(*self._ring)) + [(point, node) for point in self._node_points(node)])
+        )
+
+    def remove(self, node):
+        if node not in self._nodes:
+            return
+        self._nodes.discard(node)
+        self._rebuild([(point, owner) for point, owner in zip(*self._ring) if owner != node])
+
+    def get(self, key):
+        """
+        Return the node owning ``key``, None when the ring is empty.
+        """
+        points, owners = self._ring
+        if not points:
+            return None
+        index = bisect.bisect_left(points, _hash(key))
+        return owners[index if index < len(points) else 0]
+
+    def __contains__(self, node):
+        return node in self._nodes
+
+    def __len__(self):
+        return len(self._nodes)
+
+
+def _node_name(shard, index):
+    if hasattr(shard, "endpoint") and hasattr(shard, "port"):
+        return "{}:{}".format(shard.endpoint, shard.port)
+    return "shard-{}".format(index)
+
+
+class ShardedCache(BaseCache):
+    """
+    Cache spreading the keys over independent caches, i.e.
+    ``ShardedCache([RedisCache(endpoint="10.0.0.1"), RedisCache(endpoint="10.0.0.2")])``, with
+    a consistent hash ring (see :class:`pycached.sharded.HashRing`) of the namespaced keys.
+
+    ``multi_get`` and ``multi_set`` are split in one call per shard. When more than one shard is
+    involved the calls run in parallel in a thread pool, and ``multi_get`` returns the values
+    in the order of the keys.
+
+    A shard failing with a connection error (see ``FAILURES``) is removed from the ring for
+    ``retry_timeout`` seconds. Only its keys move to other shards meanwhile and the command is
+    retried there, so a down node is seen as misses of its keys. It gets back in the ring on
+    the first command after ``retry_timeout``.
+
+    ``clear`` and ``close`` go to all the shards and ``raw`` to the shard of its first arg.
+    Values are serialized by the shard storing them unless ``serializer`` is given.
+
+    It can be configured with ``caches.set_config``, giving the shards as configs like the
+    ones of the other caches or as aliases of other configs::
+
+        caches.set_config({
+            'default': {
+                'cache': "pycached.ShardedCache",
+                'shards': [
+                    {'cache': "pycached.RedisCache", 'endpoint': "10.0.0.1"},
+                    {'cache': "pycached.RedisCache", 'endpoint': "10.0.0.2"},
+                ],
+            },
+        })
+
+    :param shards: list of :class:`pycached.base.BaseCache` instances, configs or aliases.
+        Their names in the ring are ``"endpoint:port"`` when they have them, their position
+        otherwise.
+    :param vnodes: int points of each shard in the ring. Default is 160
+    :param retry_timeout: int or float seconds a failed shard stays out of the ring.
+        Default is 30
+    :param max_workers: int threads running the calls of multi key commands in parallel.
+        Default is the number of shards
+    :param serializer: obj derived from :class:`pycached.serializers.BaseSerializer` used for
+        the values of all the shards. Default is the serializer of each shard.
+    :param plugins: list of :class:`pycached.plugins.BasePlugin` derived classes.
+    :param namespace: string to use as default namespace in all the shards. Default is None
+    :param ttl: int the expiration time in seconds to use as a default in all operations.
+    """
+
+    NAME = "sharded"
+
+    def __init__(
+            self,
+            shards=None,
+            vnodes=160,
+            retry_timeout=30,
+            max_workers=None,
+            serializer=None,
+            **kwargs
+    ):
+        shards = [_create_tier(shard) for shard in shards or []]
+        if not shards:
+            raise ValueError("ShardedCache needs at least one shard")
+        super().__init__(serializer=serializer or shards[0].serializer, **kwargs)
+        self._serialize = serializer is not None
+        self.shards = {}
+        for index, shard in enumerate(shards):
+            name = _node_name(shard, index)
+            if name in self.shards:
+                name = "{}#{}".format(name, index)
+            self.shards[name] = shard
+        self.ring = HashRing(self.shards, vnodes=vnodes)
+        self.retry_timeout = float(retry_timeout)
+        self.max_workers = int(max_workers) if max_workers else len(self.shards)
+        self._down = {}
+        self._lock = threading.Lock()
+        self._executor = None
+
+    @property
+    def down(self):
+        """
+        Names of the shards out of the ring because they failed.
+        """
+        return list(self._down)
+
+    def _codecs(self, dumps_fn=None, loads_fn=None):
+        if self._serialize:
+            return dumps_fn or self.serializer.dumps, loads_fn or self.serializer.loads
+        return dumps_fn, loads_fn
+
+    def _namespace(self, namespace):
+        return self.namespace if namespace is None else namespace
+
+    def _ring_key(self, key, namespace):
+        return "{}{}".format(namespace or "", key)
+
+    def _revive(self):
+        if not self._down:
+            return
+        now = time.monotonic()
+        with self._lock:
+            for name, until in list(self._down.items()):
+                if until <= now:
+                    logger.info("Adding shard %s back to the ring", name)
+                    del self._down[name]
+                    self.ring.add(name)
+
+    def _fail(self, name, error):
+        with self._lock:
+            if name in self.ring:
+                logger.warning(
+                    "Removing shard %s from the ring for %ss: %s", name, self.retry_timeout, error
+                )
+                self.ring.remove(name)
+                self._down[name] = time.monotonic() + self.retry_timeout
+
+    def _route(self, key, namespace, call):
+        """
+        Run ``call`` with the shard owning the key, moving to the next owner if it fails.
+        """
+        self._revive()
+        ring_key = self._ring_key(key, namespace)
+        while True:
+            name = self.ring.get(ring_key)
+            if name is None:
+                raise ConnectionError("All the shards are down")
+            try:
+                return call(self.shards[name])
+            except FAILURES as e:
+                self._fail(name, e)
+
+    def _route_many(self, items, namespace, call):
+        """
+        Split ``items``, a list of ``(index, key, ...)`` tuples, by shard and run
+        ``call(shard, items)`` for each of them. Returns the ``(items, result)`` of each call.
+        Items of a failing shard are sent again to their new owners.
+        """
+        self._revive()
+        results = []
+        while items:
+            groups = {}
+            for item in items:
+                name = self.ring.get(self._ring_key(item[1], namespace))
+                if name is None:
+                    raise ConnectionError("All the shards are down")
+                groups.setdefault(name, []).append(item)
+
+            if len(groups) == 1:
+                outcomes = {
+                    name: self._attempt(call, self.shards[name], group)
+                    for name, group in groups.items()
+                }
+            else:
+                executor = self._get_executor()
+                futures = {
+                    name: executor.submit(self._attempt, call, self.shards[name], group)
+                    for name, group in groups.items()
+                }
+                outcomes = {name: future.result() for name, future in futures.items()}
+
+            items = []
+            for name, (result, error) in outcomes.items():
+                group = groups[name]
+                if error is None:
+                    results.append((group, result))
+                else:
+                    self._fail(name, error)
+                    items += group
+        return results
+
+    @staticmethod
+    def _attempt(call, shard, group):
+        try:
+            return call(shard, group), None
+        except FAILURES as e:
+            return None, e
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix="pycached-shards"
+                    )
+        return self._executor
+
+    @API.pycached_enabled(fake_return=True)
+    @API.plugins
+    def add(self, key, value, ttl=SENTINEL, dumps_fn=None, namespace=None, _conn=None):
+        dumps, _ = self._codecs(dumps_fn=dumps_fn)
+        namespace = self._namespace(namespace)
+        ttl = self._get_ttl(ttl)
+        return self._route(
+            key,
+            namespace,
+            lambda shard: shard.add(key, value, ttl=ttl, dumps_fn=dumps, namespace=namespace),
+        )
+
+    add.__doc__ = BaseCache.add.__doc__
+
+    @API.pycached_enabled()
+    @API.plugins
+    def get(self, key, default=None, loads_fn=None, namespace=None, _conn=None):
+        _, loads = self._codecs(loads_fn=loads_fn)
+        namespace = self._namespace(namespace)
+        return self._route(
+            key,
+            namespace,
+            lambda shard: shard.get(key, default=default, loads_fn=loads, namespace=namespace),
+        )
+
+    get.__doc__ = BaseCache.get.__doc__
+
+    @API.pycached_enabled(fake_return=[])
+    @API.plugins
+    def multi_get(self, keys, loads_fn=None, namespace=None, _conn=None):
+        start = time.monotonic()
+        _, loads = self._codecs(loads_fn=loads_fn)
+        namespace = self._namespace(namespace)
+
+        def call(shard, group):
+            return shard.multi_get([key for _, key in group], loads_fn=loads, namespace=namespace)
+
+        values = [None] * len(keys)
+        for group, found in self._route_many(list(enumerate(keys)), namespace, call):
+            for (index, _), value in zip(group, found):
+                values[index] = value
+
+        logger.debug(
+            "MULTI_GET %s %d (%.4f)s",
+            keys,
+            len([value for value in values if value is not None]),
+            time.monotonic() - start,
+        )
+        return values
+
+    multi_get.__doc__ = BaseCache.multi_get.__doc__
+
+    @API.pycached_enabled(fake_return=True)
+    @API.plugins
+    def set(
+            self,
+            key,
+            value,
+            ttl=SENTINEL,
+            dumps_fn=None,
+            namespace=None,
+            _cas_token=None,
+            _cost=None,
+            _conn=None,
+    ):
+        dumps, _ = self._codecs(dumps_fn=dumps_fn)
+        namespace = self._namespace(namespace)
+        ttl = self._get_ttl(ttl)
+        return self._route(
+            key,
+            namespace,
+            lambda shard: shard.set(
+                key,
+                value,
+                ttl=ttl,
+                dumps_fn=dumps,
+                namespace=namespace,
+                _cas_token=_cas_token,
+                _cost=_cost,
+            ),
+        )
+
+    set.__doc__ = BaseCache.set.__doc__
+
+    @API.pycached_enabled(fake_return=True)
+    @API.plugins
+    def multi_set(
+            self, pairs, ttl=SENTINEL, dumps_fn=None, namespace=None, _cost=None, _conn=None
+    ):
+        start = time.monotonic()
+        dumps, _ = self._codecs(dumps_fn=dumps_fn)
+        namespace = self._namespace(namespace)
+        ttl = self._get_ttl(ttl)
+
+        def call(shard, group):
+            return shard.multi_set(
+                [(key, value) for _, key, value in group],
+                ttl=ttl,
+                dumps_fn=dumps,
+                namespace=namespace,
+                _cost=_cost,
+            )
+
+        items = [(index, key, value) for index, (key, value) in enumerate(pairs)]
+        self._route_many(items, namespace, call)
+
+        logger.debug(
+            "MULTI_SET %s %d (%.4f)s",
+            [key for key, _ in pairs],
+            len(pairs),
+            time.monotonic() - start,
+        )
+        return True
+
+    multi_set.__doc__ = BaseCache.multi_set.__doc__
+
+    @API.pycached_enabled(fake_return=0)
+    @API.plugins
+    def delete(self, key, namespace=None, _conn=None):
+        namespace = self._namespace(namespace)
+        return self._route(key, namespace, lambda shard: shard.delete(key, namespace=namespace))
+
+    delete.__doc__ = BaseCache.delete.__doc__
+
+    @API.pycached_enabled(fake_return=False)
+    @API.plugins
+    def exists(self, key, namespace=None, _conn=None):
+        namespace = self._namespace(namespace)
+        return self._route(key, namespace, lambda shard: shard.exists(key, namespace=namespace))
+
+    exists.__doc__ = BaseCache.exists.__doc__
+
+    @API.pycached_enabled(fake_return=1)
+    @API.plugins
+    def increment(self, key, delta=1, namespace=None, _conn=None):
+        namespace = self._namespace(namespace)
+        return self._route(
+            key, namespace, lambda shard: shard.increment(key, delta, namespace=namespace)
+        )
+
+    increment.__doc__ = BaseCache.increment.__doc__
+
+    @API.pycached_enabled(fake_return=True)
+    @API.plugins
+    def expire(self, key, ttl, namespace=None, _conn=None):
+        namespace = self._namespace(namespace)
+        return self._route(
+            key, namespace, lambda shard: shard.expire(key, ttl, namespace=namespace)
+        )
+
+    expire.__doc__ = BaseCache.expire.__doc__
+
+    @API.pycached_enabled(fake_return=True)
+    @API.plugins
+    def clear(self, namespace=None, _conn=None):
+        namespace = self._namespace(namespace)
+        for name, shard in self.shards.items():
+            if name in self.ring:
+                shard.clear(namespace=namespace)
+        return True
+
+    clear.__doc__ = BaseCache.clear.__doc__
+
+    @API.pycached_enabled()
+    @API.plugins
+    def raw(self, command, *args, _conn=None, **kwargs):
+        """
+        Send the raw command to the shard owning its first arg.
+        """
+        if not args:
+            raise ValueError("raw commands need a key to choose the shard")
+        return self._route(args[0], None, lambda shard: shard.raw(command, *args, **kwargs))
+
+    def _close(self, *args, **kwargs):
+        for shard in self.shards.values():
+            shard.close()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _shard_call(self, key, method, *args, **kwargs):
+        def call(shard):
+            return getattr(shard, method)(
+                shard.build_key(key, namespace=self.namespace), *args, **kwargs
+            )
+
+        return self._route(key, self.namespace, call)
+
+    def _gets(self, key, _conn=None):
+        return self._shard_call(key, "_gets")
+
+    def _add(self, key, value, ttl=None, _conn=None):
+        return self._shard_call(key, "_add", value, ttl=ttl)
+
+    def _redlock_release(self, key, value):
+        return self._shard_call(key, "_redlock_release", value)
+
+    def _build_key(self, key, namespace=None):
+        return key
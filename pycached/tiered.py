@@ -0,0 +1,351 @@
+import logging
+import time
+
+from pycached.base import API, BaseCache, SENTINEL
+
+logger = logging.getLogger(__name__)
+
+WRITE_MODES = ("through", "around")
+
+
+def _identity(value):
+    return value
+
+
+def _same_serializer(serializer, other):
+    return type(serializer) is type(other) and getattr(serializer, "encoding", None) == getattr(
+        other, "encoding", None
+    )
+
+
+def _parse_ttl(ttl):
+    # Whole seconds stay ints, redis only takes ints for EX
+    if ttl is None:
+        return None
+    ttl = float(ttl)
+    return int(ttl) if ttl.is_integer() else ttl
+
+
+def _create_tier(tier):
+    from pycached.factory import caches, _create_cache
+
+    if isinstance(tier, BaseCache):
+        return tier
+    if isinstance(tier, str):
+        return caches.get(tier)
+    return _create_cache(**dict(tier))
+
+
+class TieredCache(BaseCache):
+    """
+    Cache composed of other caches, from the fastest and smallest to the slowest and biggest,
+    i.e. ``TieredCache([SimpleMemoryCache(), RedisCache()])``.
+
+    Reads go through the tiers in order and stop at the first one having the key. The tiers
+    above it are backfilled with the value, with ``backfill_ttl`` so they don't keep it longer
+    than that. ``multi_get`` sends a single ``multi_get`` to each tier with the keys still
+    missing, and backfills each upper tier with a single ``multi_set``.
+
+    Writes go to all the tiers with ``write="through"``. With ``write="around"`` they only go to
+    the last tier and the key is deleted from the others, so it's backfilled on the next read.
+    ``add`` and ``set`` with a CAS token are checked against the last tier, and ``increment``
+    only runs there, the other tiers forget the key.
+
+    When all the tiers use the same serializer, values are serialized once and stored as is in
+    every tier. Otherwise each tier serializes the values with its own serializer.
+
+    It can be configured with ``caches.set_config``, giving the tiers as configs like the
+    ones of the other caches or as aliases of other configs::
+
+        caches.set_config({
+            'default': {
+                'cache': "pycached.TieredCache",
+                'tiers': [
+                    {'cache': "pycached.SimpleMemoryCache", 'max_entries': 10000},
+                    'redis_alt',
+                ],
+                'backfill_ttl': 30,
+            },
+            'redis_alt': {'cache': "pycached.RedisCache"},
+        })
+
+    :param tiers: list of :class:`pycached.base.BaseCache` instances, configs or aliases.
+    :param write: str "through" or "around". Default is "through"
+    :param backfill_ttl: int or float ttl in seconds for the values backfilled in the upper
+        tiers, None to keep them until they are evicted. Default is 60
+    :param serializer: obj derived from :class:`pycached.serializers.BaseSerializer`. Default
+        is the serializer of the first tier.
+    :param plugins: list of :class:`pycached.plugins.BasePlugin` derived classes.
+    :param namespace: string to use as default namespace in all the tiers. Default is None
+    :param ttl: int the expiration time in seconds to use as a default in all operations.
+    """
+
+    NAME = "tiered"
+
+    def __init__(self, tiers=None, write="through", backfill_ttl=60, serializer=None, **kwargs):
+        tiers = [_create_tier(tier) for tier in tiers or []]
+        if not tiers:
+            raise ValueError("TieredCache needs at least one tier")
+        if write not in WRITE_MODES:
+            raise ValueError("Invalid write mode, you can only use {}".format(WRITE_MODES))
+        super().__init__(serializer=serializer or tiers[0].serializer, **kwargs)
+        self.tiers = tiers
+        self.write = write
+        self.backfill_ttl = _parse_ttl(backfill_ttl)
+
+    @property
+    def shared_serializer(self):
+        """
+        True when all the tiers use the serializer of this cache.
+        """
+        return all(_same_serializer(self.serializer, tier.serializer) for tier in self.tiers)
+
+    def _codecs(self, dumps_fn=None, loads_fn=None):
+        """
+        Return the functions serializing the values and the ones the tiers must use.
+        """
+        if self.shared_serializer:
+            return (
+                dumps_fn or self.serializer.dumps,
+                loads_fn or self.serializer.loads,
+                _identity,
+                _identity,
+            )
+        return _identity, _identity, dumps_fn, loads_fn
+
+    def _namespace(self, namespace):
+        return self.namespace if namespace is None else namespace
+
+    def _write_tiers(self):
+        return self.tiers if self.write == "through" else self.tiers[-1:]
+
+    def _backfill(self, tiers, command, *args, **kwargs):
+        # The value was already read from a lower tier, failing to copy it up can't fail the read
+        for tier in tiers:
+            try:
+                getattr(tier, command)(*args, ttl=self.backfill_ttl, **kwargs)
+            except Exception:
+                logger.exception("Couldn't backfill %s in %s, unexpected error", args[0], tier)
+
+    def _forget(self, key, namespace, tiers):
+        for tier in tiers:
+            tier.delete(key, namespace=namespace)
+
+    @API.pycached_enabled(fake_return=True)
+    @API.plugins
+    def add(self, key, value, ttl=SENTINEL, dumps_fn=None, namespace=None, _conn=None):
+        start = time.monotonic()
+        dumps, _, tier_dumps, _ = self._codecs(dumps_fn=dumps_fn)
+        namespace = self._namespace(namespace)
+        value = dumps(value)
+        ttl = self._get_ttl(ttl)
+
+        self.tiers[-1].add(key, value, ttl=ttl, dumps_fn=tier_dumps, namespace=namespace)
+        if self.write == "through":
+            for tier in self.tiers[:-1]:
+                tier.set(key, value, ttl=ttl, dumps_fn=tier_dumps, namespace=namespace)
+        else:
+            self._forget(key, namespace, self.tiers[:-1])
+
+        logger.debug("ADD %s %s (%.4f)s", key, True, time.monotonic() - start)
+        return True
+
+    add.__doc__ = BaseCache.add.__doc__
+
+    @API.pycached_enabled()
+    @API.plugins
+    def get(self, key, default=None, loads_fn=None, namespace=None, _conn=None):
+        start = time.monotonic()
+        _, loads, tier_dumps, tier_loads = self._codecs(loads_fn=loads_fn)
+        namespace = self._namespace(namespace)
+
+        value = None
+        for index, tier in enumerate(self.tiers):
+            value = tier.get(key, loads_fn=tier_loads, namespace=namespace)
+            if value is not None:
+                self._backfill(
+                    self.tiers[:index], "set", key, value, dumps_fn=tier_dumps, namespace=namespace
+                )
+                break
+
+        value = loads(value)
+        logger.debug("GET %s %s (%.4f)s", key, value is not None, time.monotonic() - start)
+        return value if value is not None else default
+
+    get.__doc__ = BaseCache.get.__doc__
+
+    @API.pycached_enabled(fake_return=[])
+    @API.plugins
+    def multi_get(self, keys, loads_fn=None, namespace=None, _conn=None):
+        start = time.monotonic()
+        _, loads, tier_dumps, tier_loads = self._codecs(loads_fn=loads_fn)
+        namespace = self._namespace(namespace)
+
+        values = [None] * len(keys)
+        missing = list(range(len(keys)))
+        for index, tier in enumerate(self.tiers):
+            if not missing:
+                break
+            found = tier.multi_get(
+                [keys[i] for i in missing], loads_fn=tier_loads, namespace=namespace
+            )
+            pairs = []
+            still_missing = []
+            for i, value in zip(missing, found):
+                if value is None:
+                    still_missing.append(i)
+                else:
+                    values[i] = value
+                    pairs.append((keys[i], value))
+            if pairs:
+                self._backfill(
+                    self.tiers[:index], "multi_set", pairs, dumps_fn=tier_dumps, namespace=namespace
+                )
+            missing = still_missing
+
+        values = [loads(value) for value in values]
+        logger.debug(
+            "MULTI_GET %s %d (%.4f)s",
+            keys,
+            len([value for value in values if value is not None]),
+            time.monotonic() - start,
+        )
+        return values
+
+    multi_get.__doc__ = BaseCache.multi_get.__doc__
+
+    @API.pycached_enabled(fake_return=True)
+    @API.plugins
+    def set(
+            self,
+            key,
+            value,
+            ttl=SENTINEL,
+            dumps_fn=None,
+            namespace=None,
+            _cas_token=None,
+            _cost=None,
+            _conn=None,
+    ):
+        start = time.monotonic()
+        dumps, _, tier_dumps, _ = self._codecs(dumps_fn=dumps_fn)
+        namespace = self._namespace(namespace)
+        value = dumps(value)
+        ttl = self._get_ttl(ttl)
+
+        if _cas_token is not None:
+            res = self.tiers[-1].set(
+                key,
+                value,
+                ttl=ttl,
+                dumps_fn=tier_dumps,
+                namespace=namespace,
+                _cas_token=_cas_token,
+                _cost=_cost,
+            )
+            self._forget(key, namespace, self.tiers[:-1])
+        else:
+            for tier in self._write_tiers():
+                res = tier.set(
+                    key, value, ttl=ttl, dumps_fn=tier_dumps, namespace=namespace, _cost=_cost
+                )
+            if self.write == "around":
+                self._forget(key, namespace, self.tiers[:-1])
+
+        logger.debug("SET %s %d (%.4f)s", key, True, time.monotonic() - start)
+        return res
+
+    set.__doc__ = BaseCache.set.__doc__
+
+    @API.pycached_enabled(fake_return=True)
+    @API.plugins
+    def multi_set(
+            self, pairs, ttl=SENTINEL, dumps_fn=None, namespace=None, _cost=None, _conn=None
+    ):
+        start = time.monotonic()
+        dumps, _, tier_dumps, _ = self._codecs(dumps_fn=dumps_fn)
+        namespace = self._namespace(namespace)
+        pairs = [(key, dumps(value)) for key, value in pairs]
+        ttl = self._get_ttl(ttl)
+
+        for tier in self._write_tiers():
+            tier.multi_set(pairs, ttl=ttl, dumps_fn=tier_dumps, namespace=namespace, _cost=_cost)
+        if self.write == "around":
+            for key, _ in pairs:
+                self._forget(key, namespace, self.tiers[:-1])
+
+        logger.debug(
+            "MULTI_SET %s %d (%.4f)s", [key for key, _ in pairs], len(pairs), time.monotonic() - start
+        )
+        return True
+
+    multi_set.__doc__ = BaseCache.multi_set.__doc__
+
+    @API.pycached_enabled(fake_return=0)
+    @API.plugins
+    def delete(self, key, namespace=None, _conn=None):
+        namespace = self._namespace(namespace)
+        ret = 0
+        for tier in self.tiers:
+            ret = tier.delete(key, namespace=namespace)
+        return ret
+
+    delete.__doc__ = BaseCache.delete.__doc__
+
+    @API.pycached_enabled(fake_return=False)
+    @API.plugins
+    def exists(self, key, namespace=None, _conn=None):
+        namespace = self._namespace(namespace)
+        return any(tier.exists(key, namespace=namespace) for tier in self.tiers)
+
+    exists.__doc__ = BaseCache.exists.__doc__
+
+    @API.pycached_enabled(fake_return=1)
+    @API.plugins
+    def increment(self, key, delta=1, namespace=None, _conn=None):
+        namespace = self._namespace(namespace)
+        ret = self.tiers[-1].increment(key, delta, namespace=namespace)
+        self._forget(key, namespace, self.tiers[:-1])
+        return ret
+
+    increment.__doc__ = BaseCache.increment.__doc__
+
+    @API.pycached_enabled(fake_return=True)
+    @API.plugins
+    def expire(self, key, ttl, namespace=None, _conn=None):
+        namespace = self._namespace(namespace)
+        ret = False
+        for tier in self.tiers:
+            ret = tier.expire(key, ttl, namespace=namespace)
+        return ret
+
+    expire.__doc__ = BaseCache.expire.__doc__
+
+    @API.pycached_enabled(fake_return=True)
+    @API.plugins
+    def clear(self, namespace=None, _conn=None):
+        namespace = self._namespace(namespace)
+        for tier in self.tiers:
+            tier.clear(namespace=namespace)
+        return True
+
+    clear.__doc__ = BaseCache.clear.__doc__
+
+    @API.pycached_enabled()
+    @API.plugins
+    def raw(self, command, *args, _conn=None, **kwargs):
+        """
+        Send the raw command to the last tier.
+        """
+        return self.tiers[-1].raw(command, *args, **kwargs)
+
+    def _close(self, *args, **kwargs):
+        for tier in self.tiers:
+            tier.close()
+
+    def _gets(self, key, _conn=None):
+        last = self.tiers[-1]
+        return last._gets(last.build_key(key, namespace=self.namespace))
+
+    def _build_key(self, key, namespace=None):
+        return key
@@ -36,6 +36,7 @@ setup(
     install_requires=REQUIRED,
     extras_require={
         'redis"': ['redis>=2.10.6'],
+        'memcached': ['pymemcache>=3.0'],
         'msgpack': ['msgpack>=0.5.5']
     }
 )
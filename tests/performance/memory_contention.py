@@ -0,0 +1,70 @@
+"""
+Contention benchmark for SimpleMemoryCache. Runs a mix of get, set, add and increment
+commands from an increasing number of threads and reports the throughput for different
+numbers of lock stripes. Run it with:
+
+    python tests/performance/memory_contention.py --threads 1 2 4 8 16 --stripes 1 16
+"""
+
+import argparse
+import random
+import threading
+import time
+
+from pycached import SimpleMemoryCache
+
+
+def worker(cache, keys, ops, barrier, seed):
+    rand = random.Random(seed)
+    barrier.wait()
+    for _ in range(ops):
+        key = keys[rand.randrange(len(keys))]
+        op = rand.random()
+        if op < 0.7:
+            cache.get(key)
+        elif op < 0.85:
+            cache.set(key, "value")
+        elif op < 0.95:
+            cache.increment(key + ":counter")
+        else:
+            try:
+                cache.add(key + ":lock", "value", ttl=1)
+            except ValueError:
+                pass
+
+
+def run(threads, stripes, ops, keys, max_entries):
+    cache = SimpleMemoryCache(stripes=stripes, max_entries=max_entries, timeout=None)
+    keys = ["key{}".format(i) for i in range(keys)]
+    barrier = threading.Barrier(threads + 1)
+    workers = [
+        threading.Thread(target=worker, args=(cache, keys, ops, barrier, seed))
+        for seed in range(threads)
+    ]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    return threads * ops / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--stripes", type=int, nargs="+", default=[1, 16])
+    parser.add_argument("--ops", type=int, default=20000, help="commands per thread")
+    parser.add_argument("--keys", type=int, default=1000)
+    parser.add_argument("--max-entries", type=int, default=None)
+    args = parser.parse_args()
+
+    print("{:>8} {:>8} {:>14}".format("threads", "stripes", "ops/s"))
+    for threads in args.threads:
+        for stripes in args.stripes:
+            throughput = run(threads, stripes, args.ops, args.keys, args.max_entries)
+            print("{:>8} {:>8} {:>14.0f}".format(threads, stripes, throughput))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark for RedisCache auto pipelining. Runs the same number of get/set calls from many
+threads with and without ``auto_pipeline`` and reports the throughput and, when pipelining, the
+average batch size. Needs a running redis:
+
+    python tests/performance/redis_auto_pipeline.py --threads 8 64 256
+"""
+
+import argparse
+import threading
+import time
+
+from pycached import RedisCache
+
+
+def worker(cache, calls, index):
+    for i in range(calls):
+        key = "bench:{}:{}".format(index, i % 100)
+        cache.set(key, i)
+        cache.get(key)
+
+
+def run(threads, calls, **kwargs):
+    cache = RedisCache(timeout=None, max_connections=threads + 1, **kwargs)
+    workers = [
+        threading.Thread(target=worker, args=(cache, calls, index)) for index in range(threads)
+    ]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    batch = cache.pipeline_stats()["avg_batch_size"] if cache.auto_pipeline else 1.0
+    cache.clear(namespace="bench")
+    cache.close()
+    return threads * calls * 2 / elapsed, batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6379)
+    parser.add_argument("--threads", type=int, nargs="+", default=[8, 64, 256])
+    parser.add_argument("--calls", type=int, default=1000)
+    parser.add_argument("--window", type=float, default=0.5)
+    args = parser.parse_args()
+
+    print("{:>8} {:>14} {:>14} {:>10}".format("threads", "plain ops/s", "pipelined", "batch"))
+    for threads in args.threads:
+        plain, _ = run(threads, args.calls, endpoint=args.host, port=args.port)
+        pipelined, batch = run(
+            threads,
+            args.calls,
+            endpoint=args.host,
+            port=args.port,
+            auto_pipeline=True,
+            pipeline_window=args.window,
+        )
+        print("{:>8} {:>14.0f} {:>14.0f} {:>10.1f}".format(threads, plain, pipelined, batch))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark for RedisCache.multi_set with a ttl. Compares the previous implementation (MSET
+followed by one EXPIRE per key in a pipeline) with the current one (a single script call
+setting every key with its ttl) for different numbers of pairs. Needs a running redis:
+
+    python tests/performance/redis_multi_set.py --pairs 100 10000 100000
+"""
+
+import argparse
+import time
+
+from pycached import RedisCache
+
+
+def mset_expire(conn, flattened, ttl):
+    pipeline = conn.pipeline()
+    pipeline.mset(flattened)
+    for key in flattened:
+        pipeline.expire(key, ttl)
+    pipeline.execute()
+
+
+def run(cache, conn, pairs, repeat, ttl):
+    flattened = {"bench:{}".format(i): "value{}".format(i) for i in range(pairs)}
+    results = {}
+    for name, multi_set in (
+        ("mset+expire", lambda: mset_expire(conn, flattened, ttl)),
+        ("script", lambda: cache._multi_set(list(flattened.items()), ttl=ttl)),
+    ):
+        timings = []
+        for _ in range(repeat):
+            conn.flushdb()
+            start = time.perf_counter()
+            multi_set()
+            timings.append(time.perf_counter() - start)
+        results[name] = min(timings)
+    conn.flushdb()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6379)
+    parser.add_argument("--pairs", type=int, nargs="+", default=[100, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--ttl", type=int, default=60)
+    args = parser.parse_args()
+
+    cache = RedisCache(endpoint=args.host, port=args.port, timeout=None)
+    conn = cache.acquire_conn()
+    print("{:>8} {:>14} {:>14}".format("pairs", "mset+expire", "script"))
+    for pairs in args.pairs:
+        results = run(cache, conn, pairs, args.repeat, args.ttl)
+        print(
+            "{:>8} {:>13.4f}s {:>13.4f}s".format(
+                pairs, results["mset+expire"], results["script"]
+            )
+        )
+    cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from redis import exceptions
+from pycached.aio.redis import AsyncRedisBackend, AsyncRedisCache
+from pycached.backends.scripts import Script
+from pycached.serializers import JsonSerializer, PickleSerializer
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class AsyncIterator:
+    def __init__(self, items):
+        self._items = iter(items)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._items)
+        except StopIteration:
+            raise StopAsyncIteration from None
+
+
+@pytest.fixture
+def redis_connection():
+    conn = AsyncMock()
+    conn.scan_iter = MagicMock(return_value=AsyncIterator([]))
+    return conn
+
+
+@pytest.fixture
+def redis(redis_connection):
+    redis = AsyncRedisCache()
+    redis._pool = redis_connection
+    return redis
+
+
+class TestAsyncRedisBackend:
+    def test_setup(self):
+        redis = AsyncRedisBackend()
+        assert redis.endpoint == "127.0.0.1"
+        assert redis.port == 6379
+        assert redis.db == 0
+        assert redis.max_connections == 10
+        assert redis.blocking is False
+        assert redis.binary is None
+
+    def test_setup_casts(self):
+        redis = AsyncRedisBackend(db="2", port="6380", blocking="true", pool_timeout="1.5")
+        assert (redis.db, redis.port, redis.blocking, redis.pool_timeout) == (2, 6380, True, 1.5)
+
+    def test_get_pool(self):
+        redis = AsyncRedisCache(max_connections=5, socket_timeout=1)
+        with patch("pycached.aio.redis.redis.asyncio.ConnectionPool") as pool_class:
+            client = redis._get_pool()
+        assert redis._get_pool() is client
+        pool_class.assert_called_once()
+        kwargs = pool_class.call_args[1]
+        assert kwargs["max_connections"] == 5
+        assert kwargs["socket_timeout"] == 1
+        assert kwargs["decode_responses"] is True
+
+    def test_get_pool_blocking_binary(self):
+        redis = AsyncRedisCache(blocking=True, pool_timeout=2, serializer=PickleSerializer())
+        with patch("pycached.aio.redis.redis.asyncio.BlockingConnectionPool") as pool_class:
+            redis._get_pool()
+        kwargs = pool_class.call_args[1]
+        assert kwargs["timeout"] == 2
+        assert kwargs["decode_responses"] is False
+
+    def test_get(self, redis, redis_connection):
+        redis_connection.get.return_value = '"value"'
+        assert run(redis.get(pytest.KEY)) == "value"
+        redis_connection.get.assert_awaited_once_with(pytest.KEY)
+
+    def test_get_binary_decodes(self, redis_connection):
+        redis = AsyncRedisCache(binary=True)
+        redis._pool = redis_connection
+        redis_connection.get.return_value = b'"value"'
+        redis_connection.mget.return_value = [b"1", None]
+        assert run(redis.get(pytest.KEY)) == "value"
+        assert run(redis.multi_get([pytest.KEY, pytest.KEY_1])) == [1, None]
+
+    def test_multi_get(self, redis, redis_connection):
+        redis_connection.mget.return_value = ["1", None]
+        assert run(redis.multi_get([pytest.KEY, pytest.KEY_1])) == [1, None]
+        redis_connection.mget.assert_awaited_once_with(pytest.KEY, pytest.KEY_1)
+
+    def test_set(self, redis, redis_connection):
+        run(redis.set(pytest.KEY, "value"))
+        redis_connection.set.assert_awaited_once_with(pytest.KEY, '"value"')
+
+    def test_set_ttl(self, redis, redis_connection):
+        run(redis.set(pytest.KEY, "value", ttl=1))
+        redis_connection.set.assert_awaited_with(pytest.KEY, '"value"', ex=1)
+        run(redis.set(pytest.KEY, "value", ttl=0.5))
+        redis_connection.set.assert_awaited_with(pytest.KEY, '"value"', px=500)
+
+    def test_set_cas(self, redis, redis_connection):
+        redis_connection.evalsha.return_value = 1
+        assert run(redis.set(pytest.KEY, "value", _cas_token='"old"')) == 1
+        redis_connection.evalsha.assert_awaited_once_with(
+            Script(redis.CAS_SCRIPT).sha, 1, pytest.KEY, '"value"', '"old"'
+        )
+
+    def test_multi_set(self, redis, redis_connection):
+        run(redis.multi_set([(pytest.KEY, "a"), (pytest.KEY_1, "b")]))
+        redis_connection.mset.assert_awaited_once_with({pytest.KEY: '"a"', pytest.KEY_1: '"b"'})
+
+    def test_multi_set_ttl(self, redis, redis_connection):
+        run(redis.multi_set([(pytest.KEY, "a"), (pytest.KEY_1, "b")], ttl=1))
+        redis_connection.evalsha.assert_awaited_once_with(
+            Script(redis.MULTI_SET_TTL_SCRIPT).sha,
+            2,
+            pytest.KEY,
+            pytest.KEY_1,
+            "EX",
+            1,
+            '"a"',
+            '"b"',
+        )
+
+    def test_add(self, redis, redis_connection):
+        redis_connection.set.return_value = True
+        assert run(redis.add(pytest.KEY, "value", ttl=1)) is True
+        redis_connection.set.assert_awaited_once_with(pytest.KEY, '"value"', nx=True, ex=1)
+
+    def test_add_existing(self, redis, redis_connection):
+        redis_connection.set.return_value = None
+        with pytest.raises(ValueError):
+            run(redis.add(pytest.KEY, "value"))
+
+    def test_exists(self, redis, redis_connection):
+        redis_connection.exists.return_value = 1
+        assert run(redis.exists(pytest.KEY)) is True
+
+    def test_increment(self, redis, redis_connection):
+        redis_connection.incrby.return_value = 3
+        assert run(redis.increment(pytest.KEY, 2)) == 3
+        redis_connection.incrby.side_effect = exceptions.ResponseError()
+        with pytest.raises(TypeError):
+            run(redis.increment(pytest.KEY))
+
+    def test_expire(self, redis, redis_connection):
+        run(redis.expire(pytest.KEY, 1))
+        redis_connection.expire.assert_awaited_once_with(pytest.KEY, 1)
+        run(redis.expire(pytest.KEY, 0))
+        redis_connection.persist.assert_awaited_once_with(pytest.KEY)
+
+    def test_delete(self, redis, redis_connection):
+        redis_connection.delete.return_value = 1
+        assert run(redis.delete(pytest.KEY)) == 1
+
+    def test_clear(self, redis, redis_connection):
+        run(redis.clear())
+        redis_connection.flushdb.assert_awaited_once_with()
+
+    def test_clear_namespace(self, redis, redis_connection):
+        redis.unlink_batch = 2
+        redis_connection.scan_iter.return_value = AsyncIterator(["ns:a", "ns:b", "ns:c"])
+        run(redis.clear(namespace="ns"))
+        redis_connection.scan_iter.assert_called_once_with(match="ns:*", count=redis.scan_count)
+        assert [call.args for call in redis_connection.unlink.await_args_list] == [
+            ("ns:a", "ns:b"),
+            ("ns:c",),
+        ]
+
+    def test_raw(self, redis, redis_connection):
+        run(redis.raw("ttl", pytest.KEY))
+        redis_connection.ttl.assert_awaited_once_with(pytest.KEY)
+
+    def test_raw_eval_reloads_on_noscript(self, redis, redis_connection):
+        redis_connection.evalsha.side_effect = [exceptions.NoScriptError(), "ok"]
+        assert run(redis.raw("eval", "return 'ok'", 0)) == "ok"
+        assert redis_connection.script_load.await_count == 8
+
+    def test_redlock_release(self, redis, redis_connection):
+        redis_connection.evalsha.return_value = 1
+        assert run(redis._redlock_release(pytest.KEY, "value")) == 1
+
+    def test_close(self, redis):
+        redis._connection_pool = AsyncMock()
+        run(redis.close())
+        redis._connection_pool.disconnect.assert_awaited_once_with()
+
+
+class TestAsyncRedisCache:
+    def test_defaults(self):
+        cache = AsyncRedisCache()
+        assert isinstance(cache.serializer, JsonSerializer)
+        assert cache.NAME == "redis"
+
+    def test_build_key(self):
+        cache = AsyncRedisCache(namespace="ns")
+        assert cache.build_key(pytest.KEY) == "ns:" + pytest.KEY
+        assert cache.build_key(pytest.KEY, namespace="") == pytest.KEY
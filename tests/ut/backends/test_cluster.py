@@ -0,0 +1,345 @@
+import fnmatch
+import hashlib
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+import redis
+
+from redis import exceptions
+from pycached import Cache, RedisCache, RedisClusterCache
+from pycached.backends.cluster import RedisClusterBackend, parse_nodes, _slot
+from pycached.serializers import JsonSerializer
+
+
+class FakeNode:
+    """
+    Stand-in for a cluster node: it only accepts commands for the slots it owns and answers
+    MOVED otherwise, like redis does.
+    """
+
+    def __init__(self, cluster, name):
+        self.cluster = cluster
+        self.name = name
+        self.data = {}
+        self.ttls = {}
+        self.threads = set()
+        self.scripts = set()
+        self.redis_connection = FakeClient(self)
+
+    def check(self, keys):
+        slots = {_slot(key) for key in keys}
+        if len(slots) > 1:
+            raise exceptions.ResponseError("CROSSSLOT Keys don't hash to the same slot")
+        for slot in slots:
+            owner = self.cluster.owner(slot)
+            if owner is not self:
+                raise exceptions.MovedError("{} {}".format(slot, owner.name))
+
+
+class FakeClient:
+    def __init__(self, node):
+        self.node = node
+        self.connection_pool = redis.ConnectionPool(max_connections=10)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def mget(self, keys):
+        self.node.check(keys)
+        self.node.threads.add(threading.current_thread().name)
+        return [self.node.data.get(key) for key in keys]
+
+    def mset(self, mapping):
+        self.node.check(mapping)
+        self.node.data.update(mapping)
+        return True
+
+    def set(self, key, value, ex=None, px=None):
+        self.node.check([key])
+        self.node.data[key] = value
+        self.node.ttls[key] = ("EX", ex) if ex else ("PX", px) if px else None
+        return True
+
+    def evalsha(self, sha, numkeys, *args):
+        if sha not in self.node.scripts:
+            raise exceptions.NoScriptError("No matching script")
+        keys, (unit, ttl), values = args[:numkeys], args[numkeys:numkeys + 2], args[numkeys + 2:]
+        self.node.check(keys)
+        for key, value in zip(keys, values):
+            self.node.data[key] = value
+            self.node.ttls[key] = (unit, ttl)
+        return len(keys)
+
+    def scan_iter(self, match=None, count=None):
+        return iter([key for key in list(self.node.data) if fnmatch.fnmatchcase(key, match)])
+
+    def unlink(self, *keys):
+        self.node.check(keys)
+        return sum(self.node.data.pop(key, None) is not None for key in keys)
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+            return self
+
+        return queue
+
+    def execute(self):
+        return [getattr(self.client, name)(*args, **kwargs) for name, args, kwargs in self.commands]
+
+
+class FakeCluster:
+    """
+    Stand-in for :class:`redis.cluster.RedisCluster` with two nodes splitting the slots. The
+    slot map cached by the client can be made stale to check redirections are handled.
+    """
+
+    def __init__(self):
+        self.nodes = [FakeNode(self, "127.0.0.1:7000"), FakeNode(self, "127.0.0.1:7001")]
+        self.cached = list(self.nodes)
+        self.nodes_manager = MagicMock()
+        self.nodes_manager.get_node_from_slot.side_effect = lambda slot: self.route(
+            self.cached, slot
+        )
+        self.close = MagicMock()
+        self.flushdb = MagicMock()
+        self.loaded = []
+
+    @staticmethod
+    def route(nodes, slot):
+        return nodes[0] if slot < 8192 else nodes[1]
+
+    def owner(self, slot):
+        return self.route(self.nodes, slot)
+
+    def keyslot(self, key):
+        return _slot(key)
+
+    def get_primaries(self):
+        return self.nodes
+
+    def get_nodes(self):
+        return self.nodes
+
+    def script_load(self, source):
+        self.loaded.append(source)
+        for node in self.nodes:
+            node.scripts.add(hashlib.sha1(source.encode()).hexdigest())
+
+    def mget_nonatomic(self, keys):
+        return [self.owner(_slot(key)).data.get(key) for key in keys]
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+    def set(self, key, value, **kwargs):
+        return self.owner(_slot(key)).redis_connection.set(key, value, **kwargs)
+
+    def get(self, key):
+        return self.owner(_slot(key)).data.get(key)
+
+
+# Keys owned by each node of the fake cluster, two of them sharing a slot
+KEYS_0 = ["{user1}:a", "{user1}:b", "key:0"]
+KEYS_1 = ["key:2", "key:3"]
+
+
+@pytest.fixture
+def cluster():
+    cluster = FakeCluster()
+    assert all(_slot(key) < 8192 for key in KEYS_0)
+    assert all(_slot(key) >= 8192 for key in KEYS_1)
+    return cluster
+
+
+@pytest.fixture
+def backend(cluster):
+    backend = RedisClusterBackend()
+    backend._pool = cluster
+    yield backend
+    backend._close()
+
+
+class TestParseNodes:
+    @pytest.mark.parametrize(
+        "nodes, expected",
+        [
+            (None, []),
+            ("a:7000,b:7001", [("a", 7000), ("b", 7001)]),
+            (["a:7000", ("b", "7001")], [("a", 7000), ("b", 7001)]),
+            (["[::1]:7000"], [("[::1]", 7000)]),
+        ],
+    )
+    def test_parse_nodes(self, nodes, expected):
+        assert parse_nodes(nodes) == expected
+
+
+class TestRedisClusterBackend:
+    def test_setup(self):
+        backend = RedisClusterBackend()
+        assert backend.startup_nodes == [("127.0.0.1", 6379)]
+        assert backend.max_workers is None
+
+    def test_setup_casts(self):
+        backend = RedisClusterBackend(startup_nodes="a:7000,b:7001", max_workers="4")
+        assert backend.startup_nodes == [("a", 7000), ("b", 7001)]
+        assert backend.max_workers == 4
+
+    def test_setup_db(self):
+        with pytest.raises(ValueError):
+            RedisClusterBackend(db=1)
+
+    def test_setup_auto_pipeline(self):
+        with pytest.raises(ValueError):
+            RedisClusterBackend(auto_pipeline=True)
+
+    def test_get_pool(self):
+        backend = RedisClusterBackend(startup_nodes=["a:7000"], socket_timeout=1)
+        with patch("pycached.backends.cluster.RedisCluster") as redis_cluster:
+            assert backend._get_pool() is redis_cluster.return_value
+        kwargs = redis_cluster.call_args[1]
+        assert [(node.host, node.port) for node in kwargs["startup_nodes"]] == [("a", 7000)]
+        assert kwargs["max_connections"] == 10
+        assert kwargs["socket_timeout"] == 1.0
+        assert kwargs["decode_responses"] is True
+        assert "db" not in kwargs
+
+    def test_get_pool_concurrent_first_calls(self):
+        backend = RedisClusterBackend()
+
+        def create(**kwargs):
+            time.sleep(0.05)
+            return MagicMock()
+
+        with patch("pycached.backends.cluster.RedisCluster", side_effect=create) as cluster:
+            pools = []
+            workers = [
+                threading.Thread(target=lambda: pools.append(backend._get_pool()))
+                for _ in range(8)
+            ]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+
+        assert cluster.call_count == 1
+        assert pools == [backend._pool] * 8
+
+    def test_pool_stats(self, backend, cluster):
+        pool = cluster.nodes[0].redis_connection.connection_pool
+        with patch.object(redis.Connection, "connect"):
+            connection = pool.get_connection()
+            pool.release(pool.get_connection())
+        assert backend.pool_stats() == {
+            "127.0.0.1:7000": {"max_connections": 10, "created": 2, "in_use": 1, "idle": 1},
+            "127.0.0.1:7001": {"max_connections": 10, "created": 0, "in_use": 0, "idle": 0},
+        }
+        pool.release(connection)
+
+    def test_multi_get(self, backend, cluster):
+        for key in KEYS_0 + KEYS_1:
+            cluster.owner(_slot(key)).data[key] = key.upper()
+        keys = ["key:2", "{user1}:a", "missing", "key:3", "{user1}:b"]
+        assert backend._multi_get(keys) == ["KEY:2", "{USER1}:A", None, "KEY:3", "{USER1}:B"]
+
+    def test_multi_get_concurrent(self, backend, cluster):
+        backend._multi_get(KEYS_0 + KEYS_1)
+        for node in cluster.nodes:
+            assert node.threads
+            assert all(name.startswith("pycached-cluster") for name in node.threads)
+
+    def test_multi_get_single_node_inline(self, backend, cluster):
+        backend._multi_get(KEYS_1)
+        assert cluster.nodes[1].threads == {threading.current_thread().name}
+        assert backend._executor is None
+
+    def test_multi_get_moved(self, backend, cluster):
+        cluster.nodes[1].data["key:2"] = "value"
+        cluster.cached = [cluster.nodes[0], cluster.nodes[0]]
+        assert backend._multi_get(["key:2", "key:0"]) == ["value", None]
+
+    def test_multi_set(self, backend, cluster):
+        backend._multi_set([(key, key) for key in KEYS_0 + KEYS_1])
+        assert cluster.nodes[0].data == {key: key for key in KEYS_0}
+        assert cluster.nodes[1].data == {key: key for key in KEYS_1}
+
+    @pytest.mark.parametrize("ttl, expected", [(10, ("EX", 10)), (0.5, ("PX", 500))])
+    def test_multi_set_ttl(self, backend, cluster, ttl, expected):
+        backend._multi_set([(key, key) for key in KEYS_0 + KEYS_1], ttl=ttl)
+        for node in cluster.nodes:
+            assert set(node.ttls.values()) == {expected}
+        assert len(cluster.nodes[0].ttls) + len(cluster.nodes[1].ttls) == 5
+
+    def test_multi_set_ttl_loads_script_once(self, backend, cluster):
+        backend._multi_set([(key, key) for key in KEYS_0 + KEYS_1], ttl=10)
+        backend._multi_set([(key, key) for key in KEYS_0 + KEYS_1], ttl=10)
+        assert cluster.loaded.count(RedisClusterBackend.MULTI_SET_TTL_SCRIPT) == 1
+
+    def test_multi_set_ttl_noscript(self, backend, cluster):
+        backend._multi_set([("key:0", 1)], ttl=10)
+        cluster.nodes[1].scripts.clear()
+        backend._multi_set([(key, key) for key in KEYS_1], ttl=10)
+        assert cluster.nodes[1].data == {key: key for key in KEYS_1}
+        assert cluster.loaded.count(RedisClusterBackend.MULTI_SET_TTL_SCRIPT) == 2
+
+    def test_multi_set_moved(self, backend, cluster):
+        cluster.cached = [cluster.nodes[1], cluster.nodes[1]]
+        backend._multi_set([(key, key) for key in KEYS_0], ttl=1)
+        assert cluster.nodes[0].data == {key: key for key in KEYS_0}
+        assert cluster.nodes[0].ttls == {key: ("EX", 1) for key in KEYS_0}
+
+    def test_clear_namespace(self, backend, cluster):
+        backend._multi_set([(key, key) for key in KEYS_0 + KEYS_1])
+        assert backend._clear("key") is True
+        assert cluster.nodes[0].data == {"{user1}:a": "{user1}:a", "{user1}:b": "{user1}:b"}
+        assert cluster.nodes[1].data == {}
+
+    def test_clear_all(self, backend, cluster):
+        backend._clear()
+        cluster.flushdb.assert_called_once_with(target_nodes="primaries")
+
+    def test_clear_in_background(self, backend, cluster):
+        backend.namespace = None
+        backend._multi_set([(key, key) for key in KEYS_0 + KEYS_1])
+        job = backend.clear_in_background("key")
+        job.wait(1)
+        assert (job.matched, job.deleted) == (3, 3)
+
+    def test_close(self, backend, cluster):
+        backend._multi_get(KEYS_0 + KEYS_1)
+        backend._close()
+        assert backend._executor is None
+        assert cluster.close.call_count == 1
+
+
+class TestRedisClusterCache:
+    def test_inheritance(self):
+        assert issubclass(RedisClusterCache, RedisCache)
+
+    def test_default_serializer(self):
+        assert isinstance(RedisClusterCache().serializer, JsonSerializer)
+
+    def test_from_url(self):
+        cache = Cache.from_url("rediscluster://10.0.0.1:7000?startup_nodes=a:7001,b:7002")
+        assert isinstance(cache, RedisClusterCache)
+        assert cache.startup_nodes == [("a", 7001), ("b", 7002)]
+
+    def test_from_url_seed(self):
+        cache = Cache.from_url("rediscluster://10.0.0.1:7000")
+        assert cache.startup_nodes == [("10.0.0.1", 7000)]
+
+    def test_multi_get(self, cluster):
+        cache = RedisClusterCache()
+        cache._pool = cluster
+        cache.multi_set([(key, {"key": key}) for key in KEYS_0 + KEYS_1], namespace="")
+        assert cache.multi_get(KEYS_1 + KEYS_0, namespace="") == [
+            {"key": key} for key in KEYS_1 + KEYS_0
+        ]
@@ -0,0 +1,379 @@
+import socketserver
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+from pymemcache.client.base import PooledClient
+
+from pycached import MemcachedCache
+from pycached.backends.memcached import MemcachedBackend, memcached_key, _expire
+from pycached.base import BaseCache
+from pycached.lock import OptimisticLock, OptimisticLockError, RedLock
+from pycached.serializers import JsonSerializer, PickleSerializer
+
+
+class FakeMemcachedHandler(socketserver.StreamRequestHandler):
+    """
+    Speaks the subset of the memcached text protocol pymemcache uses.
+    """
+
+    def handle(self):
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command, *args = line.decode().split()
+            getattr(self, "cmd_" + command)(*args)
+
+    def reply(self, *lines):
+        self.wfile.write(b"".join(line + b"\r\n" for line in lines))
+
+    @property
+    def data(self):
+        return self.server.data
+
+    def _lookup(self, key):
+        item = self.data.get(key)
+        if item is None:
+            return None
+        if item["expires"] and item["expires"] <= time.time():
+            del self.data[key]
+            return None
+        return item
+
+    def _store(self, key, flags, exptime, value):
+        exptime = int(exptime)
+        self.server.cas += 1
+        self.data[key] = {
+            "value": value,
+            "flags": flags,
+            "expires": time.time() + exptime if exptime else 0,
+            "cas": self.server.cas,
+        }
+
+    def _read_value(self, size):
+        value = self.rfile.read(int(size) + 2)[:-2]
+        return value
+
+    def cmd_get(self, *keys, cas=False):
+        lines = []
+        for key in keys:
+            item = self._lookup(key)
+            if item is not None:
+                header = "VALUE {} {} {}".format(key, item["flags"], len(item["value"]))
+                if cas:
+                    header += " {}".format(item["cas"])
+                lines += [header.encode(), item["value"]]
+        self.reply(*lines, b"END")
+
+    def cmd_gets(self, *keys):
+        self.cmd_get(*keys, cas=True)
+
+    def cmd_set(self, key, flags, exptime, size, *noreply):
+        self._store(key, flags, exptime, self._read_value(size))
+        self.reply(b"STORED")
+
+    def cmd_add(self, key, flags, exptime, size, *noreply):
+        value = self._read_value(size)
+        if self._lookup(key) is not None:
+            return self.reply(b"NOT_STORED")
+        self._store(key, flags, exptime, value)
+        self.reply(b"STORED")
+
+    def cmd_append(self, key, flags, exptime, size, *noreply):
+        value = self._read_value(size)
+        item = self._lookup(key)
+        if item is None:
+            return self.reply(b"NOT_STORED")
+        item["value"] += value
+        self.server.cas += 1
+        item["cas"] = self.server.cas
+        self.reply(b"STORED")
+
+    def cmd_cas(self, key, flags, exptime, size, cas, *noreply):
+        value = self._read_value(size)
+        item = self._lookup(key)
+        if item is None:
+            return self.reply(b"NOT_FOUND")
+        if item["cas"] != int(cas):
+            return self.reply(b"EXISTS")
+        self._store(key, flags, exptime, value)
+        self.reply(b"STORED")
+
+    def cmd_incr(self, key, delta, *noreply, sign=1):
+        item = self._lookup(key)
+        if item is None:
+            return self.reply(b"NOT_FOUND")
+        if not item["value"].isdigit():
+            return self.reply(b"CLIENT_ERROR cannot increment or decrement non-numeric value")
+        item["value"] = str(max(int(item["value"]) + sign * int(delta), 0)).encode()
+        self.reply(item["value"])
+
+    def cmd_decr(self, key, delta, *noreply):
+        self.cmd_incr(key, delta, sign=-1)
+
+    def cmd_touch(self, key, exptime, *noreply):
+        item = self._lookup(key)
+        if item is None:
+            return self.reply(b"NOT_FOUND")
+        item["expires"] = time.time() + int(exptime) if int(exptime) else 0
+        self.reply(b"TOUCHED")
+
+    def cmd_delete(self, key, *noreply):
+        if self._lookup(key) is None:
+            return self.reply(b"NOT_FOUND")
+        del self.data[key]
+        self.reply(b"DELETED")
+
+    def cmd_flush_all(self, *args):
+        self.data.clear()
+        self.reply(b"OK")
+
+
+@pytest.fixture(scope="module")
+def memcached_server():
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), FakeMemcachedHandler)
+    server.daemon_threads = True
+    server.data = {}
+    server.cas = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def memcached(memcached_server):
+    memcached_server.data.clear()
+    cache = MemcachedCache(port=memcached_server.server_address[1], max_connections=4)
+    yield cache
+    cache.close()
+
+
+class TestMemcachedKey:
+    def test_valid(self):
+        assert memcached_key("ns:key-1") == "ns:key-1"
+        assert memcached_key("a" * 250) == "a" * 250
+
+    @pytest.mark.parametrize("key", ["a" * 251, "with space", "new\nline", "ñandú"])
+    def test_invalid_hashed(self, key):
+        hashed = memcached_key(key)
+        assert len(hashed) == 40
+        assert memcached_key(hashed) == hashed
+        assert memcached_key(key + "x") != hashed
+
+
+class TestExpire:
+    @pytest.mark.parametrize("ttl, expected", [(None, 0), (0, 0), (10, 10), (0.2, 1), (1.5, 2)])
+    def test_relative(self, ttl, expected):
+        assert _expire(ttl) == expected
+
+    def test_long_ttl_timestamp(self):
+        with patch("pycached.backends.memcached.time.time", return_value=1000):
+            assert _expire(60 * 60 * 24 * 31) == 1000 + 60 * 60 * 24 * 31
+
+
+class TestMemcachedBackend:
+    def test_setup(self):
+        memcached = MemcachedBackend()
+        assert memcached.endpoint == "127.0.0.1"
+        assert memcached.port == 11211
+        assert memcached.max_connections == 10
+
+    def test_setup_casts(self):
+        memcached = MemcachedBackend(
+            port="11212",
+            max_connections="2",
+            socket_timeout="1.5",
+            pool_idle_timeout="30",
+        )
+        assert memcached.port == 11212
+        assert memcached.max_connections == 2
+        assert memcached.socket_timeout == 1.5
+        assert memcached.pool_idle_timeout == 30
+        assert MemcachedBackend(pool_timeout="0.5").pool_timeout == 0.5
+
+    def test_pool_created_once(self):
+        memcached = MemcachedCache(max_connections=3)
+        with patch("pycached.backends.memcached.PooledClient") as pooled:
+            assert memcached._get_pool() is memcached._get_pool()
+        pooled.assert_called_once()
+        assert pooled.call_args[1]["max_pool_size"] == 3
+        assert pooled.call_args[1]["default_noreply"] is False
+
+    def test_get_set(self, memcached):
+        assert memcached.get(pytest.KEY) is None
+        assert memcached.set(pytest.KEY, {"a": 1}) is True
+        assert memcached.get(pytest.KEY) == {"a": 1}
+
+    def test_bytes_serializer(self, memcached_server):
+        cache = MemcachedCache(
+            port=memcached_server.server_address[1], serializer=PickleSerializer()
+        )
+        cache.set(pytest.KEY, {"a": {1, 2}})
+        assert cache.get(pytest.KEY) == {"a": {1, 2}}
+        assert cache.multi_get([pytest.KEY]) == [{"a": {1, 2}}]
+
+    def test_multi_get_single_command(self, memcached):
+        memcached.multi_set([(pytest.KEY, 1), (pytest.KEY_1, 2)])
+        client = memcached._get_pool()
+        with patch.object(client, "get_many", wraps=client.get_many) as get_many:
+            values = memcached.multi_get([pytest.KEY, "missing", pytest.KEY_1])
+        assert values == [1, None, 2]
+        get_many.assert_called_once_with([pytest.KEY, "missing", pytest.KEY_1])
+
+    def test_multi_set_ttl(self, memcached, memcached_server):
+        memcached.multi_set([(pytest.KEY, 1), (pytest.KEY_1, 2)], ttl=10)
+        assert {key: item["value"] for key, item in memcached_server.data.items()} == {
+            pytest.KEY: b"1",
+            pytest.KEY_1: b"2",
+        }
+        assert all(item["expires"] for item in memcached_server.data.values())
+
+    def test_ttl_expires(self, memcached, memcached_server):
+        memcached.set(pytest.KEY, "value", ttl=1)
+        memcached_server.data[pytest.KEY]["expires"] = time.time() - 1
+        assert memcached.get(pytest.KEY) is None
+
+    def test_add(self, memcached):
+        assert memcached.add(pytest.KEY, "value") is True
+        with pytest.raises(ValueError):
+            memcached.add(pytest.KEY, "other")
+        assert memcached.get(pytest.KEY) == "value"
+
+    def test_exists(self, memcached):
+        assert memcached.exists(pytest.KEY) is False
+        memcached.set(pytest.KEY, "value")
+        assert memcached.exists(pytest.KEY) is True
+        assert memcached.get(pytest.KEY) == "value"
+
+    def test_exists_keeps_cas_token(self, memcached):
+        memcached.set(pytest.KEY, "value")
+        token = memcached._gets(pytest.KEY)
+        assert memcached.exists(pytest.KEY) is True
+        assert memcached._gets(pytest.KEY) == token
+
+    def test_increment(self, memcached):
+        assert memcached.increment(pytest.KEY) == 1
+        assert memcached.increment(pytest.KEY, 5) == 6
+        assert memcached.increment(pytest.KEY, -2) == 4
+        assert memcached.get(pytest.KEY) == 4
+
+    def test_increment_not_int(self, memcached):
+        memcached.set(pytest.KEY, "value")
+        with pytest.raises(TypeError):
+            memcached.increment(pytest.KEY)
+
+    def test_expire(self, memcached, memcached_server):
+        assert memcached.expire(pytest.KEY, 10) is False
+        memcached.set(pytest.KEY, "value")
+        assert memcached.expire(pytest.KEY, 10) is True
+        assert memcached_server.data[pytest.KEY]["expires"] > time.time()
+        memcached.expire(pytest.KEY, 0)
+        assert memcached_server.data[pytest.KEY]["expires"] == 0
+
+    def test_delete(self, memcached):
+        memcached.set(pytest.KEY, "value")
+        assert memcached.delete(pytest.KEY) == 1
+        assert memcached.delete(pytest.KEY) == 0
+
+    def test_clear(self, memcached, memcached_server):
+        memcached.set(pytest.KEY, "value")
+        assert memcached.clear() is True
+        assert memcached_server.data == {}
+
+    def test_clear_namespace(self, memcached):
+        with pytest.raises(ValueError):
+            memcached.clear(namespace="ns")
+
+    def test_raw(self, memcached):
+        memcached.raw("set", pytest.KEY, b"value")
+        assert memcached.raw("get", pytest.KEY) == b"value"
+
+    def test_optimistic_lock(self, memcached):
+        memcached.set(pytest.KEY, "value")
+        with OptimisticLock(memcached, pytest.KEY) as lock:
+            lock.cas("new")
+        assert memcached.get(pytest.KEY) == "new"
+
+    def test_optimistic_lock_conflict(self, memcached):
+        memcached.set(pytest.KEY, "value")
+        with pytest.raises(OptimisticLockError):
+            with OptimisticLock(memcached, pytest.KEY) as lock:
+                memcached.set(pytest.KEY, "other")
+                lock.cas("new")
+        assert memcached.get(pytest.KEY) == "other"
+
+    def test_redlock(self, memcached, memcached_server):
+        RedLock._EVENTS = {}
+        with RedLock(memcached, pytest.KEY, 10):
+            assert pytest.KEY + "-lock" in memcached_server.data
+            with pytest.raises(ValueError):
+                memcached._add(pytest.KEY + "-lock", "other")
+        assert memcached_server.data == {}
+
+    def test_redlock_release_other_value(self, memcached):
+        memcached._add(pytest.KEY, "lock")
+        assert memcached._redlock_release(pytest.KEY, "other") == 0
+        assert memcached._redlock_release(pytest.KEY, "lock") == 1
+
+    def test_redlock_release_changed_after_gets(self, memcached, memcached_server):
+        memcached._add(pytest.KEY, "lock")
+        gets = PooledClient.gets
+
+        def gets_then_replace(client, key, *args, **kwargs):
+            result = gets(client, key, *args, **kwargs)
+            client.set(key, b"other")
+            return result
+
+        with patch.object(PooledClient, "gets", gets_then_replace):
+            assert memcached._redlock_release(pytest.KEY, "lock") == 0
+        assert memcached_server.data[pytest.KEY]["value"] == b"other"
+
+    def test_concurrent_threads(self, memcached):
+        def worker(index):
+            for i in range(20):
+                memcached.set("{}-{}".format(index, i), i)
+                assert memcached.get("{}-{}".format(index, i)) == i
+
+        threads = [threading.Thread(target=worker, args=(index,)) for index in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert memcached.multi_get(["7-19", "0-0"]) == [19, 0]
+
+    def test_pool_timeout(self, memcached):
+        memcached.pool_timeout = 0.01
+        for _ in range(memcached.max_connections):
+            memcached._slots.acquire()
+        with pytest.raises(TimeoutError):
+            memcached.get(pytest.KEY)
+
+    def test_close(self, memcached):
+        memcached._get_pool()
+        memcached.close()
+        assert memcached._pool is None
+
+
+class TestMemcachedCache:
+    def test_inheritance(self):
+        assert isinstance(MemcachedCache(), BaseCache)
+
+    def test_default_serializer(self):
+        assert isinstance(MemcachedCache().serializer, JsonSerializer)
+
+    def test_build_key(self):
+        cache = MemcachedCache(namespace="ns:")
+        assert cache.build_key(pytest.KEY) == "ns:" + pytest.KEY
+        assert cache.build_key("with space") == memcached_key("ns:with space")
+
+    def test_long_keys(self, memcached):
+        key = "k" * 300
+        memcached.set(key, "value")
+        assert memcached.get(key) == "value"
+
+    def test_parse_uri_path(self):
+        assert MemcachedCache.parse_uri_path("/1/2") == {}
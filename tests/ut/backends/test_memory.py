@@ -1,205 +1,911 @@
+import gc
+import sys
+import threading
+import time
+import weakref
+
 import pytest
-from threading import Timer
 
 from pycached import SimpleMemoryCache
 from pycached.base import BaseCache
-from pycached.serializers import NullSerializer
-from pycached.backends.memory import SimpleMemoryBackend
+from pycached.serializers import NullSerializer, PickleSerializer, JsonSerializer
+from pycached.backends.memory import (
+    ArenaMemoryStore,
+    SimpleMemoryBackend,
+    ExpiryEngine,
+    ExpiryHandle,
+    NamespacedKey,
+    SNAPSHOT_MAGIC,
+)
 
 @pytest.fixture
-def memory(mocker):
-    SimpleMemoryBackend._handlers = {}
-    SimpleMemoryBackend._cache = {}
-    mocker.spy(SimpleMemoryBackend, "_cache")
+def memory():
     return SimpleMemoryBackend()
 
 
+@pytest.fixture
+def store(memory):
+    return memory._store
+
+
 class TestSimpleMemoryBackend:
-    
-    def test_get(self, memory):
-        memory._get(pytest.KEY)
-        SimpleMemoryBackend._cache.get.assert_called_with(pytest.KEY)
+    def test_get(self, memory, store, mocker):
+        mocker.spy(store, "get")
+        store._data[pytest.KEY] = "value"
+        assert memory._get(pytest.KEY) == "value"
+        store.get.assert_called_with(pytest.KEY)
+
+    def test_get_missing(self, memory):
+        assert memory._get(pytest.KEY) is None
 
-    
     def test_gets(self, mocker, memory):
         mocker.spy(memory, "_get")
         memory._gets(pytest.KEY)
         memory._get.assert_called_with(pytest.KEY, _conn=mocker.ANY)
 
-    
-    def test_set(self, memory):
-        memory._set(pytest.KEY, "value")
-        SimpleMemoryBackend._cache.__setitem__.assert_called_with(pytest.KEY, "value")
+    def test_set(self, memory, store):
+        assert memory._set(pytest.KEY, "value") is True
+        assert store._data[pytest.KEY] == "value"
 
-    
-    def test_set_no_ttl_no_handle(self, memory):
+    def test_set_no_ttl_no_handle(self, memory, store):
         memory._set(pytest.KEY, "value", ttl=0)
-        assert pytest.KEY not in memory._handlers
+        assert pytest.KEY not in store._handlers
 
         memory._set(pytest.KEY, "value")
-        assert pytest.KEY not in memory._handlers
+        assert pytest.KEY not in store._handlers
 
-    
-    def test_set_cancel_previous_ttl_handle(self, memory, mocker):
-        mocker.patch("threading.Timer")
-        mocker.patch.object(Timer, 'cancel')
+    def test_set_cancel_previous_ttl_handle(self, memory, store):
         memory._set(pytest.KEY, "value", ttl=0.1)
-        memory._handlers[pytest.KEY].cancel.assert_not_called()
+        handle = store._handlers[pytest.KEY]
+        assert handle.cancelled() is False
 
         memory._set(pytest.KEY, "new_value", ttl=0.1)
-        memory._handlers[pytest.KEY].cancel.assert_called_once_with()
+        assert handle.cancelled() is True
+        assert store._handlers[pytest.KEY].cancelled() is False
 
-    
-    def test_set_ttl_handle(self, memory):
+    def test_set_ttl_handle(self, memory, store):
         memory._set(pytest.KEY, "value", ttl=1)
-        assert pytest.KEY in memory._handlers
-        assert isinstance(memory._handlers[pytest.KEY], Timer)
+        assert pytest.KEY in store._handlers
+        assert isinstance(store._handlers[pytest.KEY], ExpiryHandle)
+
+    def test_set_ttl_uses_single_engine(self, memory, mocker):
+        mocker.spy(SimpleMemoryBackend._expiry, "call_later")
+        memory._multi_set([(str(i), i) for i in range(100)], ttl=10)
+        assert SimpleMemoryBackend._expiry.call_later.call_count == 100
+        assert SimpleMemoryBackend._expiry._thread.is_alive()
 
-    
-    def test_set_cas_token(self, mocker, memory):
-        memory._cache.get.return_value = "old_value"
+    def test_set_cas_token(self, memory, store):
+        store._data[pytest.KEY] = "old_value"
         assert memory._set(pytest.KEY, "value", _cas_token="old_value") == 1
-        SimpleMemoryBackend._cache.__setitem__.assert_called_with(pytest.KEY, "value")
-
-    
-    def test_set_cas_fail(self, mocker, memory):
-        memory._cache.get.return_value = "value"
-        assert memory._set(pytest.KEY, "value", _cas_token="old_value") == 0
-        assert SimpleMemoryBackend._cache.__setitem__.call_count == 0
-
-    
-    def test_multi_get(self, memory):
-        memory._multi_get([pytest.KEY, pytest.KEY_1])
-        SimpleMemoryBackend._cache.get.assert_any_call(pytest.KEY)
-        SimpleMemoryBackend._cache.get.assert_any_call(pytest.KEY_1)
-
-    
-    def test_multi_set(self, memory):
+        assert store._data[pytest.KEY] == "value"
+
+    def test_set_cas_fail(self, memory, store):
+        store._data[pytest.KEY] = "value"
+        assert memory._set(pytest.KEY, "new_value", _cas_token="old_value") == 0
+        assert store._data[pytest.KEY] == "value"
+
+    def test_multi_get(self, memory, store):
+        store._data[pytest.KEY] = "value"
+        assert memory._multi_get([pytest.KEY, pytest.KEY_1]) == ["value", None]
+
+    def test_multi_set(self, memory, store):
         memory._multi_set([(pytest.KEY, "value"), (pytest.KEY_1, "random")])
-        SimpleMemoryBackend._cache.__setitem__.assert_any_call(pytest.KEY, "value")
-        SimpleMemoryBackend._cache.__setitem__.assert_any_call(pytest.KEY_1, "random")
-
-    
-    def test_add(self, memory, mocker):
-        mocker.spy(memory, "_set")
-        memory._add(pytest.KEY, "value")
-        memory._set.assert_called_with(pytest.KEY, "value", ttl=None)
-
-    
-    def test_add_existing(self, memory):
-        SimpleMemoryBackend._cache.__contains__.return_value = True
+        assert store._data == {pytest.KEY: "value", pytest.KEY_1: "random"}
+
+    def test_add(self, memory, store):
+        assert memory._add(pytest.KEY, "value", ttl=1) is True
+        assert store._data[pytest.KEY] == "value"
+        assert pytest.KEY in store._handlers
+
+    def test_add_existing(self, memory, store):
+        store._data[pytest.KEY] = "value"
         with pytest.raises(ValueError):
             memory._add(pytest.KEY, "value")
 
-    
-    def test_exists(self, memory):
-        memory._exists(pytest.KEY)
-        SimpleMemoryBackend._cache.__contains__.assert_called_with(pytest.KEY)
-
-    
-    def test_increment(self, memory):
-        memory._increment(pytest.KEY, 2)
-        SimpleMemoryBackend._cache.__contains__.assert_called_with(pytest.KEY)
-        SimpleMemoryBackend._cache.__setitem__.assert_called_with(pytest.KEY, 2)
-
-    
-    def test_increment_missing(self, memory):
-        SimpleMemoryBackend._cache.__contains__.return_value = True
-        SimpleMemoryBackend._cache.__getitem__.return_value = 2
-        memory._increment(pytest.KEY, 2)
-        SimpleMemoryBackend._cache.__getitem__.assert_called_with(pytest.KEY)
-        SimpleMemoryBackend._cache.__setitem__.assert_called_with(pytest.KEY, 4)
-
-    
-    def test_increment_typerror(self, memory):
-        SimpleMemoryBackend._cache.__contains__.return_value = True
-        SimpleMemoryBackend._cache.__getitem__.return_value = "asd"
+    def test_exists(self, memory, store):
+        assert memory._exists(pytest.KEY) is False
+        store._data[pytest.KEY] = "value"
+        assert memory._exists(pytest.KEY) is True
+
+    def test_increment(self, memory, store):
+        assert memory._increment(pytest.KEY, 2) == 2
+        assert store._data[pytest.KEY] == 2
+
+    def test_increment_existing(self, memory, store):
+        store._data[pytest.KEY] = 2
+        assert memory._increment(pytest.KEY, 2) == 4
+        assert store._data[pytest.KEY] == 4
+
+    def test_increment_typerror(self, memory, store):
+        store._data[pytest.KEY] = "asd"
         with pytest.raises(TypeError):
             memory._increment(pytest.KEY, 2)
 
-    
-    def test_expire_no_handle_no_ttl(self, memory):
-        SimpleMemoryBackend._cache.__contains__.return_value = True
-        memory._expire(pytest.KEY, 0)
-        assert memory._handlers.get(pytest.KEY) is None
+    def test_expire_no_handle_no_ttl(self, memory, store):
+        store._data[pytest.KEY] = "value"
+        assert memory._expire(pytest.KEY, 0) is True
+        assert store._handlers.get(pytest.KEY) is None
 
-    
-    def test_expire_no_handle_ttl(self, memory):
-        SimpleMemoryBackend._cache.__contains__.return_value = True
+    def test_expire_no_handle_ttl(self, memory, store):
+        store._data[pytest.KEY] = "value"
         memory._expire(pytest.KEY, 1)
-        assert isinstance(memory._handlers.get(pytest.KEY), Timer)
+        assert isinstance(store._handlers.get(pytest.KEY), ExpiryHandle)
 
-    
-    def test_expire_handle_ttl(self, memory, mocker):
+    def test_expire_handle_ttl(self, memory, store, mocker):
         fake = mocker.MagicMock()
-        SimpleMemoryBackend._handlers[pytest.KEY] = fake
-        SimpleMemoryBackend._cache.__contains__.return_value = True
+        fake.due.return_value = False
+        store._handlers[pytest.KEY] = fake
+        store._data[pytest.KEY] = "value"
         memory._expire(pytest.KEY, 1)
         assert fake.cancel.call_count == 1
-        assert isinstance(memory._handlers.get(pytest.KEY), Timer)
+        assert isinstance(store._handlers.get(pytest.KEY), ExpiryHandle)
+
+    def test_expire_0_removes_handle(self, memory, store):
+        memory._set(pytest.KEY, "value", ttl=1)
+        handle = store._handlers[pytest.KEY]
+        memory._expire(pytest.KEY, 0)
+        assert handle.cancelled() is True
+        assert pytest.KEY not in store._handlers
 
-    
     def test_expire_missing(self, memory):
-        SimpleMemoryBackend._cache.__contains__.return_value = False
         assert memory._expire(pytest.KEY, 1) is False
 
-    
-    def test_delete(self, memory, mocker):
+    def test_delete(self, memory, store, mocker):
         fake = mocker.MagicMock()
-        SimpleMemoryBackend._handlers[pytest.KEY] = fake
-        memory._delete(pytest.KEY)
+        store._handlers[pytest.KEY] = fake
+        store._data[pytest.KEY] = "value"
+        assert memory._delete(pytest.KEY) == 1
         assert fake.cancel.call_count == 1
-        assert pytest.KEY not in SimpleMemoryBackend._handlers
-        SimpleMemoryBackend._cache.pop.assert_called_with(pytest.KEY, None)
+        assert pytest.KEY not in store._handlers
+        assert pytest.KEY not in store._data
 
-    
     def test_delete_missing(self, memory):
-        SimpleMemoryBackend._cache.pop.return_value = None
-        memory._delete(pytest.KEY)
-        SimpleMemoryBackend._cache.pop.assert_called_with(pytest.KEY, None)
+        assert memory._delete(pytest.KEY) == 0
 
-    
-    def test_clear_namespace(self, memory):
-        SimpleMemoryBackend._cache.__iter__.return_value = iter(["nma", "nmb", "no"])
+    def test_clear_namespace(self, memory, store):
+        memory._multi_set([("nma", 1), ("nmb", 2), ("no", 3)])
         memory._clear("nm")
-        assert SimpleMemoryBackend._cache.pop.call_count == 2
-        SimpleMemoryBackend._cache.pop.assert_any_call("nma", None)
-        SimpleMemoryBackend._cache.pop.assert_any_call("nmb", None)
-
-    
-    def test_clear_no_namespace(self, memory):
-        SimpleMemoryBackend._handlers = "asdad"
-        SimpleMemoryBackend._cache = "asdad"
-        memory._clear()
-        SimpleMemoryBackend._handlers = {}
-        SimpleMemoryBackend._cache = {}
+        assert store._data == {"no": 3}
 
-    
-    def test_raw(self, memory):
-        memory._raw("get", pytest.KEY)
-        SimpleMemoryBackend._cache.get.assert_called_with(pytest.KEY)
+    def test_clear_no_namespace(self, memory, store, mocker):
+        memory._set(pytest.KEY, "value", ttl=10)
+        handle = store._handlers[pytest.KEY]
+        memory._clear()
+        assert handle.cancelled() is True
+        assert store._handlers == {}
+        assert store._data == {}
 
-        memory._set(pytest.KEY, "value")
-        SimpleMemoryBackend._cache.__setitem__.assert_called_with(pytest.KEY, "value")
+    def test_raw(self, memory, store):
+        memory._raw("__setitem__", pytest.KEY, "value")
+        assert memory._raw("get", pytest.KEY) == "value"
 
-    
-    def test_redlock_release(self, memory):
-        SimpleMemoryBackend._cache.get.return_value = "lock"
+    def test_redlock_release(self, memory, store):
+        memory._set(pytest.KEY, "lock", ttl=10)
         assert memory._redlock_release(pytest.KEY, "lock") == 1
-        SimpleMemoryBackend._cache.get.assert_called_with(pytest.KEY)
-        SimpleMemoryBackend._cache.pop.assert_called_with(pytest.KEY)
+        assert pytest.KEY not in store._data
+        assert pytest.KEY not in store._handlers
+
+    def test_redlock_release_nokey(self, memory, store):
+        assert memory._redlock_release(pytest.KEY, "lock") == 0
 
-    
-    def test_redlock_release_nokey(self, memory):
-        SimpleMemoryBackend._cache.get.return_value = None
+    def test_redlock_release_other_value(self, memory, store):
+        store._data[pytest.KEY] = "other"
         assert memory._redlock_release(pytest.KEY, "lock") == 0
-        SimpleMemoryBackend._cache.get.assert_called_with(pytest.KEY)
-        assert SimpleMemoryBackend._cache.pop.call_count == 0
+        assert store._data[pytest.KEY] == "other"
+
+    def test_get_expired_lazily(self, memory, store):
+        store._data[pytest.KEY] = "value"
+        store._handlers[pytest.KEY] = ExpiryHandle(time.monotonic() - 1, None, (), None)
+        assert memory._get(pytest.KEY) is None
+        assert pytest.KEY not in store._handlers
+
+    def test_exists_expired_lazily(self, memory, store):
+        store._data[pytest.KEY] = "value"
+        store._handlers[pytest.KEY] = ExpiryHandle(time.monotonic() - 1, None, (), None)
+        assert memory._exists(pytest.KEY) is False
+        assert pytest.KEY not in store._data
 
     def test_parse_uri_path(self):
         assert SimpleMemoryBackend.parse_uri_path("/1/2/3") == {}
 
 
+class TestMemoryStorePartitions:
+    def test_instances_isolated(self):
+        memory, other = SimpleMemoryBackend(), SimpleMemoryBackend()
+        memory._set(pytest.KEY, "value")
+        assert other._get(pytest.KEY) is None
+        other._clear()
+        assert memory._get(pytest.KEY) == "value"
+
+    def test_shared_by_name(self):
+        memory = SimpleMemoryBackend(store="shared")
+        other = SimpleMemoryBackend(store="shared")
+        memory._set(pytest.KEY, "value")
+        assert other._get(pytest.KEY) == "value"
+        assert memory._store is other._store
+        assert SimpleMemoryBackend()._store is not memory._store
+
+    def test_shared_keeps_first_bounds(self):
+        memory = SimpleMemoryBackend(store="shared_bounded", max_entries=1)
+        other = SimpleMemoryBackend(store="shared_bounded", max_entries=10)
+        assert other.max_entries == 1
+        assert memory.max_entries == 1
+
+    def test_keys_indexed_by_namespace(self, memory, store):
+        memory._set(NamespacedKey("nm:", "a"), 1)
+        memory._set(NamespacedKey("nm:", "b"), 2)
+        memory._set(NamespacedKey("other:", "a"), 3)
+        assert store._namespaces["nm:"] == {"nm:a", "nm:b"}
+        assert store._namespaces["other:"] == {"other:a"}
+        assert None not in store._namespaces
+        assert type(next(iter(store._data))) is str
+
+    def test_clear_namespace_only_touches_namespace(self, memory, store, mocker):
+        memory._set(NamespacedKey("nm:", "a"), 1)
+        memory._set(NamespacedKey("other:", "a"), 3)
+        mocker.spy(store, "delete")
+        memory._clear("nm:")
+        store.delete.assert_called_once_with("nm:a")
+        assert "nm:" not in store._namespaces
+        assert store._data == {"other:a": 3}
+
+    def test_clear_namespace_prefix(self, memory, store):
+        memory._set(NamespacedKey("nm", "a"), 1)
+        memory._set(NamespacedKey("nm2", "a"), 2)
+        memory._set("nmc", 3)
+        memory._set("other", 4)
+        memory._clear("nm")
+        assert store._data == {"other": 4}
+
+    def test_size(self, memory):
+        memory._set(NamespacedKey("nm:", "a"), 1)
+        memory._set(NamespacedKey("nm:", "b"), 2)
+        memory._set("c", 3)
+        assert memory.size() == 3
+        assert memory.size("nm:") == 2
+        assert memory.size("missing") == 0
+
+    def test_keys(self, memory):
+        memory._set(NamespacedKey("nm:", "a"), 1)
+        memory._set("c", 3)
+        assert sorted(memory.keys()) == ["c", "nm:a"]
+        assert list(memory.keys("nm:")) == ["nm:a"]
+
+    def test_unindexed_on_delete_and_expire(self, memory, store):
+        memory._set(NamespacedKey("nm:", "a"), 1)
+        memory._set(NamespacedKey("nm:", "b"), 1, ttl=10)
+        memory._delete("nm:a")
+        store._handlers["nm:b"].when = 0
+        assert memory._get("nm:b") is None
+        assert store._namespaces == {}
+        assert store._owners == {}
+
+
+class TestMemoryStoreThreads:
+    @staticmethod
+    def run_threads(target, threads=8):
+        workers = [threading.Thread(target=target) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+    def test_stripes(self):
+        memory = SimpleMemoryBackend(stripes="4")
+        assert memory._store.stripes == 4
+        assert memory._store.lock(pytest.KEY) is memory._store.lock(pytest.KEY)
+
+    def test_stripe_of_namespaced_key(self, store):
+        assert store.lock(NamespacedKey("nm:", "a")) is store.lock("nm:a")
+
+    def test_increment_atomic(self, memory):
+        def increment():
+            for _ in range(1000):
+                memory._increment(pytest.KEY, 1)
+
+        self.run_threads(increment)
+        assert memory._get(pytest.KEY) == 8000
+
+    def test_add_atomic(self, memory):
+        added = []
+
+        def add():
+            for i in range(200):
+                try:
+                    memory._add(str(i), threading.get_ident())
+                    added.append(i)
+                except ValueError:
+                    pass
+
+        self.run_threads(add)
+        assert sorted(added) == list(range(200))
+
+    def test_cas_atomic(self, memory):
+        memory._set(pytest.KEY, 0)
+
+        def swap():
+            for _ in range(500):
+                while True:
+                    value = memory._get(pytest.KEY)
+                    if memory._set(pytest.KEY, value + 1, _cas_token=value):
+                        break
+
+        self.run_threads(swap)
+        assert memory._get(pytest.KEY) == 4000
+
+    def test_bounded_concurrent_writes(self):
+        memory = SimpleMemoryBackend(max_entries=50, policy="tinylfu")
+
+        def write():
+            for i in range(500):
+                memory._set(str(i), i)
+                memory._get(str(i // 2))
+                if i % 7 == 0:
+                    memory._delete(str(i // 3))
+
+        self.run_threads(write)
+        store = memory._store
+        assert len(store._data) <= 50
+        assert len(store._policy) == len(store._data) == len(store._sizes)
+
+    def test_bounded_concurrent_adds(self):
+        memory = SimpleMemoryBackend(max_entries=50, stripes=4)
+
+        def add():
+            for i in range(2000):
+                memory._add("{}-{}".format(threading.get_ident(), i), i)
+                if i % 500 == 0:
+                    memory._clear()
+
+        workers = [threading.Thread(target=add, daemon=True) for _ in range(8)]
+        for worker in workers:
+            worker.start()
+        deadline = time.monotonic() + 10
+        for worker in workers:
+            worker.join(timeout=max(deadline - time.monotonic(), 0))
+        assert not any(worker.is_alive() for worker in workers)
+        assert len(memory._store._data) <= 50
+
+    def test_read_skips_busy_policy(self, mocker):
+        memory = SimpleMemoryBackend(max_entries=10)
+        memory._set(pytest.KEY, "value")
+        mocker.spy(memory._store._policy, "access")
+        with memory._store._meta:
+            assert memory._get(pytest.KEY) == "value"
+        assert memory._store._policy.access.call_count == 0
+        memory._get(pytest.KEY)
+        assert memory._store._policy.access.call_count == 1
+
+    def test_stale_expiration_keeps_new_value(self, memory, store):
+        memory._set(pytest.KEY, "value", ttl=10)
+        handle = store._handlers[pytest.KEY]
+        memory._set(pytest.KEY, "new_value", ttl=10)
+        handle._run()
+        assert memory._get(pytest.KEY) == "new_value"
+
+    def test_expiration_callback(self, memory, store):
+        memory._set(pytest.KEY, "value", ttl=10)
+        handle = store._handlers[pytest.KEY]
+        handle.when = 0
+        handle._run()
+        assert pytest.KEY not in store._data
+
+    def test_expiration_keeps_store_collectable(self):
+        memory = SimpleMemoryBackend()
+        memory._set(pytest.KEY, "value", ttl=10)
+        memory._store._schedule_many([("a", time.monotonic() + 10)])
+        handles = list(memory._store._handlers.values())
+        store = weakref.ref(memory._store)
+        del memory
+        gc.collect()
+        assert store() is None
+        for handle in handles:
+            handle._run()
+
+
+class TestSnapshot:
+    @pytest.fixture
+    def path(self, tmp_path):
+        return str(tmp_path / "snapshot")
+
+    def test_dump_load(self, memory, path):
+        memory._set(NamespacedKey("nm:", "a"), {"value": 1})
+        memory._set("b", "value", ttl=10)
+        assert memory.dump(path) == 2
+
+        other = SimpleMemoryBackend()
+        assert other.load(path) == 2
+        assert other._get("nm:a") == {"value": 1}
+        assert other._get("b") == "value"
+        assert other._store._owners == {"nm:a": "nm:"}
+        assert 9 < other._store._handlers["b"].when - time.monotonic() <= 10
+        assert "nm:a" not in other._store._handlers
+
+    def test_load_skips_expired(self, memory, path, mocker):
+        memory._set("a", "value", ttl=10)
+        memory._set("b", "value", ttl=100)
+        memory.dump(path)
+
+        mocker.patch("pycached.backends.memory.time.time", return_value=time.time() + 50)
+        other = SimpleMemoryBackend()
+        assert other.load(path) == 1
+        assert list(other.keys()) == ["b"]
+
+    def test_dump_skips_expired(self, memory, store, path):
+        memory._set("a", "value")
+        store._data["b"] = "value"
+        store._handlers["b"] = ExpiryHandle(time.monotonic() - 1, None, (), None)
+        assert memory.dump(path) == 1
+
+    def test_chunked(self, memory, path, mocker):
+        memory._multi_set([(str(i), i) for i in range(5)])
+        memory.dump(path, chunk_size=2)
+
+        other = SimpleMemoryBackend()
+        mocker.spy(other._store, "restore")
+        assert other.load(path) == 5
+        assert other._store.restore.call_count == 3
+
+    def test_load_overwrites(self, memory, path):
+        memory._set("a", "new", ttl=10)
+        other = SimpleMemoryBackend()
+        other._set("a", "old", ttl=10)
+        handle = other._store._handlers["a"]
+        memory.dump(path)
+        other.load(path)
+        assert other._get("a") == "new"
+        assert handle.cancelled() is True
+
+    def test_load_bounded(self, memory, path):
+        memory._multi_set([(str(i), i) for i in range(10)])
+        memory.dump(path)
+        bounded = SimpleMemoryBackend(max_entries=5)
+        assert bounded.load(path) == 10
+        assert bounded.size() == 5
+
+    def test_load_invalid(self, memory, tmp_path):
+        path = tmp_path / "snapshot"
+        path.write_bytes(b"random")
+        with pytest.raises(ValueError):
+            memory.load(str(path))
+
+    def test_load_truncated(self, memory, path):
+        memory._set("a", "value")
+        memory.dump(path)
+        with open(path, "rb+") as f:
+            f.truncate(len(SNAPSHOT_MAGIC) + 10)
+        with pytest.raises(ValueError):
+            memory.load(path)
+
+    def test_dump_failure_keeps_previous(self, memory, path, tmp_path):
+        memory._set("a", "value")
+        memory.dump(path)
+        memory._set("b", lambda: None)
+        with pytest.raises(Exception):
+            memory.dump(path)
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["snapshot"]
+        assert SimpleMemoryBackend().load(path) == 1
+
+    def test_load_on_init(self, memory, path):
+        memory._set("a", "value")
+        memory.dump(path)
+        assert SimpleMemoryBackend(snapshot=path)._get("a") == "value"
+
+    def test_periodic_snapshot(self, path):
+        memory = SimpleMemoryBackend(snapshot=path, snapshot_interval="0.01")
+        memory._set("a", "value")
+        time.sleep(0.1)
+        memory._close()
+        assert memory._snapshot_stop is None
+        assert SimpleMemoryBackend().load(path) == 1
+
+    def test_close_writes_snapshot(self, path, mocker):
+        memory = SimpleMemoryBackend(snapshot=path, snapshot_interval=60)
+        mocker.spy(memory, "dump")
+        memory._close()
+        memory.dump.assert_called_once_with(path)
+
+    def test_with_serializer(self, path):
+        cache = SimpleMemoryCache(serializer=PickleSerializer(), namespace="test")
+        cache.set("a", {"value": [1, 2]}, ttl=10)
+        cache.dump(path)
+        other = SimpleMemoryCache(serializer=PickleSerializer(), namespace="test")
+        other.load(path)
+        assert other.get("a") == {"value": [1, 2]}
+        assert other.size("test") == 1
+
+
+class TestArenaMemoryStore:
+    @pytest.fixture
+    def arena(self, mocker):
+        mocker.patch.object(ArenaMemoryStore, "_start_compactor")
+        return SimpleMemoryBackend(storage="arena", arena_size=128)
+
+    @pytest.fixture
+    def store(self, arena):
+        return arena._store
+
+    def test_storage(self, arena):
+        assert isinstance(arena._store, ArenaMemoryStore)
+        assert arena._store.arena_size == 128
+
+    def test_invalid_storage(self):
+        with pytest.raises(ValueError):
+            SimpleMemoryBackend(storage="random")
+
+    @pytest.mark.parametrize("value", ["value", "ünïcode", b"\x00bytes", 10, ""])
+    def test_set_get(self, arena, value):
+        arena._set(pytest.KEY, value)
+        assert arena._get(pytest.KEY) == value
+        assert type(arena._get(pytest.KEY)) is type(value)
+
+    def test_set_invalid_type(self, arena):
+        with pytest.raises(TypeError):
+            arena._set(pytest.KEY, {"a": 1})
+
+    def test_slots_are_ints(self, arena, store):
+        arena._set(pytest.KEY, "value")
+        assert store._data == {pytest.KEY: 0}
+        assert store._lengths[0] == 5
+
+    def test_overwrite_leaves_garbage(self, arena, store):
+        arena._set(pytest.KEY, "a" * 10)
+        arena._set(pytest.KEY, "b" * 20)
+        assert arena._get(pytest.KEY) == "b" * 20
+        assert store._arena_used[0] == 30
+        assert store._arena_live[0] == 20
+
+    def test_delete_reuses_slot(self, arena, store):
+        arena._set("a", "value")
+        arena._set("b", "value")
+        arena._delete("a")
+        arena._set("c", "value")
+        assert store._data == {"b": 1, "c": 0}
+
+    def test_new_arena_when_full(self, arena, store):
+        for i in range(3):
+            arena._set(str(i), "x" * 50)
+        assert store.arenas == 2
+        assert [arena._get(str(i)) for i in range(3)] == ["x" * 50] * 3
+
+    def test_big_value_own_arena(self, arena, store):
+        arena._set("big", "x" * 1000)
+        assert store.arenas == 2
+        assert arena._get("big") == "x" * 1000
+        arena._delete("big")
+        assert store.arenas == 1
+
+    def test_ttl(self, arena, store):
+        arena._set(pytest.KEY, "value", ttl=10)
+        assert store._handlers == {}
+        assert 9 < store._expires[0] - time.monotonic() <= 10
+        store._expires[0] = time.monotonic() - 1
+        assert arena._get(pytest.KEY) is None
+        assert pytest.KEY not in store._data
+
+    def test_set_removes_ttl(self, arena, store):
+        arena._set(pytest.KEY, "value", ttl=10)
+        arena._set(pytest.KEY, "value")
+        assert store._expires[0] == 0
+
+    def test_expire(self, arena, store):
+        arena._set(pytest.KEY, "value")
+        arena._expire(pytest.KEY, 10)
+        assert store._expires[0] > 0
+        arena._expire(pytest.KEY, 0)
+        assert store._expires[0] == 0
+
+    def test_increment(self, arena):
+        assert arena._increment(pytest.KEY, 2) == 2
+        assert arena._increment(pytest.KEY, 2) == 4
+        arena._set(pytest.KEY, "4")
+        assert arena._increment(pytest.KEY, 1) == 5
+        assert arena._get(pytest.KEY) == 5
+
+    def test_compact(self, arena, store):
+        for i in range(6):
+            arena._set(str(i), "x" * 40)
+        arena._multi_set([("0", "y"), ("1", "y"), ("3", "y")])
+        assert store.arenas == 2
+        assert store.compact() == 1
+        assert store.arenas == 2
+        assert store._arena_of[store._data["2"]] == 2
+        assert [arena._get(str(i)) for i in range(6)] == ["y", "y", "x" * 40, "y"] + ["x" * 40] * 2
+
+    def test_empty_arena_freed(self, arena, store):
+        for i in range(6):
+            arena._set(str(i), "x" * 40)
+        arena._multi_set([("0", "y"), ("1", "y"), ("2", "y")])
+        assert store._arenas[0] is None
+        assert store._free_arenas == [0]
+
+    def test_dead_active_arena_freed(self, arena, store):
+        for _ in range(50):
+            for i in range(3):
+                arena._set(str(i), "x" * 40)
+            for i in range(3):
+                arena._delete(str(i))
+        store.compact()
+        assert store.arenas == 1
+        assert store._data == {}
+
+    def test_compact_frees_empty_arenas(self, arena, store):
+        arena._set("a", "x" * 40)
+        arena._delete("a")
+        store._active = store._new_arena(store.arena_size)
+        assert store.arenas == 2
+        assert store.compact() == 1
+        assert store.arenas == 1
+        assert store._free_arenas == [0]
+
+    def test_compact_in_batches(self, arena, store, monkeypatch):
+        monkeypatch.setattr(ArenaMemoryStore, "COMPACT_BATCH", 2)
+        for i in range(6):
+            arena._set(str(i), "x" * 40, ttl=10 if i == 4 else None)
+        arena._multi_set([("0", "y"), ("1", "y"), ("3", "y")])
+        store._expires[store._data["4"]] = time.monotonic() - 1
+        assert store.compact() == 1
+        assert "4" not in store._data
+        assert [arena._get(str(i)) for i in (0, 1, 2, 3, 5)] == ["y", "y", "x" * 40, "y", "x" * 40]
+
+    def test_compact_options(self):
+        memory = SimpleMemoryBackend(storage="arena", compact_ratio="0.25", compact_interval=0)
+        assert memory._store.compact_ratio == 0.25
+        assert memory._store._compactor is None
+
+    def test_compact_removes_expired(self, arena, store):
+        arena._set(pytest.KEY, "value", ttl=10)
+        store._expires[0] = time.monotonic() - 1
+        store.compact()
+        assert store._data == {}
+
+    def test_compactor_thread(self):
+        memory = SimpleMemoryBackend(storage="arena", arena_size=64)
+        memory._store.compact_interval = 0.01
+        memory._store._start_compactor()
+        thread = memory._store._compactor
+        assert thread.daemon is True
+        for i in range(10):
+            memory._set(str(i), "x" * 40)
+            memory._set(str(i), "y")
+        time.sleep(0.05)
+        assert memory._store.arenas < 5
+        del memory
+        time.sleep(0.05)
+        assert thread.is_alive() is False
+
+    def test_clear(self, arena, store):
+        arena._set("a", "x" * 100, ttl=10)
+        arena._set("b", "x" * 1000)
+        arena._clear()
+        assert store._data == {}
+        assert store.arenas == 1
+        assert len(store._kinds) == 0
+
+    def test_bounded(self):
+        memory = SimpleMemoryBackend(storage="arena", max_bytes=1000)
+        for i in range(100):
+            memory._set(str(i), "x" * 100)
+        assert memory._store._bytes <= 1000
+        assert memory._get("99") == "x" * 100
+
+    def test_dump_load(self, arena, tmp_path):
+        path = str(tmp_path / "snapshot")
+        arena._set(NamespacedKey("nm:", "a"), "value", ttl=10)
+        arena._set("b", b"value")
+        arena.dump(path)
+        other = SimpleMemoryBackend(storage="arena")
+        assert other.load(path) == 2
+        assert other._get("nm:a") == "value"
+        assert other._get("b") == b"value"
+        assert other._store._expires[other._store._data["nm:a"]] > time.monotonic()
+
+    def test_cache(self):
+        cache = SimpleMemoryCache(storage="arena", serializer=JsonSerializer(), namespace="t")
+        cache.set("a", {"value": [1, 2]})
+        assert cache.get("a") == {"value": [1, 2]}
+        assert cache.size("t") == 1
+
+
+class TestFrozenNamespaces:
+    @pytest.fixture
+    def cache(self, mocker):
+        cache = SimpleMemoryCache(serializer=JsonSerializer(), plugins=[mocker.MagicMock()])
+        cache.publish("ref", {"a": {"value": 1}, "b": 2})
+        return cache
+
+    def test_get(self, cache):
+        assert cache.get("a", namespace="ref") == {"value": 1}
+        assert cache.get("missing", namespace="ref") is None
+        assert cache.get("missing", default=3, namespace="ref") == 3
+
+    def test_get_bypasses_plugins_and_store(self, cache, mocker):
+        mocker.spy(cache, "_get")
+        cache.get("a", namespace="ref")
+        assert cache._get.call_count == 0
+        assert cache.plugins[0].pre_get.call_count == 0
+
+    def test_default_namespace(self, cache):
+        cache.namespace = "ref"
+        assert cache.get("b") == 2
+        assert cache.multi_get(["a", "b"]) == [{"value": 1}, 2]
+
+    def test_multi_get(self, cache):
+        assert cache.multi_get(["a", "b", "c"], namespace="ref") == [{"value": 1}, 2, None]
+
+    def test_other_namespaces(self, cache):
+        cache.set("a", "value", namespace="other")
+        assert cache.get("a", namespace="other") == "value"
+        assert cache.multi_get(["a"], namespace="other") == ["value"]
+        assert cache.get("a") is None
+
+    def test_publish_copies(self, cache):
+        mapping = {"a": 1}
+        cache.publish("ref", mapping)
+        mapping["a"] = 2
+        assert cache.get("a", namespace="ref") == 1
+        with pytest.raises(TypeError):
+            cache._store.frozen["ref"]["a"] = 3
+
+    def test_publish_swaps(self, cache):
+        frozen = cache._store.frozen
+        cache.publish("ref", {"c": 3})
+        assert cache._store.frozen is not frozen
+        assert frozen["ref"]["b"] == 2
+        assert cache.get("b", namespace="ref") is None
+        assert cache.get("c", namespace="ref") == 3
+
+    def test_publish_none_namespace(self, cache):
+        with pytest.raises(ValueError):
+            cache.publish(None, {})
+
+    def test_unpublish(self, cache):
+        cache.unpublish("ref")
+        cache.unpublish("missing")
+        assert cache.get("a", namespace="ref") is None
+
+    def test_clear(self, cache):
+        cache.publish("other", {"a": 1})
+        cache.clear(namespace="ref")
+        assert cache.get("a", namespace="ref") is None
+        assert cache.get("a", namespace="other") == 1
+        cache.clear()
+        assert cache._store.frozen == {}
+
+    def test_shared_store(self):
+        cache = SimpleMemoryCache(store="frozen")
+        SimpleMemoryCache(store="frozen").publish("ref", {"a": 1})
+        assert cache.get("a", namespace="ref") == 1
+
+
+class TestBoundedSimpleMemoryBackend:
+    def test_unbounded_by_default(self, memory, store):
+        assert memory.max_entries is None
+        assert memory.max_bytes is None
+        assert store._policy is None
+
+    def test_casts(self):
+        memory = SimpleMemoryBackend(max_entries="10", max_bytes="1000")
+        assert memory.max_entries == 10
+        assert memory.max_bytes == 1000
+
+    def test_max_entries_evicts_lru(self):
+        memory = SimpleMemoryBackend(max_entries=2)
+        memory._set("a", 1)
+        memory._set("b", 2)
+        memory._get("a")
+        memory._set("c", 3)
+        assert memory._exists("a") is True
+        assert memory._exists("b") is False
+        assert memory._exists("c") is True
+        assert memory.stats()["evictions"] == 1
+
+    def test_max_bytes_evicts_lru(self):
+        memory = SimpleMemoryBackend(max_bytes=1000)
+        for key in "abcd":
+            memory._set(key, "x" * 300)
+        stats = memory.stats()
+        assert stats["bytes"] <= 1000
+        assert stats["entries"] == 2
+        assert stats["evictions"] == 2
+        assert stats["evicted_bytes"] > 600
+        assert memory._multi_get(["a", "b", "c", "d"]) == [None, None, "x" * 300, "x" * 300]
+
+    def test_bytes_tracked_on_overwrite_and_delete(self):
+        memory = SimpleMemoryBackend(max_bytes=10000)
+        memory._set("a", "x" * 100)
+        memory._set("a", "x" * 10)
+        assert memory.stats()["bytes"] == sys.getsizeof("a") + sys.getsizeof("x" * 10)
+        memory._delete("a")
+        assert memory.stats()["bytes"] == 0
+
+    def test_evicted_ttl_handle_cancelled(self):
+        memory = SimpleMemoryBackend(max_entries=1)
+        memory._set("a", 1, ttl=10)
+        handle = memory._store._handlers["a"]
+        memory._set("b", 1)
+        assert handle.cancelled() is True
+        assert "a" not in memory._store._handlers
+
+    def test_increment_counts_as_write(self):
+        memory = SimpleMemoryBackend(max_entries=1)
+        memory._set("a", 1)
+        assert memory._increment("b", 2) == 2
+        assert memory._exists("a") is False
+
+    def test_cost_passed_to_policy(self, mocker):
+        memory = SimpleMemoryBackend(max_entries=10)
+        policy = memory._store._policy
+        mocker.spy(policy, "insert")
+        mocker.spy(policy, "update")
+        memory._multi_set([("a", 1)], _cost=2)
+        memory._set("a", 1, _cost=3)
+        policy.insert.assert_called_with("a", mocker.ANY, cost=2)
+        policy.update.assert_called_with("a", mocker.ANY, cost=3)
+
+    def test_clear(self):
+        memory = SimpleMemoryBackend(max_entries=10)
+        memory._set("a", 1)
+        memory._clear()
+        assert memory.stats()["entries"] == 0
+        assert memory.stats()["bytes"] == 0
+
+
+class TestExpiryEngine:
+    @pytest.fixture
+    def engine(self, mocker):
+        engine = ExpiryEngine(batch=2)
+        mocker.patch.object(engine, "_start_sweeper")
+        return engine
+
+    def test_call_later(self, engine):
+        handle = engine.call_later(10, print)
+        assert isinstance(handle, ExpiryHandle)
+        assert len(engine) == 1
+        assert handle.due() is False
+        assert handle.due(time.monotonic() + 11) is True
+
+    def test_sweep_runs_due_handles(self, engine, mocker):
+        callback = mocker.Mock()
+        engine.call_later(0, callback, "a")
+        engine.call_later(10, callback, "b")
+        assert engine.sweep() == 1
+        callback.assert_called_once_with("a")
+        assert len(engine) == 1
+
+    def test_sweep_respects_batch(self, engine, mocker):
+        callback = mocker.Mock()
+        for i in range(5):
+            engine.call_later(0, callback, i)
+        assert engine.sweep() == 2
+        assert engine.sweep() == 2
+        assert engine.sweep() == 1
+        assert callback.call_count == 5
+
+    def test_sweep_skips_cancelled(self, engine, mocker):
+        callback = mocker.Mock()
+        engine.call_later(0, callback).cancel()
+        assert engine.sweep() == 0
+        assert callback.call_count == 0
+        assert len(engine) == 0
+
+    def test_call_at_many(self, engine, mocker):
+        callback = mocker.Mock()
+        engine.call_later(0, callback, "a")
+        handles = engine.call_at_many([(0, callback, ("b",)), (time.monotonic() + 10, print, ())])
+        assert [handle._args for handle in handles] == [("b",), ()]
+        assert len(engine) == 3
+        assert engine.sweep() == 2
+        assert callback.call_count == 2
+
+    def test_cancelled_handles_compacted(self, engine, mocker):
+        handles = [engine.call_later(10, print) for _ in range(300)]
+        for handle in handles[:200]:
+            handle.cancel()
+        assert len(engine._heap) < 300
+        assert len(engine) == 100
+
+
 class TestSimpleMemoryCache:
     def test_name(self):
         assert SimpleMemoryCache.NAME == "memory"
@@ -212,3 +918,34 @@ class TestSimpleMemoryCache:
 
     def test_parse_uri_path(self):
         assert SimpleMemoryCache().parse_uri_path("/1/2/3") == {}
+
+    @pytest.mark.parametrize(
+        "namespace, expected",
+        ([None, "test" + pytest.KEY], ["", pytest.KEY], ["my_ns", "my_ns" + pytest.KEY]),
+    )
+    def test_build_key(self, namespace, expected):
+        cache = SimpleMemoryCache(namespace="test")
+        key = cache.build_key(pytest.KEY, namespace=namespace)
+        assert key == expected
+        assert key.namespace == (namespace if namespace is not None else "test")
+
+    def test_build_key_no_namespace(self):
+        key = SimpleMemoryCache().build_key(pytest.KEY)
+        assert key == pytest.KEY
+        assert type(key) is str
+
+    def test_clear_namespace(self):
+        cache = SimpleMemoryCache(namespace="test")
+        cache.set("a", 1)
+        cache.set("a", 2, namespace="other")
+        cache.clear(namespace="test")
+        assert cache.get("a") is None
+        assert cache.get("a", namespace="other") == 2
+        assert cache.size("other") == 1
+
+    def test_bounded_from_config(self):
+        cache = SimpleMemoryCache(max_entries=1)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") is None
+        assert cache.get("b") == 2
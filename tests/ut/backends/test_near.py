@@ -0,0 +1,213 @@
+import queue
+import time
+
+import pytest
+
+from redis import exceptions
+from pycached.backends.near import INVALIDATE_CHANNEL, InvalidationListener, NearCache
+
+
+class FakeConnection:
+    """
+    Connection replying with the responses queued in ``replies``. Once they are consumed,
+    ``can_read`` raises ``error`` if set.
+    """
+
+    def __init__(self, replies=(), error=None):
+        self.replies = queue.Queue()
+        for reply in replies:
+            self.replies.put(reply)
+        self.error = error
+        self.commands = []
+        self.disconnected = False
+
+    def connect(self):
+        pass
+
+    def on_connect(self):
+        self.commands.append(("ON_CONNECT",))
+
+    def send_command(self, *args):
+        self.commands.append(args)
+
+    def read_response(self):
+        return self.replies.get_nowait()
+
+    def can_read(self, timeout=0):
+        if self.replies.empty() and self.error is not None:
+            raise self.error
+        return not self.replies.empty()
+
+    def disconnect(self):
+        self.disconnected = True
+
+
+def wait_for(predicate, timeout=1):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def near():
+    near = NearCache(2)
+    near.available = True
+    return near
+
+
+def store(near, key, value):
+    near.finish(key, near.begin(key), value)
+
+
+class TestNearCache:
+    def test_get_missing(self, near):
+        assert near.get(pytest.KEY) is None
+
+    def test_store(self, near):
+        store(near, pytest.KEY, "value")
+        assert near.get(pytest.KEY) == "value"
+        assert near.stats()["local_hits"] == 1
+        assert near.stats()["remote_hits"] == 1
+
+    def test_bounded_lru(self, near):
+        store(near, "a", "1")
+        store(near, "b", "2")
+        near.get("a")
+        store(near, "c", "3")
+        assert near.get("b") is None
+        assert near.get("a") == "1"
+        assert len(near) == 2
+
+    def test_invalidated_while_reading(self, near):
+        token = near.begin(pytest.KEY)
+        near.invalidate([pytest.KEY])
+        near.finish(pytest.KEY, token, "stale")
+        assert near.get(pytest.KEY) is None
+
+    def test_not_stored_when_unavailable(self, near):
+        near.available = False
+        assert near.begin(pytest.KEY) is None
+        near.finish(pytest.KEY, None, "value")
+        assert near.get(pytest.KEY) is None
+        assert near.stats()["remote_hits"] == 1
+
+    def test_none_not_stored(self, near):
+        store(near, pytest.KEY, None)
+        assert len(near) == 0
+        assert near.stats()["remote_misses"] == 1
+
+    def test_invalidate(self, near):
+        store(near, pytest.KEY, "value")
+        near.invalidate([pytest.KEY, "missing"])
+        assert near.get(pytest.KEY) is None
+        assert near.stats()["invalidations"] == 1
+
+    def test_flush(self, near):
+        store(near, pytest.KEY, "value")
+        near.flush()
+        assert len(near) == 0
+        assert near.stats()["flushes"] == 1
+
+
+class TestInvalidationListener:
+    def listener(self, near, connections, **kwargs):
+        connections = list(connections)
+
+        def connect():
+            if not connections:
+                raise exceptions.ConnectionError()
+            return connections.pop(0)
+
+        return InvalidationListener(near, connect, **kwargs)
+
+    def test_connect_tracking(self, near):
+        connection = FakeConnection([7, ["subscribe", INVALIDATE_CHANNEL, 1]])
+        connected = []
+        listener = self.listener(near, [connection], on_connect=lambda: connected.append(1))
+        store(near, pytest.KEY, "value")
+        near.available = False
+        listener._connect()
+        assert connection.commands == [("CLIENT", "ID"), ("SUBSCRIBE", INVALIDATE_CHANNEL)]
+        assert listener.client_id == 7
+        assert near.available is True
+        assert len(near) == 0
+        assert connected == [1]
+
+    def test_connect_bcast(self, near):
+        connection = FakeConnection([7, ["subscribe", INVALIDATE_CHANNEL, 1]])
+        tracker = FakeConnection(["OK"])
+        listener = self.listener(
+            near, [connection, tracker], mode="bcast", prefixes=["a:", "b:"]
+        )
+        listener._connect()
+        assert tracker.commands == [
+            ("CLIENT", "TRACKING", "ON", "REDIRECT", 7, "BCAST", "PREFIX", "a:", "PREFIX", "b:")
+        ]
+
+    def test_connect_keyspace(self, near):
+        connection = FakeConnection([7, ["psubscribe", "p", 1]])
+        listener = self.listener(near, [connection], mode="keyspace", prefixes=["a:"], db=2)
+        listener._connect()
+        assert connection.commands[1] == ("PSUBSCRIBE", "__keyspace@2__:a:*")
+
+    def test_enable_tracking(self, near):
+        listener = self.listener(near, [])
+        listener.client_id = 7
+        connection = FakeConnection(["OK"])
+        listener.enable_tracking(connection)
+        assert connection.commands == [
+            ("ON_CONNECT",),
+            ("CLIENT", "TRACKING", "ON", "REDIRECT", 7),
+        ]
+
+    def test_enable_tracking_not_connected(self, near):
+        listener = self.listener(near, [])
+        connection = FakeConnection()
+        listener.enable_tracking(connection)
+        assert connection.commands == [("ON_CONNECT",)]
+
+    def test_handle_invalidate(self, near):
+        store(near, "a", "1")
+        store(near, "b", "2")
+        self.listener(near, [])._handle(["message", INVALIDATE_CHANNEL, ["a"]])
+        assert near.get("a") is None
+        assert near.get("b") == "2"
+
+    def test_handle_flush(self, near):
+        store(near, "a", "1")
+        self.listener(near, [])._handle(["message", INVALIDATE_CHANNEL, None])
+        assert len(near) == 0
+
+    def test_handle_keyspace(self, near):
+        store(near, "a:b", "1")
+        self.listener(near, [])._handle(
+            ["pmessage", "__keyspace@0__:*", "__keyspace@0__:a:b", "set"]
+        )
+        assert near.get("a:b") is None
+
+    def test_connection_lost(self, near):
+        lost = FakeConnection(
+            [7, ["subscribe", INVALIDATE_CHANNEL, 1], ["message", INVALIDATE_CHANNEL, ["a"]]],
+            error=exceptions.ConnectionError(),
+        )
+        listener = self.listener(near, [lost])
+        listener.RECONNECT_DELAY = 0.01
+        store(near, "b", "2")
+        listener.start()
+        wait_for(lambda: lost.disconnected)
+        listener.stop()
+        assert near.available is False
+        assert len(near) == 0
+        assert listener.client_id is None
+
+    def test_reconnects(self, near):
+        first = FakeConnection([7, ["subscribe", INVALIDATE_CHANNEL, 1]], error=OSError())
+        second = FakeConnection([8, ["subscribe", INVALIDATE_CHANNEL, 1]])
+        connected = []
+        listener = self.listener(near, [first, second], on_connect=lambda: connected.append(1))
+        listener.RECONNECT_DELAY = 0.01
+        listener.start()
+        wait_for(lambda: listener.client_id == 8)
+        listener.stop()
+        assert connected == [1, 1]
+        assert second.disconnected is True
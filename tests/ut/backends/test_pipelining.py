@@ -0,0 +1,157 @@
+import threading
+
+import pytest
+
+from redis import exceptions
+from pycached.backends.pipelining import AutoPipeline
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+            return self
+
+        return queue
+
+    def execute(self, raise_on_error=True):
+        self.client.batches.append([name for name, _, _ in self.commands])
+        if self.client.error is not None:
+            raise self.client.error
+        replies = []
+        for name, args, kwargs in self.commands:
+            try:
+                replies.append(getattr(self.client, name)(*args, **kwargs))
+            except exceptions.ResponseError as e:
+                replies.append(e)
+        return replies
+
+    def reset(self):
+        self.commands = []
+
+
+class FakeClient:
+    def __init__(self):
+        self.data = {}
+        self.batches = []
+        self.error = None
+        self.connection_pool = "pool"
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value):
+        if value is None:
+            raise exceptions.DataError("Invalid input of type: 'NoneType'")
+        self.data[key] = value
+        return True
+
+    def incrby(self, key, delta):
+        value = self.data.get(key, 0)
+        if not isinstance(value, int):
+            raise exceptions.ResponseError("value is not an integer or out of range")
+        self.data[key] = value + delta
+        return self.data[key]
+
+
+@pytest.fixture
+def client():
+    return FakeClient()
+
+
+@pytest.fixture
+def pipeline(client):
+    pipeline = AutoPipeline(client, window=0.05, max_batch=4)
+    yield pipeline
+    pipeline.stop()
+
+
+def run_concurrently(calls):
+    results = [None] * len(calls)
+    barrier = threading.Barrier(len(calls))
+
+    def run(index, call):
+        barrier.wait()
+        try:
+            results[index] = call()
+        except Exception as e:
+            results[index] = e
+
+    threads = [threading.Thread(target=run, args=item) for item in enumerate(calls)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class TestAutoPipeline:
+    def test_command(self, pipeline, client):
+        assert pipeline.set(pytest.KEY, "value") is True
+        assert pipeline.get(pytest.KEY) == "value"
+        assert client.batches == [["set"], ["get"]]
+
+    def test_not_pipelined(self, pipeline):
+        assert pipeline.connection_pool == "pool"
+
+    def test_coalesces_concurrent_commands(self, pipeline, client):
+        client.data = {"a": "1", "b": "2", "c": "3"}
+        results = run_concurrently([lambda key=key: pipeline.get(key) for key in "abc"])
+        assert results == ["1", "2", "3"]
+        assert client.batches == [["get", "get", "get"]]
+        assert pipeline.stats() == {
+            "batches": 1,
+            "commands": 3,
+            "avg_batch_size": 3.0,
+            "max_batch_size": 3,
+            "pending": 0,
+        }
+
+    def test_max_batch(self, pipeline, client):
+        run_concurrently([lambda key=key: pipeline.get(key) for key in "abcdef"])
+        assert sorted(len(batch) for batch in client.batches) == [2, 4]
+        assert pipeline.stats()["max_batch_size"] == 4
+
+    def test_error_only_raised_to_caller(self, pipeline, client):
+        client.data = {"a": 1, "b": "text"}
+        results = run_concurrently(
+            [lambda: pipeline.incrby("a", 1), lambda: pipeline.incrby("b", 1)]
+        )
+        assert results[0] == 2
+        assert isinstance(results[1], exceptions.ResponseError)
+
+    def test_invalid_command_isolated(self, pipeline, client):
+        results = run_concurrently(
+            [lambda: pipeline.set("a", "1"), lambda: pipeline.set("b", None)]
+        )
+        assert results[0] is True
+        assert isinstance(results[1], exceptions.DataError)
+        assert client.data == {"a": "1"}
+
+    def test_connection_error(self, pipeline, client):
+        client.error = exceptions.ConnectionError()
+        with pytest.raises(exceptions.ConnectionError):
+            pipeline.get(pytest.KEY)
+
+    def test_stop_sends_queued(self, client):
+        pipeline = AutoPipeline(client, window=10)
+        future = pipeline.submit("set", (pytest.KEY, "value"), {})
+        pipeline.stop()
+        assert future.result(timeout=1) is True
+        assert pipeline._thread is None
+
+    def test_restarts_after_stop(self, pipeline, client):
+        pipeline.get(pytest.KEY)
+        pipeline.stop()
+        assert pipeline.get(pytest.KEY) is None
+        assert len(client.batches) == 2
+
+    def test_stats_empty(self, pipeline):
+        assert pipeline.stats()["avg_batch_size"] == 0.0
@@ -1,12 +1,27 @@
 from unittest.mock import Mock, MagicMock, patch, ANY
 
+import math
+import os
+import threading
+import time
+
 import pytest
 
 from redis import exceptions
 from pycached import RedisCache
-from pycached.backends.redis import RedisBackend, conn, REDIS_BEFORE_ONE
+from pycached.backends.near import NearCache
+from pycached.backends.pipelining import AutoPipeline
+from pycached.backends.redis import (
+    RedisBackend,
+    ConnectionPool,
+    BlockingConnectionPool,
+    conn,
+    parse_nodes,
+    REDIS_BEFORE_ONE,
+    _Replica,
+)
 from pycached.base import BaseCache
-from pycached.serializers import JsonSerializer
+from pycached.serializers import JsonSerializer, PickleSerializer
 
 
 @pytest.fixture
@@ -26,7 +41,11 @@ def redis_connection():
     conn.delete = Mock()
     conn.flushdb = Mock()
     conn.eval = Mock()
+    conn.evalsha = Mock()
+    conn.script_load = Mock()
     conn.keys = Mock()
+    conn.scan_iter = Mock(return_value=iter([]))
+    conn.unlink = Mock(side_effect=lambda *keys: len(keys))
     conn.pipeline = MagicMock(return_value=conn)
     conn.execute = Mock()
     return conn
@@ -57,6 +76,14 @@ def create_pool():
         yield create_pool
 
 
+def fake_connection(**kwargs):
+    return MagicMock(
+        pid=os.getpid(),
+        can_read=Mock(return_value=False),
+        should_reconnect=Mock(return_value=False),
+    )
+
+
 @pytest.fixture(autouse=True)
 def mock_redis_v1(mocker, redis_connection):
     mocker.patch("pycached.backends.redis.redis.Redis", return_value=redis_connection)
@@ -92,6 +119,23 @@ class TestRedisBackend:
         assert redis_backend.max_connections == 10
         assert redis_backend.create_connection_timeout == 1.5
 
+    def test_setup_casts_pool_options(self):
+        redis_backend = RedisBackend(
+            blocking="true",
+            pool_timeout="0.5",
+            pool_min_size="0",
+            socket_timeout="1",
+            socket_keepalive="false",
+            health_check_interval="30",
+        )
+
+        assert redis_backend.blocking is True
+        assert redis_backend.pool_timeout == 0.5
+        assert redis_backend.pool_min_size == 0
+        assert redis_backend.socket_timeout == 1.0
+        assert redis_backend.socket_keepalive is False
+        assert redis_backend.health_check_interval == 30
+
     def test_acquire_conn(self, redis, redis_connection):
         assert redis.acquire_conn() == redis_connection
 
@@ -112,26 +156,79 @@ class TestRedisBackend:
     def test_get_pool_calls_create_pool(self, redis, create_pool):
         redis._pool = None
         redis._get_pool()
-        create_pool.assert_called_with(
-            host=redis.endpoint,
-            port=redis.port,
-            db=redis.db,
-            password=redis.password,
-            connection_pool=None,
-            encoding="utf-8",
-            decode_responses=True,
-            max_connections=redis.max_connections,
+        create_pool.assert_called_with(connection_pool=redis._connection_pool)
+        assert isinstance(redis._connection_pool, ConnectionPool)
+        assert redis._connection_pool.max_connections == redis.max_connections
+        expected = {
+            "host": redis.endpoint,
+            "port": redis.port,
+            "db": redis.db,
+            "password": redis.password,
+            "encoding": "utf-8",
+            "decode_responses": True,
+            "socket_timeout": None,
+            "socket_connect_timeout": None,
+            "socket_keepalive": False,
+            "health_check_interval": 0,
+        }
+        kwargs = redis._connection_pool.connection_kwargs
+        assert {key: kwargs[key] for key in expected} == expected
+
+    def test_get_pool_blocking(self, create_pool):
+        redis = RedisBackend(blocking=True, pool_timeout=0.5, max_connections=2)
+        redis._get_pool()
+        assert isinstance(redis._connection_pool, BlockingConnectionPool)
+        assert redis._connection_pool.timeout == 0.5
+        assert redis._connection_pool.max_connections == 2
+
+    def test_pool_min_size_warms_up(self, mocker):
+        mocker.patch.object(RedisBackend, "_connection_kwargs", return_value={
+            "connection_class": fake_connection
+        })
+        redis = RedisBackend(pool_min_size=3)
+        stats = redis.pool_stats()
+        assert stats["created"] == 3
+        assert stats["idle"] == 3
+        assert stats["in_use"] == 0
+
+    def test_pool_warm_up_failure(self, mocker):
+        mocker.patch.object(
+            ConnectionPool, "get_connection", side_effect=exceptions.ConnectionError()
         )
+        redis = RedisBackend(pool_min_size=3)
+        assert redis._pool is not None
+
+    @pytest.mark.parametrize("blocking", [True, False])
+    def test_pool_stats(self, mocker, blocking):
+        mocker.patch.object(RedisBackend, "_connection_kwargs", return_value={
+            "connection_class": fake_connection
+        })
+        redis = RedisBackend(blocking=blocking, pool_timeout=0.01, max_connections=2)
+        redis._get_pool()
+        pool = redis._connection_pool
+        first = pool.get_connection()
+        pool.get_connection()
+        with pytest.raises(exceptions.ConnectionError):
+            pool.get_connection()
+        pool.release(first)
+
+        stats = redis.pool_stats()
+        assert stats["max_connections"] == 2
+        assert stats["created"] == 2
+        assert stats["in_use"] == 1
+        assert stats["idle"] == 1
+        assert stats["acquired"] == 2
+        assert stats["errors"] == 1
+        assert stats["wait_time"] >= stats["max_wait"] > 0
 
 
     def test_get(self, redis, redis_connection):
         redis._get(pytest.KEY)
         redis_connection.get.assert_called_with(pytest.KEY)
 
-    def test_gets(self, mocker, redis, redis_connection):
-        mocker.spy(redis, "_get")
+    def test_gets(self, redis, redis_connection):
         redis._gets(pytest.KEY)
-        redis._get.assert_called_with(pytest.KEY, _conn=ANY)
+        redis_connection.get.assert_called_with(pytest.KEY)
 
     def test_set(self, redis, redis_connection):
         redis._set(pytest.KEY, "value")
@@ -151,10 +248,7 @@ class TestRedisBackend:
         mocker.spy(redis, "_raw")
         redis._cas(pytest.KEY, "value", "old_value", ttl=10, _conn=redis_connection)
         redis._raw.assert_called_with(
-            "eval",
-            redis.CAS_SCRIPT,
-            [pytest.KEY],
-            ["value", "old_value", "EX", 10],
+            "eval", redis.CAS_SCRIPT, 1, pytest.KEY, "value", "old_value", "EX", 10,
             _conn=redis_connection,
         )
 
@@ -162,10 +256,7 @@ class TestRedisBackend:
         mocker.spy(redis, "_raw")
         redis._cas(pytest.KEY, "value", "old_value", ttl=0.1, _conn=redis_connection)
         redis._raw.assert_called_with(
-            "eval",
-            redis.CAS_SCRIPT,
-            [pytest.KEY],
-            ["value", "old_value", "PX", 100],
+            "eval", redis.CAS_SCRIPT, 1, pytest.KEY, "value", "old_value", "PX", 100,
             _conn=redis_connection,
         )
 
@@ -179,11 +270,17 @@ class TestRedisBackend:
 
     def test_multi_set_with_ttl(self, redis, redis_connection):
         redis._multi_set([(pytest.KEY, "value"), (pytest.KEY_1, "random")], ttl=1)
-        assert redis_connection.pipeline.call_count == 1
-        redis_connection.mset.assert_called_with({pytest.KEY: "value", pytest.KEY_1: "random"})
-        redis_connection.expire.assert_any_call(pytest.KEY, 1)
-        redis_connection.expire.assert_any_call(pytest.KEY_1, 1)
-        assert redis_connection.execute.call_count == 1
+        redis_connection.evalsha.assert_called_once_with(
+            redis.scripts.register(redis.MULTI_SET_TTL_SCRIPT).sha,
+            2, pytest.KEY, pytest.KEY_1, "EX", 1, "value", "random"
+        )
+        assert redis_connection.mset.call_count == 0
+        assert redis_connection.expire.call_count == 0
+
+    def test_multi_set_with_float_ttl(self, redis, redis_connection):
+        redis._multi_set([(pytest.KEY, "value")], ttl=0.25)
+        sha = redis.scripts.register(redis.MULTI_SET_TTL_SCRIPT).sha
+        redis_connection.evalsha.assert_called_once_with(sha, 1, pytest.KEY, "PX", 250, "value")
 
     def test_add(self, redis, redis_connection):
         redis._add(pytest.KEY, "value")
@@ -228,9 +325,68 @@ class TestRedisBackend:
         redis_connection.delete.assert_called_with(pytest.KEY)
 
     def test_clear(self, redis, redis_connection):
-        redis_connection.keys.return_value = ["nm:a", "nm:b"]
+        redis_connection.scan_iter.return_value = iter(["nm:a", "nm:b"])
+        redis._clear("nm")
+        redis_connection.scan_iter.assert_called_with(match="nm:*", count=1000)
+        redis_connection.unlink.assert_called_with("nm:a", "nm:b")
+        assert redis_connection.keys.call_count == 0
+
+    def test_clear_no_keys(self, redis, redis_connection):
+        assert redis._clear("nm") is True
+        assert redis_connection.unlink.call_count == 0
+
+    def test_clear_batches(self, redis, redis_connection):
+        redis.scan_count = 10
+        redis.unlink_batch = 2
+        redis_connection.scan_iter.return_value = iter(["nm:a", "nm:b", "nm:c"])
         redis._clear("nm")
-        redis_connection.delete.assert_called_with("nm:a", "nm:b")
+        redis_connection.scan_iter.assert_called_with(match="nm:*", count=10)
+        assert redis_connection.unlink.call_args_list == [
+            (("nm:a", "nm:b"),),
+            (("nm:c",),),
+        ]
+
+    def test_clear_escapes_namespace(self, redis, redis_connection):
+        redis._clear("n*[m]")
+        redis_connection.scan_iter.assert_called_with(match="n\\*\\[m\\]:*", count=1000)
+
+    def test_clear_in_background(self, redis, redis_connection):
+        redis.unlink_batch = 2
+        redis_connection.scan_iter.return_value = iter(["nm:a", "nm:b", "nm:c"])
+        progress = []
+        job = redis.clear_in_background("nm", progress=lambda job: progress.append(job.deleted))
+        assert job.wait(1) is True
+        assert job.done is True
+        assert (job.matched, job.deleted, job.error) == (3, 3, None)
+        assert progress == [2, 3]
+
+    def test_clear_in_background_default_namespace(self, redis, redis_connection):
+        redis.namespace = "test"
+        redis.clear_in_background().wait(1)
+        redis_connection.scan_iter.assert_called_with(match="test:*", count=1000)
+
+    def test_clear_in_background_cancel(self, redis, redis_connection):
+        redis.unlink_batch = 1
+        redis_connection.scan_iter.return_value = iter(["nm:a", "nm:b", "nm:c"])
+        proceed = threading.Event()
+
+        def progress(job):
+            job.cancel()
+            proceed.wait(1)
+
+        job = redis.clear_in_background("nm", progress=progress)
+        proceed.set()
+        job.wait(1)
+        assert job.cancelled is True
+        assert job.deleted == 1
+        assert redis_connection.unlink.call_count == 1
+
+    def test_clear_in_background_error(self, redis, redis_connection):
+        redis_connection.scan_iter.side_effect = exceptions.ConnectionError()
+        job = redis.clear_in_background("nm")
+        job.wait(1)
+        assert isinstance(job.error, exceptions.ConnectionError)
+        assert job.done is True
 
     def test_clear_no_namespace(self, redis, redis_connection):
         redis._clear()
@@ -245,17 +401,182 @@ class TestRedisBackend:
     def test_redlock_release(self, mocker, redis):
         mocker.spy(redis, "_raw")
         redis._redlock_release(pytest.KEY, "random")
-        redis._raw.assert_called_with("eval", redis.RELEASE_SCRIPT, [pytest.KEY], ["random"])
+        redis._raw.assert_called_with("eval", redis.RELEASE_SCRIPT, 1, pytest.KEY, "random")
+
+    def test_raw_eval_uses_scripts(self, redis, redis_connection):
+        redis._raw("eval", "return 1", 1, pytest.KEY, "arg")
+        assert "return 1" in redis.scripts
+        redis_connection.evalsha.assert_called_once_with(
+            redis.scripts.register("return 1").sha, 1, pytest.KEY, "arg"
+        )
+        assert redis_connection.eval.call_count == 0
+
+    def test_scripts_loaded_once(self, redis, redis_connection):
+        redis._redlock_release(pytest.KEY, "random")
+        redis._cas(pytest.KEY, "value", "old_value")
+        assert redis_connection.script_load.call_count == len(redis.scripts) == 3
+        assert redis_connection.evalsha.call_count == 2
 
     def test_close_when_connected(self, redis):
         redis._raw("set", pytest.KEY, 1)
         assert redis._close() is None
 
+    def test_close_disconnects_pool(self, redis):
+        redis._pool = None
+        redis._get_pool()
+        with patch.object(redis._connection_pool, "disconnect") as disconnect:
+            redis._close()
+        assert disconnect.call_count == 1
+
     def test_close_when_not_connected(self, redis, redis_pool):
         redis._pool = None
         assert redis._close() is None
 
 
+@pytest.fixture
+def replicated(redis):
+    redis.replicas = [("10.0.0.1", 6379), ("10.0.0.2", 6379)]
+    redis._replicas = [
+        _Replica("10.0.0.1:6379", MagicMock(), MagicMock()),
+        _Replica("10.0.0.2:6379", MagicMock(), MagicMock()),
+    ]
+    return redis
+
+
+class TestReplicas:
+    def test_parse_nodes(self):
+        assert parse_nodes("a:1,b:2") == [("a", 1), ("b", 2)]
+        assert parse_nodes(None) == []
+
+    def test_setup(self):
+        redis = RedisBackend(replicas="10.0.0.1:6379,10.0.0.2:6380", read_your_writes="50")
+        assert redis.replicas == [("10.0.0.1", 6379), ("10.0.0.2", 6380)]
+        assert redis.replica_strategy == "round_robin"
+        assert redis.read_your_writes == 50
+
+    def test_setup_invalid_strategy(self):
+        with pytest.raises(ValueError):
+            RedisBackend(replica_strategy="random")
+
+    def test_get_replicas_creates_pools(self):
+        redis = RedisBackend(replicas=["10.0.0.1:6380"], blocking=True)
+        replica, = redis._get_replicas()
+        assert replica.name == "10.0.0.1:6380"
+        assert isinstance(replica.pool, BlockingConnectionPool)
+        assert replica.pool.connection_kwargs["host"] == "10.0.0.1"
+        assert replica.pool.connection_kwargs["port"] == 6380
+        assert redis._get_replicas() == [replica]
+
+    def test_reads_round_robin(self, replicated, redis_connection):
+        first, second = replicated._replicas
+        replicated._get(pytest.KEY)
+        replicated._multi_get([pytest.KEY])
+        first.client.exists.return_value = 1
+        assert replicated._exists(pytest.KEY) is True
+        assert first.client.get.call_count == 1
+        assert second.client.mget.call_count == 1
+        assert first.client.exists.call_count == 1
+        assert redis_connection.get.call_count == 0
+        assert redis_connection.mget.call_count == 0
+
+    @pytest.mark.parametrize(
+        "command, args",
+        [("_gets", ()), ("_set", ("value",)), ("_delete", ()), ("_increment", (1,))],
+    )
+    def test_primary_commands(self, replicated, redis_connection, command, args):
+        getattr(replicated, command)(pytest.KEY, *args)
+        for replica in replicated._replicas:
+            assert replica.client.method_calls == []
+
+    def test_explicit_conn(self, replicated, redis_connection):
+        replicated._get(pytest.KEY, _conn=redis_connection)
+        redis_connection.get.assert_called_with(pytest.KEY)
+
+    def test_least_latency(self, replicated):
+        replicated.replica_strategy = "least_latency"
+        first, second = replicated._replicas
+        first.latency = 0.01
+        second.latency = 0.001
+        for _ in range(replicated.LATENCY_PROBE_EVERY):
+            replicated._get(pytest.KEY)
+        assert first.client.get.call_count == 1
+        assert second.client.get.call_count == replicated.LATENCY_PROBE_EVERY - 1
+
+    def test_least_latency_unmeasured_first(self, replicated):
+        replicated.replica_strategy = "least_latency"
+        first, second = replicated._replicas
+        first.latency = 0.001
+        next(replicated._reads)
+        replicated._get(pytest.KEY)
+        assert second.client.get.call_count == 1
+        assert second.latency is not None
+
+    def test_replica_failure_falls_back(self, replicated, redis_connection):
+        first, _ = replicated._replicas
+        first.client.get.side_effect = exceptions.ConnectionError()
+        redis_connection.get.return_value = "value"
+        assert replicated._get(pytest.KEY) == "value"
+        assert first.latency == math.inf
+        first.observe(0.002)
+        assert first.latency == 0.002
+
+    def test_observe_smooths(self):
+        replica = _Replica("r", None, None)
+        replica.observe(1.0)
+        replica.observe(2.0)
+        assert replica.latency == pytest.approx(1.2)
+
+    def test_read_your_writes(self, replicated, redis_connection):
+        replicated.read_your_writes = 20
+        replicated._set(pytest.KEY, "value")
+        replicated._get(pytest.KEY)
+        replicated._multi_get([pytest.KEY_1, pytest.KEY])
+        replicated._get(pytest.KEY_1)
+        assert redis_connection.get.call_count == 1
+        assert redis_connection.mget.call_count == 1
+        time.sleep(0.03)
+        replicated._get(pytest.KEY)
+        assert redis_connection.get.call_count == 1
+
+    def test_read_your_writes_multi_set(self, replicated, redis_connection):
+        replicated.read_your_writes = 1000
+        replicated._multi_set([(pytest.KEY, "value"), (pytest.KEY_1, "random")])
+        replicated._get(pytest.KEY_1)
+        assert redis_connection.get.call_count == 1
+
+    def test_read_your_writes_clear(self, replicated, redis_connection):
+        replicated.read_your_writes = 1000
+        replicated._clear()
+        replicated._get(pytest.KEY)
+        assert redis_connection.get.call_count == 1
+
+    def test_read_your_writes_disabled(self, replicated):
+        replicated._set(pytest.KEY, "value")
+        assert replicated._written == {}
+
+    def test_written_pruned(self, replicated):
+        replicated.read_your_writes = 1
+        replicated._prune_written_at = 4
+        for key in "abc":
+            replicated._wrote(key)
+        time.sleep(0.002)
+        replicated._wrote("d")
+        assert list(replicated._written) == ["d"]
+        assert replicated._prune_written_at == 1024
+
+    def test_pool_stats(self, replicated):
+        replicated._pool = None
+        replicated._replicas[0].pool.stats.return_value = {"in_use": 1}
+        replicated._replicas[0].latency = 0.5
+        stats = replicated.pool_stats()
+        assert stats["replicas"]["10.0.0.1:6379"] == {"in_use": 1, "latency": 0.5}
+
+    def test_close(self, replicated):
+        replicated._close()
+        for replica in replicated._replicas:
+            assert replica.pool.disconnect.call_count == 1
+
+
 class TestConn:
     def dummy(self, *args, _conn=None, **kwargs):
         pass
@@ -303,3 +624,226 @@ class TestRedisCache:
 
     def test_build_key_no_namespace(self, redis_cache):
         assert redis_cache.build_key(pytest.KEY, namespace=None) == pytest.KEY
+
+
+@pytest.fixture
+def near(redis):
+    redis._near = NearCache(10)
+    redis._near.available = True
+    return redis
+
+
+class TestNearCache:
+    def test_setup(self):
+        redis = RedisBackend(near_cache_size="100", near_cache_prefixes="a:,b:")
+        assert redis.near_cache_size == 100
+        assert redis.near_cache_mode == "tracking"
+        assert redis.near_cache_prefixes == ["a:", "b:"]
+        assert redis._near.max_size == 100
+
+    def test_setup_disabled(self):
+        assert RedisBackend()._near is None
+
+    def test_setup_invalid(self):
+        with pytest.raises(ValueError):
+            RedisBackend(near_cache_size=10, near_cache_mode="other")
+        with pytest.raises(ValueError):
+            RedisBackend(near_cache_size=10, replicas="10.0.0.1:6379")
+
+    def test_get_pool_starts_listener(self, mocker):
+        listener = mocker.patch("pycached.backends.redis.InvalidationListener")
+        redis = RedisBackend(near_cache_size=10, near_cache_mode="bcast")
+        redis.namespace = "test"
+        redis._get_pool()
+        assert listener.return_value.start.call_count == 1
+        assert listener.call_args[1]["mode"] == "bcast"
+        assert listener.call_args[1]["prefixes"] == ["test:"]
+        assert redis._connection_pool.connection_kwargs["redis_connect_func"] == (
+            redis._enable_tracking
+        )
+
+    def test_get_pool_concurrent_first_calls(self, mocker):
+        redis = RedisBackend(near_cache_size=10, auto_pipeline=True)
+        published = []
+
+        def start():
+            time.sleep(0.05)
+            published.append(redis._pool)
+
+        listener = mocker.patch("pycached.backends.redis.InvalidationListener")
+        listener.return_value.start.side_effect = start
+        pipeline = mocker.patch("pycached.backends.redis.AutoPipeline")
+        pools = []
+        workers = [
+            threading.Thread(target=lambda: pools.append(redis._get_pool())) for _ in range(8)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        assert listener.call_count == pipeline.call_count == 1
+        assert published == [None]
+        assert pools == [pipeline.return_value] * 8
+
+    def test_reconnect_disconnects_pool(self, mocker):
+        mocker.patch("pycached.backends.redis.InvalidationListener")
+        redis = RedisBackend(near_cache_size=10)
+        redis._get_pool()
+        with patch.object(redis._connection_pool, "disconnect") as disconnect:
+            redis._near_cache_connected()
+        assert disconnect.call_count == 1
+
+    def test_get(self, near, redis_connection):
+        redis_connection.get.return_value = "value"
+        assert near._get(pytest.KEY) == "value"
+        assert near._get(pytest.KEY) == "value"
+        assert redis_connection.get.call_count == 1
+        stats = near.near_cache_stats()
+        assert (stats["local_hits"], stats["remote_hits"], stats["remote_misses"]) == (1, 1, 0)
+
+    def test_get_missing_not_cached(self, near, redis_connection):
+        redis_connection.get.return_value = None
+        near._get(pytest.KEY)
+        near._get(pytest.KEY)
+        assert redis_connection.get.call_count == 2
+        assert near.near_cache_stats()["remote_misses"] == 2
+
+    def test_get_unavailable(self, near, redis_connection):
+        near._near.available = False
+        redis_connection.get.return_value = "value"
+        near._get(pytest.KEY)
+        near._get(pytest.KEY)
+        assert redis_connection.get.call_count == 2
+
+    def test_multi_get(self, near, redis_connection):
+        redis_connection.get.return_value = "cached"
+        near._get(pytest.KEY)
+        redis_connection.mget.return_value = ["value", None]
+        assert near._multi_get([pytest.KEY_1, pytest.KEY, "missing"]) == ["value", "cached", None]
+        redis_connection.mget.assert_called_with(pytest.KEY_1, "missing")
+        assert near._near.get(pytest.KEY_1) == "value"
+
+    def test_gets_bypasses_near_cache(self, near, redis_connection):
+        redis_connection.get.return_value = "value"
+        near._get(pytest.KEY)
+        near._gets(pytest.KEY)
+        assert redis_connection.get.call_count == 2
+
+    @pytest.mark.parametrize(
+        "command, args",
+        [("_set", ("new",)), ("_delete", ()), ("_increment", (1,)), ("_expire", (1,))],
+    )
+    def test_writes_invalidate(self, near, redis_connection, command, args):
+        redis_connection.get.return_value = "value"
+        near._get(pytest.KEY)
+        getattr(near, command)(pytest.KEY, *args)
+        assert near._near.get(pytest.KEY) is None
+
+    def test_clear_flushes(self, near, redis_connection):
+        redis_connection.get.return_value = "value"
+        near._get(pytest.KEY)
+        near._clear()
+        assert len(near._near) == 0
+
+    def test_stats_disabled(self, redis):
+        with pytest.raises(ValueError):
+            redis.near_cache_stats()
+
+    def test_close_stops_listener(self, near):
+        listener = near._listener = MagicMock()
+        near._near.finish(pytest.KEY, near._near.begin(pytest.KEY), "value")
+        near._close()
+        assert listener.stop.call_count == 1
+        assert near._near.available is False
+        assert len(near._near) == 0
+
+
+class TestAutoPipeline:
+    def test_setup(self):
+        redis = RedisBackend(auto_pipeline="true", pipeline_window="2", pipeline_max_batch="64")
+        assert redis.auto_pipeline is True
+        assert redis.pipeline_window == 2.0
+        assert redis.pipeline_max_batch == 64
+
+    def test_setup_disabled(self, create_pool):
+        redis = RedisBackend()
+        assert redis._get_pool() is create_pool.return_value
+        assert redis._pipeline is None
+
+    def test_get_pool_wraps_client(self, create_pool):
+        redis = RedisBackend(auto_pipeline=True, pipeline_window=2, pipeline_max_batch=64)
+        pool = redis._get_pool()
+        assert isinstance(pool, AutoPipeline)
+        assert pool is redis._pipeline
+        assert pool.client is create_pool.return_value
+        assert (pool.window, pool.max_batch) == (0.002, 64)
+
+    def test_commands_pipelined(self, create_pool):
+        client = create_pool.return_value
+        client.pipeline.return_value.execute.return_value = ["value"]
+        redis = RedisBackend(auto_pipeline=True)
+        assert redis._get(pytest.KEY) == "value"
+        client.pipeline.return_value.get.assert_called_once_with(pytest.KEY)
+        assert redis.pipeline_stats()["commands"] == 1
+        redis._close()
+
+    def test_stats_disabled(self, redis):
+        with pytest.raises(ValueError):
+            redis.pipeline_stats()
+
+    def test_close_stops_pipeline(self, redis):
+        pipeline = redis._pipeline = MagicMock()
+        redis._close()
+        assert pipeline.stop.call_count == 1
+
+
+class TestBinary:
+    def test_setup(self):
+        assert RedisBackend().binary is None
+        assert RedisBackend(binary="true").binary is True
+        assert RedisBackend(binary=False).binary is False
+
+    @pytest.mark.parametrize(
+        "serializer, binary", [(JsonSerializer(), False), (PickleSerializer(), True)]
+    )
+    def test_auto_from_serializer(self, serializer, binary):
+        cache = RedisCache(serializer=serializer)
+        assert cache._connection_kwargs()["decode_responses"] is not binary
+
+    def test_explicit(self):
+        cache = RedisCache(serializer=JsonSerializer(), binary=True)
+        assert cache._connection_kwargs()["decode_responses"] is False
+
+    def test_pool_min_size_uses_serializer(self, mocker):
+        mocker.patch.object(RedisBackend, "_warm_up")
+        cache = RedisCache(serializer=PickleSerializer(), pool_min_size=1)
+        assert cache._connection_pool.connection_kwargs["decode_responses"] is False
+
+    def test_bytes_not_decoded(self, redis_pool, redis_connection):
+        cache = RedisCache(serializer=PickleSerializer())
+        cache._pool = redis_pool
+        cache._is_binary()
+        value = PickleSerializer().dumps({"a": 1})
+        redis_connection.get.return_value = value
+        redis_connection.mget.return_value = [value, None]
+        assert cache._get(pytest.KEY) is value
+        assert cache._multi_get([pytest.KEY, pytest.KEY_1]) == [value, None]
+        assert cache.get(pytest.KEY) == {"a": 1}
+
+    def test_str_serializer_decoded_once(self, redis_pool, redis_connection):
+        cache = RedisCache(serializer=JsonSerializer(), binary=True)
+        cache._pool = redis_pool
+        redis_connection.get.return_value = b'{"a": 1}'
+        redis_connection.mget.return_value = [b"1", None]
+        assert cache._get(pytest.KEY) == '{"a": 1}'
+        assert cache._gets(pytest.KEY) == '{"a": 1}'
+        assert cache._multi_get([pytest.KEY, pytest.KEY_1]) == ["1", None]
+
+    def test_near_cache_listener_decodes(self, mocker):
+        listener = mocker.patch("pycached.backends.redis.InvalidationListener")
+        connection = mocker.patch("pycached.backends.redis.redis.Connection")
+        cache = RedisCache(serializer=PickleSerializer(), near_cache_size=10)
+        cache._get_pool()
+        listener.call_args[0][1]()
+        assert connection.call_args[1]["decode_responses"] is True
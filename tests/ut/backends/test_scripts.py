@@ -0,0 +1,91 @@
+import asyncio
+import hashlib
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from redis import exceptions
+from pycached.backends.scripts import Script, ScriptRegistry
+
+
+@pytest.fixture
+def conn():
+    return MagicMock()
+
+
+@pytest.fixture
+def registry():
+    return ScriptRegistry(("return 1", "return 2"))
+
+
+class TestScript:
+    def test_sha(self):
+        script = Script("return 1")
+        assert script.sha == hashlib.sha1(b"return 1").hexdigest()
+        assert script.loaded is False
+
+
+class TestScriptRegistry:
+    def test_register(self, registry):
+        script = registry.register("return 3")
+        assert registry.register("return 3") is script
+        assert "return 3" in registry
+        assert len(registry) == 3
+
+    def test_run_loads_all_on_first_use(self, registry, conn):
+        registry.run(conn, "return 1", 1, pytest.KEY, "arg")
+        assert [call[0][0] for call in conn.script_load.call_args_list] == [
+            "return 1",
+            "return 2",
+        ]
+        conn.evalsha.assert_called_once_with(
+            registry.register("return 1").sha, 1, pytest.KEY, "arg"
+        )
+
+    def test_run_loads_once(self, registry, conn):
+        registry.run(conn, "return 1", 0)
+        registry.run(conn, "return 2", 0)
+        assert conn.script_load.call_count == 2
+        assert conn.evalsha.call_count == 2
+        assert conn.eval.call_count == 0
+
+    def test_run_new_script(self, registry, conn):
+        registry.run(conn, "return 1", 0)
+        registry.run(conn, "return 3", 0)
+        assert conn.script_load.call_args[0][0] == "return 3"
+        assert conn.script_load.call_count == 3
+
+    def test_run_reloads_on_noscript(self, registry, conn):
+        registry.run(conn, "return 1", 0)
+        conn.evalsha.side_effect = [exceptions.NoScriptError("NOSCRIPT"), 1]
+        assert registry.run(conn, "return 1", 0) == 1
+        assert conn.script_load.call_count == 4
+        assert conn.evalsha.call_count == 3
+
+    def test_run_noscript_twice(self, registry, conn):
+        conn.evalsha.side_effect = exceptions.NoScriptError("NOSCRIPT")
+        with pytest.raises(exceptions.NoScriptError):
+            registry.run(conn, "return 1", 0)
+        assert conn.evalsha.call_count == 2
+
+    def test_run_error(self, registry, conn):
+        conn.evalsha.side_effect = exceptions.ResponseError("ERR")
+        with pytest.raises(exceptions.ResponseError):
+            registry.run(conn, "return 1", 0)
+        assert conn.script_load.call_count == 2
+
+
+class TestScriptRegistryAsync:
+    def test_run_async(self, registry):
+        conn = AsyncMock()
+        conn.evalsha.return_value = 1
+        assert asyncio.run(registry.run_async(conn, "return 1", 0)) == 1
+        assert conn.script_load.await_count == 2
+        conn.evalsha.assert_awaited_once_with(Script("return 1").sha, 0)
+
+    def test_run_async_reloads_on_noscript(self, registry):
+        conn = AsyncMock()
+        conn.evalsha.side_effect = [exceptions.NoScriptError(), 1]
+        assert asyncio.run(registry.run_async(conn, "return 1", 0)) == 1
+        assert conn.script_load.await_count == 4
+        assert conn.evalsha.await_count == 2
@@ -0,0 +1,330 @@
+import multiprocessing
+import threading
+import time
+
+import pytest
+
+from pycached import Cache, SharedMemoryCache
+from pycached.base import BaseCache
+from pycached.serializers import JsonSerializer
+from pycached.backends.shm import SharedMemoryBackend, SharedMemorySegment, parse_size
+
+
+@pytest.fixture
+def shm(tmp_path):
+    shm = SharedMemoryBackend(name="test", size="1m", directory=str(tmp_path))
+    yield shm
+    shm.unlink()
+
+
+@pytest.fixture
+def shm_cache(tmp_path):
+    cache = SharedMemoryCache(name="test", size="1m", directory=str(tmp_path))
+    yield cache
+    cache.unlink()
+
+
+class TestParseSize:
+    @pytest.mark.parametrize(
+        "size, expected",
+        [(10, 10), ("10", 10), ("64k", 65536), ("2M", 2 << 20), ("1gb", 1 << 30)],
+    )
+    def test_parse_size(self, size, expected):
+        assert parse_size(size) == expected
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            parse_size("1tb")
+
+
+class TestSharedMemorySegment:
+    def test_geometry(self, tmp_path):
+        segment = SharedMemorySegment(str(tmp_path / "segment"), 1 << 20, stripes=8)
+        assert segment.slots == 2048
+        assert segment.stripe_slots == 256
+        assert segment.arena_offset % 64 == 0
+
+    def test_attach_keeps_geometry(self, tmp_path):
+        path = str(tmp_path / "segment")
+        SharedMemorySegment(path, 1 << 20, stripes=8)
+        segment = SharedMemorySegment(path, 1 << 16, stripes=2)
+        assert segment.size == 1 << 20
+        assert segment.stripes == 8
+
+    def test_attach_invalid_file(self, tmp_path):
+        path = tmp_path / "segment"
+        path.write_bytes(b"x" * 1024)
+        with pytest.raises(ValueError):
+            SharedMemorySegment(str(path), 1 << 20)
+
+    def test_too_small(self, tmp_path):
+        with pytest.raises(ValueError):
+            SharedMemorySegment(str(tmp_path / "segment"), 1024, slots=1000)
+
+    def test_split_bigger_chunks(self, tmp_path):
+        segment = SharedMemorySegment(str(tmp_path / "segment"), 1 << 16, slots=16, stripes=1)
+        with segment._allocator_lock():
+            segment._alloc(0)
+            big = segment._alloc(4)
+            segment._free(4, big)
+            segment._write_counter(40, segment.arena_size)
+            assert segment._alloc(0) == big
+            assert segment._alloc(1) == big + 128
+            assert segment._alloc(0) == big + 64
+
+    def test_empty_arena_reset(self, tmp_path):
+        segment = SharedMemorySegment(str(tmp_path / "segment"), 1 << 16, slots=16, stripes=1)
+        with segment._allocator_lock():
+            chunks = [segment._alloc(0) for _ in range(3)]
+            for chunk in chunks:
+                segment._free(0, chunk)
+            assert segment._read_counter(40) == 0
+            assert segment._pop_free(0) == 0xFFFFFFFFFFFFFFFF
+
+
+class TestSharedMemoryBackend:
+    def test_get_missing(self, shm):
+        assert shm._get(pytest.KEY) is None
+
+    @pytest.mark.parametrize("value", ["value", b"\x00bytes", 10, ""])
+    def test_set_get(self, shm, value):
+        assert shm._set(pytest.KEY, value) is True
+        assert shm._get(pytest.KEY) == value
+        assert type(shm._get(pytest.KEY)) is type(value)
+
+    def test_set_invalid_type(self, shm):
+        with pytest.raises(TypeError):
+            shm._set(pytest.KEY, {"a": 1})
+
+    def test_set_overwrite_other_size(self, shm):
+        shm._set(pytest.KEY, "a")
+        shm._set(pytest.KEY, "a" * 1000)
+        assert shm._get(pytest.KEY) == "a" * 1000
+        shm._set(pytest.KEY, "b")
+        assert shm._get(pytest.KEY) == "b"
+        assert shm.stats()["entries"] == 1
+        assert shm.stats()["bytes"] == 64
+
+    def test_set_ttl(self, shm):
+        shm._set(pytest.KEY, "value", ttl=0.05)
+        assert shm._get(pytest.KEY) == "value"
+        time.sleep(0.06)
+        assert shm._get(pytest.KEY) is None
+        assert shm.stats()["entries"] == 0
+
+    def test_set_cas(self, shm):
+        shm._set(pytest.KEY, "value")
+        assert shm._set(pytest.KEY, "new", _cas_token="other") == 0
+        assert shm._set(pytest.KEY, "new", _cas_token="value") is True
+        assert shm._get(pytest.KEY) == "new"
+
+    def test_multi_get_set(self, shm):
+        shm._multi_set([(pytest.KEY, "value"), (pytest.KEY_1, "random")], ttl=10)
+        assert shm._multi_get([pytest.KEY, pytest.KEY_1, "missing"]) == [
+            "value",
+            "random",
+            None,
+        ]
+
+    def test_add(self, shm):
+        assert shm._add(pytest.KEY, "value") is True
+        with pytest.raises(ValueError):
+            shm._add(pytest.KEY, "value")
+
+    def test_add_expired(self, shm):
+        shm._add(pytest.KEY, "value", ttl=0.01)
+        time.sleep(0.02)
+        assert shm._add(pytest.KEY, "value") is True
+
+    def test_exists(self, shm):
+        assert shm._exists(pytest.KEY) is False
+        shm._set(pytest.KEY, "value")
+        assert shm._exists(pytest.KEY) is True
+
+    def test_increment(self, shm):
+        assert shm._increment(pytest.KEY, 2) == 2
+        assert shm._get(pytest.KEY) == "2"
+        assert shm._increment(pytest.KEY, -3) == -1
+
+    def test_increment_keeps_type_and_ttl(self, shm):
+        shm._set(pytest.KEY, 1, ttl=0.05)
+        assert shm._increment(pytest.KEY, 1) == 2
+        assert shm._get(pytest.KEY) == 2
+        time.sleep(0.06)
+        assert shm._get(pytest.KEY) is None
+
+    def test_increment_typeerror(self, shm):
+        shm._set(pytest.KEY, "value")
+        with pytest.raises(TypeError):
+            shm._increment(pytest.KEY, 1)
+
+    def test_expire(self, shm):
+        assert shm._expire(pytest.KEY, 1) is False
+        shm._set(pytest.KEY, "value", ttl=0.01)
+        assert shm._expire(pytest.KEY, 0) is True
+        time.sleep(0.02)
+        assert shm._get(pytest.KEY) == "value"
+        shm._expire(pytest.KEY, 0.01)
+        time.sleep(0.02)
+        assert shm._exists(pytest.KEY) is False
+
+    def test_delete(self, shm):
+        assert shm._delete(pytest.KEY) == 0
+        shm._set(pytest.KEY, "value")
+        assert shm._delete(pytest.KEY) == 1
+        assert shm._get(pytest.KEY) is None
+
+    def test_delete_keeps_probe_chain(self, tmp_path):
+        shm = SharedMemoryBackend(
+            name="small", size="64k", slots=4, stripes=1, directory=str(tmp_path)
+        )
+        for key in "abcd":
+            shm._set(key, key)
+        for key in "abc":
+            shm._delete(key)
+            assert shm._get("d") == "d"
+        shm.unlink()
+
+    def test_clear(self, shm):
+        shm._multi_set([("a", "1"), ("b", "2")])
+        shm._clear()
+        assert shm.size() == 0
+        assert shm.stats()["bytes"] == 0
+        assert shm._get("a") is None
+
+    def test_clear_namespace(self, shm):
+        shm._multi_set([("nm:a", "1"), ("nm:b", "2"), ("nmc", "3")])
+        shm._clear("nm")
+        assert sorted(shm.keys()) == ["nmc"]
+
+    def test_keys_size(self, shm):
+        shm._multi_set([("nm:a", "1"), ("nm:b", "2"), ("c", "3")])
+        assert sorted(shm.keys("nm")) == ["nm:a", "nm:b"]
+        assert shm.size() == 3
+        assert shm.size("nm") == 2
+
+    def test_raw(self, shm):
+        shm._set(pytest.KEY, "value")
+        assert shm._raw("stats")["entries"] == 1
+
+    def test_redlock_release(self, shm):
+        shm._set(pytest.KEY, "lock")
+        assert shm._redlock_release(pytest.KEY, "other") == 0
+        assert shm._redlock_release(pytest.KEY, "lock") == 1
+        assert shm._redlock_release(pytest.KEY, "lock") == 0
+
+    def test_evicts_when_arena_full(self, tmp_path):
+        shm = SharedMemoryBackend(name="small", size="64k", slots=512, directory=str(tmp_path))
+        for i in range(1000):
+            shm._set(str(i), "x" * 100)
+        stats = shm.stats()
+        assert stats["evictions"] > 0
+        assert stats["bytes"] <= stats["arena_bytes"]
+        assert shm._get("999") == "x" * 100
+        shm.unlink()
+
+    def test_evicts_unread_first(self, tmp_path):
+        shm = SharedMemoryBackend(
+            name="small", size="64k", slots=512, stripes=1, directory=str(tmp_path)
+        )
+        shm._set("hot", "x" * 100)
+        for i in range(1000):
+            shm._get("hot")
+            shm._set(str(i), "x" * 100)
+        assert shm._get("hot") == "x" * 100
+        shm.unlink()
+
+    def test_big_entry_after_small_ones_deleted(self, tmp_path):
+        shm = SharedMemoryBackend(name="small", size="256k", slots=4000, directory=str(tmp_path))
+        keys = [str(i) for i in range(1000)]
+        shm._multi_set([(key, "x") for key in keys])
+        for key in keys:
+            shm._delete(key)
+        assert (shm.stats()["entries"], shm.stats()["bytes"]) == (0, 0)
+        shm._set("big", "y" * 60000)
+        assert shm._get("big") == "y" * 60000
+        shm.unlink()
+
+    def test_big_entry_evicts_small_ones(self, tmp_path):
+        shm = SharedMemoryBackend(name="small", size="64k", slots=512, directory=str(tmp_path))
+        for i in range(1000):
+            shm._set(str(i), "x" * 10)
+        shm._set("big", "y" * 20000)
+        assert shm._get("big") == "y" * 20000
+        shm.unlink()
+
+    def test_entry_too_big(self, shm):
+        with pytest.raises(ValueError):
+            shm._set(pytest.KEY, "x" * (2 << 20))
+
+    def test_shared_by_name(self, shm, tmp_path):
+        other = SharedMemoryBackend(name="test", directory=str(tmp_path))
+        shm._set(pytest.KEY, "value")
+        assert other._get(pytest.KEY) == "value"
+        assert other._segment is shm._segment
+
+    def test_shared_across_processes(self, shm, tmp_path):
+        def child():
+            other = SharedMemoryBackend(name="test", directory=str(tmp_path))
+            other._set("from_child", "value")
+            for _ in range(500):
+                other._increment("counter", 1)
+
+        context = multiprocessing.get_context("fork")
+        processes = [context.Process(target=child) for _ in range(2)]
+        for process in processes:
+            process.start()
+        for _ in range(500):
+            shm._increment("counter", 1)
+        for process in processes:
+            process.join()
+
+        assert shm._get("from_child") == "value"
+        assert shm._get("counter") == "1500"
+
+    def test_threads(self, shm):
+        def increment():
+            for _ in range(500):
+                shm._increment("counter", 1)
+
+        threads = [threading.Thread(target=increment) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert shm._get("counter") == "2000"
+
+
+class TestSharedMemoryCache:
+    def test_inheritance(self):
+        assert issubclass(SharedMemoryCache, BaseCache)
+
+    def test_default_serializer(self, shm_cache):
+        assert isinstance(shm_cache.serializer, JsonSerializer)
+
+    def test_from_url(self, tmp_path):
+        cache = Cache.from_url(
+            "shm://fromurl?size=128k&stripes=4&directory={}".format(tmp_path)
+        )
+        assert isinstance(cache, SharedMemoryCache)
+        assert cache.name == "fromurl"
+        assert cache.segment_size == 128 << 10
+        assert cache._segment.stripes == 4
+        cache.unlink()
+
+    @pytest.mark.parametrize(
+        "namespace, expected",
+        ([None, "test:" + pytest.KEY], ["", pytest.KEY], ["my_ns", "my_ns:" + pytest.KEY]),
+    )
+    def test_build_key(self, shm_cache, namespace, expected):
+        shm_cache.namespace = "test"
+        assert shm_cache.build_key(pytest.KEY, namespace=namespace) == expected
+
+    def test_commands(self, shm_cache):
+        shm_cache.set(pytest.KEY, {"a": [1, 2]}, namespace="nm")
+        assert shm_cache.get(pytest.KEY, namespace="nm") == {"a": [1, 2]}
+        shm_cache.increment("counter")
+        assert shm_cache.get("counter") == 1
+        shm_cache.clear(namespace="nm")
+        assert shm_cache.exists(pytest.KEY, namespace="nm") is False
+        assert shm_cache.exists("counter") is True
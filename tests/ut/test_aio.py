@@ -0,0 +1,274 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+from pycached import Cache, caches, SimpleMemoryCache, RedisCache
+from pycached.aio import AsyncBaseCache, AsyncSimpleMemoryCache, AsyncRedisCache
+from pycached.exceptions import InvalidCacheType
+from pycached.plugins import BasePlugin
+from pycached.serializers import JsonSerializer, NullSerializer
+from pycached.tiered import TieredCache
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.fixture
+def cache():
+    return AsyncSimpleMemoryCache()
+
+
+class TestAsyncBaseCache:
+    def test_defaults(self):
+        cache = AsyncBaseCache()
+        assert cache.timeout == 5
+        assert cache.ttl is None
+        assert cache.namespace is None
+
+    def test_str_timeout(self):
+        assert AsyncBaseCache(timeout="1.5").timeout == 1.5
+
+    def test_build_key(self):
+        cache = AsyncBaseCache(namespace="ns")
+        assert cache.build_key(pytest.KEY) == "ns" + pytest.KEY
+        assert cache.build_key(pytest.KEY, namespace="other") == "other" + pytest.KEY
+
+    def test_commands_not_implemented(self):
+        with pytest.raises(NotImplementedError):
+            run(AsyncBaseCache().get(pytest.KEY))
+
+    def test_timeout(self, cache):
+        async def slow(*args, **kwargs):
+            await asyncio.sleep(1)
+
+        cache._get = slow
+        with pytest.raises(asyncio.TimeoutError):
+            run(cache.get(pytest.KEY, timeout=0.01))
+
+    def test_timeout_disabled(self, cache):
+        async def slow(*args, **kwargs):
+            await asyncio.sleep(0.02)
+
+        cache._get = slow
+        cache.timeout = 0.01
+        assert run(cache.get(pytest.KEY, timeout=None)) is None
+
+    def test_disabled(self, cache, monkeypatch):
+        monkeypatch.setenv("CACHE_DISABLE", "1")
+        assert run(cache.set(pytest.KEY, "value")) is True
+        assert run(cache.get(pytest.KEY)) is None
+        assert cache._cache == {}
+
+    def test_plugins(self, cache):
+        plugin = MagicMock(spec=BasePlugin)
+        cache.plugins = [plugin]
+        run(cache.set(pytest.KEY, "value"))
+        plugin.pre_set.assert_called_once_with(cache, pytest.KEY, "value")
+        assert plugin.post_set.call_args[1]["ret"] is True
+
+    def test_async_plugins(self, cache):
+        class Plugin(BasePlugin):
+            def __init__(self):
+                self.calls = []
+
+            async def pre_get(self, client, key, **kwargs):
+                self.calls.append(("pre", key))
+
+            async def post_get(self, client, key, took=0, ret=None, **kwargs):
+                self.calls.append(("post", ret))
+
+        plugin = Plugin()
+        cache.plugins = [plugin]
+        run(cache.get(pytest.KEY, default="default"))
+        assert plugin.calls == [("pre", pytest.KEY), ("post", "default")]
+
+    def test_context_manager(self, cache):
+        async def scenario():
+            async with cache:
+                await cache.set(pytest.KEY, "value", ttl=10)
+            return cache._handlers
+
+        assert run(scenario()) == {}
+
+    def test_get_connection(self, cache):
+        async def scenario():
+            async with cache.get_connection() as conn:
+                await conn.set(pytest.KEY, "value")
+                return await conn.get(pytest.KEY)
+
+        assert run(scenario()) == "value"
+
+
+class TestAsyncSimpleMemoryCache:
+    def test_defaults(self, cache):
+        assert isinstance(cache.serializer, NullSerializer)
+        assert cache.NAME == "memory"
+
+    def test_commands(self, cache):
+        async def scenario():
+            await cache.set(pytest.KEY, "value")
+            await cache.multi_set([(pytest.KEY_1, 1), ("other", 2)])
+            assert await cache.get(pytest.KEY) == "value"
+            assert await cache.multi_get([pytest.KEY, "missing", pytest.KEY_1]) == [
+                "value",
+                None,
+                1,
+            ]
+            assert await cache.exists(pytest.KEY) is True
+            assert await cache.increment("other", 2) == 4
+            assert await cache.increment("counter") == 1
+            assert await cache.delete(pytest.KEY) == 1
+            assert await cache.delete(pytest.KEY) == 0
+            with pytest.raises(ValueError):
+                await cache.add(pytest.KEY_1, "value")
+            assert await cache.add(pytest.KEY, "value") is True
+            assert await cache.raw("__len__") == 4
+
+        run(scenario())
+
+    def test_increment_not_int(self, cache):
+        async def scenario():
+            await cache.set(pytest.KEY, "value")
+            await cache.increment(pytest.KEY)
+
+        with pytest.raises(TypeError):
+            run(scenario())
+
+    def test_ttl_expires_in_loop(self, cache):
+        async def scenario():
+            await cache.set(pytest.KEY, "value", ttl=0.01)
+            await cache.set(pytest.KEY_1, "value")
+            assert await cache.get(pytest.KEY) == "value"
+            await asyncio.sleep(0.03)
+            return await cache.exists(pytest.KEY), await cache.exists(pytest.KEY_1)
+
+        assert run(scenario()) == (False, True)
+        assert pytest.KEY not in cache._handlers
+
+    def test_set_cancels_previous_ttl(self, cache):
+        async def scenario():
+            await cache.set(pytest.KEY, "value", ttl=0.01)
+            await cache.set(pytest.KEY, "value")
+            await asyncio.sleep(0.03)
+            return await cache.get(pytest.KEY)
+
+        assert run(scenario()) == "value"
+
+    def test_expire(self, cache):
+        async def scenario():
+            assert await cache.expire(pytest.KEY, 1) is False
+            await cache.set(pytest.KEY, "value", ttl=0.01)
+            await cache.expire(pytest.KEY, 0)
+            await cache.set(pytest.KEY_1, "value")
+            await cache.expire(pytest.KEY_1, 0.01)
+            await asyncio.sleep(0.03)
+            return await cache.exists(pytest.KEY), await cache.exists(pytest.KEY_1)
+
+        assert run(scenario()) == (True, False)
+
+    def test_cas(self, cache):
+        async def scenario():
+            await cache.set(pytest.KEY, "value")
+            assert await cache.set(pytest.KEY, "new", _cas_token="other") == 0
+            assert await cache.set(pytest.KEY, "new", _cas_token="value") is True
+            return await cache.get(pytest.KEY)
+
+        assert run(scenario()) == "new"
+
+    def test_clear(self, cache):
+        async def scenario():
+            await cache.set("ns:a", 1, ttl=10)
+            await cache.set("other", 2, ttl=10)
+            await cache.clear(namespace="ns")
+            assert await cache.multi_get(["ns:a", "other"]) == [None, 2]
+            await cache.clear()
+
+        run(scenario())
+        assert cache._cache == {}
+        assert cache._handlers == {}
+
+    def test_redlock_release(self, cache):
+        async def scenario():
+            await cache.set(pytest.KEY, "lock")
+            assert await cache._redlock_release(pytest.KEY, "other") == 0
+            return await cache._redlock_release(pytest.KEY, "lock")
+
+        assert run(scenario()) == 1
+
+
+class TestFactory:
+    def test_cache_asynchronous(self):
+        assert isinstance(Cache(Cache.MEMORY, asynchronous=True), AsyncSimpleMemoryCache)
+        cache = Cache(Cache.REDIS, asynchronous=True, endpoint="127.0.0.10", db="1")
+        assert isinstance(cache, AsyncRedisCache)
+        assert cache.endpoint == "127.0.0.10"
+        assert cache.db == 1
+
+    def test_cache_asynchronous_invalid(self):
+        with pytest.raises(InvalidCacheType):
+            Cache(Cache.SHM, asynchronous=True)
+
+    def test_from_url(self):
+        cache = Cache.from_url("redis://localhost:6380/2?binary=true", asynchronous=True)
+        assert isinstance(cache, AsyncRedisCache)
+        assert (cache.port, cache.db, cache.binary) == (6380, 2, True)
+
+    def test_caches_get_both_flavours(self):
+        caches.set_config(
+            {
+                "default": {
+                    "cache": "pycached.RedisCache",
+                    "endpoint": "127.0.0.10",
+                    "serializer": {"class": "pycached.serializers.JsonSerializer"},
+                    "plugins": [{"class": "pycached.plugins.HitMissRatioPlugin"}],
+                }
+            }
+        )
+        sync = caches.get("default")
+        async_cache = caches.get("default", asynchronous=True)
+        assert isinstance(sync, RedisCache)
+        assert isinstance(async_cache, AsyncRedisCache)
+        assert caches.get("default", asynchronous=True) is async_cache
+        assert async_cache.endpoint == "127.0.0.10"
+        assert isinstance(async_cache.serializer, JsonSerializer)
+        assert len(async_cache.plugins) == 1
+
+    def test_set_config_removes_async_caches(self):
+        cache = caches.get("default", asynchronous=True)
+        caches.set_config({"default": {"cache": "pycached.SimpleMemoryCache"}})
+        assert caches.get("default", asynchronous=True) is not cache
+
+    def test_create_asynchronous(self):
+        cache = caches.create("default", asynchronous=True)
+        assert isinstance(cache, AsyncSimpleMemoryCache)
+
+    def test_async_class_kept(self):
+        caches.add("aio_memory", {"cache": "pycached.aio.AsyncSimpleMemoryCache"})
+        assert isinstance(caches.get("aio_memory"), AsyncSimpleMemoryCache)
+        assert isinstance(caches.get("aio_memory", asynchronous=True), AsyncSimpleMemoryCache)
+
+    def test_no_async_flavour(self):
+        caches.add("tiered", {"cache": TieredCache, "tiers": [{"cache": SimpleMemoryCache}]})
+        with pytest.raises(InvalidCacheType):
+            caches.get("tiered", asynchronous=True)
+
+    def test_sync_only_options(self):
+        caches.add("aio_bounded", {"cache": "pycached.SimpleMemoryCache", "max_entries": 100})
+        assert caches.get("aio_bounded").max_entries == 100
+        with pytest.raises(InvalidCacheType, match="max_entries"):
+            caches.get("aio_bounded", asynchronous=True)
+
+    def test_sync_only_redis_options(self):
+        caches.add("aio_near", {"cache": "pycached.RedisCache", "near_cache_size": 10})
+        with pytest.raises(InvalidCacheType, match="near_cache_size"):
+            caches.get("aio_near", asynchronous=True)
+
+    def test_shared_options(self):
+        caches.add(
+            "aio_shared",
+            {"cache": "pycached.RedisCache", "namespace": "ns", "ttl": 10, "max_connections": 5},
+        )
+        cache = caches.get("aio_shared", asynchronous=True)
+        assert (cache.namespace, cache.ttl, cache.max_connections) == ("ns", 10, 5)
@@ -3,9 +3,34 @@ from unittest.mock import patch, MagicMock, ANY, Mock
 
 import pytest
 
+from pycached import cached, multi_cached
 from pycached.base import API, _Conn, BaseCache
 
 
+class LegacyCache(BaseCache):
+    """
+    Backend with the _set and _multi_set signatures from before cost aware eviction.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.values = {}
+
+    def _get(self, key, _conn=None):
+        return self.values.get(key)
+
+    def _multi_get(self, keys, _conn=None):
+        return [self.values.get(key) for key in keys]
+
+    def _set(self, key, value, ttl, _cas_token=None, _conn=None):
+        self.values[key] = value
+        return True
+
+    def _multi_set(self, pairs, ttl, _conn=None):
+        self.values.update(pairs)
+        return True
+
+
 class TestAPI:
     def test_register(self):
         @API.register
@@ -215,6 +240,36 @@ class TestBaseCache:
             pytest.KEY, "value", _cas_token=None, _conn=None, ttl=None
         )
 
+    def test_set_cost(self, base_cache):
+        base_cache._set = Mock()
+        base_cache._multi_set = Mock()
+
+        base_cache.set(pytest.KEY, "value", _cost=0.5)
+        base_cache.multi_set([[pytest.KEY, "value"]], _cost=0.5)
+
+        assert base_cache._set.call_args[1]["_cost"] == 0.5
+        assert base_cache._multi_set.call_args[1]["_cost"] == 0.5
+
+    def test_set_without_cost_support(self):
+        cache = LegacyCache()
+        assert cache.set(pytest.KEY, "value", _cost=0.5) is True
+        assert cache.multi_set([[pytest.KEY_1, "value"]], _cost=0.5) is True
+        assert cache.values == {pytest.KEY: "value", pytest.KEY_1: "value"}
+
+    def test_decorators_without_cost_support(self):
+        @cached(cache=LegacyCache)
+        def fn():
+            return "value"
+
+        @multi_cached("keys", cache=LegacyCache)
+        def multi_fn(keys=None):
+            return {key: key.upper() for key in keys}
+
+        assert fn() == "value"
+        assert fn.cache.values == {"tests.ut.test_basefn()[]": "value"}
+        assert multi_fn(keys=["a"]) == {"a": "A"}
+        assert multi_fn.cache.values == {"a": "A"}
+
     def test_multi_set_ttl_cache_default(self, base_cache):
         base_cache._multi_set = Mock()
 
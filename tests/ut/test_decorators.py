@@ -1,3 +1,4 @@
+import asyncio
 import inspect
 import random
 import sys
@@ -6,10 +7,12 @@ from unittest.mock import MagicMock, Mock, ANY, patch
 
 import pytest
 
-from pycached import cached, cached_stampede, multi_cached, SimpleMemoryCache
+from pycached import caches, cached, cached_stampede, multi_cached, SimpleMemoryCache
+from pycached.aio import AsyncRedisCache, AsyncSimpleMemoryCache
 from pycached.base import BaseCache, SENTINEL
-from pycached.decorators import _get_args_dict
+from pycached.decorators import _async_flavour, _get_args_dict
 from pycached.lock import RedLock
+from pycached.tiered import TieredCache
 
 
 def stub(*args, value=None, seconds=0, **kwargs):
@@ -145,7 +148,9 @@ class TestCached:
         decorator_call(value="value")
 
         assert decorator.get_from_cache.call_count == 1
-        decorator.set_in_cache.assert_called_with("stub()[('value', 'value')]", "value")
+        decorator.set_in_cache.assert_called_with(
+            "stub()[('value', 'value')]", "value", cost=ANY
+        )
         stub.assert_called_once_with(value="value")
 
     def test_calls_fn_raises_exception(self, mocker, decorator, decorator_call):
@@ -157,14 +162,19 @@ class TestCached:
 
 
 
+    def test_set_passes_compute_cost(self, decorator, decorator_call):
+        decorator.cache.get = Mock(return_value=None)
+        decorator_call(value="value", seconds=0.01)
+        assert decorator.cache.set.call_args[1]["_cost"] >= 0.01
+
     def test_set_calls_set(self, decorator, decorator_call):
         decorator.set_in_cache("key", "value")
-        decorator.cache.set.assert_called_with("key", "value", ttl=SENTINEL)
+        decorator.cache.set.assert_called_with("key", "value", ttl=SENTINEL, _cost=None)
 
     def test_set_calls_set_ttl(self, decorator, decorator_call):
         decorator.ttl = 10
         decorator.set_in_cache("key", "value")
-        decorator.cache.set.assert_called_with("key", "value", ttl=decorator.ttl)
+        decorator.cache.set.assert_called_with("key", "value", ttl=decorator.ttl, _cost=None)
 
     def test_set_catches_exception(self, decorator, decorator_call):
         decorator.cache.set = Mock(side_effect=Exception)
@@ -284,7 +294,7 @@ class TestCachedStampede:
             assert lock.__enter__.call_count == 1
             assert lock.__exit__.call_count == 1
             decorator.cache.set.assert_called_with(
-                "stub()[('value', 'value')]", "value", ttl=SENTINEL
+                "stub()[('value', 'value')]", "value", ttl=SENTINEL, _cost=ANY
             )
             stub.assert_called_once_with(value="value")
 
@@ -304,7 +314,7 @@ class TestCachedStampede:
             assert lock2.__enter__.call_count == 1
             assert lock2.__exit__.call_count == 1
             decorator.cache.set.assert_called_with(
-                "stub()[('value', 'value')]", "value", ttl=SENTINEL
+                "stub()[('value', 'value')]", "value", ttl=SENTINEL, _cost=ANY
             )
             assert stub.call_count == 1
 
@@ -441,7 +451,7 @@ class TestMultiCached:
         ret = decorator_call(1, keys=["a", "b"], value="value")
 
         decorator.get_from_cache.assert_called_once_with("a", "b")
-        decorator.set_in_cache.assert_called_with(ret, stub_dict, ANY, ANY)
+        decorator.set_in_cache.assert_called_with(ret, stub_dict, ANY, ANY, cost=ANY)
         stub_dict.assert_called_once_with(1, keys=["a", "b"], value="value")
 
 
@@ -452,7 +462,9 @@ class TestMultiCached:
 
         assert decorator_call(1, keys=["a", "b"], value="value") == {"a": ANY, "b": ANY}
 
-        decorator.set_in_cache.assert_called_once_with({"a": ANY, "b": ANY}, stub_dict, ANY, ANY)
+        decorator.set_in_cache.assert_called_once_with(
+            {"a": ANY, "b": ANY}, stub_dict, ANY, ANY, cost=ANY
+        )
         stub_dict.assert_called_once_with(1, keys=["b"], value="value")
 
     def test_calls_fn_raises_exception(self, mocker, decorator, decorator_call):
@@ -557,3 +569,177 @@ def test_get_args_dict():
 
     args_dict = _get_args_dict(fn, ("a", "b", "c", "d"), {"what": "what"})
     assert args_dict == {"a": "a", "b": "b", "keys": None, "what": "what"}
+
+
+class TestAsyncDecorators:
+    def test_cached_coroutine(self):
+        calls = []
+
+        @cached()
+        async def fn(a):
+            calls.append(a)
+            return a * 2
+
+        async def scenario():
+            return await fn(1), await fn(1), await fn(1, cache_read=False)
+
+        assert isinstance(fn.cache, AsyncSimpleMemoryCache)
+        assert inspect.iscoroutinefunction(fn)
+        assert asyncio.run(scenario()) == (2, 2, 2)
+        assert calls == [1, 1]
+
+    def test_cached_coroutine_keeps_signature(self):
+        @cached()
+        async def what(self, a, b):
+            return "1"
+
+        assert what.__name__ == "what"
+        assert str(inspect.signature(what)) == "(self, a, b)"
+
+    def test_cached_coroutine_alias(self):
+        caches.add("aio_redis", {"cache": "pycached.RedisCache"})
+
+        @cached(alias="aio_redis")
+        async def fn():
+            pass
+
+        assert isinstance(fn.cache, AsyncRedisCache)
+        assert fn.cache is caches.get("aio_redis", asynchronous=True)
+
+    def test_cached_coroutine_no_async_flavour(self):
+        assert _async_flavour(TieredCache) is TieredCache
+        assert _async_flavour(SimpleMemoryCache) is AsyncSimpleMemoryCache
+
+    def test_cached_coroutine_sync_only_options(self):
+        @cached(cache=SimpleMemoryCache, max_entries=10)
+        async def fn():
+            return "value"
+
+        assert type(fn.cache) is SimpleMemoryCache
+        assert fn.cache.max_entries == 10
+        assert asyncio.run(fn()) == "value"
+
+    def test_cached_coroutine_alias_sync_only_options(self):
+        caches.add("aio_bounded", {"cache": "pycached.SimpleMemoryCache", "max_entries": 100})
+
+        @cached(alias="aio_bounded")
+        async def fn():
+            return "value"
+
+        assert fn.cache is caches.get("aio_bounded")
+        assert asyncio.run(fn()) == "value"
+
+    def test_cached_coroutine_sync_cache(self):
+        with patch("pycached.decorators._get_cache", return_value=SimpleMemoryCache()):
+
+            @cached()
+            async def fn():
+                return "value"
+
+        assert asyncio.run(fn()) == "value"
+        assert fn.cache.get("tests.ut.test_decoratorsfn()[]") == "value"
+
+    def test_cached_coroutine_cache_errors(self):
+        @cached()
+        async def fn():
+            return "value"
+
+        async def fail(*args, **kwargs):
+            raise Exception
+
+        fn.cache.get = fail
+        fn.cache.set = fail
+        assert asyncio.run(fn()) == "value"
+
+    def test_cached_stampede_coalesces(self):
+        calls = []
+
+        @cached_stampede(lease=1)
+        async def fn(a):
+            calls.append(a)
+            await asyncio.sleep(0.02)
+            return a
+
+        async def scenario():
+            return await asyncio.gather(*[fn(1) for _ in range(5)], fn(2))
+
+        with patch("pycached.decorators.RedLock", wraps=RedLock) as lock:
+            assert asyncio.run(scenario()) == [1, 1, 1, 1, 1, 2]
+        assert lock.call_count == 2
+        assert sorted(calls) == [1, 2]
+        assert fn.cache._cache == {
+            "tests.ut.test_decoratorsfn(1,)[]": 1,
+            "tests.ut.test_decoratorsfn(2,)[]": 2,
+        }
+
+    def test_cached_stampede_coalesces_errors(self):
+        calls = []
+
+        @cached_stampede(lease=1)
+        async def fn():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            raise ValueError
+
+        async def scenario():
+            return await asyncio.gather(fn(), fn(), return_exceptions=True)
+
+        results = asyncio.run(scenario())
+        assert [type(result) for result in results] == [ValueError, ValueError]
+        assert calls == [1]
+
+    def test_cached_stampede_leader_cancelled(self):
+        calls = []
+
+        decorator = cached_stampede(lease=1)
+
+        @decorator
+        async def fn():
+            calls.append(1)
+            await asyncio.sleep(0.02)
+            return "value"
+
+        async def scenario():
+            leader = asyncio.ensure_future(fn())
+            await asyncio.sleep(0)
+            followers = [asyncio.ensure_future(fn()) for _ in range(3)]
+            await asyncio.sleep(0.005)
+            leader.cancel()
+            results = await asyncio.gather(leader, *followers, return_exceptions=True)
+            return results, decorator._inflight
+
+        results, inflight = asyncio.run(scenario())
+        assert isinstance(results[0], asyncio.CancelledError)
+        assert results[1:] == ["value"] * 3
+        assert calls == [1, 1]
+        assert inflight == {}
+
+    def test_cached_stampede_uses_async_lock(self):
+        lock = MagicMock(spec=RedLock)
+
+        @cached_stampede()
+        async def fn():
+            return "value"
+
+        with patch("pycached.decorators.RedLock", return_value=lock):
+            assert asyncio.run(fn()) == "value"
+        assert lock.__aenter__.call_count == 1
+        assert lock.__aexit__.call_count == 1
+        assert lock.__enter__.call_count == 0
+
+    def test_multi_cached_coroutine(self):
+        calls = []
+
+        @multi_cached("keys")
+        async def fn(keys=None):
+            calls.append(list(keys))
+            return {key: key.upper() for key in keys}
+
+        async def scenario():
+            first = await fn(keys=["a", "b"])
+            second = await fn(keys=["a", "b", "c"])
+            return first, second
+
+        assert isinstance(fn.cache, AsyncSimpleMemoryCache)
+        assert asyncio.run(scenario()) == ({"a": "A", "b": "B"}, {"a": "A", "b": "B", "c": "C"})
+        assert calls == [["a", "b"], ["c"]]
@@ -0,0 +1,254 @@
+import pytest
+
+from pycached.backends.memory import SimpleMemoryBackend
+from pycached.eviction import (
+    BasePolicy,
+    LRUPolicy,
+    TinyLFUPolicy,
+    GDSFPolicy,
+    CountMinSketch,
+    get_policy,
+)
+
+
+class TestBasePolicy:
+    @pytest.mark.parametrize("method", ["access", "remove"])
+    def test_not_implemented(self, method):
+        with pytest.raises(NotImplementedError):
+            getattr(BasePolicy(), method)(pytest.KEY)
+
+    def test_insert_not_implemented(self):
+        with pytest.raises(NotImplementedError):
+            BasePolicy().insert(pytest.KEY, 1)
+
+    def test_victim_not_implemented(self):
+        with pytest.raises(NotImplementedError):
+            BasePolicy().victim()
+
+    def test_miss_does_nothing(self):
+        assert BasePolicy().miss(pytest.KEY) is None
+
+
+class TestLRUPolicy:
+    def test_victim_is_least_recently_used(self):
+        policy = LRUPolicy()
+        policy.insert("a", 1)
+        policy.insert("b", 1)
+        assert policy.victim() == "a"
+        policy.access("a")
+        assert policy.victim() == "b"
+
+    def test_update_counts_as_access(self):
+        policy = LRUPolicy()
+        policy.insert("a", 1)
+        policy.insert("b", 1)
+        policy.update("a", 1)
+        assert policy.victim() == "b"
+
+    def test_remove(self):
+        policy = LRUPolicy()
+        policy.insert("a", 1)
+        policy.remove("a")
+        policy.remove("missing")
+        assert len(policy) == 0
+
+    def test_clear(self):
+        policy = LRUPolicy()
+        policy.insert("a", 1)
+        policy.clear()
+        assert len(policy) == 0
+
+
+class TestCountMinSketch:
+    def test_width_power_of_two(self):
+        assert CountMinSketch(100).width == 1024
+        assert CountMinSketch(64).width == 512
+        assert CountMinSketch(64).capacity == 64
+
+    def test_frequency(self):
+        sketch = CountMinSketch()
+        for _ in range(3):
+            sketch.increment("a")
+        assert sketch.frequency("a") == 3
+        assert sketch.frequency("b") <= 3
+
+    def test_saturates(self):
+        sketch = CountMinSketch()
+        for _ in range(20):
+            sketch.increment("a")
+        assert sketch.frequency("a") == CountMinSketch.MAX_COUNT
+
+    def test_ages(self):
+        sketch = CountMinSketch(capacity=1, sample_factor=8)
+        for _ in range(8):
+            sketch.increment("a")
+        assert sketch.frequency("a") == 4
+
+    def test_ensure_capacity(self):
+        sketch = CountMinSketch()
+        sketch.increment("a")
+        sketch.ensure_capacity(10)
+        assert sketch.capacity == 16
+        sketch.ensure_capacity(1000)
+        assert sketch.capacity == 1024
+        assert sketch.width == 8192
+        assert sketch.frequency("a") == 1
+
+
+class TestTinyLFUPolicy:
+    def test_window_overflows_to_probation(self):
+        policy = TinyLFUPolicy()
+        for key in "abc":
+            policy.insert(key, 1)
+        assert list(policy._window) == ["c"]
+        assert list(policy._probation) == ["a", "b"]
+
+    def test_access_promotes_to_protected(self):
+        policy = TinyLFUPolicy()
+        for key in "abc":
+            policy.insert(key, 1)
+        policy.access("a")
+        assert "a" in policy._protected
+        assert "a" not in policy._probation
+
+    def test_protected_demotes_to_probation(self):
+        policy = TinyLFUPolicy(protected=0.5)
+        for key in "abcde":
+            policy.insert(key, 1)
+        for key in "abc":
+            policy.access(key)
+        assert len(policy._protected) == 2
+        assert "a" in policy._probation
+
+    def test_candidate_loses_against_frequent_victim(self):
+        policy = TinyLFUPolicy()
+        for key in "abc":
+            policy.insert(key, 1)
+        for _ in range(5):
+            policy.miss("a")
+        assert policy.victim() == "b"
+
+    def test_frequent_candidate_wins(self):
+        policy = TinyLFUPolicy()
+        for key in "abc":
+            policy.insert(key, 1)
+        for _ in range(5):
+            policy.miss("b")
+        assert policy.victim() == "a"
+
+    def test_victim_without_probation(self):
+        policy = TinyLFUPolicy()
+        policy.insert("a", 1)
+        assert policy.victim() == "a"
+
+    def test_remove(self):
+        policy = TinyLFUPolicy()
+        for key in "abcd":
+            policy.insert(key, 1)
+        policy.access("a")
+        for key in "abcd":
+            policy.remove(key)
+        assert len(policy) == 0
+
+    def test_scan_resistant(self):
+        memory = SimpleMemoryBackend(max_entries=100, policy="tinylfu")
+        for _ in range(3):
+            for i in range(50):
+                memory._get("hot{}".format(i)) or memory._set("hot{}".format(i), i)
+        for i in range(1000):
+            memory._set("scan{}".format(i), i)
+        assert sum(memory._exists("hot{}".format(i)) for i in range(50)) == 50
+
+
+class TestGDSFPolicy:
+    def test_priority(self):
+        policy = GDSFPolicy()
+        policy.insert("a", 10, cost=2)
+        assert policy.priority("a") == 0.2
+        policy.access("a")
+        assert policy.priority("a") == 0.4
+
+    def test_victim_lowest_cost_per_byte(self):
+        policy = GDSFPolicy()
+        policy.insert("cheap", 100, cost=0.002)
+        policy.insert("expensive", 100, cost=4)
+        policy.insert("big", 1000000, cost=4)
+        assert policy.victim() == "big"
+        policy.remove("big")
+        assert policy.victim() == "cheap"
+
+    def test_frequency_counts(self):
+        policy = GDSFPolicy()
+        policy.insert("a", 10, cost=1)
+        policy.insert("b", 10, cost=1)
+        policy.access("a")
+        assert policy.victim() == "b"
+
+    def test_victim_advances_clock(self):
+        policy = GDSFPolicy()
+        policy.insert("a", 10, cost=1)
+        policy.victim()
+        assert policy.clock == 0.1
+        policy.remove("a")
+        policy.insert("b", 10, cost=1)
+        assert policy.priority("b") == pytest.approx(0.2)
+
+    def test_default_cost_is_average(self):
+        policy = GDSFPolicy()
+        policy.insert("a", 1, cost=1)
+        policy.insert("b", 1, cost=3)
+        policy.insert("c", 1)
+        assert policy.priority("c") == 2
+
+    def test_update_keeps_cost(self):
+        policy = GDSFPolicy()
+        policy.insert("a", 1, cost=3)
+        policy.update("a", 1)
+        assert policy.priority("a") == 6
+        policy.update("a", 2, cost=1)
+        assert policy.priority("a") == 1.5
+
+    def test_heap_compacted(self):
+        policy = GDSFPolicy()
+        policy.insert("a", 1, cost=1)
+        for _ in range(1000):
+            policy.access("a")
+        assert len(policy._heap) < 100
+
+    def test_keeps_expensive_results(self):
+        memory = SimpleMemoryBackend(max_entries=10, policy="gdsf")
+        for i in range(5):
+            memory._set("report{}".format(i), "x", _cost=4)
+        for i in range(100):
+            memory._set("lookup{}".format(i), "x", _cost=0.002)
+        assert all(memory._exists("report{}".format(i)) for i in range(5))
+
+    def test_clear(self):
+        policy = GDSFPolicy()
+        policy.insert("a", 1, cost=1)
+        policy.victim()
+        policy.clear()
+        assert len(policy) == 0
+        assert policy.clock == 0
+
+
+class TestGetPolicy:
+    def test_default(self):
+        assert isinstance(get_policy(), LRUPolicy)
+
+    @pytest.mark.parametrize(
+        "name, cls", [("lru", LRUPolicy), ("TinyLFU", TinyLFUPolicy), ("gdsf", GDSFPolicy)]
+    )
+    def test_by_name(self, name, cls):
+        assert isinstance(get_policy(name), cls)
+
+    def test_by_class(self):
+        assert isinstance(get_policy(TinyLFUPolicy), TinyLFUPolicy)
+
+    def test_instance(self):
+        policy = TinyLFUPolicy()
+        assert get_policy(policy) is policy
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            get_policy("random")
@@ -364,3 +364,18 @@ class TestCacheHandler:
 
         cache = caches.create("default")
         assert isinstance(cache.plugins[0], HitMissRatioPlugin)
+
+    def test_bounded_memory_config(self):
+        caches.set_config(
+            {
+                "default": {
+                    "cache": "pycached.SimpleMemoryCache",
+                    "max_entries": 100,
+                    "max_bytes": 1024,
+                }
+            }
+        )
+
+        cache = caches.get("default")
+        assert cache.max_entries == 100
+        assert cache.max_bytes == 1024
@@ -1,6 +1,9 @@
+import asyncio
+
 import pytest
 from unittest.mock import patch
 
+from pycached.aio import AsyncSimpleMemoryCache
 from pycached.lock import RedLock, OptimisticLock, OptimisticLockError
 
 
@@ -80,6 +83,66 @@ class TestRedLock:
         # assert event
 
 
+class TestRedLockAsync:
+    @pytest.fixture
+    def lock(self):
+        RedLock._EVENTS = {}
+        yield RedLock(AsyncSimpleMemoryCache(), pytest.KEY, 20)
+
+    def test_context_manager(self, lock):
+        async def scenario():
+            async with lock:
+                assert await lock.client._get(pytest.KEY + "-lock") == lock._value
+                assert pytest.KEY + "-lock" in lock._EVENTS
+            return await lock.client._exists(pytest.KEY + "-lock")
+
+        assert asyncio.run(scenario()) is False
+        assert pytest.KEY + "-lock" not in lock._EVENTS
+
+    def test_sync_client(self, mock_cache):
+        RedLock._EVENTS = {}
+        mock_cache._redlock_release.return_value = 1
+
+        async def scenario():
+            async with RedLock(mock_cache, pytest.KEY, 20):
+                pass
+
+        asyncio.run(scenario())
+        assert mock_cache._add.call_count == 1
+        assert pytest.KEY + "-lock" not in RedLock._EVENTS
+
+    def test_waits_without_blocking_loop(self, lock):
+        other = RedLock(lock.client, pytest.KEY, 1)
+        order = []
+
+        async def holder():
+            async with lock:
+                await asyncio.sleep(0.05)
+                order.append("holder")
+
+        async def waiter():
+            await asyncio.sleep(0.01)
+            async with other:
+                order.append("waiter")
+
+        async def scenario():
+            await asyncio.gather(holder(), waiter())
+
+        asyncio.run(scenario())
+        assert order == ["holder", "waiter"]
+
+    def test_wait_timeouts(self, lock):
+        lock.lease = 0.02
+
+        async def scenario():
+            await lock._async_acquire()
+            other = RedLock(lock.client, pytest.KEY, 0.02)
+            await other._async_acquire()
+            return other.lease
+
+        assert asyncio.run(scenario()) <= 0
+
+
 class TestOptimisticLock:
     @pytest.fixture
     def lock(self, mock_cache):
@@ -0,0 +1,243 @@
+import pytest
+
+from pycached import RouterCache, SimpleMemoryCache, cached, caches
+from pycached.lock import OptimisticLock, OptimisticLockError, RedLock
+from pycached.serializers import JsonSerializer, PickleSerializer
+from pycached.router import PrefixTrie
+
+
+class RecordingCache(SimpleMemoryCache):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.calls = []
+
+    def _multi_get(self, keys, _conn=None):
+        self.calls.append(("multi_get", keys))
+        return super()._multi_get(keys)
+
+    def _multi_set(self, pairs, *args, **kwargs):
+        self.calls.append(("multi_set", [key for key, _ in pairs]))
+        return super()._multi_set(pairs, *args, **kwargs)
+
+
+@pytest.fixture
+def sessions():
+    return RecordingCache(serializer=JsonSerializer())
+
+
+@pytest.fixture
+def users():
+    return RecordingCache(serializer=JsonSerializer())
+
+
+@pytest.fixture
+def fallback():
+    return RecordingCache(serializer=JsonSerializer())
+
+
+@pytest.fixture
+def router(sessions, users, fallback):
+    return RouterCache(
+        routes={"session:": sessions, "user:": users, "user:admin:": sessions},
+        fallback=fallback,
+    )
+
+
+class TestPrefixTrie:
+    def test_longest(self):
+        trie = PrefixTrie([("a", 1), ("abc", 2), ("b", 3)])
+        assert trie.longest("a") == 1
+        assert trie.longest("ab") == 1
+        assert trie.longest("abcd") == 2
+        assert trie.longest("b") == 3
+        assert trie.longest("c") is None
+        assert trie.longest("c", default=0) == 0
+
+    def test_empty_prefix(self):
+        trie = PrefixTrie([("", 0), ("a", 1)])
+        assert trie.longest("") == 0
+        assert trie.longest("b") == 0
+        assert trie.longest("a") == 1
+
+
+class TestRouterCache:
+    def test_setup(self, router, sessions, users, fallback):
+        assert router.routes == {
+            "session:": sessions, "user:": users, "user:admin:": sessions, "": fallback
+        }
+        assert router.caches == [sessions, users, fallback]
+        assert router.serializer is sessions.serializer
+
+    def test_setup_no_routes(self):
+        with pytest.raises(ValueError):
+            RouterCache()
+
+    def test_setup_from_config(self):
+        caches.set_config(
+            {
+                "default": {"cache": "pycached.SimpleMemoryCache"},
+                "router_default": {
+                    "cache": "pycached.RouterCache",
+                    "routes": {
+                        "session:": "router_sessions",
+                        "config:": {"cache": "pycached.SimpleMemoryCache"},
+                    },
+                    "fallback": {"cache": "pycached.SimpleMemoryCache"},
+                },
+                "router_sessions": {"cache": "pycached.SimpleMemoryCache"},
+            }
+        )
+        router = caches.get("router_default")
+        assert router.route("session:1") is caches.get("router_sessions")
+        assert router.route("config:1") is not router.route("other")
+
+    def test_route_longest_prefix(self, router, sessions, users, fallback):
+        assert router.route("session:1") is sessions
+        assert router.route("user:1") is users
+        assert router.route("user:admin:1") is sessions
+        assert router.route("other") is fallback
+
+    def test_route_by_namespace(self, router, users):
+        assert router.route("1", namespace="user") is users
+        router.set("1", "value", namespace="user")
+        assert users.get("1", namespace="user") == "value"
+        assert router.get("1", namespace="user") == "value"
+
+    def test_route_by_namespace_and_separator(self, router, sessions, users, fallback):
+        assert router.route("admin:1", namespace="user") is sessions
+        assert router.route("1", namespace="users_v2") is fallback
+        assert router.route("1", namespace="") is fallback
+
+    def test_bare_route_matches_longer_namespaces(self, sessions, fallback):
+        router = RouterCache(routes={"session": sessions}, fallback=fallback)
+        assert router.route("1", namespace="session") is sessions
+        assert router.route("1", namespace="sessions_v2") is sessions
+
+    def test_default_namespace(self, sessions, users):
+        router = RouterCache(routes={"session:": sessions, "user:": users}, namespace="user")
+        router.set("1", "value")
+        assert users.get("1", namespace="user") == "value"
+
+    def test_no_route(self, sessions):
+        router = RouterCache(routes={"session:": sessions})
+        with pytest.raises(KeyError):
+            router.get("other")
+
+    def test_set_get(self, router, sessions, users, fallback):
+        router.set("session:1", {"id": 1})
+        router.set("user:1", "user")
+        router.set("other", "value")
+        assert router.get("session:1") == {"id": 1}
+        assert sessions.get("session:1") == {"id": 1}
+        assert users.get("user:1") == "user"
+        assert fallback.get("other") == "value"
+        assert router.get("missing", default="default") == "default"
+
+    def test_add(self, router, sessions):
+        assert router.add("session:1", "value") is True
+        with pytest.raises(ValueError):
+            router.add("session:1", "value")
+        assert sessions.exists("session:1")
+
+    def test_delete_exists_expire_increment(self, router, users):
+        router.set("user:1", 1)
+        assert router.exists("user:1") is True
+        assert router.increment("user:1", 2) == 3
+        assert router.expire("user:1", 10) is True
+        assert router.delete("user:1") == 1
+        assert router.exists("user:1") is False
+
+    def test_multi_get_in_order(self, router):
+        keys = ["session:1", "user:1", "other", "user:admin:1", "user:2"]
+        router.multi_set([(key, index) for index, key in enumerate(keys)])
+        assert router.multi_get(keys[::-1] + ["missing"]) == list(range(5))[::-1] + [None]
+
+    def test_multi_commands_one_call_per_cache(self, router, sessions, users, fallback):
+        keys = ["session:1", "user:1", "other", "user:admin:1", "user:2"]
+        router.multi_set([(key, 1) for key in keys])
+        router.multi_get(keys)
+        assert sessions.calls == [
+            ("multi_set", ["session:1", "user:admin:1"]),
+            ("multi_get", ["session:1", "user:admin:1"]),
+        ]
+        assert users.calls == [
+            ("multi_set", ["user:1", "user:2"]), ("multi_get", ["user:1", "user:2"])
+        ]
+        assert fallback.calls == [("multi_set", ["other"]), ("multi_get", ["other"])]
+
+    def test_clear(self, router, sessions, users, fallback):
+        router.multi_set([("session:1", 1), ("user:1", 1), ("other", 1)])
+        router.clear()
+        assert sessions.size() == users.size() == fallback.size() == 0
+
+    def test_clear_namespace(self, router, sessions, users, fallback):
+        router.multi_set([("1", 1)], namespace="user")
+        router.multi_set([("1", 1)], namespace="session")
+        router.set("other", 1)
+        router.clear(namespace="user")
+        assert users.size() == 0
+        assert sessions.size() == fallback.size() == 1
+
+    def test_clear_namespace_with_longer_routes(self, router, sessions, users):
+        router.set("admin:1", 1, namespace="user")
+        router.set("1", 1, namespace="user")
+        router.set("session:1", 1)
+        router.clear(namespace="user")
+        assert users.size() == 0
+        assert list(sessions.keys()) == ["session:1"]
+
+    def test_raw(self, router):
+        router.set("session:1", "value")
+        assert router.raw("get", "session:1") == '"value"'
+        with pytest.raises(ValueError):
+            router.raw("keys")
+
+    def test_serializer(self, sessions, users):
+        router = RouterCache(routes={"session:": sessions}, serializer=PickleSerializer())
+        router.set("session:1", {1, 2})
+        assert router.get("session:1") == {1, 2}
+        assert isinstance(sessions._get("session:1"), bytes)
+
+    def test_cached(self):
+        caches.set_config(
+            {
+                "default": {"cache": "pycached.SimpleMemoryCache"},
+                "router_cached": {
+                    "cache": "pycached.RouterCache",
+                    "routes": {"config:": "router_config"},
+                    "fallback": {"cache": "pycached.SimpleMemoryCache"},
+                },
+                "router_config": {"cache": "pycached.SimpleMemoryCache"},
+            }
+        )
+
+        @cached(alias="router_cached", key="config:feature")
+        def feature():
+            return "on"
+
+        assert feature() == "on"
+        assert caches.get("router_config").get("config:feature") == "on"
+
+    def test_optimistic_lock(self, router):
+        router.set("user:1", "value")
+        with OptimisticLock(router, "user:1") as lock:
+            lock.cas("new")
+        assert router.get("user:1") == "new"
+
+        with pytest.raises(OptimisticLockError):
+            with OptimisticLock(router, "user:1") as lock:
+                router.set("user:1", "other")
+                lock.cas("new")
+
+    def test_redlock(self, router, users):
+        RedLock._EVENTS = {}
+        with RedLock(router, "user:1", 10):
+            assert users.exists("user:1-lock")
+        assert not users.exists("user:1-lock")
+
+    def test_close(self, mocker, router, sessions, users, fallback):
+        for cache in (sessions, users, fallback):
+            mocker.spy(cache, "close")
+        router.close()
+        assert sessions.close.call_count == users.close.call_count == 1
+        assert fallback.close.call_count == 1
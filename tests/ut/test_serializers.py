@@ -37,6 +37,20 @@ class TestBaseSerializer:
         with pytest.raises(NotImplementedError):
             BaseSerializer().loads("")
 
+    @pytest.mark.parametrize(
+        "serializer, data_type",
+        [
+            (BaseSerializer, str),
+            (NullSerializer, None),
+            (StringSerializer, str),
+            (JsonSerializer, str),
+            (PickleSerializer, bytes),
+            (MsgPackSerializer, bytes),
+        ],
+    )
+    def test_data_type(self, serializer, data_type):
+        assert serializer.DATA_TYPE is data_type
+
 
 class TestNullSerializer:
     def test_init(self):
@@ -92,6 +106,10 @@ class TestPickleSerializer:
     def test_loads_with_none(self):
         assert PickleSerializer().loads(None) is None
 
+    def test_loads_memoryview(self):
+        serializer = PickleSerializer()
+        assert serializer.loads(memoryview(serializer.dumps("hi"))) == "hi"
+
     def test_dumps_and_loads(self):
         obj = Dummy(1, 2)
         serializer = PickleSerializer()
@@ -0,0 +1,286 @@
+import threading
+from collections import Counter
+from unittest.mock import patch
+
+import pytest
+
+from pycached import RedisCache, ShardedCache, SimpleMemoryCache, caches
+from pycached.lock import OptimisticLock, OptimisticLockError, RedLock
+from pycached.serializers import JsonSerializer, PickleSerializer
+from pycached.sharded import HashRing
+
+
+class FailingCache(SimpleMemoryCache):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.failing = False
+        self.calls = []
+
+    def _check(self, command):
+        self.calls.append((command, threading.current_thread().name))
+        if self.failing:
+            raise ConnectionError("down")
+
+    def _get(self, key, _conn=None):
+        self._check("get")
+        return super()._get(key)
+
+    def _multi_get(self, keys, _conn=None):
+        self._check("multi_get")
+        return super()._multi_get(keys)
+
+    def _set(self, key, value, *args, **kwargs):
+        self._check("set")
+        return super()._set(key, value, *args, **kwargs)
+
+    def _multi_set(self, pairs, *args, **kwargs):
+        self._check("multi_set")
+        return super()._multi_set(pairs, *args, **kwargs)
+
+
+@pytest.fixture
+def shards():
+    return [FailingCache(serializer=JsonSerializer()) for _ in range(3)]
+
+
+@pytest.fixture
+def sharded(shards):
+    cache = ShardedCache(shards, retry_timeout=10)
+    yield cache
+    cache.close()
+
+
+def owner(sharded, key):
+    return sharded.shards[sharded.ring.get(key)]
+
+
+class TestHashRing:
+    def test_get_empty(self):
+        assert HashRing().get("key") is None
+
+    def test_points(self):
+        ring = HashRing(["a", "b"], vnodes=160)
+        points, owners = ring._ring
+        assert len(points) == 320
+        assert points == sorted(points)
+        assert Counter(owners) == {"a": 160, "b": 160}
+        assert "a" in ring and len(ring) == 2
+
+    def test_get_deterministic(self):
+        keys = ["key-{}".format(i) for i in range(100)]
+        assert [HashRing(["a", "b", "c"]).get(key) for key in keys] == [
+            HashRing(["c", "b", "a"]).get(key) for key in keys
+        ]
+
+    def test_balanced(self):
+        ring = HashRing(["a", "b", "c", "d"])
+        counts = Counter(ring.get("key-{}".format(i)) for i in range(10000))
+        assert min(counts.values()) > 1500
+
+    def test_remove_only_moves_its_keys(self):
+        ring = HashRing(["a", "b", "c", "d"])
+        keys = ["key-{}".format(i) for i in range(2000)]
+        before = {key: ring.get(key) for key in keys}
+        ring.remove("b")
+        after = {key: ring.get(key) for key in keys}
+        assert "b" not in after.values()
+        assert all(after[key] == node for key, node in before.items() if node != "b")
+        ring.add("b")
+        assert {key: ring.get(key) for key in keys} == before
+
+
+class TestShardedCache:
+    def test_setup(self, sharded, shards):
+        assert list(sharded.shards.values()) == shards
+        assert list(sharded.shards) == ["shard-0", "shard-1", "shard-2"]
+        assert sharded.serializer is shards[0].serializer
+        assert sharded.max_workers == 3
+        assert sharded.down == []
+
+    def test_setup_no_shards(self):
+        with pytest.raises(ValueError):
+            ShardedCache([])
+
+    def test_setup_names_from_endpoint(self):
+        sharded = ShardedCache(
+            [RedisCache(endpoint="10.0.0.1"), RedisCache(endpoint="10.0.0.2"), RedisCache()]
+        )
+        assert list(sharded.shards) == ["10.0.0.1:6379", "10.0.0.2:6379", "127.0.0.1:6379"]
+
+    def test_setup_duplicated_names(self):
+        sharded = ShardedCache([RedisCache(), RedisCache()])
+        assert list(sharded.shards) == ["127.0.0.1:6379", "127.0.0.1:6379#1"]
+
+    def test_setup_from_config(self):
+        caches.set_config(
+            {
+                "default": {
+                    "cache": "pycached.ShardedCache",
+                    "shards": [
+                        {"cache": "pycached.SimpleMemoryCache"},
+                        {"cache": "pycached.SimpleMemoryCache"},
+                        "other",
+                    ],
+                    "vnodes": "40",
+                    "retry_timeout": "5",
+                },
+                "other": {"cache": "pycached.SimpleMemoryCache"},
+            }
+        )
+        sharded = caches.get("default")
+        assert len(sharded.shards) == 3
+        assert sharded.shards["shard-2"] is caches.get("other")
+        assert len(sharded.ring._ring[0]) == 120
+        assert sharded.retry_timeout == 5
+
+    def test_set_get(self, sharded):
+        for i in range(30):
+            sharded.set("key-{}".format(i), {"i": i})
+        assert [sharded.get("key-{}".format(i)) for i in range(30)] == [
+            {"i": i} for i in range(30)
+        ]
+        assert all(shard.size() > 0 for shard in sharded.shards.values())
+        assert owner(sharded, "key-1").get("key-1") == {"i": 1}
+
+    def test_namespace_in_ring_key(self, sharded):
+        sharded.set(pytest.KEY, "value", namespace="ns:")
+        assert owner(sharded, "ns:" + pytest.KEY).get(pytest.KEY, namespace="ns:") == "value"
+
+    def test_get_default(self, sharded):
+        assert sharded.get(pytest.KEY, default="default") == "default"
+
+    def test_multi_get_in_order(self, sharded):
+        keys = ["key-{}".format(i) for i in range(20)]
+        sharded.multi_set([(key, index) for index, key in enumerate(keys)])
+        assert sharded.multi_get(keys[::-1] + ["missing"]) == list(range(20))[::-1] + [None]
+
+    def test_multi_commands_one_call_per_shard(self, sharded):
+        keys = ["key-{}".format(i) for i in range(20)]
+        sharded.multi_set([(key, 1) for key in keys])
+        sharded.multi_get(keys)
+        for shard in sharded.shards.values():
+            commands = [command for command, _ in shard.calls]
+            assert commands == ["multi_set", "multi_get"]
+
+    def test_multi_commands_in_thread_pool(self, sharded):
+        sharded.multi_get(["key-{}".format(i) for i in range(20)])
+        threads = {thread for shard in sharded.shards.values() for _, thread in shard.calls}
+        assert all(thread.startswith("pycached-shards") for thread in threads)
+
+    def test_multi_commands_single_shard_inline(self):
+        shard = FailingCache()
+        sharded = ShardedCache([shard])
+        sharded.multi_get(["a", "b"])
+        assert shard.calls == [("multi_get", threading.current_thread().name)]
+        assert sharded._executor is None
+
+    def test_add(self, sharded):
+        assert sharded.add(pytest.KEY, "value") is True
+        with pytest.raises(ValueError):
+            sharded.add(pytest.KEY, "value")
+        assert sharded.down == []
+
+    def test_delete_exists_expire_increment(self, sharded):
+        sharded.set(pytest.KEY, 1)
+        assert sharded.exists(pytest.KEY) is True
+        assert sharded.increment(pytest.KEY, 2) == 3
+        assert sharded.expire(pytest.KEY, 10) is True
+        assert sharded.delete(pytest.KEY) == 1
+        assert sharded.exists(pytest.KEY) is False
+
+    def test_clear(self, sharded):
+        sharded.multi_set([("key-{}".format(i), i) for i in range(20)])
+        sharded.clear()
+        assert all(shard.size() == 0 for shard in sharded.shards.values())
+
+    def test_raw(self, sharded):
+        sharded.set(pytest.KEY, "value")
+        assert sharded.raw("get", pytest.KEY) == '"value"'
+        with pytest.raises(ValueError):
+            sharded.raw("keys")
+
+    def test_serializer(self, shards):
+        sharded = ShardedCache(shards, serializer=PickleSerializer())
+        sharded.set(pytest.KEY, {1, 2})
+        assert sharded.get(pytest.KEY) == {1, 2}
+        assert isinstance(owner(sharded, pytest.KEY)._get(pytest.KEY), bytes)
+
+    def test_failed_shard_removed(self, sharded):
+        failed = sharded.ring.get(pytest.KEY)
+        sharded.set(pytest.KEY, "value")
+        sharded.shards[failed].failing = True
+
+        assert sharded.get(pytest.KEY) is None
+        assert sharded.down == [failed]
+        assert failed not in sharded.ring
+        sharded.set(pytest.KEY, "new")
+        assert sharded.get(pytest.KEY) == "new"
+
+    def test_failed_shard_minimal_remapping(self, sharded):
+        keys = ["key-{}".format(i) for i in range(300)]
+        before = {key: sharded.ring.get(key) for key in keys}
+        failed = before[keys[0]]
+        sharded.shards[failed].failing = True
+        sharded.get(keys[0])
+        after = {key: sharded.ring.get(key) for key in keys}
+        assert all(after[key] == name for key, name in before.items() if name != failed)
+
+    def test_failed_shard_multi_commands_rerouted(self, sharded):
+        keys = ["key-{}".format(i) for i in range(30)]
+        failed = sharded.ring.get(keys[0])
+        sharded.shards[failed].failing = True
+
+        sharded.multi_set([(key, key) for key in keys])
+        assert sharded.down == [failed]
+        assert sharded.multi_get(keys) == keys
+
+    def test_failed_shard_back_after_retry_timeout(self, sharded):
+        failed = sharded.ring.get(pytest.KEY)
+        sharded.shards[failed].failing = True
+        with patch("pycached.sharded.time.monotonic", return_value=100):
+            sharded.get(pytest.KEY)
+        sharded.shards[failed].failing = False
+        with patch("pycached.sharded.time.monotonic", return_value=109):
+            sharded.get(pytest.KEY)
+            assert sharded.down == [failed]
+        with patch("pycached.sharded.time.monotonic", return_value=111):
+            sharded.get(pytest.KEY)
+            assert sharded.down == []
+        assert sharded.ring.get(pytest.KEY) == failed
+
+    def test_all_shards_down(self, sharded):
+        for shard in sharded.shards.values():
+            shard.failing = True
+        with pytest.raises(ConnectionError):
+            sharded.get(pytest.KEY)
+        with pytest.raises(ConnectionError):
+            sharded.multi_get([pytest.KEY])
+
+    def test_other_errors_not_failures(self, sharded):
+        with patch.object(FailingCache, "_get", side_effect=TypeError):
+            with pytest.raises(TypeError):
+                sharded.get(pytest.KEY)
+        assert sharded.down == []
+
+    def test_optimistic_lock(self, sharded):
+        sharded.set(pytest.KEY, "value")
+        with OptimisticLock(sharded, pytest.KEY) as lock:
+            lock.cas("new")
+        assert sharded.get(pytest.KEY) == "new"
+
+        with pytest.raises(OptimisticLockError):
+            with OptimisticLock(sharded, pytest.KEY) as lock:
+                sharded.set(pytest.KEY, "other")
+                lock.cas("new")
+
+    def test_redlock(self, sharded):
+        RedLock._EVENTS = {}
+        with RedLock(sharded, pytest.KEY, 10):
+            shard = owner(sharded, pytest.KEY + "-lock")
+            assert shard.exists(pytest.KEY + "-lock")
+        assert not shard.exists(pytest.KEY + "-lock")
+
+    def test_close(self, sharded):
+        sharded.multi_get(["key-{}".format(i) for i in range(20)])
+        sharded.close()
+        assert sharded._executor is None
@@ -0,0 +1,232 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from pycached import RedisCache, SimpleMemoryCache, TieredCache, caches
+from pycached.lock import OptimisticLock, OptimisticLockError
+from pycached.serializers import JsonSerializer, PickleSerializer
+
+
+@pytest.fixture
+def l1():
+    return SimpleMemoryCache(serializer=JsonSerializer())
+
+
+@pytest.fixture
+def l2():
+    return SimpleMemoryCache(serializer=JsonSerializer())
+
+
+@pytest.fixture
+def tiered(l1, l2):
+    return TieredCache([l1, l2], backfill_ttl=10)
+
+
+def raw(cache, key):
+    return cache._get(cache.build_key(key))
+
+
+class TestTieredCache:
+    def test_setup(self, tiered, l1, l2):
+        assert tiered.tiers == [l1, l2]
+        assert tiered.write == "through"
+        assert tiered.backfill_ttl == 10
+        assert tiered.serializer is l1.serializer
+        assert tiered.shared_serializer is True
+
+    def test_setup_no_tiers(self):
+        with pytest.raises(ValueError):
+            TieredCache([])
+
+    def test_setup_invalid_write(self, l1):
+        with pytest.raises(ValueError):
+            TieredCache([l1], write="back")
+
+    def test_setup_from_config(self):
+        caches.set_config(
+            {
+                "default": {
+                    "cache": "pycached.TieredCache",
+                    "tiers": [
+                        {"cache": "pycached.SimpleMemoryCache", "max_entries": 10},
+                        "l2",
+                    ],
+                    "write": "around",
+                    "backfill_ttl": "5",
+                },
+                "l2": {
+                    "cache": "pycached.SimpleMemoryCache",
+                    "serializer": {"class": "pycached.serializers.PickleSerializer"},
+                },
+            }
+        )
+        tiered = caches.get("default")
+        assert isinstance(tiered, TieredCache)
+        assert tiered.tiers[0].max_entries == 10
+        assert tiered.tiers[1] is caches.get("l2")
+        assert tiered.write == "around"
+        assert tiered.backfill_ttl == 5
+        assert type(tiered.backfill_ttl) is int
+
+    def test_set_through(self, tiered, l1, l2, mocker):
+        mocker.spy(tiered.serializer, "dumps")
+        assert tiered.set(pytest.KEY, {"a": 1}) is True
+        assert raw(l1, pytest.KEY) == raw(l2, pytest.KEY) == '{"a": 1}'
+        assert tiered.serializer.dumps.call_count == 1
+
+    def test_set_around(self, l1, l2):
+        tiered = TieredCache([l1, l2], write="around")
+        l1.set(pytest.KEY, "old")
+        tiered.set(pytest.KEY, "new")
+        assert raw(l1, pytest.KEY) is None
+        assert l2.get(pytest.KEY) == "new"
+
+    def test_get_backfills(self, tiered, l1, l2, mocker):
+        l2.set(pytest.KEY, {"a": 1})
+        mocker.spy(l1, "_set")
+        assert tiered.get(pytest.KEY) == {"a": 1}
+        l1._set.assert_called_once_with(pytest.KEY, '{"a": 1}', ttl=10, _cas_token=None,
+                                        _conn=None)
+        assert l1.get(pytest.KEY) == {"a": 1}
+
+    def test_get_backfills_redis_int_ttl(self, l2):
+        redis = RedisCache()
+        client = MagicMock()
+        client.get.return_value = None
+        redis._pool = client
+        tiered = TieredCache([redis, l2])
+        l2.set(pytest.KEY, "value")
+        assert tiered.get(pytest.KEY) == "value"
+        client.setex.assert_called_once_with(pytest.KEY, 60, '"value"')
+        assert type(client.setex.call_args[0][1]) is int
+
+    def test_float_backfill_ttl(self, l1, l2):
+        assert TieredCache([l1, l2], backfill_ttl="0.5").backfill_ttl == 0.5
+
+    def test_get_backfill_errors_ignored(self, tiered, l1, l2, mocker):
+        mocker.patch.object(l1, "_set", side_effect=ConnectionError)
+        mocker.patch.object(l1, "_multi_set", side_effect=ConnectionError)
+        l2.set(pytest.KEY, "value")
+        assert tiered.get(pytest.KEY) == "value"
+        assert tiered.multi_get([pytest.KEY]) == ["value"]
+
+    def test_get_stops_at_first_hit(self, tiered, l1, l2, mocker):
+        l1.set(pytest.KEY, "value")
+        mocker.spy(l2, "get")
+        assert tiered.get(pytest.KEY) == "value"
+        assert l2.get.call_count == 0
+
+    def test_get_missing(self, tiered):
+        assert tiered.get(pytest.KEY, default="default") == "default"
+
+    def test_get_namespace(self, tiered, l1, l2):
+        l2.set(pytest.KEY, "value", namespace="ns:")
+        assert tiered.get(pytest.KEY, namespace="ns:") == "value"
+        assert l1.get(pytest.KEY, namespace="ns:") == "value"
+        assert tiered.get(pytest.KEY) is None
+
+    def test_multi_get_one_call_per_tier(self, tiered, l1, l2, mocker):
+        l1.set("a", 1)
+        l2.multi_set([("b", 2), ("c", 3)])
+        mocker.spy(l1, "multi_get")
+        mocker.spy(l2, "multi_get")
+        mocker.spy(l1, "multi_set")
+        assert tiered.multi_get(["a", "b", "missing", "c"]) == [1, 2, None, 3]
+        assert l1.multi_get.call_args[0][0] == ["a", "b", "missing", "c"]
+        assert l2.multi_get.call_args[0][0] == ["b", "missing", "c"]
+        assert l1.multi_set.call_count == 1
+        assert l1.multi_set.call_args[0][0] == [("b", "2"), ("c", "3")]
+        assert l1.multi_get(["b", "c"]) == [2, 3]
+
+    def test_multi_get_all_hits(self, tiered, l1, l2, mocker):
+        l1.multi_set([("a", 1), ("b", 2)])
+        mocker.spy(l2, "multi_get")
+        assert tiered.multi_get(["a", "b"]) == [1, 2]
+        assert l2.multi_get.call_count == 0
+
+    def test_multi_set(self, tiered, l1, l2):
+        tiered.multi_set([("a", 1), ("b", 2)], ttl=5)
+        assert l1.multi_get(["a", "b"]) == l2.multi_get(["a", "b"]) == [1, 2]
+
+    def test_multi_set_around(self, l1, l2):
+        tiered = TieredCache([l1, l2], write="around")
+        l1.set("a", 0)
+        tiered.multi_set([("a", 1), ("b", 2)])
+        assert l1.multi_get(["a", "b"]) == [None, None]
+        assert l2.multi_get(["a", "b"]) == [1, 2]
+
+    def test_different_serializers(self, l1):
+        l2 = SimpleMemoryCache(serializer=PickleSerializer())
+        tiered = TieredCache([l1, l2])
+        assert tiered.shared_serializer is False
+        l2.set(pytest.KEY, {"a": 1})
+        assert tiered.get(pytest.KEY) == {"a": 1}
+        assert raw(l1, pytest.KEY) == '{"a": 1}'
+        tiered.multi_set([("b", [1])])
+        assert raw(l1, "b") == "[1]"
+        assert l2.get("b") == [1]
+
+    def test_add(self, tiered, l1, l2):
+        assert tiered.add(pytest.KEY, "value") is True
+        assert l1.get(pytest.KEY) == l2.get(pytest.KEY) == "value"
+
+    def test_add_existing(self, tiered, l1, l2):
+        l2.set(pytest.KEY, "value")
+        with pytest.raises(ValueError):
+            tiered.add(pytest.KEY, "other")
+        assert l1.get(pytest.KEY) is None
+
+    def test_increment(self, tiered, l1, l2):
+        tiered.set(pytest.KEY, 1)
+        assert tiered.increment(pytest.KEY, 2) == 3
+        assert raw(l1, pytest.KEY) is None
+        assert raw(l2, pytest.KEY) == 3
+
+    def test_delete(self, tiered, l1, l2):
+        tiered.set(pytest.KEY, "value")
+        assert tiered.delete(pytest.KEY) == 1
+        assert not l1.exists(pytest.KEY)
+        assert not l2.exists(pytest.KEY)
+
+    def test_exists(self, tiered, l2):
+        assert tiered.exists(pytest.KEY) is False
+        l2.set(pytest.KEY, "value")
+        assert tiered.exists(pytest.KEY) is True
+
+    def test_expire(self, tiered, l1, l2, mocker):
+        tiered.set(pytest.KEY, "value")
+        mocker.spy(l1, "expire")
+        mocker.spy(l2, "expire")
+        assert tiered.expire(pytest.KEY, 1) is True
+        l1.expire.assert_called_once_with(pytest.KEY, 1, namespace=None)
+        l2.expire.assert_called_once_with(pytest.KEY, 1, namespace=None)
+
+    def test_clear(self, tiered, l1, l2):
+        tiered.multi_set([("a", 1), ("b", 2)])
+        assert tiered.clear() is True
+        assert l1.multi_get(["a", "b"]) == l2.multi_get(["a", "b"]) == [None, None]
+
+    def test_close(self, tiered, l1, l2, mocker):
+        mocker.spy(l1, "close")
+        mocker.spy(l2, "close")
+        tiered.close()
+        assert l1.close.call_count == l2.close.call_count == 1
+
+    def test_disabled(self, tiered, monkeypatch):
+        tiered.set(pytest.KEY, "value")
+        monkeypatch.setenv("CACHE_DISABLE", "1")
+        assert tiered.get(pytest.KEY) is None
+
+    def test_optimistic_lock(self, tiered, l1, l2):
+        tiered.set(pytest.KEY, "value")
+        with OptimisticLock(tiered, pytest.KEY) as lock:
+            lock.cas("new")
+        assert raw(l1, pytest.KEY) is None
+        assert tiered.get(pytest.KEY) == "new"
+
+    def test_optimistic_lock_conflict(self, tiered, l2):
+        tiered.set(pytest.KEY, "value")
+        with pytest.raises(OptimisticLockError):
+            with OptimisticLock(tiered, pytest.KEY) as lock:
+                l2.set(pytest.KEY, "other")
+                lock.cas("new")